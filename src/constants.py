@@ -6,11 +6,77 @@ ENVIRONMENT = os.getenv("ENVIRONMENT", "dev")
 
 class MongoLockContants(object):
     """Constants for MongoDB lock."""
-    LOCK_DURATION_IN_SECONDS = 1
-    WAIT_SLEEP_DURATION = 0.1
-    MAX_WAIT_TIMEOUT_IN_SECONDS = 3
+    # Held locks are renewed by a heartbeat, so this only bounds how long the lock of a crashed holder lasts
+    LOCK_DURATION_IN_SECONDS = 15
+    MAX_WAIT_TIMEOUT_IN_SECONDS = 60
+    BACKOFF_BASE_DELAY_IN_SECONDS = 0.05
+    BACKOFF_MAX_DELAY_IN_SECONDS = 2
 
 
 class PathConstants(object):
     """Constants for path."""
     COLLECTION_PREFIX = "Collections"
+
+
+class CacheInvalidationConstants(object):
+    """Constants for cache invalidation."""
+    POLL_INTERVAL_IN_SECONDS = 5
+    RETRY_DELAY_IN_SECONDS = 30
+
+
+class CollectionDataCacheConstants(object):
+    """Constants for the in-process cache of the collection data given to the LLM."""
+    # Bounds the memory used by the cached data, whatever the size of each collection
+    MAX_SIZE_IN_BYTES = 256 * 1024 * 1024
+    TTL_IN_SECONDS = 86400
+
+
+class SharedCacheConstants(object):
+    """Constants for the cache shared across instances."""
+    # Entries are keyed by the version of the data they are built from, so the TTL only bounds memory use
+    DEFAULT_TTL_IN_SECONDS = 86400
+    IN_MEMORY_MAX_ENTRIES = 1000
+    # A slow or unreachable cache falls back to rebuilding the entry rather than holding up the query
+    SOCKET_TIMEOUT_IN_SECONDS = 1
+
+
+class ContextPruningConstants(object):
+    """Constants for the question-aware pruning of the collection data given to the LLM."""
+    DEFAULT_MAX_FIELDS = 20
+    DEFAULT_MAX_LEASES = 50
+    # Roughly 50k tokens of serialized JSON
+    DEFAULT_MAX_SIZE_IN_BYTES = 200_000
+
+
+class ContextBudgetConstants(object):
+    """Constants for fitting the collection data given to the LLM in a token budget."""
+    # The encoding of the gpt-4o and o-series models, used for models tiktoken does not know
+    DEFAULT_ENCODING = "o200k_base"
+    # Used when tiktoken or its encoding files are not available. JSON is denser in tokens than prose, so this
+    # overestimates rather than underestimates
+    APPROXIMATE_CHARACTERS_PER_TOKEN = 3
+    # The role and separators each chat message is wrapped in
+    TOKENS_PER_MESSAGE = 4
+
+
+class AsyncIoConstants(object):
+    """Constants for running blocking I/O from async code."""
+    # Matches the default connection pool size of pymongo, so waiting threads do not queue on connections
+    MAX_BLOCKING_IO_THREADS = 100
+
+
+class BlobStorageConstants(object):
+    """Constants for blob storage transfers."""
+    # Parallel connections used to transfer the blocks or ranges of a single large blob
+    MAX_CONCURRENCY = 4
+    # Blobs transferred at the same time by the async client
+    CONCURRENT_TRANSFERS = 10
+    # Blobs stored gzip-compressed, with a gzip Content-Encoding, once larger than the minimum size
+    COMPRESSED_EXTENSIONS = (".md",)
+    COMPRESSION_MIN_SIZE_IN_BYTES = 1024
+
+
+class IngestionConstants(object):
+    """Constants for document ingestion."""
+    # Worker slots ingesting in parallel per instance; each collection is always processed by the same slot
+    WORKER_SLOTS = 8
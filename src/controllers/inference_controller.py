@@ -1,4 +1,5 @@
 import logging
+from typing import Optional
 
 from pydantic import ValidationError
 
@@ -6,7 +7,11 @@ from services.ingest_config_management_service import IngestConfigManagementServ
 from services.ingest_lease_documents_service import IngestionCollectionDocumentService
 from services.llm_request_manager import LlmRequestManager
 from services.collection_kernel_plugin import CollectionPlugin
+from services.collection_context_store import CollectionContextStore
+from services.context_packer import ContextPacker
+from services.context_pruner import CollectionContextPruner
 from services.cosmos_chat_history import CosmosChatHistory
+from services.shared_cache import SharedCache
 from utils.document_utils import build_config_id
 from models import HTTPError
 from models.api.v1 import QueryRequest, QueryResponse
@@ -17,13 +22,21 @@ class InferenceController(object):
     _config_management_service: IngestConfigManagementService
     _chat_history: CosmosChatHistory
     _document_service: IngestionCollectionDocumentService
+    _shared_cache: Optional[SharedCache]
+    _context_store: Optional[CollectionContextStore]
+    _context_pruner: Optional[CollectionContextPruner]
+    _context_packer: Optional[ContextPacker]
 
     def __init__(
         self,
         llm_request_manager: LlmRequestManager,
         config_management_service: IngestConfigManagementService,
         chat_history: CosmosChatHistory,
-        document_service: IngestionCollectionDocumentService
+        document_service: IngestionCollectionDocumentService,
+        shared_cache: Optional[SharedCache] = None,
+        context_store: Optional[CollectionContextStore] = None,
+        context_pruner: Optional[CollectionContextPruner] = None,
+        context_packer: Optional[ContextPacker] = None
     ):
         """Initializes the Inference Controller.
 
@@ -34,11 +47,21 @@ class InferenceController(object):
             chat_history (CosmosChatHistory): The chat history service.
             document_service (IngestionCollectionDocumentService):
                 The service to manage collection documents ingested using Content Understanding.
+            shared_cache (Optional[SharedCache]): The cache of collection data shared across instances.
+            context_store (Optional[CollectionContextStore]): The store of the LLM context serialized at ingest
+                time.
+            context_pruner (Optional[CollectionContextPruner]): Prunes the collection data to what is relevant to
+                the question.
+            context_packer (Optional[ContextPacker]): Fits the collection data in the tokens left by the prompt.
         """
         self._llm_request_manager = llm_request_manager
         self._config_management_service = config_management_service
         self._chat_history = chat_history
         self._document_service = document_service
+        self._shared_cache = shared_cache
+        self._context_store = context_store
+        self._context_pruner = context_pruner
+        self._context_packer = context_packer
 
     async def query(
         self,
@@ -60,27 +83,49 @@ class InferenceController(object):
         """
         logging.info(f"Querying with config: {config_name}; version: {config_version}")
         config_id = build_config_id(config_name, config_version)
-        config = self._config_management_service.load_config(config_id)
+        config = await self._config_management_service.load_config_async(config_id)
 
         if not config:
             raise HTTPError("Configuration not found.", 404)
 
-        collection_plugin = CollectionPlugin(config, self._document_service)
-        self._chat_history.read_messages(query_request.sid, user_id)
+        await self._chat_history.read_messages_async(query_request.sid, user_id)
         if self._chat_history.user_message_limit_exceeded:
             raise HTTPError("User message limit exceeded.", 400)
 
+        prompt_tokens = 0
+        if self._context_packer is not None:
+            prompt_tokens = self._context_packer.count_prompt_tokens(
+                config.prompt,
+                query_request.query,
+                self._chat_history.messages or [],
+                self._llm_request_manager.get_collection_question_definitions()
+            )
+        collection_plugin = CollectionPlugin(
+            config,
+            self._document_service,
+            self._shared_cache,
+            self._context_store,
+            self._context_pruner,
+            query_request.query,
+            self._context_packer,
+            prompt_tokens
+        )
+
         result = await self._llm_request_manager.answer_collection_question(
             config.prompt,
             query_request.query,
             collection_plugin,
             self._chat_history,
         )
-        self._chat_history.store_messages(query_request.sid, user_id)
+        await self._chat_history.store_messages_async(query_request.sid, user_id)
 
         try:
             output = QueryResponse.model_validate_json(result)
         except ValidationError:
             raise HTTPError(f"Invalid JSON for QueryResponse: {result}", 500)
 
+        if self._context_packer is not None and output.metrics is not None:
+            output.metrics.context_tokens = collection_plugin.context_tokens
+            output.metrics.truncated_context_values = collection_plugin.truncated_context_values
+
         return output
@@ -6,8 +6,8 @@ from services.azure_content_understanding_client import AzureContentUnderstandin
 from services.ingest_lease_documents_service import IngestionCollectionDocumentService
 from utils.document_utils import build_config_id
 from models.http_error import HTTPError
-from models.data_collection_config import DataType, LeaseAgreementCollectionRow
-from models.ingestion_models import IngestCollectionDocumentRequest
+from models.data_collection_config import CompiledCollectionRow
+from models.ingestion_models import ContentUnderstandingIngestOutput, IngestCollectionDocumentRequest
 from .file_cache_manager import FileCacheManager
 
 
@@ -45,7 +45,8 @@ class IngestLeaseDocumentsController(object):
         """Processes the documents by ingesting the content understanding output.
 
         Depending on the JSON configuration, runs the CU analyzer or classifier to get the corresponding
-        output to ingest into CosmosDB.
+        output to ingest into CosmosDB. Batches of more than one document are ingested together once all
+        outputs are available, so each collection document is written once per batch.
 
         Args:
             config_name (str): The name of the configuration.
@@ -57,16 +58,19 @@ class IngestLeaseDocumentsController(object):
         """
         config = self._load_and_validate_config(config_name, config_version)
 
-        lease_collection_rows: list[LeaseAgreementCollectionRow] = \
-            [row for row in config.collection_rows if row.data_type == DataType.LEASE_AGREEMENT]
+        is_batch = len(documents) > 1
+        batch_outputs: list[ContentUnderstandingIngestOutput] = []
+        batch_keys: set[tuple] = set()
 
         for document in documents:
-            for collection_row in lease_collection_rows:
+            for lease_row in config.compiled.lease_rows:
                 self._ingestion_collection_document_service.clean_empty_document(
                     document.id,
                     config
                 )
-                if self._ingestion_collection_document_service.is_document_ingested(
+                # Outputs pending in the batch are not visible to is_document_ingested yet
+                document_key = (document.type, document.id, document.lease_id, document.filename)
+                if document_key in batch_keys or self._ingestion_collection_document_service.is_document_ingested(
                     document.type,
                     document.id,
                     document.filename,
@@ -79,45 +83,25 @@ class IngestLeaseDocumentsController(object):
                     )
                     continue
 
-                content_understanding_output = None
-
-                if self._is_local_dev_mode():
-                    cache_key = self._file_cache_manager.get_cache_key(
-                        document.id,
-                        document.filename,
-                        config.lease_config_hash)
-                    content_understanding_output = self._file_cache_manager.read(cache_key)
-                    if content_understanding_output is not None:
-                        logging.info(f"Loaded content understanding output from file cache for key: {cache_key}")
-
-                is_classifier_enabled = collection_row.classifier is not None and collection_row.classifier.enabled
-
-                # If not already cached, call the appropriate CU API endpoint to get the output to ingest
-                if content_understanding_output is None:
-                    if is_classifier_enabled:
-                        # If classifier is enabled, use the classifier ID from the collection row
-                        classifier_id = collection_row.classifier.classifier_id
-
-                        response = self._content_understanding_client.begin_classify_data(
-                            classifier_id,
-                            document.file_bytes
-                        )
-                        content_understanding_output = self._content_understanding_client.poll_result(response)
-                    else:
-                        # Otherwise, use the analyzer ID for ingestion
-                        analyzer_id = collection_row.analyzer_id
-
-                        response = self._content_understanding_client.begin_analyze_data(analyzer_id,
-                                                                                         document.file_bytes)
-                        content_understanding_output = self._content_understanding_client.poll_result(response)
-
-                    # Cache the content understanding output if in local dev mode
-                    if self._is_local_dev_mode():
-                        self._file_cache_manager.write(cache_key, content_understanding_output)
-                        logging.info(f"Cached content understanding output to file for key: {cache_key}")
+                content_understanding_output = self._get_content_understanding_output(
+                    document,
+                    lease_row,
+                    config.lease_config_hash
+                )
 
+                if is_batch:
+                    batch_outputs.append(ContentUnderstandingIngestOutput(
+                        doc_type=document.type,
+                        collection_id=document.id,
+                        lease_id=document.lease_id,
+                        filename=document.filename,
+                        date_of_document=document.date_of_document,
+                        data=content_understanding_output,
+                        is_classifier_output=lease_row.is_classifier_enabled
+                    ))
+                    batch_keys.add(document_key)
                 # Ingest the content understanding output into CosmosDB using the appropriate service method
-                if is_classifier_enabled:
+                elif lease_row.is_classifier_enabled:
                     self._ingestion_collection_document_service.ingest_classifier_output(
                         document.type,
                         document.id,
@@ -138,6 +122,50 @@ class IngestLeaseDocumentsController(object):
                         config
                     )
 
+        if batch_outputs:
+            self._ingestion_collection_document_service.ingest_many(batch_outputs, config)
+
+    def _get_content_understanding_output(
+        self,
+        document: IngestCollectionDocumentRequest,
+        lease_row: CompiledCollectionRow,
+        lease_config_hash: str
+    ) -> dict:
+        """Gets the CU output for a document, from the local file cache when available."""
+        content_understanding_output = None
+
+        if self._is_local_dev_mode():
+            cache_key = self._file_cache_manager.get_cache_key(
+                document.id,
+                document.filename,
+                lease_config_hash)
+            content_understanding_output = self._file_cache_manager.read(cache_key)
+            if content_understanding_output is not None:
+                logging.info(f"Loaded content understanding output from file cache for key: {cache_key}")
+
+        # If not already cached, call the appropriate CU API endpoint to get the output to ingest
+        if content_understanding_output is None:
+            if lease_row.is_classifier_enabled:
+                # If classifier is enabled, the compiled row holds the classifier ID
+                response = self._content_understanding_client.begin_classify_data(
+                    lease_row.content_understanding_id,
+                    document.file_bytes
+                )
+            else:
+                # Otherwise, it holds the analyzer ID used for ingestion
+                response = self._content_understanding_client.begin_analyze_data(
+                    lease_row.content_understanding_id,
+                    document.file_bytes
+                )
+            content_understanding_output = self._content_understanding_client.poll_result(response)
+
+            # Cache the content understanding output if in local dev mode
+            if self._is_local_dev_mode():
+                self._file_cache_manager.write(cache_key, content_understanding_output)
+                logging.info(f"Cached content understanding output to file for key: {cache_key}")
+
+        return content_understanding_output
+
     def _load_and_validate_config(self, config_name: str, config_version: str):
         """Load and validate the configuration."""
         config_id = build_config_id(config_name, config_version)
@@ -4,6 +4,9 @@ from routes.api.v1 import health_check_routes_bp
 from routes.api.v1 import ingest_config_routes_bp
 from routes.api.v1 import inference_config_routes_bp
 from routes.api.v1 import classifier_routes_bp
+from routes.api.v1 import lease_document_migration_routes_bp
+from routes.api.v1 import index_management_routes_bp
+from routes.api.v1 import markdown_page_routes_bp
 from routes.api.v1.ingest_documents_routes import ingest_docs_routes_bp
 from utils.monitoring_utils import set_up_monitoring
 
@@ -15,4 +18,7 @@ app.register_functions(health_check_routes_bp)
 app.register_functions(ingest_config_routes_bp)
 app.register_functions(inference_config_routes_bp)
 app.register_functions(ingest_docs_routes_bp)
+app.register_functions(lease_document_migration_routes_bp)
+app.register_functions(index_management_routes_bp)
+app.register_functions(markdown_page_routes_bp)
 # app.register_functions(classifier_routes_bp)
\ No newline at end of file
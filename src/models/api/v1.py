@@ -28,6 +28,8 @@ class QueryMetrics(BaseModel):
     completion_tokens: int
     total_tokens: int
     total_latency_sec: float
+    context_tokens: Optional[int] = None
+    truncated_context_values: Optional[int] = None
 
 
 class QueryResponse(BaseModel):
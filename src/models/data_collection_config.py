@@ -1,5 +1,6 @@
+from functools import cached_property
 from uuid import uuid4
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from enum import Enum
 from typing import List, Literal, Optional, Union
 
@@ -90,3 +91,60 @@ class FieldDataCollectionConfig(BaseModel):
     prompt: str
     lease_config_hash: str = ""
     collection_rows: list[LeaseAgreementCollectionRow]
+
+    @cached_property
+    def compiled(self) -> "CompiledIngestConfig":
+        """The precomputed ingestion plan of this configuration.
+
+        Computed on first access and kept for the lifetime of the instance, so the configuration must not be
+        modified once it has been compiled.
+        """
+        return CompiledIngestConfig.from_config(self)
+
+
+class CompiledCollectionRow(BaseModel):
+    """Precomputed ingestion plan of a lease agreement collection row."""
+    model_config = ConfigDict(frozen=True)
+
+    row: LeaseAgreementCollectionRow
+    field_names: frozenset[str]
+    is_classifier_enabled: bool
+    content_understanding_id: str  # The classifier ID when the classifier is enabled, otherwise the analyzer ID
+
+
+class CompiledIngestConfig(BaseModel):
+    """Values derived from a data collection configuration that are needed on every ingest and query."""
+    model_config = ConfigDict(frozen=True)
+
+    field_names: frozenset[str]
+    lease_rows: tuple[CompiledCollectionRow, ...]
+    prompt: str
+
+    @classmethod
+    def from_config(cls, config: FieldDataCollectionConfig) -> "CompiledIngestConfig":
+        """Compiles a data collection configuration.
+
+        Args:
+            config (FieldDataCollectionConfig): The configuration to compile.
+
+        Returns:
+            CompiledIngestConfig: The compiled configuration.
+        """
+        lease_rows = []
+        for row in config.collection_rows:
+            if row.data_type is not DataType.LEASE_AGREEMENT:
+                continue
+
+            is_classifier_enabled = row.classifier is not None and row.classifier.enabled
+            lease_rows.append(CompiledCollectionRow(
+                row=row,
+                field_names=frozenset(field_schema.name for field_schema in row.field_schema),
+                is_classifier_enabled=is_classifier_enabled,
+                content_understanding_id=row.classifier.classifier_id if is_classifier_enabled else row.analyzer_id
+            ))
+
+        return cls(
+            field_names=frozenset().union(*(lease_row.field_names for lease_row in lease_rows)),
+            lease_rows=tuple(lease_rows),
+            prompt=config.prompt
+        )
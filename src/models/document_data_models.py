@@ -1,8 +1,9 @@
 from typing import Any, Literal, Optional, List, Dict
 from enum import Enum
 from datetime import date
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from .extracted_collection_documents import ExtractedLeaseFieldValue
+from utils.field_encoding import decode_source
 
 
 class DocumentType(str, Enum):
@@ -34,6 +35,11 @@ class _LeaseAgreementDocumentData(ExtractedLeaseFieldValue):
     valueArray: Optional[List["_LeaseAgreementDocumentData"]] = None  # Recursive type
     valueObject: Optional[Dict[str, "_LeaseAgreementDocumentData"]] = None  # Recursive type
 
+    @field_validator("source_bounding_boxes", mode="before")
+    @classmethod
+    def _decode_source(cls, value: Any) -> Any:
+        return decode_source(value) if isinstance(value, bytes) else value
+
     class Config:
         populate_by_name = True
         extra = "ignore"
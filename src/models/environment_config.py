@@ -37,6 +37,9 @@ class CosmosDbConfig(BaseModel):
     endpoint: ConfigurationValue
     configuration_collection_name: ConfigurationValue
     document_collection_name: ConfigurationValue
+    lease_document_collection_name: Optional[ConfigurationValue] = None
+    ingested_documents_collection_name: Optional[ConfigurationValue] = None
+    context_collection_name: Optional[ConfigurationValue] = None
 
 
 class LLMConfig(BaseModel):
@@ -68,9 +71,43 @@ class ChatHistoryConfig(BaseModel):
     remove_tool_calls: ConfigurationValue[str] = ConfigurationValue(value="true")
 
 
+class BlobStorageBackend(str, Enum):
+    AZURE = "azure"
+    LOCAL = "local"
+
+
 class BlobStorageConfig(BaseModel):
     account_url: ConfigurationValue
     container_name: ConfigurationValue
+    max_concurrency: Optional[ConfigurationValue[int]] = None
+    backend: ConfigurationValue[BlobStorageBackend] = ConfigurationValue(value=BlobStorageBackend.AZURE)
+    local_root_path: Optional[ConfigurationValue] = None
+
+    @property
+    def uses_local_backend(self) -> bool:
+        """Whether blobs are stored on the local filesystem rather than in Azure Blob Storage."""
+        return self.backend.value == BlobStorageBackend.LOCAL
+
+
+class SharedCacheBackend(str, Enum):
+    REDIS = "redis"
+    MEMORY = "memory"
+
+
+class SharedCacheConfig(BaseModel):
+    backend: ConfigurationValue[SharedCacheBackend] = ConfigurationValue(value=SharedCacheBackend.REDIS)
+    url: Optional[ConfigurationValue] = None
+    ttl_in_seconds: Optional[ConfigurationValue[int]] = None
+
+
+class ContextPruningConfig(BaseModel):
+    max_fields: Optional[ConfigurationValue[int]] = None
+    max_leases: Optional[ConfigurationValue[int]] = None
+    max_size_in_bytes: Optional[ConfigurationValue[int]] = None
+
+
+class ContextBudgetConfig(BaseModel):
+    max_prompt_tokens: ConfigurationValue[int]
 
 
 class EnvironmentConfig(BaseModel):
@@ -83,3 +120,6 @@ class EnvironmentConfig(BaseModel):
     content_understanding: ContentUnderstandingConfig
     chat_history: ChatHistoryConfig
     blob_storage: BlobStorageConfig
+    shared_cache: Optional[SharedCacheConfig] = None
+    context_pruning: Optional[ContextPruningConfig] = None
+    context_budget: Optional[ContextBudgetConfig] = None
@@ -3,8 +3,9 @@ from enum import Enum
 from typing import Any, Optional, List, Dict
 from uuid import uuid4
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from .base_mongo_lockable import BaseMongoLockable
+from utils.field_encoding import decode_source, decode_spans
 
 
 class ExtractedLeaseFieldType(str, Enum):
@@ -47,6 +48,16 @@ class ExtractedLeaseField(ExtractedLeaseFieldValue):
     subdocument_start_page: Optional[int] = None
     subdocument_end_page: Optional[int] = None
 
+    @field_validator("source", mode="before")
+    @classmethod
+    def _decode_source(cls, value: Any) -> Any:
+        return decode_source(value) if isinstance(value, bytes) else value
+
+    @field_validator("spans", mode="before")
+    @classmethod
+    def _decode_spans(cls, value: Any) -> Any:
+        return decode_spans(value) if isinstance(value, bytes) else value
+
 
 ExtractedLeaseField.model_rebuild()
 
@@ -71,3 +82,54 @@ class ExtractedCollectionDocuments(BaseMongoLockable):
     config_id: str
     lease_config_hash: str
     information: ExtractedCollectionInformationCollection
+
+    @classmethod
+    def from_stored(cls, data: dict) -> "ExtractedCollectionDocuments":
+        """Loads a document read back from the database, deferring the validation of its leases.
+
+        Leases are kept as stored until ``get_lease`` hydrates them, so appending to one lease does not
+        re-validate every lease already in the document. Dump the result with ``warnings=False``, since
+        leases that were never hydrated are serialized as the stored dictionaries.
+
+        Args:
+            data (dict): The document as stored in the database.
+
+        Returns:
+            ExtractedCollectionDocuments: The document, with unhydrated leases.
+        """
+        document = cls.model_validate({**data, "information": {"leases": []}})
+        stored_leases = (data.get("information") or {}).get("leases", [])
+        document.information = ExtractedCollectionInformationCollection.model_construct(leases=list(stored_leases))
+        return document
+
+    def get_lease(self, lease_id: Optional[str]) -> Optional[ExtractedLeaseCollection]:
+        """Gets a lease by ID, validating it on first access.
+
+        Args:
+            lease_id (Optional[str]): The lease ID.
+
+        Returns:
+            Optional[ExtractedLeaseCollection]: The lease, or None if the document has no such lease.
+        """
+        for index, lease in enumerate(self.information.leases):
+            if isinstance(lease, dict):
+                if lease.get("lease_id") != lease_id:
+                    continue
+                lease = ExtractedLeaseCollection.model_validate(lease)
+                self.information.leases[index] = lease
+                return lease
+            if lease.lease_id == lease_id:
+                return lease
+        return None
+
+
+class ExtractedLeaseDocument(BaseMongoLockable, ExtractedLeaseCollection):
+    """Representation of a single lease stored as its own document.
+
+    Used by the per-lease storage layout, where every (collection, lease, config hash) triple is kept in
+    its own document instead of being appended to the collection-wide ``ExtractedCollectionDocuments``.
+    """
+    id: str = Field(..., alias="_id", default_factory=lambda: str(uuid4()))
+    collection_id: str
+    config_id: str
+    lease_config_hash: str
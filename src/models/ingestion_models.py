@@ -21,3 +21,13 @@ class BaseIngestDocumentRequest(BaseModel):
 class IngestCollectionDocumentRequest(BaseIngestDocumentRequest):
     type: Literal[IngestDocumentType.COLLECTION] = IngestDocumentType.COLLECTION
     lease_id: str
+
+
+class ContentUnderstandingIngestOutput(BaseModel):
+    doc_type: IngestDocumentType
+    collection_id: str
+    lease_id: Optional[str] = None
+    filename: str
+    date_of_document: date
+    data: dict
+    is_classifier_output: bool = False
@@ -3,10 +3,16 @@ from .health_check_routes import health_check_routes_bp
 from .inference_config_routes import inference_config_routes_bp
 from .ingest_config_routes import ingest_config_routes_bp
 from .classifier_routes import classifier_routes_bp
+from .lease_document_migration_routes import lease_document_migration_routes_bp
+from .index_management_routes import index_management_routes_bp
+from .markdown_page_routes import markdown_page_routes_bp
 
 __all__ = [
     "inference_config_routes_bp",
     "ingest_config_routes_bp",
     "health_check_routes_bp",
-    "classifier_routes_bp"
+    "classifier_routes_bp",
+    "lease_document_migration_routes_bp",
+    "index_management_routes_bp",
+    "markdown_page_routes_bp"
 ]
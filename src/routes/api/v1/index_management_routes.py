@@ -0,0 +1,27 @@
+import logging
+import azure.functions as func
+from configs.app_config_manager import get_app_config_manager
+from services.mongo_index_manager import MongoIndexManager
+
+index_management_routes_bp = func.Blueprint()
+
+
+@index_management_routes_bp.timer_trigger(
+    schedule="0 0 3 * * *",
+    arg_name="timer",
+    run_on_startup=True,
+    use_monitor=False
+)
+def ensure_mongo_indexes(timer: func.TimerRequest) -> None:
+    """Creates the declared Mongo indexes on startup and daily, and checks the hot query plans.
+
+    Args:
+        timer (func.TimerRequest): The timer request object.
+    """
+    environment_config = get_app_config_manager().hydrate_config()
+    index_manager = MongoIndexManager.from_environment_config(environment_config)
+    index_manager.ensure_indexes()
+
+    collection_scans = [result for result in index_manager.validate_query_plans() if result.is_collection_scan]
+    if collection_scans:
+        logging.error(f"{len(collection_scans)} hot queries scan a whole collection.")
@@ -7,6 +7,9 @@ from services.ingest_config_management_service import IngestConfigManagementServ
 from services.ingest_lease_documents_service import IngestionCollectionDocumentService
 from services.llm_request_manager import get_llm_request_manager
 from services.cosmos_chat_history import get_cosmos_chat_history
+from services.shared_cache import get_shared_cache
+from services.context_pruner import get_context_pruner
+from services.context_packer import get_context_packer
 from configs import get_app_config_manager
 
 from opentelemetry import trace
@@ -58,7 +61,11 @@ async def query(req: func.HttpRequest) -> func.HttpResponse:
         llm_request_manager,
         ingest_config_management_service,
         chat_history,
-        ingestion_collection_document_service
+        ingestion_collection_document_service,
+        get_shared_cache(environment_config),
+        ingestion_collection_document_service.context_store,
+        get_context_pruner(environment_config),
+        get_context_packer(environment_config)
     )
 
     tracer = trace.get_tracer(__name__)
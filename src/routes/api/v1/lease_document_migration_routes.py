@@ -0,0 +1,30 @@
+import logging
+import azure.functions as func
+from configs.app_config_manager import get_app_config_manager
+from services.lease_document_migrator import LeaseDocumentMigrator
+
+lease_document_migration_routes_bp = func.Blueprint()
+
+# Bound the work done per run so a single invocation stays well within the function timeout
+_MAX_DOCUMENTS_PER_RUN = 50
+
+
+@lease_document_migration_routes_bp.timer_trigger(
+    schedule="0 */15 * * * *",
+    arg_name="timer",
+    run_on_startup=False,
+    use_monitor=False
+)
+def migrate_lease_documents(timer: func.TimerRequest) -> None:
+    """Background migration of collection-wide documents into the per-lease storage layout.
+
+    Args:
+        timer (func.TimerRequest): The timer request object.
+    """
+    environment_config = get_app_config_manager().hydrate_config()
+    if not environment_config.cosmosdb.lease_document_collection_name:
+        logging.info("Per-lease storage layout is not configured. Skipping lease document migration.")
+        return
+
+    migrator = LeaseDocumentMigrator.from_environment_config(environment_config)
+    migrator.migrate_all(limit=_MAX_DOCUMENTS_PER_RUN)
@@ -0,0 +1,74 @@
+import azure.functions as func
+import json
+from configs.app_config_manager import get_app_config_manager
+from decorators import error_handler
+from models import HTTPError
+from services.markdown_page_service import MarkdownPageService
+
+
+markdown_page_routes_bp = func.Blueprint()
+
+# Bound the pages of a single request, so a preview cannot turn into a download of the whole document
+_MAX_PAGES_PER_REQUEST = 50
+
+
+def _parse_page_numbers(pages: str) -> list[int]:
+    """Parses a page selection such as ``1,3-5`` into page numbers."""
+    page_numbers = []
+    for part in pages.split(","):
+        first, _, last = part.strip().partition("-")
+        try:
+            first_page = int(first)
+            last_page = int(last) if last else first_page
+        except ValueError:
+            raise HTTPError(f"Invalid page selection: {pages}", 400)
+        if first_page < 1 or last_page < first_page:
+            raise HTTPError(f"Invalid page selection: {pages}", 400)
+        page_numbers.extend(range(first_page, min(last_page, first_page + _MAX_PAGES_PER_REQUEST) + 1))
+        if len(page_numbers) > _MAX_PAGES_PER_REQUEST:
+            raise HTTPError(f"At most {_MAX_PAGES_PER_REQUEST} pages can be requested at once.", 400)
+    return page_numbers
+
+
+@markdown_page_routes_bp.route(
+    route="documents/{collection_id}/{lease_id}/{document_name}/pages",
+    methods=["GET"]
+)
+@error_handler
+def get_markdown_pages(req: func.HttpRequest) -> func.HttpResponse:
+    """Gets the markdown of some pages of an ingested document, such as the pages cited in an answer.
+
+    The pages are selected with the ``pages`` query parameter, for example ``pages=1,3-5``.
+
+    Args:
+        req (func.HttpRequest): The request object.
+
+    Returns:
+        func.HttpResponse: The response object.
+    """
+    pages = req.params.get("pages")
+    if not pages:
+        raise HTTPError("Missing required query parameter: 'pages'.", 400)
+    page_numbers = _parse_page_numbers(pages)
+
+    environment_config = get_app_config_manager().hydrate_config()
+    markdown_page_service = MarkdownPageService.from_environment_config(environment_config)
+    markdown_pages = markdown_page_service.get_pages(
+        req.route_params.get("collection_id"),
+        req.route_params.get("lease_id"),
+        req.route_params.get("document_name"),
+        page_numbers
+    )
+    if markdown_pages is None:
+        raise HTTPError("No page index found for the document.", 404)
+
+    return func.HttpResponse(
+        body=json.dumps({
+            "pages": [
+                {"page_number": page_number, "markdown": markdown_pages[page_number]}
+                for page_number in sorted(markdown_pages)
+            ]
+        }),
+        status_code=200,
+        headers={"Content-Type": "application/json"}
+    )
@@ -0,0 +1,46 @@
+from typing import Optional
+from pymongo.collection import Collection
+
+from utils.async_utils import run_blocking
+
+
+class AsyncCollection(object):
+    """Awaitable reads over a pymongo collection, for the async query path.
+
+    pymongo calls run on a shared thread pool, the same model async Mongo drivers use on top of pymongo,
+    so a single function instance can serve concurrent queries while the connection pool is shared with
+    the synchronous ingest path.
+    """
+    _collection: Collection
+
+    def __init__(self, collection: Collection):
+        """Initializes the AsyncCollection.
+
+        Args:
+            collection (Collection): The pymongo collection to read from.
+        """
+        self._collection = collection
+
+    async def find_one(self, filter: dict, projection: Optional[dict] = None) -> Optional[dict]:
+        """Finds a single document.
+
+        Args:
+            filter (dict): The query filter.
+            projection (Optional[dict]): The fields to return.
+
+        Returns:
+            Optional[dict]: The document, or None if no document matches.
+        """
+        return await run_blocking(self._collection.find_one, filter, projection)
+
+    async def find(self, filter: dict, projection: Optional[dict] = None) -> list[dict]:
+        """Finds all matching documents. The cursor is exhausted on the thread pool.
+
+        Args:
+            filter (dict): The query filter.
+            projection (Optional[dict]): The fields to return.
+
+        Returns:
+            list[dict]: The matching documents.
+        """
+        return await run_blocking(lambda: list(self._collection.find(filter, projection)))
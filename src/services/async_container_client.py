@@ -0,0 +1,241 @@
+import asyncio
+import os
+from typing import Awaitable, Union
+from azure.core.credentials import AccessToken, TokenCredential
+from azure.core.exceptions import ResourceExistsError
+from azure.storage.blob.aio import ContainerClient as AsyncAzureContainerClient
+
+from .container_client import _decode_download, _get_output_paths, _prepare_upload, _save_file, \
+    get_storage_credential
+from constants import BlobStorageConstants
+from models.environment_config import EnvironmentConfig
+from utils.async_utils import run_blocking
+
+
+class _SharedAsyncCredential(object):
+    """Async view of a process-wide sync credential.
+
+    The async storage clients are bound to the event loop they run on, while each request runs on its own
+    loop. Requesting tokens from the shared sync credential keeps a single token cache for the process
+    instead of one per client.
+    """
+    _credential: TokenCredential
+
+    def __init__(self, credential: TokenCredential):
+        self._credential = credential
+
+    async def get_token(self, *scopes: str, **kwargs) -> AccessToken:
+        return await run_blocking(self._credential.get_token, *scopes, **kwargs)
+
+    async def close(self):
+        # The shared credential outlives the clients using it
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+
+async def _gather_bounded(awaitables: list[Awaitable], limit: int) -> list:
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(awaitable: Awaitable):
+        async with semaphore:
+            return await awaitable
+
+    return await asyncio.gather(*(run(awaitable) for awaitable in awaitables))
+
+
+class AsyncContainerClient(object):
+    """Async counterpart of ContainerClient, transferring blobs without blocking a thread per blob.
+
+    Blobs larger than a single request are transferred in blocks or ranges over up to ``max_concurrency``
+    parallel connections, and several blobs are transferred concurrently on the event loop.
+
+    The underlying Azure client is bound to the event loop it is used on, so use an instance on a single
+    loop and close it once done, for example with ``async with``.
+    """
+    container_client: AsyncAzureContainerClient
+    _max_concurrency: int
+
+    def __init__(
+        self,
+        container_client: AsyncAzureContainerClient,
+        max_concurrency: int = BlobStorageConstants.MAX_CONCURRENCY
+    ):
+        """Initialize the AsyncContainerClient.
+
+        Args:
+            container_client (AsyncAzureContainerClient): The async Azure ContainerClient instance.
+            max_concurrency (int): Parallel connections used to transfer a single large blob.
+        """
+        self.container_client = container_client
+        self._max_concurrency = max_concurrency
+
+    async def __aenter__(self):
+        """Use the client until the block exits."""
+        return self
+
+    async def __aexit__(self, *args):
+        """Close the client."""
+        await self.close()
+
+    async def close(self):
+        """Close the connections of the underlying Azure client."""
+        await self.container_client.close()
+
+    async def file_exists(self, file_path: str) -> bool:
+        """Check if a file exists in the blob storage.
+
+        Args:
+            file_path (str): The path of the file to check.
+
+        Returns:
+            bool: True if the file exists, False otherwise.
+        """
+        blob_client = self.container_client.get_blob_client(file_path)
+        return await blob_client.exists()
+
+    async def upload_document(
+        self,
+        bytes: Union[bytes, str],
+        path: str,
+        metadata: dict = None,
+        content_encoding: str = None
+    ):
+        """Upload a document to the blob storage.
+
+        Args:
+            bytes (Union[bytes, str]): The content of the document to upload.
+            path (str): The path to upload the document to.
+            metadata (dict, optional): Metadata to associate with the blob. Defaults to None.
+            content_encoding (str, optional): The encoding of content that is already encoded. Defaults to None.
+        """
+        data, upload_arguments = _prepare_upload(bytes, path, content_encoding)
+        await self.container_client.upload_blob(
+            path,
+            data,
+            overwrite=True,
+            metadata=metadata,
+            max_concurrency=self._max_concurrency,
+            **upload_arguments
+        )
+
+    async def upload_if_absent(
+        self,
+        bytes: Union[bytes, str],
+        path: str,
+        metadata: dict = None,
+        content_encoding: str = None
+    ) -> bool:
+        """Upload a document to the blob storage unless a blob already exists at the path.
+
+        Args:
+            bytes (Union[bytes, str]): The content of the document to upload.
+            path (str): The path to upload the document to.
+            metadata (dict, optional): Metadata to associate with the blob. Defaults to None.
+            content_encoding (str, optional): The encoding of content that is already encoded. Defaults to None.
+
+        Returns:
+            bool: True if the document was uploaded, False if a blob already existed at the path.
+        """
+        data, upload_arguments = _prepare_upload(bytes, path, content_encoding)
+        try:
+            await self.container_client.upload_blob(
+                path,
+                data,
+                overwrite=False,
+                metadata=metadata,
+                max_concurrency=self._max_concurrency,
+                **upload_arguments
+            )
+        except ResourceExistsError:
+            return False
+        return True
+
+    async def upload_documents(self, documents: list[tuple[Union[bytes, str], str]], if_absent: bool = False) -> list:
+        """Upload several documents to the blob storage concurrently.
+
+        Args:
+            documents (list[tuple[Union[bytes, str], str]]): The content and path of each document to upload,
+                optionally followed by its metadata and content encoding.
+            if_absent (bool): Whether to skip documents whose path already exists, as ``upload_if_absent``.
+
+        Returns:
+            list: When if_absent is set, whether each document was uploaded.
+        """
+        upload = self.upload_if_absent if if_absent else self.upload_document
+        return await _gather_bounded(
+            [upload(*document) for document in documents],
+            BlobStorageConstants.CONCURRENT_TRANSFERS
+        )
+
+    async def download_file(self, path: str) -> tuple[bytes, dict]:
+        """Download a file from the blob storage.
+
+        Args:
+            path (str): The path of the file to download.
+
+        Returns:
+            tuple[bytes, dict]: The content and metadata of the downloaded file.
+        """
+        blob = await self.container_client.download_blob(
+            path,
+            max_concurrency=self._max_concurrency,
+            decompress=False
+        )
+        content = _decode_download(await blob.readall(), blob.properties.content_settings)
+        return content, blob.properties.metadata
+
+    async def download_files(self, base_path: str, output_dir: str, extension: str = None) -> list[str]:
+        """Download files from the blob storage concurrently.
+
+        Args:
+            base_path (str): The base path of the files to download.
+            output_dir (str): The directory to save the downloaded files.
+            extension (str, optional): The file extension to filter the files. Defaults to None.
+
+        Returns:
+            list[str]: The paths of the saved files.
+        """
+        files = [
+            blob.name async for blob in self.container_client.list_blobs(base_path)
+            if os.path.splitext(blob.name)[1]
+        ]
+        if extension:
+            files = [file for file in files if file.endswith(extension)]
+        return await _gather_bounded(
+            [self._download_and_save_file(file, output_dir) for file in files],
+            BlobStorageConstants.CONCURRENT_TRANSFERS
+        )
+
+    async def _download_and_save_file(self, path: str, output_dir: str) -> str:
+        output_file, metadata_output_file = _get_output_paths(path, output_dir)
+        content, metadata = await self.download_file(path)
+        await run_blocking(_save_file, output_file, metadata_output_file, content, metadata)
+        return output_file
+
+
+def get_async_container_client(environment_config: EnvironmentConfig) -> AsyncContainerClient:
+    """Create an AsyncContainerClient for the current event loop.
+
+    Clients are not cached since each is bound to its event loop, but all of them share the process-wide
+    storage credential.
+
+    Args:
+        environment_config (EnvironmentConfig): The environment configuration.
+
+    Returns:
+        AsyncContainerClient: The AsyncContainerClient instance.
+    """
+    blob_storage = environment_config.blob_storage
+    container_client = AsyncAzureContainerClient(
+        account_url=blob_storage.account_url.value,
+        container_name=blob_storage.container_name.value,
+        credential=_SharedAsyncCredential(get_storage_credential(environment_config))
+    )
+    max_concurrency = blob_storage.max_concurrency.value if blob_storage.max_concurrency else \
+        BlobStorageConstants.MAX_CONCURRENCY
+    return AsyncContainerClient(container_client, max_concurrency)
@@ -0,0 +1,158 @@
+import logging
+import time
+from threading import Event, Lock, Thread
+from pymongo import errors
+from pymongo.collection import Collection
+
+from ._cosmos_client import CosmosClient
+from constants import CacheInvalidationConstants
+from models.environment_config import EnvironmentConfig
+from utils.cache_invalidation import InvalidationSource, invalidate
+
+
+_VERSION_FIELD = "updated_unix_timestamp"
+_IDENTITY_PROJECTION = {"_id": 1, "collection_id": 1, "lease_config_hash": 1, _VERSION_FIELD: 1}
+
+# Writers stamp the version field with their own clock, so polling looks back this far to tolerate skew
+_CLOCK_SKEW_ALLOWANCE_IN_SECONDS = 60
+
+# Lock acquisitions, renewals and releases update the same documents without stamping the version field,
+# so only writes of data are reported, and only the identity of the written document is sent
+_CHANGE_STREAM_PIPELINE = [
+    {"$match": {"$or": [
+        {"operationType": {"$in": ["insert", "replace"]}, f"fullDocument.{_VERSION_FIELD}": {"$exists": True}},
+        {"operationType": "update", f"updateDescription.updatedFields.{_VERSION_FIELD}": {"$exists": True}},
+    ]}},
+    {"$project": {
+        "_id": 1,
+        "ns": 1,
+        "documentKey": 1,
+        **{f"fullDocument.{key}": 1 for key in _IDENTITY_PROJECTION},
+    }}
+]
+
+
+class CacheInvalidationWatcher(object):
+    """Pushes changes made to stored documents by any instance to the in-process caches of this instance.
+
+    Each watched collection is followed with a change stream where the database supports it. Otherwise the
+    watcher falls back to polling the ``updated_unix_timestamp`` field that every write stamps.
+    """
+    _collections: list[tuple[InvalidationSource, Collection]]
+    _stop_event: Event
+    _threads: list[Thread]
+
+    def __init__(self, collections: list[tuple[InvalidationSource, Collection]]):
+        """Initializes the CacheInvalidationWatcher.
+
+        Args:
+            collections (list[tuple[InvalidationSource, Collection]]): The collections to watch, along with
+                the source their changes are reported as.
+        """
+        self._collections = collections
+        self._stop_event = Event()
+        self._threads = []
+
+    def start(self):
+        """Starts one background thread per watched collection."""
+        for source, collection in self._collections:
+            thread = Thread(
+                target=self._watch,
+                args=(source, collection),
+                name=f"cache-invalidation-{collection.name}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Stops watching. Threads exit once their current change stream wait or poll completes."""
+        self._stop_event.set()
+
+    def _watch(self, source: InvalidationSource, collection: Collection):
+        use_change_stream = True
+        while not self._stop_event.is_set():
+            try:
+                if use_change_stream:
+                    self._watch_change_stream(source, collection)
+                else:
+                    self._poll(source, collection)
+            except errors.OperationFailure as e:
+                if use_change_stream:
+                    logging.info(f"Change streams are not available for {collection.name}, polling instead: {e}")
+                    use_change_stream = False
+                    continue
+                logging.error(f"Cache invalidation watcher for {collection.name} failed, retrying: {e}")
+                self._stop_event.wait(CacheInvalidationConstants.RETRY_DELAY_IN_SECONDS)
+            except Exception as e:
+                logging.error(f"Cache invalidation watcher for {collection.name} failed, retrying: {e}")
+                self._stop_event.wait(CacheInvalidationConstants.RETRY_DELAY_IN_SECONDS)
+
+    def _watch_change_stream(self, source: InvalidationSource, collection: Collection):
+        with collection.watch(_CHANGE_STREAM_PIPELINE, full_document="updateLookup") as stream:
+            while not self._stop_event.is_set():
+                change = stream.try_next()
+                if change is None:
+                    continue
+                document = change.get("fullDocument") or change.get("documentKey") or {}
+                invalidate(source, {key: document[key] for key in _IDENTITY_PROJECTION if key in document})
+
+    def _poll(self, source: InvalidationSource, collection: Collection):
+        # The version field is indexed by the index manager, see services/mongo_index_manager.py
+        last_seen = time.time()
+        seen_versions: dict = {}
+
+        while not self._stop_event.wait(CacheInvalidationConstants.POLL_INTERVAL_IN_SECONDS):
+            since = last_seen - _CLOCK_SKEW_ALLOWANCE_IN_SECONDS
+            for document in collection.find({_VERSION_FIELD: {"$gt": since}}, _IDENTITY_PROJECTION):
+                version = document[_VERSION_FIELD]
+                if seen_versions.get(document["_id"]) == version:
+                    continue
+                seen_versions[document["_id"]] = version
+                last_seen = max(last_seen, version)
+                invalidate(source, document)
+
+            # Versions older than the look-back window can no longer be returned by the query
+            since = last_seen - _CLOCK_SKEW_ALLOWANCE_IN_SECONDS
+            seen_versions = {key: version for key, version in seen_versions.items() if version > since}
+
+
+_watcher: CacheInvalidationWatcher | None = None
+_watcher_lock = Lock()
+
+
+def start_cache_invalidation_watcher(environment_config: EnvironmentConfig) -> CacheInvalidationWatcher:
+    """Starts the process-wide CacheInvalidationWatcher, if it is not running yet.
+
+    Args:
+        environment_config (EnvironmentConfig): The environment configuration.
+
+    Returns:
+        CacheInvalidationWatcher: The running CacheInvalidationWatcher instance.
+    """
+    global _watcher
+    with _watcher_lock:
+        if _watcher is not None:
+            return _watcher
+
+        cosmos_client = CosmosClient(environment_config.cosmosdb.endpoint.value)
+        db_name = environment_config.cosmosdb.db_name.value
+        collections = [
+            (
+                InvalidationSource.CONFIGURATIONS,
+                cosmos_client.get_collection(db_name, environment_config.cosmosdb.configuration_collection_name.value)
+            ),
+            (
+                InvalidationSource.COLLECTION_DOCUMENTS,
+                cosmos_client.get_collection(db_name, environment_config.cosmosdb.document_collection_name.value)
+            ),
+        ]
+        if lease_document_collection_name := environment_config.cosmosdb.lease_document_collection_name:
+            collections.append((
+                InvalidationSource.COLLECTION_DOCUMENTS,
+                cosmos_client.get_collection(db_name, lease_document_collection_name.value)
+            ))
+
+        _watcher = CacheInvalidationWatcher(collections)
+        _watcher.start()
+        return _watcher
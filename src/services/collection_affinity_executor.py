@@ -0,0 +1,85 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable
+
+from constants import IngestionConstants
+from utils.consistent_hash import ConsistentHashRing
+
+
+class CollectionAffinityExecutor(object):
+    """Runs the writes of ingestion on worker slots partitioned by collection.
+
+    Every collection is assigned to one single-threaded worker slot by consistent hashing, so the writes to
+    a collection run one at a time in submission order and never contend for its own document lock, while
+    different collections run in parallel on other slots. Slow work, such as document analysis, blob uploads
+    or waiting for a lock, belongs before the submission, since it would hold up every collection sharing
+    the slot.
+    """
+    _ring: ConsistentHashRing
+    _workers: dict[str, ThreadPoolExecutor]
+
+    def __init__(self, worker_count: int):
+        """Initializes the CollectionAffinityExecutor.
+
+        Args:
+            worker_count (int): The number of worker slots.
+        """
+        slots = [str(slot) for slot in range(worker_count)]
+        self._ring = ConsistentHashRing(slots)
+        self._workers = {
+            slot: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"ingest-worker-{slot}")
+            for slot in slots
+        }
+
+    def get_worker_slot(self, collection_id: str) -> str:
+        """Gets the worker slot that processes a collection.
+
+        Args:
+            collection_id (str): The collection ID.
+
+        Returns:
+            str: The worker slot.
+        """
+        return self._ring.get_node(collection_id)
+
+    def submit(self, collection_id: str, func: Callable[..., Any], *args, **kwargs) -> Future:
+        """Queues work for a collection on its worker slot.
+
+        Work must not wait on other work submitted for the same collection, which would never start.
+
+        Args:
+            collection_id (str): The collection the work writes to.
+            func (Callable[..., Any]): The work to run.
+            *args: Positional arguments for the work.
+            **kwargs: Keyword arguments for the work.
+
+        Returns:
+            Future: The result of the work.
+        """
+        return self._workers[self.get_worker_slot(collection_id)].submit(func, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True):
+        """Stops the worker slots.
+
+        Args:
+            wait (bool): Whether to wait for queued work to finish.
+        """
+        for worker in self._workers.values():
+            worker.shutdown(wait=wait)
+
+
+_collection_affinity_executor: CollectionAffinityExecutor | None = None
+_collection_affinity_executor_lock = Lock()
+
+
+def get_collection_affinity_executor() -> CollectionAffinityExecutor:
+    """Gets the process-wide CollectionAffinityExecutor.
+
+    Returns:
+        CollectionAffinityExecutor: The CollectionAffinityExecutor instance.
+    """
+    global _collection_affinity_executor
+    with _collection_affinity_executor_lock:
+        if _collection_affinity_executor is None:
+            _collection_affinity_executor = CollectionAffinityExecutor(IngestionConstants.WORKER_SLOTS)
+        return _collection_affinity_executor
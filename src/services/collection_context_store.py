@@ -0,0 +1,252 @@
+import json
+import logging
+import re
+from datetime import date, datetime
+from typing import Iterable, Optional
+from pymongo import UpdateOne, errors
+from pymongo.collection import Collection
+
+from ._async_collection import AsyncCollection
+from .citation_mapper import CitationMapper
+from models.document_data_models import LeaseAgreement, LeaseAgreementDocumentData
+
+
+_DUPLICATE_KEY_ERROR_CODE = 11000
+
+
+def convert_datetime(o):
+    """Converts datetime and date objects to their string representation.
+
+    Args:
+        o: The object to convert.
+
+    Returns:
+        str: The string representation of the datetime or date object, or the original object if not
+    """
+    if isinstance(o, datetime) or isinstance(o, date):
+        return o.__str__()
+
+
+def _build_collection_context_id(collection_id: str, lease_config_hash: str) -> str:
+    return f"{collection_id}-{lease_config_hash}"
+
+
+def _build_lease_context_id(collection_id: str, lease_config_hash: str, lease_id: Optional[str]) -> str:
+    return f"{collection_id}-{lease_config_hash}-{lease_id}"
+
+
+def build_lease_context(
+    collection_id: str,
+    lease_id: Optional[str],
+    fields: dict[str, list[LeaseAgreementDocumentData]]
+) -> tuple[str, dict]:
+    """Serializes the LLM context of a single lease and the citation mappings of its aliases.
+
+    Aliases are numbered from ``A`` within the lease, see ``join_lease_contexts``.
+
+    Args:
+        collection_id (str): The collection ID, part of every alias.
+        lease_id (Optional[str]): The lease ID.
+        fields (dict[str, list[LeaseAgreementDocumentData]]): The fields of the lease.
+
+    Returns:
+        tuple[str, dict]: The serialized lease and its citation mappings.
+    """
+    lease = LeaseAgreement(lease_id=lease_id, fields=fields).model_dump(
+        by_alias=True,
+        exclude_none=True,
+        exclude_defaults=True,
+        exclude_unset=True,
+    )
+    _, citation_mappings = CitationMapper().process_json({"_id": collection_id, "unstructured_data": [lease]})
+    return json.dumps(lease, default=convert_datetime), citation_mappings
+
+
+def join_lease_contexts(
+    collection_id: str,
+    lease_config_hash: str,
+    lease_contexts: Iterable[tuple[str, dict]]
+) -> tuple[str, dict]:
+    """Joins serialized leases into the serialized data of a collection, without parsing them again.
+
+    Every lease numbers its aliases from ``A``, so the aliases of each lease after the first are suffixed
+    with the position of the lease to keep them unique within the collection, for example ``CITE{id}-A2``.
+
+    Args:
+        collection_id (str): The collection ID.
+        lease_config_hash (str): The hash of the lease configuration.
+        lease_contexts (Iterable[tuple[str, dict]]): The serialized leases and their citation mappings.
+
+    Returns:
+        tuple[str, dict]: The serialized collection data and its citation mappings.
+    """
+    # Aliases are only ever the value of a "document" key, and quotes within values are escaped
+    alias_prefix = json.dumps(f"CITE{collection_id}-")[:-1]
+    alias_pattern = re.compile(re.escape(f'"document": {alias_prefix}') + r'[A-Z]+(?=")')
+
+    leases = []
+    citation_mappings = {}
+    for position, (lease_context, lease_citation_mappings) in enumerate(lease_contexts, start=1):
+        if position > 1:
+            suffix = str(position)
+            lease_context = alias_pattern.sub(lambda match: match.group(0) + suffix, lease_context)
+            lease_citation_mappings = {
+                alias + suffix: citation for alias, citation in lease_citation_mappings.items()
+            }
+        leases.append(lease_context)
+        citation_mappings.update(lease_citation_mappings)
+
+    # Serializes as '{..., "unstructured_data": []}', into which the leases are spliced
+    document_data_str = json.dumps({
+        "_id": collection_id,
+        "lease_config_hash": lease_config_hash,
+        "unstructured_data": []
+    })
+    return f"{document_data_str[:-2]}{', '.join(leases)}]}}", citation_mappings
+
+
+class CollectionContextStore(object):
+    """Stores the LLM context of every lease, serialized at ingest time, so that queries read it in one lookup.
+
+    Each lease is stored as its own document, written whenever its fields change. A collection is served
+    from the store once a marker document records that all of its leases were stored; until then, it is
+    built from the stored leases and saved by ``save_collection_context``.
+    """
+    _collection: Collection
+
+    def __init__(self, collection: Collection):
+        """Initializes the CollectionContextStore.
+
+        Args:
+            collection (Collection): The MongoDB collection holding the serialized leases.
+        """
+        self._collection = collection
+
+    def save_lease_context(
+        self,
+        collection_id: str,
+        lease_config_hash: str,
+        lease_id: Optional[str],
+        lease_context: tuple[str, dict]
+    ):
+        """Stores the serialized context of a lease, replacing the previous one.
+
+        Args:
+            collection_id (str): The collection ID.
+            lease_config_hash (str): The hash of the lease configuration.
+            lease_id (Optional[str]): The lease ID.
+            lease_context (tuple[str, dict]): The serialized lease and its citation mappings.
+        """
+        self._collection.update_one(
+            {"_id": _build_lease_context_id(collection_id, lease_config_hash, lease_id)},
+            {"$set": self._build_lease_context_document(collection_id, lease_config_hash, lease_id, lease_context)},
+            upsert=True
+        )
+
+    def save_collection_context(
+        self,
+        collection_id: str,
+        lease_config_hash: str,
+        lease_contexts: dict[Optional[str], tuple[str, dict]]
+    ):
+        """Stores the serialized context of every lease of a collection built at query time.
+
+        Leases already stored are kept, since ingestion stores a lease once it is written, so the stored one
+        is at least as recent as one built from fields read before that write. The marker is written last, so
+        a failed save is retried by the next query that builds the collection.
+
+        Args:
+            collection_id (str): The collection ID.
+            lease_config_hash (str): The hash of the lease configuration.
+            lease_contexts (dict[Optional[str], tuple[str, dict]]): The serialized leases and their citation
+                mappings, keyed by lease ID.
+        """
+        requests = [
+            UpdateOne(
+                {"_id": _build_lease_context_id(collection_id, lease_config_hash, lease_id)},
+                {"$setOnInsert": self._build_lease_context_document(
+                    collection_id,
+                    lease_config_hash,
+                    lease_id,
+                    lease_context
+                )},
+                upsert=True
+            )
+            for lease_id, lease_context in lease_contexts.items()
+        ]
+        requests.append(UpdateOne(
+            {"_id": _build_collection_context_id(collection_id, lease_config_hash)},
+            {"$set": {"collection_id": collection_id, "lease_config_hash": lease_config_hash, "complete": True}},
+            upsert=True
+        ))
+
+        try:
+            self._collection.bulk_write(requests, ordered=True)
+        except errors.BulkWriteError as e:
+            # Two instances inserted the same lease at once, so the next query saves the collection again
+            if any(error.get("code") != _DUPLICATE_KEY_ERROR_CODE for error in e.details.get("writeErrors", [])):
+                raise
+            logging.info(f"Context of collection {collection_id} was saved concurrently: {e}")
+
+    def discard_lease_context(self, collection_id: str, lease_config_hash: str, lease_id: Optional[str]):
+        """Removes the stored context of a lease along with the marker of its collection.
+
+        Used when the fields of a lease were written but its context could not be stored, so the next query
+        builds the collection from the stored fields instead of serving the outdated lease.
+
+        Args:
+            collection_id (str): The collection ID.
+            lease_config_hash (str): The hash of the lease configuration.
+            lease_id (Optional[str]): The lease ID.
+        """
+        self._collection.delete_many({"_id": {"$in": [
+            _build_collection_context_id(collection_id, lease_config_hash),
+            _build_lease_context_id(collection_id, lease_config_hash, lease_id)
+        ]}})
+
+    async def get_collection_context_async(
+        self,
+        collection_id: str,
+        lease_config_hash: str
+    ) -> Optional[tuple[str, dict]]:
+        """Gets the serialized data of a collection and its citation mappings from the stored leases.
+
+        Args:
+            collection_id (str): The collection ID.
+            lease_config_hash (str): The hash of the lease configuration.
+
+        Returns:
+            Optional[tuple[str, dict]]: The serialized collection data and its citation mappings, or None if
+                the leases of the collection have not all been stored yet.
+        """
+        documents = await AsyncCollection(self._collection).find(
+            {"collection_id": collection_id, "lease_config_hash": lease_config_hash}
+        )
+        if not any(document.get("complete") for document in documents):
+            return None
+
+        lease_documents = sorted(
+            (document for document in documents if "context" in document),
+            key=lambda document: document["_id"]
+        )
+        return join_lease_contexts(
+            collection_id,
+            lease_config_hash,
+            [(document["context"], document["citation_mappings"]) for document in lease_documents]
+        )
+
+    def _build_lease_context_document(
+        self,
+        collection_id: str,
+        lease_config_hash: str,
+        lease_id: Optional[str],
+        lease_context: tuple[str, dict]
+    ) -> dict:
+        lease_context_str, citation_mappings = lease_context
+        return {
+            "collection_id": collection_id,
+            "lease_config_hash": lease_config_hash,
+            "lease_id": lease_id,
+            "context": lease_context_str,
+            "citation_mappings": citation_mappings,
+        }
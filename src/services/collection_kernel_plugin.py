@@ -1,31 +1,65 @@
 from collections import defaultdict
+from functools import partial
 from semantic_kernel.functions import kernel_function
-from datetime import date, datetime
 from typing import Optional
 import json
-from models.data_collection_config import DataType, \
-    FieldDataCollectionConfig, \
-    LeaseAgreementCollectionRow
-from models.document_data_models import LeaseAgreement, DocumentData
+import logging
+import time
+from opentelemetry import metrics
+from opentelemetry.metrics import Observation
+from constants import CollectionDataCacheConstants
+from models.data_collection_config import FieldDataCollectionConfig
 from services.ingest_lease_documents_service import IngestionCollectionDocumentService
-from cachetools import TTLCache
 from cachetools.keys import hashkey
-from services.citation_mapper import CitationMapper
+from services.collection_context_store import CollectionContextStore, build_lease_context, convert_datetime, \
+    join_lease_contexts
+from services.context_packer import ContextPacker
+from services.context_pruner import CollectionContextPruner
+from services.shared_cache import SharedCache
+from utils.async_utils import SingleFlight, run_blocking
+from utils.cache_invalidation import InvalidationSource, register_invalidation_handler
+from utils.greedy_dual_size_cache import GreedyDualSizeCache
 
-document_data_cache = TTLCache(maxsize=100, ttl=86400)
 
+def _get_document_data_size(entry: dict) -> int:
+    """Gets the size of a cached collection data entry, including its term index when it has one."""
+    size = len(entry["document_data_str"]) + len(json.dumps(entry["citation_mappings"]))
+    if "term_index" in entry:
+        size += entry["term_index"].size
+    return size
 
-def convert_datetime(o):
-    """Converts datetime and date objects to their string representation.
 
-    Args:
-        o: The object to convert.
+document_data_cache = GreedyDualSizeCache(
+    maxsize=CollectionDataCacheConstants.MAX_SIZE_IN_BYTES,
+    getsizeof=_get_document_data_size,
+    ttl=CollectionDataCacheConstants.TTL_IN_SECONDS
+)
 
-    Returns:
-        str: The string representation of the datetime or date object, or the original object if not
-    """
-    if isinstance(o, datetime) or isinstance(o, date):
-        return o.__str__()
+_SHARED_CACHE_KEY_PREFIX = "collection-data"
+
+_document_data_loads = SingleFlight()
+
+_meter = metrics.get_meter(__name__)
+_meter.create_observable_gauge(
+    "collection_data_cache.size",
+    callbacks=[lambda options: [Observation(document_data_cache.currsize)]],
+    unit="By",
+    description="Serialized size of the collection data cached in-process."
+)
+_meter.create_observable_counter(
+    "collection_data_cache.evictions",
+    callbacks=[lambda options: [Observation(document_data_cache.evictions)]],
+    description="Collection data evicted from the in-process cache to stay within its size budget."
+)
+
+
+def _invalidate_document_data(document: dict):
+    """Drops the cached data of a collection whose stored documents changed."""
+    if "collection_id" in document and "lease_config_hash" in document:
+        document_data_cache.pop(hashkey(document["collection_id"], document["lease_config_hash"]), None)
+
+
+register_invalidation_handler(InvalidationSource.COLLECTION_DOCUMENTS, _invalidate_document_data)
 
 
 class CollectionPlugin:
@@ -33,13 +67,50 @@ class CollectionPlugin:
     _config: FieldDataCollectionConfig
     _document_service: IngestionCollectionDocumentService
     _collection_id: Optional[str] = None
+    _shared_cache: Optional[SharedCache] = None
+    _context_store: Optional[CollectionContextStore] = None
+    _context_pruner: Optional[CollectionContextPruner] = None
+    _question: Optional[str] = None
+    _context_packer: Optional[ContextPacker] = None
+    _prompt_tokens: int = 0
+    _loaded_document_data: dict[str, dict]
+    context_tokens: int = 0
+    truncated_context_values: int = 0
 
     def __init__(self, config: FieldDataCollectionConfig,
-                 document_service: IngestionCollectionDocumentService):
-        """Initializes the CollectionPlugin with the given configuration."""
+                 document_service: IngestionCollectionDocumentService,
+                 shared_cache: Optional[SharedCache] = None,
+                 context_store: Optional[CollectionContextStore] = None,
+                 context_pruner: Optional[CollectionContextPruner] = None,
+                 question: Optional[str] = None,
+                 context_packer: Optional[ContextPacker] = None,
+                 prompt_tokens: int = 0):
+        """Initializes the CollectionPlugin with the given configuration.
+
+        Args:
+            config (FieldDataCollectionConfig): The configuration of the collection data.
+            document_service (IngestionCollectionDocumentService): The service reading the stored documents.
+            shared_cache (Optional[SharedCache]): The cache shared across instances. When set, collection data
+                missing from the in-process cache is looked up there before it is built.
+            context_store (Optional[CollectionContextStore]): The store of the context serialized at ingest time.
+                When set, collection data is read from it rather than built, and saved to it once built.
+            context_pruner (Optional[CollectionContextPruner]): Prunes the collection data to what is relevant
+                to the question. The whole collection data is returned when None.
+            question (Optional[str]): The question of the user the collection data is requested for.
+            context_packer (Optional[ContextPacker]): Fits the collection data in the tokens left by the prompt.
+                The collection data is not budgeted when None.
+            prompt_tokens (int): The tokens of the prompt and chat history sent along with the collection data.
+        """
         self._config = config
         self._document_service = document_service
-        self._citation_mapper = CitationMapper()
+        self._shared_cache = shared_cache
+        self._context_store = context_store
+        self._context_pruner = context_pruner
+        self._question = question
+        self._context_packer = context_packer
+        self._prompt_tokens = prompt_tokens
+        # Citations are restored from the data returned to the model, which the cache may drop in the meantime
+        self._loaded_document_data = {}
 
     def composite_key(self, collection_id: str, lease_config_hash: str):
         """Generates a composite key by hashing the provided collection ID and lease configuration hash.
@@ -57,7 +128,7 @@ class CollectionPlugin:
         name="get_collection_data",
         description="Gets the data for a specified collection by the collection id.",
     )
-    def get_collection_data(
+    async def get_collection_data(
         self,
         collection_id: str,
     ) -> str:
@@ -67,61 +138,164 @@ class CollectionPlugin:
         cache_key = self.composite_key(collection_id, self._config.lease_config_hash)
 
         # Check if the data is already in the cache
-        if cache_key in document_data_cache:
-            document_data_str = document_data_cache[cache_key]["document_data_str"]
-            citation_mappings = document_data_cache[cache_key]["citation_mappings"]
-        else:
-            # Fetch structured and unstructured data leases
-            unstructured_data = self._get_unstructured_data_lease_info_by_collection_id(collection_id)
-
-            # Create the document data object
-            document_data = DocumentData(
-                _id=collection_id,
-                lease_config_hash=self._config.lease_config_hash,
-                unstructured_data=unstructured_data,
+        document_data = document_data_cache.get(cache_key)
+        if document_data is None:
+            # Concurrent queries of a collection that is not cached share a single load
+            document_data = await _document_data_loads.run(
+                cache_key,
+                partial(self._load_document_data, collection_id, cache_key)
             )
-            document_data = document_data.model_dump(
-                by_alias=True,
-                exclude_none=True,
-                exclude_defaults=True,
-                exclude_unset=True,
+        self._loaded_document_data[collection_id] = document_data
+
+        document_data_str = document_data["document_data_str"]
+        if self._context_pruner is not None and self._question:
+            # Entries cached by a plugin without a pruner have no term index
+            term_index = document_data.get("term_index") or await run_blocking(
+                self._context_pruner.index,
+                document_data_str,
+                self._config
             )
+            document_data_str = await run_blocking(self._context_pruner.prune_indexed, term_index, self._question)
+
+        if self._context_packer is not None:
+            # Collection data returned earlier in the same turn is part of the prompt too
+            packed_context = await run_blocking(
+                self._context_packer.pack,
+                document_data_str,
+                self._prompt_tokens + self.context_tokens
+            )
+            document_data_str = packed_context.document_data_str
+            self.context_tokens += packed_context.tokens
+            self.truncated_context_values += packed_context.truncated_values
+
+        return document_data_str
 
-            document_data, citation_mappings = self._citation_mapper.process_json(document_data)
+    async def _load_document_data(self, collection_id: str, cache_key: tuple) -> dict:
+        """Gets the data of a collection from the shared cache or builds it, and caches it in-process.
+
+        Args:
+            collection_id (str): The collection ID.
+            cache_key (tuple): The key of the collection in the in-process cache.
 
-            # Serialize the document data to a string
-            document_data_str = json.dumps(document_data, default=convert_datetime)
+        Returns:
+            dict: The serialized document data and its citation mappings.
+        """
+        # A load that finished since the cache was checked has already cached the data
+        document_data = document_data_cache.get(cache_key)
+        if document_data is not None:
+            return document_data
+
+        start = time.perf_counter()
+        if self._shared_cache is not None:
+            document_data_str, citation_mappings = await self._get_shared_document_data(collection_id)
+        else:
+            document_data_str, citation_mappings = await self._build_document_data(collection_id)
 
-        # Store the result in the cache
-        document_data_cache[cache_key] = {
+        # Store the result in the cache, weighted by how long it took to get
+        document_data = {
             "document_data_str": document_data_str,
             "citation_mappings": citation_mappings
         }
+        if self._context_pruner is not None:
+            # Parsed and tokenized once per load, so every question only scores the cached terms
+            document_data["term_index"] = await run_blocking(
+                self._context_pruner.index,
+                document_data_str,
+                self._config
+            )
+        document_data_cache.set(cache_key, document_data, cost=time.perf_counter() - start)
+        return document_data
 
-        return document_data_str
+    async def _build_document_data(self, collection_id: str) -> tuple[str, dict]:
+        """Builds the serialized data of a collection and its citation mappings from the stored documents.
 
-    def _get_unstructured_data_lease_info_by_collection_id(self, collection_id: str) -> list[LeaseAgreement]:
-        """Queries CosmosDB to retrieve extracted lease information for the specified collection ID.
+        When a context store is configured, the context serialized at ingest time is read instead. Collections
+        whose leases were not all serialized at ingest time are built and saved to the store.
 
         Args:
-            collection_id (str): Collection ID to query
+            collection_id (str): The collection ID.
+
+        Returns:
+            tuple[str, dict]: The serialized document data and its citation mappings.
+        """
+        lease_config_hash = self._config.lease_config_hash
+        if self._context_store is not None:
+            stored_context = await self._context_store.get_collection_context_async(collection_id, lease_config_hash)
+            if stored_context is not None:
+                return stored_context
+
+        # Serialize each lease on its own, the way ingestion stores them
+        lease_contexts = {
+            lease_id: build_lease_context(collection_id, lease_id, lease_fields)
+            for lease_id, lease_fields in (await self._get_extracted_fields(collection_id)).items()
+        }
+
+        if self._context_store is not None:
+            try:
+                await run_blocking(
+                    self._context_store.save_collection_context,
+                    collection_id,
+                    lease_config_hash,
+                    lease_contexts
+                )
+            except Exception as e:
+                logging.warning(f"Failed to save the context of collection {collection_id}: {e}")
+
+        return join_lease_contexts(collection_id, lease_config_hash, lease_contexts.values())
+
+    async def _get_shared_document_data(self, collection_id: str) -> tuple[str, dict]:
+        """Gets the data of a collection from the shared cache, building and sharing it on a miss.
+
+        Entries are keyed by the version of the stored data, so instances never read data built before the
+        collection last changed and no invalidation has to reach the shared cache. The shared cache is an
+        optimization: when it cannot be reached, the data is built as if it missed.
+
+        Args:
+            collection_id (str): The collection ID.
 
         Returns:
-            list[LeaseAgreement]: list of LeaseAgreements containing the fields extracted from
-                                  raw lease documents using Azure AI Content Understanding
+            tuple[str, dict]: The serialized document data and its citation mappings.
         """
-        unstructured_data_leases = []
-        lease_document_rows: list[LeaseAgreementCollectionRow] = \
-            [row for row in self._config.collection_rows if row.data_type == DataType.LEASE_AGREEMENT]
+        version = await self._document_service.get_collection_version_async(collection_id, self._config)
+        shared_key = f"{_SHARED_CACHE_KEY_PREFIX}:{collection_id}:{self._config.lease_config_hash}:{version}"
+
+        try:
+            shared_entry = await run_blocking(self._shared_cache.get, shared_key)
+        except Exception as e:
+            logging.warning(f"Failed to read collection data from the shared cache: {e}")
+            shared_entry = None
+
+        if shared_entry is not None:
+            entry = json.loads(shared_entry)
+            return entry["document_data_str"], entry["citation_mappings"]
+
+        document_data_str, citation_mappings = await self._build_document_data(collection_id)
+        try:
+            await run_blocking(self._shared_cache.set, shared_key, json.dumps({
+                "document_data_str": document_data_str,
+                "citation_mappings": citation_mappings
+            }, default=convert_datetime))
+        except Exception as e:
+            logging.warning(f"Failed to write collection data to the shared cache: {e}")
+        return document_data_str, citation_mappings
+
+    async def _get_extracted_fields(self, collection_id: str) -> dict:
+        """Queries CosmosDB to retrieve extracted lease information for the specified collection ID.
 
-        if len(lease_document_rows) > 0:
-            extracted_fields = self._document_service._get_all_extracted_fields_from_collection_doc(collection_id,
-                                                                                                     self._config)
+        Args:
+            collection_id (str): Collection ID to query
 
-            unstructured_data_leases = [LeaseAgreement(lease_id=lease_id, fields=lease_fields)
-                                        for lease_id, lease_fields in extracted_fields.items()]
+        Returns:
+            dict: The fields extracted from raw lease documents using Azure AI Content Understanding, keyed by
+                lease ID and then by field name.
+        """
+        if not self._config.compiled.lease_rows:
+            return {}
 
-        return unstructured_data_leases
+        return await self._document_service._get_all_extracted_fields_from_collection_doc_async(
+            collection_id,
+            self._config
+        )
 
     def _get_original_citation(self, citation: str) -> str:
         """Extracts the original collection ID from the citation string.
@@ -149,18 +323,16 @@ class CollectionPlugin:
         # Extract and return the collection ID
         collection_id = citation.split('-')[0][4:]
 
-        key = self.composite_key(collection_id, self._config.lease_config_hash)
-
-        # Check if the key exists in the cache
-        if key not in document_data_cache:
+        # Check if the data of the collection was returned to the model
+        document_data = self._loaded_document_data.get(collection_id)
+        if document_data is None:
             return None
 
         # Check if the citation exists in the citation mappings
-        if citation not in document_data_cache[key]['citation_mappings']:
+        restored_citation = document_data['citation_mappings'].get(citation)
+        if restored_citation is None:
             return None
 
-        restored_citation = document_data_cache[key]['citation_mappings'][citation]
-
         return [restored_citation['source_document'], restored_citation['source_bounding_boxes']]
 
     def restore_citations(self, citations: list[str]):
@@ -1,16 +1,217 @@
 import os
+import re
+import gzip
 import json
-from typing import Union
+import shutil
+import logging
+import mimetypes
+from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Iterator, Optional, Union
 from multiprocessing.pool import ThreadPool
+from azure.core import MatchConditions
+from azure.core.credentials import TokenCredential
+from azure.core.exceptions import ResourceExistsError, ResourceModifiedError
 from azure.identity import DefaultAzureCredential, ManagedIdentityCredential
-from azure.storage.blob import ContainerClient as AzureContainerClient
+from azure.storage.blob import BlobProperties, ContentSettings, StorageStreamDownloader, \
+    ContainerClient as AzureContainerClient
+from constants import BlobStorageConstants
 from models.environment_config import EnvironmentConfig
+from utils.download_manifest import DownloadManifest
 
 
 _CONCURRENT_THREADS = 10
+_GZIP_ENCODING = "gzip"
 
 
-class ContainerClient(object):
+def _prepare_upload(
+    content: Union[bytes, str],
+    path: str,
+    content_encoding: Optional[str] = None
+) -> tuple[Union[bytes, str], dict]:
+    """Compresses content stored under a compressed extension, returning it with its upload arguments.
+
+    Content that is already encoded is uploaded as it is, with its content encoding.
+    """
+    if content_encoding is None:
+        if not path.endswith(BlobStorageConstants.COMPRESSED_EXTENSIONS):
+            return content, {}
+
+        data = content.encode("utf-8") if isinstance(content, str) else content
+        if len(data) < BlobStorageConstants.COMPRESSION_MIN_SIZE_IN_BYTES:
+            return content, {}
+        # A fixed modification time keeps the compressed bytes, and so the blob's MD5, stable across uploads
+        content = gzip.compress(data, mtime=0)
+        content_encoding = _GZIP_ENCODING
+
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if content_type.startswith("text/"):
+        content_type += "; charset=utf-8"
+    return content, {"content_settings": ContentSettings(content_type=content_type, content_encoding=content_encoding)}
+
+
+def _is_compressed(content_settings: ContentSettings | None) -> bool:
+    return content_settings is not None and content_settings.content_encoding == _GZIP_ENCODING
+
+
+def _decode_download(content: bytes, content_settings: ContentSettings | None) -> bytes:
+    return gzip.decompress(content) if _is_compressed(content_settings) else content
+
+
+def _get_output_paths(path: str, output_dir: str) -> tuple[str, str]:
+    output_path, file_name = os.path.split(path)
+    metadata_file_name = file_name.split(".")[0] + ".json"
+
+    # remove all special characters from the path except for _ and -
+    output_path = re.sub(r"[^a-zA-Z0-9_\-\/]", "", output_path)
+    output_file = os.path.join(output_dir, output_path, file_name)
+    metadata_output_file = os.path.join(
+        output_dir,
+        output_path,
+        metadata_file_name
+    )
+    return output_file, metadata_output_file
+
+
+def _save_file(output_file: str, metadata_output_file: str, content: bytes, metadata: dict):
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
+    with open(output_file, "wb") as f:
+        f.write(content)
+
+    _save_metadata(metadata_output_file, metadata)
+
+
+def _save_metadata(metadata_output_file: str, metadata: dict):
+    with open(metadata_output_file, "w") as f:
+        json.dump(metadata, f, indent=4)
+
+
+class BaseContainerClient(ABC):
+    """Blob storage operations used by the application, whichever backend stores the blobs.
+
+    Paths are blob names using ``/`` separators, and every blob can carry a metadata dictionary.
+    """
+
+    @abstractmethod
+    def file_exists(self, file_path: str) -> bool:
+        """Check if a file exists in the blob storage.
+
+        Args:
+            file_path (str): The path of the file to check.
+
+        Returns:
+            bool: True if the file exists, False otherwise.
+        """
+
+    @abstractmethod
+    def upload_document(
+        self,
+        bytes: Union[bytes, str],
+        path: str,
+        metadata: dict = None,
+        content_encoding: str = None
+    ):
+        """Upload a document to the blob storage, replacing any existing blob.
+
+        Args:
+            bytes (Union[bytes, str]): The content of the document to upload.
+            path (str): The path to upload the document to.
+            metadata (dict, optional): Metadata to associate with the blob. Defaults to None.
+            content_encoding (str, optional): The encoding of content that is already encoded, such as gzip.
+                Defaults to None, in which case compressed extensions are compressed on upload.
+        """
+
+    @abstractmethod
+    def upload_if_absent(
+        self,
+        bytes: Union[bytes, str],
+        path: str,
+        metadata: dict = None,
+        content_encoding: str = None
+    ) -> bool:
+        """Upload a document to the blob storage unless a blob already exists at the path.
+
+        Args:
+            bytes (Union[bytes, str]): The content of the document to upload.
+            path (str): The path to upload the document to.
+            metadata (dict, optional): Metadata to associate with the blob. Defaults to None.
+            content_encoding (str, optional): The encoding of content that is already encoded. Defaults to None.
+
+        Returns:
+            bool: True if the document was uploaded, False if a blob already existed at the path.
+        """
+
+    @abstractmethod
+    def download_file(self, path: str) -> tuple[bytes, dict]:
+        """Download a file from the blob storage.
+
+        Args:
+            path (str): The path of the file to download.
+
+        Returns:
+            tuple[bytes, dict]: The content and metadata of the downloaded file.
+        """
+
+    @abstractmethod
+    def download_range(self, path: str, offset: int, length: int) -> bytes:
+        """Download a byte range of a file from the blob storage, as stored.
+
+        Args:
+            path (str): The path of the file to download.
+            offset (int): The offset of the first byte to download.
+            length (int): The number of bytes to download.
+
+        Returns:
+            bytes: The stored bytes of the range, which are not decompressed.
+        """
+
+    @abstractmethod
+    def iter_download_files(self, base_path: str, output_dir: str, extension: str = None) -> Iterator[str]:
+        """Download files from the blob storage, yielding each saved file as its download completes.
+
+        Args:
+            base_path (str): The base path of the files to download.
+            output_dir (str): The directory to save the downloaded files.
+            extension (str, optional): The file extension to filter the files. Defaults to None.
+
+        Yields:
+            str: The path of each saved file.
+        """
+
+    def upload_documents(self, documents: list[tuple[Union[bytes, str], str]], if_absent: bool = False) -> list:
+        """Upload several documents to the blob storage concurrently.
+
+        Args:
+            documents (list[tuple[Union[bytes, str], str]]): The content and path of each document to upload,
+                optionally followed by its metadata and content encoding.
+            if_absent (bool): Whether to skip documents whose path already exists, as ``upload_if_absent``.
+
+        Returns:
+            list: When if_absent is set, whether each document was uploaded.
+        """
+        if not documents:
+            return []
+        upload = self.upload_if_absent if if_absent else self.upload_document
+        with ThreadPool(processes=min(_CONCURRENT_THREADS, len(documents))) as pool:
+            return pool.starmap(upload, documents)
+
+    def download_files(self, base_path: str, output_dir: str, extension: str = None):
+        """Download files from the blob storage.
+
+        Args:
+            base_path (str): The base path of the files to download.
+            output_dir (str): The directory to save the downloaded files.
+            extension (str, optional): The file extension to filter the files. Defaults to None.
+
+        Returns:
+            list[str]: The paths of the saved files.
+        """
+        return list(self.iter_download_files(base_path, output_dir, extension))
+
+
+class ContainerClient(BaseContainerClient):
+    """Blob storage backed by an Azure Blob Storage container."""
     container_client: AzureContainerClient
 
     def __init__(self, container_client: AzureContainerClient):
@@ -21,35 +222,63 @@ class ContainerClient(object):
         """
         self.container_client = container_client
 
-    def _list_documents(self, base_path: str):
-        files = self.container_client.list_blobs(base_path)
-        return [file.name for file in files if os.path.splitext(file.name)[1]]
-
-    def _download_and_save_file(self, path: str, output_dir: str):
-        output_path, file_name = os.path.split(path)
-        metadata_file_name = file_name.split(".")[0] + ".json"
-
-        # remove all special characters from the path except for _ and -
-        import re
-        output_path = re.sub(r"[^a-zA-Z0-9_\-\/]", "", output_path)
-        output_file = os.path.join(output_dir, output_path, file_name)
-        metadata_output_file = os.path.join(
-            output_dir,
-            output_path,
-            metadata_file_name
-        )
+    def _iter_documents(self, base_path: str, extension: str = None) -> Iterator[BlobProperties]:
+        # The listing is paged lazily, so only the current page is held in memory
+        for blob in self.container_client.list_blobs(base_path, include=["metadata"]):
+            if os.path.splitext(blob.name)[1] and (not extension or blob.name.endswith(extension)):
+                yield blob
 
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
-        content, metadata = self.download_file(path)
+    def _download_to_file(self, blob: BlobProperties, output_dir: str, manifest: DownloadManifest) -> str:
+        output_file, metadata_output_file = _get_output_paths(blob.name, output_dir)
+        if manifest.is_complete(blob.name, blob.etag, blob.size, output_file):
+            return output_file
 
-        with open(output_file, "wb") as f:
-            f.write(content)
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        partial_file = output_file + ".part"
+        entry = manifest.get(blob.name)
+        offset = 0
+        if entry is not None and not entry["complete"] and entry["etag"] == blob.etag \
+                and os.path.isfile(partial_file) and os.path.getsize(partial_file) <= blob.size:
+            offset = os.path.getsize(partial_file)
+        else:
+            manifest.record(blob.name, blob.etag, blob.size, complete=False)
 
-        with open(metadata_output_file, "w") as f:
-            json.dump(metadata, f, indent=4)
+        downloader, offset = self._open_download(blob, offset)
+        with open(partial_file, "r+b" if offset else "wb") as f:
+            f.seek(offset)
+            f.truncate()
+            if downloader is not None:
+                downloader.readinto(f)
 
+        if _is_compressed(blob.content_settings):
+            with gzip.open(partial_file, "rb") as source, open(output_file, "wb") as target:
+                shutil.copyfileobj(source, target)
+            os.remove(partial_file)
+        else:
+            os.replace(partial_file, output_file)
+        _save_metadata(metadata_output_file, blob.metadata)
+        etag = downloader.properties.etag if downloader is not None else blob.etag
+        manifest.record(blob.name, etag, blob.size, complete=True, file_size=os.path.getsize(output_file))
         return output_file
 
+    def _open_download(self, blob: BlobProperties, offset: int) -> tuple[StorageStreamDownloader | None, int]:
+        """Opens the download of a blob from an offset, falling back to the start if the blob changed."""
+        if offset == blob.size:
+            return None, offset
+        if offset:
+            try:
+                downloader = self.container_client.download_blob(
+                    blob.name,
+                    offset=offset,
+                    etag=blob.etag,
+                    match_condition=MatchConditions.IfNotModified,
+                    decompress=False
+                )
+                return downloader, offset
+            except ResourceModifiedError:
+                logging.info(f"Blob {blob.name} changed since its download started, downloading it again.")
+        return self.container_client.download_blob(blob.name, decompress=False), 0
+
     def file_exists(self, file_path: str):
         """Check if a file exists in the blob storage.
 
@@ -62,15 +291,51 @@ class ContainerClient(object):
         blob_client = self.container_client.get_blob_client(file_path)
         return blob_client.exists()
 
-    def upload_document(self, bytes: Union[bytes, str], path: str, metadata: dict = None):
+    def upload_document(
+        self,
+        bytes: Union[bytes, str],
+        path: str,
+        metadata: dict = None,
+        content_encoding: str = None
+    ):
         """Upload a document to the blob storage.
 
         Args:
             bytes (Union[bytes, str]): The content of the document to upload.
             path (str): The path to upload the document to.
             metadata (dict, optional): Metadata to associate with the blob. Defaults to None.
+            content_encoding (str, optional): The encoding of content that is already encoded. Defaults to None.
+        """
+        data, upload_arguments = _prepare_upload(bytes, path, content_encoding)
+        self.container_client.upload_blob(path, data, overwrite=True, metadata=metadata, **upload_arguments)
+
+    def upload_if_absent(
+        self,
+        bytes: Union[bytes, str],
+        path: str,
+        metadata: dict = None,
+        content_encoding: str = None
+    ) -> bool:
+        """Upload a document to the blob storage unless a blob already exists at the path.
+
+        The existence check is a condition of the upload request (``If-None-Match: *``), so it takes a single
+        round trip and concurrent uploads to the same path write the blob once.
+
+        Args:
+            bytes (Union[bytes, str]): The content of the document to upload.
+            path (str): The path to upload the document to.
+            metadata (dict, optional): Metadata to associate with the blob. Defaults to None.
+            content_encoding (str, optional): The encoding of content that is already encoded. Defaults to None.
+
+        Returns:
+            bool: True if the document was uploaded, False if a blob already existed at the path.
         """
-        self.container_client.upload_blob(path, bytes, overwrite=True, metadata=metadata)
+        data, upload_arguments = _prepare_upload(bytes, path, content_encoding)
+        try:
+            self.container_client.upload_blob(path, data, overwrite=False, metadata=metadata, **upload_arguments)
+        except ResourceExistsError:
+            return False
+        return True
 
     def download_file(self, path: str):
         """Download a file from the blob storage.
@@ -81,57 +346,108 @@ class ContainerClient(object):
         Returns:
             bytes: The content of the downloaded file.
         """
-        blob = self.container_client.download_blob(path)
-        content = blob.readall()
+        # Compressed blobs are decompressed here rather than by the transport, which cannot do so for blobs
+        # downloaded in several ranges
+        blob = self.container_client.download_blob(path, decompress=False)
+        content = _decode_download(blob.readall(), blob.properties.content_settings)
         metadata = blob.properties.metadata
         return content, metadata
 
-    def download_files(self, base_path: str, output_dir: str, extension: str = None):
-        """Download files from the blob storage.
+    def download_range(self, path: str, offset: int, length: int) -> bytes:
+        """Download a byte range of a file from the blob storage, as stored.
+
+        Args:
+            path (str): The path of the file to download.
+            offset (int): The offset of the first byte to download.
+            length (int): The number of bytes to download.
+
+        Returns:
+            bytes: The stored bytes of the range, which are not decompressed.
+        """
+        return self.container_client.download_blob(path, offset=offset, length=length, decompress=False).readall()
+
+    def iter_download_files(self, base_path: str, output_dir: str, extension: str = None) -> Iterator[str]:
+        """Download files from the blob storage, yielding each saved file as its download completes.
+
+        Listings are paged lazily and each blob is streamed to disk in chunks, so memory use does not grow
+        with the number or size of the files. Compressed blobs are saved decompressed. Downloads are
+        recorded in a manifest in the output directory: files whose ETag and size are unchanged are skipped,
+        and interrupted downloads resume where they stopped.
 
         Args:
             base_path (str): The base path of the files to download.
             output_dir (str): The directory to save the downloaded files.
             extension (str, optional): The file extension to filter the files. Defaults to None.
+
+        Yields:
+            str: The path of each saved file.
         """
-        files = self._list_documents(base_path)
-        if extension:
-            files = [file for file in files if file.endswith(extension)]
-        parameters = [(file, output_dir) for file in files]
-        with ThreadPool(processes=_CONCURRENT_THREADS) as pool:
-            results = pool.starmap(self._download_and_save_file, parameters)
-        return results
+        os.makedirs(output_dir, exist_ok=True)
+        with DownloadManifest(output_dir) as manifest, ThreadPoolExecutor(_CONCURRENT_THREADS) as executor:
+            pending: set[Future] = set()
+            for blob in self._iter_documents(base_path, extension):
+                # Submit as downloads complete rather than all at once, so the listing is consumed lazily
+                if len(pending) >= _CONCURRENT_THREADS:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from (future.result() for future in done)
+                pending.add(executor.submit(self._download_to_file, blob, output_dir, manifest))
+
+            for future in pending:
+                yield future.result()
 
 
-_container_client: ContainerClient | None = None
+_container_client: BaseContainerClient | None = None
+_credential: TokenCredential | None = None
 
 
-def get_container_client(environment_config: EnvironmentConfig) -> ContainerClient:
-    """Get the ContainerClient instance.
+def get_storage_credential(environment_config: EnvironmentConfig) -> TokenCredential:
+    """Get the credential used for blob storage, shared by the sync and async clients.
+
+    A single credential keeps one token cache per process, whichever client requests the token.
 
     Args:
         environment_config (EnvironmentConfig): The environment configuration.
 
     Returns:
-        ContainerClient: The ContainerClient instance.
+        TokenCredential: The credential instance.
     """
-    global _container_client
-    if _container_client is not None:
-        return _container_client
+    global _credential
+    if _credential is not None:
+        return _credential
 
     is_local = os.environ.get("ENVIRONMENT", "").lower() == "local"
 
-    credential: str | DefaultAzureCredential
     if environment_config.user_managed_identity.client_id and not is_local:
-        credential = ManagedIdentityCredential(
+        _credential = ManagedIdentityCredential(
             client_id=environment_config.user_managed_identity.client_id.value
         )
     else:
-        credential = DefaultAzureCredential()
+        _credential = DefaultAzureCredential()
+    return _credential
+
+
+def get_container_client(environment_config: EnvironmentConfig) -> BaseContainerClient:
+    """Get the container client of the configured blob storage backend.
+
+    Args:
+        environment_config (EnvironmentConfig): The environment configuration.
+
+    Returns:
+        BaseContainerClient: The ContainerClient, or LocalFileSystemContainerClient for the local backend.
+    """
+    global _container_client
+    if _container_client is not None:
+        return _container_client
+
+    if environment_config.blob_storage.uses_local_backend:
+        from .local_container_client import LocalFileSystemContainerClient
+        _container_client = LocalFileSystemContainerClient.from_environment_config(environment_config)
+        return _container_client
+
     container_client = AzureContainerClient(
         account_url=environment_config.blob_storage.account_url.value,
         container_name=environment_config.blob_storage.container_name.value,
-        credential=credential
+        credential=get_storage_credential(environment_config)
     )
     _container_client = ContainerClient(container_client)
     return _container_client
@@ -0,0 +1,168 @@
+import json
+import logging
+import math
+from typing import Optional
+from pydantic import BaseModel
+from semantic_kernel.contents import ChatMessageContent
+
+from constants import ContextBudgetConstants
+from models.environment_config import EnvironmentConfig
+from utils.token_counter import TokenCounter, get_token_counter
+
+
+class PackedContext(BaseModel):
+    """Collection data packed into a token budget."""
+    document_data_str: str
+    tokens: int
+    truncated_values: int
+
+
+def _get_message_text(message: ChatMessageContent) -> str:
+    """Gets the text of a chat message, including the calls and results of functions."""
+    if message.content:
+        return message.content
+    return " ".join(
+        str(getattr(item, "result", None) or getattr(item, "arguments", None) or "") for item in message.items
+    )
+
+
+class ContextPacker(object):
+    """Fits the collection data given to the LLM in the tokens left by the prompt.
+
+    When the collection data does not fit, field values are kept by priority, the most recent
+    ``date_of_document`` first and in their stored order otherwise, and the others are left out. The number
+    of values left out is added to the data as ``truncated_values``, so the model knows the data is partial.
+    """
+    _max_prompt_tokens: int
+    _token_counter: TokenCounter
+
+    def __init__(self, max_prompt_tokens: int, token_counter: TokenCounter):
+        """Initializes the ContextPacker.
+
+        Args:
+            max_prompt_tokens (int): The maximum number of tokens of the prompt, chat history and collection data.
+            token_counter (TokenCounter): Counts the tokens of a text.
+        """
+        self._max_prompt_tokens = max_prompt_tokens
+        self._token_counter = token_counter
+
+    def count_prompt_tokens(
+        self,
+        system_message: str,
+        user_message: str,
+        history_messages: list[ChatMessageContent],
+        request_definitions: list[dict]
+    ) -> int:
+        """Counts the tokens of the messages and definitions sent along with the collection data.
+
+        Args:
+            system_message (str): The system message, only sent when the chat history is empty.
+            user_message (str): The question of the user.
+            history_messages (list[ChatMessageContent]): The messages of the chat history.
+            request_definitions (list[dict]): The tool definitions and response format sent with the messages.
+
+        Returns:
+            int: The number of tokens.
+        """
+        texts = [_get_message_text(message) for message in history_messages] or [system_message]
+        texts.append(user_message)
+        message_tokens = sum(
+            self._token_counter.count(text) + ContextBudgetConstants.TOKENS_PER_MESSAGE for text in texts
+        )
+        return message_tokens + sum(
+            self._token_counter.count(json.dumps(definition)) for definition in request_definitions
+        )
+
+    def pack(self, document_data_str: str, reserved_tokens: int) -> PackedContext:
+        """Packs serialized collection data into the tokens that are not reserved.
+
+        Args:
+            document_data_str (str): The serialized collection data.
+            reserved_tokens (int): The tokens already used by the prompt, chat history and earlier tool results.
+
+        Returns:
+            PackedContext: The packed collection data. It exceeds the budget only when no value fits at all.
+        """
+        budget = max(self._max_prompt_tokens - reserved_tokens, 0)
+        tokens = self._token_counter.count(document_data_str)
+        if tokens <= budget:
+            return PackedContext(document_data_str=document_data_str, tokens=tokens, truncated_values=0)
+
+        # Every value of every field, as (date_of_document, lease position, field name, value position)
+        document_data = json.loads(document_data_str)
+        values = [
+            (value.get("date_of_document") or "", lease_position, name, position)
+            for lease_position, lease in enumerate(document_data.get("unstructured_data", []))
+            for name, field_values in lease.get("fields", {}).items()
+            for position, value in enumerate(field_values)
+        ]
+
+        # Sorting is stable, so values of the same date keep their stored order
+        values.sort(key=lambda value: value[0], reverse=True)
+        kept = self._select_values(document_data, values, budget)
+
+        # Counts add up closely but not exactly, so drop the values of lowest priority until the data fits
+        while True:
+            packed = self._build_packed_data(document_data, kept, len(values) - len(kept))
+            tokens = self._token_counter.count(packed)
+            if tokens <= budget or not kept:
+                break
+            del kept[-max(1, math.ceil(len(kept) * (tokens - budget) / tokens)):]
+
+        logging.info(
+            f"Packed collection {document_data.get('_id')} into {tokens} of {budget} available tokens, "
+            f"truncating {len(values) - len(kept)} of {len(values)} values"
+        )
+        return PackedContext(document_data_str=packed, tokens=tokens, truncated_values=len(values) - len(kept))
+
+    def _select_values(self, document_data: dict, values: list[tuple], budget: int) -> list[tuple]:
+        leases = document_data.get("unstructured_data", [])
+        used_tokens = self._token_counter.count(self._build_packed_data(document_data, [], len(values)))
+        kept_fields = set()
+        kept = []
+        for value in values:
+            _, lease_position, name, position = value
+            value_tokens = self._token_counter.count(json.dumps(leases[lease_position]["fields"][name][position]))
+            if (lease_position, name) not in kept_fields:
+                value_tokens += self._token_counter.count(json.dumps(name))
+            # A value that does not fit is left out, but later values of lower priority may still fit
+            if used_tokens + value_tokens > budget:
+                continue
+            used_tokens += value_tokens
+            kept_fields.add((lease_position, name))
+            kept.append(value)
+        return kept
+
+    def _build_packed_data(self, document_data: dict, kept: list[tuple], truncated_values: int) -> str:
+        kept_positions = {(lease_position, name, position) for _, lease_position, name, position in kept}
+        packed_leases = []
+        for lease_position, lease in enumerate(document_data.get("unstructured_data", [])):
+            fields = {}
+            for name, field_values in lease.get("fields", {}).items():
+                kept_values = [
+                    value for position, value in enumerate(field_values)
+                    if (lease_position, name, position) in kept_positions
+                ]
+                if kept_values:
+                    fields[name] = kept_values
+            packed_leases.append({**lease, "fields": fields})
+        return json.dumps({**document_data, "unstructured_data": packed_leases, "truncated_values": truncated_values})
+
+
+def get_context_packer(environment_config: EnvironmentConfig) -> Optional[ContextPacker]:
+    """Gets the packer of the collection data, if a token budget is configured.
+
+    Args:
+        environment_config (EnvironmentConfig): The environment configuration.
+
+    Returns:
+        Optional[ContextPacker]: The packer, or None if the collection data is not budgeted.
+    """
+    config = environment_config.context_budget
+    if config is None:
+        return None
+
+    return ContextPacker(
+        config.max_prompt_tokens.value,
+        get_token_counter(environment_config.llm.model_name.value)
+    )
@@ -0,0 +1,276 @@
+import json
+import logging
+import math
+import re
+from collections import Counter
+from typing import Any, Iterable, Iterator, Optional
+
+from constants import ContextPruningConstants
+from models.data_collection_config import ArrayFieldSchema, FieldDataCollectionConfig
+from models.environment_config import EnvironmentConfig
+
+
+# Splits snake_case and camelCase names as well as text into lowercase terms
+_TERM_PATTERN = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+")
+
+_STOP_WORDS = frozenset({
+    "a", "about", "all", "an", "and", "any", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from",
+    "give", "has", "have", "how", "i", "in", "is", "it", "its", "list", "many", "me", "much", "my", "of", "on",
+    "or", "please", "show", "tell", "that", "the", "their", "there", "these", "this", "those", "to", "was",
+    "what", "when", "where", "which", "who", "why", "will", "with", "you", "your",
+})
+
+# A question term in the name or description of a field counts as much as this many matching values
+_SCHEMA_TERM_WEIGHT = 3
+
+_VALUE_KEYS = ("valueString", "valueNumber", "valueInteger", "valueDate", "valueTime")
+
+
+def _tokenize(text: str) -> list[str]:
+    terms = (term.lower() for term in _TERM_PATTERN.findall(text))
+    return [term for term in terms if term not in _STOP_WORDS]
+
+
+def _iter_value_texts(field_value: Any) -> Iterator[str]:
+    """Yields the values of a serialized field, including the properties of its array items."""
+    if isinstance(field_value, list):
+        for item in field_value:
+            yield from _iter_value_texts(item)
+    elif isinstance(field_value, dict):
+        for key in _VALUE_KEYS:
+            if key in field_value:
+                yield str(field_value[key])
+        yield from _iter_value_texts(field_value.get("valueArray") or [])
+        yield from _iter_value_texts(list((field_value.get("valueObject") or {}).values()))
+
+
+def _get_schema_texts(config: FieldDataCollectionConfig) -> dict[str, str]:
+    """Gets the name and description of every configured field, along with those of its array items."""
+    schema_texts = {}
+    for lease_row in config.compiled.lease_rows:
+        for field_schema in lease_row.row.field_schema:
+            texts = [field_schema.name, field_schema.description]
+            if isinstance(field_schema, ArrayFieldSchema):
+                for item_schema in field_schema.items:
+                    texts.extend([item_schema.name, item_schema.description])
+            schema_texts[field_schema.name] = " ".join(texts)
+    return schema_texts
+
+
+def _get_idf(question_terms: Iterable[str], documents: list[Counter]) -> dict[str, float]:
+    """Gets the smoothed inverse document frequency of the question terms."""
+    return {
+        term: math.log((1 + len(documents)) / (1 + sum(1 for document in documents if term in document))) + 1
+        for term in question_terms
+    }
+
+
+def _score(question_terms: Iterable[str], document: Counter, idf: dict[str, float]) -> float:
+    return sum((1 + math.log(document[term])) * idf[term] for term in question_terms if document[term])
+
+
+class CollectionTermIndex(object):
+    """The parsed collection data and the terms of its fields and leases, which are the same for every question."""
+    __slots__ = ("document_data", "field_names", "field_documents", "lease_documents", "size")
+
+    def __init__(
+        self,
+        document_data: dict,
+        field_names: list[str],
+        field_documents: list[Counter],
+        lease_documents: list[Counter],
+        size: int
+    ):
+        """Initializes the CollectionTermIndex.
+
+        Args:
+            document_data (dict): The parsed collection data. It is shared, so it is never modified.
+            field_names (list[str]): The names of the fields of every lease, in their stored order.
+            field_documents (list[Counter]): The terms of each field, in the order of ``field_names``.
+            lease_documents (list[Counter]): The terms of each lease, in their stored order.
+            size (int): The approximate size of the index in bytes.
+        """
+        self.document_data = document_data
+        self.field_names = field_names
+        self.field_documents = field_documents
+        self.lease_documents = lease_documents
+        self.size = size
+
+
+class CollectionContextPruner(object):
+    """Keeps the fields and leases of the collection data that are relevant to a question.
+
+    Fields are scored by TF-IDF against the question, over their name, description and values; leases are
+    scored over their ID and values. The best fields and leases are kept within the configured limits, and
+    the number of leases and the names of the fields left out are added to the data, so the model does not
+    take what was left out for missing data.
+    """
+    _max_fields: int
+    _max_leases: int
+    _max_size_in_bytes: int
+
+    def __init__(
+        self,
+        max_fields: int = ContextPruningConstants.DEFAULT_MAX_FIELDS,
+        max_leases: int = ContextPruningConstants.DEFAULT_MAX_LEASES,
+        max_size_in_bytes: int = ContextPruningConstants.DEFAULT_MAX_SIZE_IN_BYTES
+    ):
+        """Initializes the CollectionContextPruner.
+
+        Args:
+            max_fields (int): The maximum number of fields kept in each lease.
+            max_leases (int): The maximum number of leases kept.
+            max_size_in_bytes (int): The maximum serialized size of the kept leases. The most relevant lease
+                is kept whatever its size.
+        """
+        self._max_fields = max_fields
+        self._max_leases = max_leases
+        self._max_size_in_bytes = max_size_in_bytes
+
+    def prune(self, document_data_str: str, question: str, config: FieldDataCollectionConfig) -> str:
+        """Prunes serialized collection data to the fields and leases relevant to a question.
+
+        Args:
+            document_data_str (str): The serialized collection data.
+            question (str): The question of the user.
+            config (FieldDataCollectionConfig): The configuration describing the fields.
+
+        Returns:
+            str: The serialized pruned collection data.
+        """
+        return self.prune_indexed(self.index(document_data_str, config), question)
+
+    def index(self, document_data_str: str, config: FieldDataCollectionConfig) -> CollectionTermIndex:
+        """Parses serialized collection data and counts the terms of its fields and leases.
+
+        The index does not depend on the question, so it is built once per collection data and kept with it.
+
+        Args:
+            document_data_str (str): The serialized collection data.
+            config (FieldDataCollectionConfig): The configuration describing the fields.
+
+        Returns:
+            CollectionTermIndex: The index of the collection data.
+        """
+        document_data = json.loads(document_data_str)
+        leases = document_data.get("unstructured_data", [])
+        field_names = list(dict.fromkeys(name for lease in leases for name in lease.get("fields", {})))
+
+        schema_texts = _get_schema_texts(config)
+        field_documents = []
+        for name in field_names:
+            document = Counter({
+                term: count * _SCHEMA_TERM_WEIGHT
+                for term, count in Counter(_tokenize(schema_texts.get(name, name))).items()
+            })
+            for lease in leases:
+                for text in _iter_value_texts(lease.get("fields", {}).get(name)):
+                    document.update(_tokenize(text))
+            field_documents.append(document)
+
+        lease_documents = []
+        for lease in leases:
+            document = Counter(_tokenize(str(lease.get("lease_id", ""))))
+            for text in _iter_value_texts(list(lease.get("fields", {}).values())):
+                document.update(_tokenize(text))
+            lease_documents.append(document)
+
+        # The parsed data and the term counts take about as much memory as the serialized data each
+        return CollectionTermIndex(
+            document_data,
+            field_names,
+            field_documents,
+            lease_documents,
+            size=2 * len(document_data_str)
+        )
+
+    def prune_indexed(self, index: CollectionTermIndex, question: str) -> str:
+        """Prunes indexed collection data to the fields and leases relevant to a question.
+
+        Fields are only left out when at least one field matches the question, since nothing tells which
+        fields matter otherwise. Leases are ranked by relevance, in their stored order when none matches.
+
+        Args:
+            index (CollectionTermIndex): The index of the collection data.
+            question (str): The question of the user.
+
+        Returns:
+            str: The serialized pruned collection data.
+        """
+        leases = index.document_data.get("unstructured_data", [])
+        question_terms = set(_tokenize(question))
+
+        field_names = index.field_names
+        kept_field_names = set(self._select_fields(field_names, index.field_documents, question_terms))
+        pruned_leases = [
+            {**lease, "fields": {
+                name: value for name, value in lease.get("fields", {}).items() if name in kept_field_names
+            }}
+            for lease in leases
+        ]
+        kept_lease_positions = self._select_leases(index.lease_documents, pruned_leases, question_terms)
+
+        omitted_field_names = [name for name in field_names if name not in kept_field_names]
+        omitted_leases = len(leases) - len(kept_lease_positions)
+        document_data = {**index.document_data, "unstructured_data": [
+            lease for position, lease in enumerate(pruned_leases) if position in kept_lease_positions
+        ]}
+        if omitted_leases:
+            document_data["omitted_leases"] = omitted_leases
+        if omitted_field_names:
+            document_data["omitted_fields"] = omitted_field_names
+
+        logging.info(
+            f"Kept {len(kept_lease_positions)} of {len(leases)} leases and {len(kept_field_names)} of "
+            f"{len(field_names)} fields of collection {document_data.get('_id')} for the question"
+        )
+        return json.dumps(document_data)
+
+    def _select_fields(self, field_names: list[str], documents: list[Counter], question_terms: set[str]) -> list[str]:
+        idf = _get_idf(question_terms, documents)
+        scores = [_score(question_terms, document, idf) for document in documents]
+        if not any(scores):
+            return field_names
+
+        ranked = sorted(range(len(field_names)), key=lambda index: -scores[index])
+        return [field_names[index] for index in ranked[:self._max_fields] if scores[index] > 0]
+
+    def _select_leases(
+        self,
+        documents: list[Counter],
+        pruned_leases: list[dict],
+        question_terms: set[str]
+    ) -> set[int]:
+        idf = _get_idf(question_terms, documents)
+        scores = [_score(question_terms, document, idf) for document in documents]
+        ranked = sorted(range(len(documents)), key=lambda position: -scores[position])
+
+        kept_positions = set()
+        size = 0
+        for position in ranked[:self._max_leases]:
+            size += len(json.dumps(pruned_leases[position]))
+            if kept_positions and size > self._max_size_in_bytes:
+                break
+            kept_positions.add(position)
+        return kept_positions
+
+
+def get_context_pruner(environment_config: EnvironmentConfig) -> Optional[CollectionContextPruner]:
+    """Gets the pruner of the collection data, if pruning is configured.
+
+    Args:
+        environment_config (EnvironmentConfig): The environment configuration.
+
+    Returns:
+        Optional[CollectionContextPruner]: The pruner, or None if the whole collection data is given to the LLM.
+    """
+    config = environment_config.context_pruning
+    if config is None:
+        return None
+
+    return CollectionContextPruner(
+        max_fields=config.max_fields.value if config.max_fields else ContextPruningConstants.DEFAULT_MAX_FIELDS,
+        max_leases=config.max_leases.value if config.max_leases else ContextPruningConstants.DEFAULT_MAX_LEASES,
+        max_size_in_bytes=config.max_size_in_bytes.value if config.max_size_in_bytes
+        else ContextPruningConstants.DEFAULT_MAX_SIZE_IN_BYTES
+    )
@@ -18,6 +18,7 @@ from azure.cosmos.exceptions import CosmosHttpResponseError
 from models.environment_config import EnvironmentConfig
 from models.api.v1 import QueryResponse
 from utils.citation_cleaner import remove_inline_citations_preserve_spacing
+from utils.async_utils import run_blocking
 
 
 class ChatMessageType(str, Enum):
@@ -169,6 +170,32 @@ class CosmosChatHistory(ChatHistory):
                 message.content = content
             self.messages.append(message)
 
+    async def store_messages_async(
+        self,
+        session_id: str,
+        user_id: str,
+    ) -> None:
+        """Store the chat history in the Cosmos DB without blocking the event loop.
+
+        Args:
+            session_id (str): The session ID.
+            user_id (str): The user ID.
+        """
+        await run_blocking(self.store_messages, session_id, user_id)
+
+    async def read_messages_async(
+        self,
+        session_id: str,
+        user_id: str,
+    ) -> None:
+        """Read the chat history from the Cosmos DB without blocking the event loop.
+
+        Args:
+            session_id (str): The session ID.
+            user_id (str): The user ID.
+        """
+        await run_blocking(self.read_messages, session_id, user_id)
+
     @property
     def user_message_limit_exceeded(self) -> bool:
         """Check if the user message limit has been hit.
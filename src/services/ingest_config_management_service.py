@@ -1,11 +1,42 @@
+import time
+from datetime import datetime
+from threading import Lock
+from cachetools import TTLCache
 from pymongo.collection import Collection
 from ._cosmos_client import CosmosClient
+from ._async_collection import AsyncCollection
 from models import FieldDataCollectionConfig
 from models.environment_config import EnvironmentConfig
+from utils.cache_invalidation import InvalidationSource, invalidate, register_invalidation_handler
+from .cache_invalidation_watcher import start_cache_invalidation_watcher
+
+
+# Seconds during which a cached configuration is served without checking its version in the database
+_CONFIG_VERSION_CHECK_INTERVAL = 30
+_VERSION_FIELDS = ("lease_config_hash", "updated_unix_timestamp")
+
+# Loaded configurations keyed by (collection full name, config ID). Each entry holds the configuration,
+# the version it was loaded at and the time its version was last checked
+config_cache = TTLCache(maxsize=100, ttl=86400)
+_config_cache_lock = Lock()
+
+
+def _get_version(config: dict) -> tuple:
+    return tuple(config.get(field) for field in _VERSION_FIELDS)
+
+
+def _invalidate_cached_config(document: dict):
+    with _config_cache_lock:
+        for cache_key in [cache_key for cache_key in config_cache if cache_key[1] == document.get("_id")]:
+            config_cache.pop(cache_key, None)
+
+
+register_invalidation_handler(InvalidationSource.CONFIGURATIONS, _invalidate_cached_config)
 
 
 class IngestConfigManagementService(object):
     _collection: Collection
+    _async_collection: AsyncCollection
 
     def __init__(self, cosmos_client: CosmosClient, environment_config: EnvironmentConfig):
         """Initializes the ConfigManagementService with the given CosmosClient.
@@ -18,6 +49,7 @@ class IngestConfigManagementService(object):
             environment_config.cosmosdb.db_name.value,
             environment_config.cosmosdb.configuration_collection_name.value
         )
+        self._async_collection = AsyncCollection(self._collection)
 
     def load_config(
         self,
@@ -25,17 +57,81 @@ class IngestConfigManagementService(object):
     ) -> FieldDataCollectionConfig | None:
         """Loads the configuration from the database.
 
+        Loaded configurations are cached in-process, along with their compiled form. A cached configuration
+        is served as-is for a short interval, after which only its version is read back to check it is still
+        current.
+
         Args:
             id (str): The ID of the configuration.
 
         Returns:
             dict: The configuration data.
         """
-        config = self._collection.find_one({"_id": id})
+        cache_key = (self._collection.full_name, id)
+        cached = self._get_cached_config(cache_key)
+
+        if cached is not None:
+            config, version, checked_at = cached
+            if time.monotonic() - checked_at < _CONFIG_VERSION_CHECK_INTERVAL:
+                return config
+
+            stored_version = self._collection.find_one({"_id": id}, dict.fromkeys(_VERSION_FIELDS, 1))
+            if self._refresh_cached_config(cache_key, cached, stored_version):
+                return config
+
+        return self._cache_loaded_config(cache_key, self._collection.find_one({"_id": id}))
+
+    async def load_config_async(
+        self,
+        id: str
+    ) -> FieldDataCollectionConfig | None:
+        """Loads the configuration from the database without blocking the event loop.
+
+        Shares the in-process cache of ``load_config``.
+
+        Args:
+            id (str): The ID of the configuration.
+
+        Returns:
+            FieldDataCollectionConfig | None: The configuration, or None if it does not exist.
+        """
+        cache_key = (self._collection.full_name, id)
+        cached = self._get_cached_config(cache_key)
+
+        if cached is not None:
+            config, version, checked_at = cached
+            if time.monotonic() - checked_at < _CONFIG_VERSION_CHECK_INTERVAL:
+                return config
+
+            stored_version = await self._async_collection.find_one({"_id": id}, dict.fromkeys(_VERSION_FIELDS, 1))
+            if self._refresh_cached_config(cache_key, cached, stored_version):
+                return config
+
+        return self._cache_loaded_config(cache_key, await self._async_collection.find_one({"_id": id}))
+
+    def _get_cached_config(self, cache_key: tuple) -> tuple | None:
+        with _config_cache_lock:
+            return config_cache.get(cache_key)
+
+    def _refresh_cached_config(self, cache_key: tuple, cached: tuple, stored_version: dict | None) -> bool:
+        """Marks a cached configuration as checked if its stored version has not changed."""
+        config, version, _ = cached
+        if stored_version is None or _get_version(stored_version) != version:
+            return False
+        with _config_cache_lock:
+            config_cache[cache_key] = (config, version, time.monotonic())
+        return True
+
+    def _cache_loaded_config(self, cache_key: tuple, stored_config: dict | None) -> FieldDataCollectionConfig | None:
+        if not stored_config:
+            with _config_cache_lock:
+                config_cache.pop(cache_key, None)
+            return None
 
-        if config:
-            return FieldDataCollectionConfig(**config)
-        return None
+        config = FieldDataCollectionConfig(**stored_config)
+        with _config_cache_lock:
+            config_cache[cache_key] = (config, _get_version(stored_config), time.monotonic())
+        return config
 
     def upsert_config(self, config: FieldDataCollectionConfig):
         """Upserts the configuration in the database.
@@ -45,9 +141,13 @@ class IngestConfigManagementService(object):
         """
         self._collection.update_one(
             {"_id": config.id},
-            {"$set": config.model_dump(by_alias=True)},
+            {"$set": {
+                **config.model_dump(by_alias=True),
+                "updated_unix_timestamp": datetime.now().timestamp()
+            }},
             upsert=True
         )
+        invalidate(InvalidationSource.CONFIGURATIONS, {"_id": config.id})
 
     @classmethod
     def from_environment_config(cls, environment_config: EnvironmentConfig):
@@ -60,4 +160,5 @@ class IngestConfigManagementService(object):
             ConfigManagementService: The ConfigManagementService instance.
         """
         cosmos_client = CosmosClient(environment_config.cosmosdb.endpoint.value)
+        start_cache_invalidation_watcher(environment_config)
         return cls(cosmos_client, environment_config)
@@ -1,20 +1,34 @@
+import asyncio
 import logging
-from datetime import date
+from datetime import date, datetime
+from pymongo import UpdateOne, errors
+from pydantic import TypeAdapter
 from pymongo.collection import Collection
-from typing import Optional
-
-from .container_client import ContainerClient, get_container_client
-from .mongo_lock_manager import MongoLockManager
+from functools import partial
+from typing import Callable, Iterable, Optional
+
+from .async_container_client import AsyncContainerClient, get_async_container_client
+from .container_client import BaseContainerClient, get_container_client
+from .mongo_lock_manager import LOCK_FIELDS, MongoLockManager
+from .mongo_index_manager import MongoCollection, ensure_indexes
+from ._async_collection import AsyncCollection
+from .collection_affinity_executor import CollectionAffinityExecutor, get_collection_affinity_executor
+from .collection_context_store import CollectionContextStore, build_lease_context
 from models.extracted_collection_documents import ExtractedLeaseCollection, \
     ExtractedLeaseField, \
     ExtractedCollectionDocuments, \
-    ExtractedCollectionInformationCollection
-from models.data_collection_config import DataType, FieldDataCollectionConfig
+    ExtractedCollectionInformationCollection, \
+    ExtractedLeaseDocument
+from models.data_collection_config import ArrayFieldSchema, FieldDataCollectionConfig
 from models.document_data_models import LeaseAgreementDocumentData
-from models.ingestion_models import IngestDocumentType
+from models.ingestion_models import ContentUnderstandingIngestOutput, IngestDocumentType
 from ._cosmos_client import CosmosClient
 from models.environment_config import EnvironmentConfig
-from utils.path_utils import build_adls_markdown_file_path, build_adls_pdf_file_path
+from utils.markdown_pages import PagedMarkdown, encode_paged_markdown, get_page_offsets
+from utils.path_utils import build_adls_markdown_file_path, build_adls_pdf_file_path, build_markdown_page_index_path
+from utils.cache_invalidation import InvalidationSource, invalidate
+from utils.field_encoding import encode_stored_fields
+from .cache_invalidation_watcher import start_cache_invalidation_watcher
 
 
 def _build_document_id(collection_id: str, config_hash: str) -> str:
@@ -30,27 +44,270 @@ def _build_document_id(collection_id: str, config_hash: str) -> str:
     return f"{collection_id}-{config_hash}"
 
 
+def _build_lease_document_id(collection_id: str, config_hash: str, lease_id: Optional[str]) -> str:
+    """Builds the document ID for a lease document in the per-lease storage layout.
+
+    Args:
+        collection_id (str): The collection ID.
+        config_hash (str): The configuration hash.
+        lease_id (Optional[str]): The lease ID.
+
+    Returns:
+        str: The lease document ID.
+    """
+    return f"{collection_id}-{config_hash}-{lease_id}"
+
+
+_COLLECTION_DOCUMENT_LEASES_PATH = "information.leases."
+
+# Stored field attributes that are not part of the LLM context
+_CONTEXT_EXCLUDED_FIELD_KEYS = (
+    "type",
+    "spans",
+    "confidence",
+    "markdown",
+    "category",
+    "subdocument_start_page",
+    "subdocument_end_page",
+)
+_CONTEXT_EXCLUDED_NESTED_FIELD_KEYS = ("type", "spans", "confidence")
+
+_DUPLICATE_KEY_ERROR_CODE = 11000
+
+# Stamped by every write, which the cache invalidation watcher and cached data versions rely on
+_VERSION_FIELD = "updated_unix_timestamp"
+
+# Set on collection-wide documents whose leases were copied into the per-lease storage layout
+_MIGRATED_FLAG = "lease_documents_migrated"
+
+# Validates all fields of a stored lease in a single call instead of one model_validate per field value
+_LEASE_FIELDS_ADAPTER = TypeAdapter(dict[str, list[LeaseAgreementDocumentData]])
+
+
+def _build_lease_context_projection(config: FieldDataCollectionConfig, leases_path: str = "") -> dict:
+    """Builds a Mongo projection that only returns what the LLM context needs from the stored leases.
+
+    Lock fields, blob paths and the per-value attributes that are not part of the LLM context (notably the
+    ``spans`` arrays) are excluded for every field in the configuration, including nested array items.
+
+    Args:
+        config (FieldDataCollectionConfig): The configuration object containing the field schemas.
+        leases_path (str): The path prefix of the leases within the stored document.
+
+    Returns:
+        dict: The exclusion projection.
+    """
+    projection = {
+        **dict.fromkeys(LOCK_FIELDS, 0),
+        f"{leases_path}original_documents": 0,
+        f"{leases_path}markdowns": 0,
+    }
+    for lease_row in config.compiled.lease_rows:
+        for field_schema in lease_row.row.field_schema:
+            field_path = f"{leases_path}fields.{field_schema.name}"
+            projection.update({f"{field_path}.{key}": 0 for key in _CONTEXT_EXCLUDED_FIELD_KEYS})
+
+            if not isinstance(field_schema, ArrayFieldSchema):
+                continue
+
+            item_path = f"{field_path}.valueArray"
+            projection.update({f"{item_path}.{key}": 0 for key in _CONTEXT_EXCLUDED_NESTED_FIELD_KEYS})
+            for item_schema in field_schema.items:
+                property_path = f"{item_path}.valueObject.{item_schema.name}"
+                projection.update({f"{property_path}.{key}": 0 for key in _CONTEXT_EXCLUDED_NESTED_FIELD_KEYS})
+
+    return projection
+
+
+def _dump_lease(lease: ExtractedLeaseCollection) -> dict:
+    """Serializes a lease for storage, packing the sources and spans of its fields.
+
+    Lock fields are left to the lock manager, so a write never undoes a renewal or a takeover of the lock.
+    """
+    dump = lease.model_dump(by_alias=True, mode='json', exclude_defaults=True, exclude=set(LOCK_FIELDS))
+    encode_stored_fields(dump.get("fields", {}))
+    return dump
+
+
+def _dump_collection_document(document: ExtractedCollectionDocuments) -> dict:
+    """Serializes a collection-wide document for storage.
+
+    Leases that were never hydrated are written back as they were stored.
+    """
+    dump = document.model_dump(
+        by_alias=True,
+        mode='json',
+        exclude_defaults=True,
+        exclude={"information", *LOCK_FIELDS}
+    )
+    dump["information"] = {
+        "leases": [lease if isinstance(lease, dict) else _dump_lease(lease) for lease in document.information.leases]
+    }
+    return dump
+
+
+def _merge_stored_leases(lease_documents: Iterable[dict], existing_document: Optional[dict]) -> list[dict]:
+    """Merges the leases read from both storage layouts.
+
+    Leases stored in the per-lease layout take precedence over their copy in the collection-wide document.
+    """
+    leases = list(lease_documents)
+    if existing_document and existing_document.get("collection_id") is not None:
+        migrated_lease_ids = {lease.get("lease_id") for lease in leases}
+        leases.extend(
+            lease for lease in existing_document.get("information", {}).get("leases", [])
+            if lease.get("lease_id") not in migrated_lease_ids
+        )
+    return leases
+
+
+def _build_stored_lease_context(collection_id: str, lease: ExtractedLeaseCollection) -> tuple[str, dict]:
+    """Builds the LLM context of a lease the way a query builds it from the stored lease.
+
+    Args:
+        collection_id (str): The collection ID.
+        lease (ExtractedLeaseCollection): The lease.
+
+    Returns:
+        tuple[str, dict]: The serialized lease and its citation mappings.
+    """
+    # Dumped the way leases are stored, and validated the way they are read back
+    fields = _LEASE_FIELDS_ADAPTER.validate_python(
+        lease.model_dump(by_alias=True, exclude_defaults=True, include={"fields"}).get("fields", {})
+    )
+    return build_lease_context(collection_id, lease.lease_id, fields)
+
+
+def _store_lease_context(
+    context_store: CollectionContextStore,
+    collection_id: str,
+    lease_config_hash: str,
+    lease: ExtractedLeaseCollection
+):
+    """Stores the LLM context of a lease whose fields were just written.
+
+    The fields are already written, so a lease whose context cannot be stored is discarded from the store
+    instead, and the next query builds its collection from the stored fields.
+
+    Args:
+        context_store (CollectionContextStore): The store of the serialized leases.
+        collection_id (str): The collection ID.
+        lease_config_hash (str): The hash of the lease configuration.
+        lease (ExtractedLeaseCollection): The written lease.
+    """
+    try:
+        context_store.save_lease_context(
+            collection_id,
+            lease_config_hash,
+            lease.lease_id,
+            _build_stored_lease_context(collection_id, lease)
+        )
+    except Exception as e:
+        logging.error(f"Failed to store the context of lease {lease.lease_id} in collection {collection_id}: {e}")
+        context_store.discard_lease_context(collection_id, lease_config_hash, lease.lease_id)
+
+
+def _without_stored_leases(document: dict) -> dict:
+    """Returns a shallow copy of a stored collection document with an empty lease list."""
+    if isinstance(document.get("information"), dict):
+        return {**document, "information": {**document["information"], "leases": []}}
+    return document
+
+
+# Recorded in the ingested documents collection once the documents of a collection stored before the
+# collection existed are recorded, as the entry of a path no document can have
+_BACKFILLED_DOCUMENT_PATH = ""
+
+
+def _build_ingested_document_key(
+    collection_id: str,
+    lease_id: Optional[str],
+    document_path: str,
+    lease_config_hash: str
+) -> dict:
+    """Builds the key of an entry in the ingested documents collection.
+
+    Args:
+        collection_id (str): The collection ID.
+        lease_id (Optional[str]): The lease ID.
+        document_path (str): The path of the original PDF document.
+        lease_config_hash (str): The configuration hash.
+
+    Returns:
+        dict: The key, usable both as query and as the inserted document.
+    """
+    return {
+        "collection_id": collection_id,
+        "lease_id": lease_id,
+        "document_path": document_path,
+        "lease_config_hash": lease_config_hash,
+    }
+
+
 class IngestionCollectionDocumentService(object):
     _collection_documents_collection: Collection
-    _container_client: ContainerClient
+    _container_client: BaseContainerClient
     _mongo_lock_manager: MongoLockManager
+    _lease_documents_collection: Optional[Collection]
+    _lease_mongo_lock_manager: Optional[MongoLockManager]
+    _ingested_documents_collection: Optional[Collection]
+    _context_store: Optional[CollectionContextStore]
+    _collection_affinity_executor: Optional[CollectionAffinityExecutor]
 
     def __init__(
         self,
         collection_documents_collection: Collection,
-        container_client: ContainerClient,
+        container_client: BaseContainerClient,
         mongo_lock_manager: MongoLockManager,
+        lease_documents_collection: Optional[Collection] = None,
+        lease_mongo_lock_manager: Optional[MongoLockManager] = None,
+        ingested_documents_collection: Optional[Collection] = None,
+        async_container_client_factory: Optional[Callable[[], AsyncContainerClient]] = None,
+        context_store: Optional[CollectionContextStore] = None,
+        collection_affinity_executor: Optional[CollectionAffinityExecutor] = None,
     ):
         """Initializes the IngestionConfigurationService with the given CosmosClient.
 
         Args:
             collection_documents_collection (Collection): The MongoDB collection to use for extracted documents.
-            container_client (ContainerClient): The Azure ContainerClient instance.
+            container_client (BaseContainerClient): The container client of the blob storage backend.
             mongo_lock_manager (MongoLockManager): The MongoLockManager instance for managing locks.
+            lease_documents_collection (Optional[Collection]): The MongoDB collection for the per-lease storage
+                layout. When set, new data is written to one document per lease and reads merge both layouts.
+            lease_mongo_lock_manager (Optional[MongoLockManager]): The MongoLockManager for the lease documents
+                collection. Required when lease_documents_collection is set.
+            ingested_documents_collection (Optional[Collection]): The MongoDB collection indexing which PDF
+                documents have been ingested. When set, duplicate checks are answered by a point lookup.
+            async_container_client_factory (Optional[Callable[[], AsyncContainerClient]]): Creates an async
+                blob client. When set, the markdowns of several documents are uploaded concurrently on one
+                event loop rather than on a thread each.
+            context_store (Optional[CollectionContextStore]): The store of the LLM context of every lease. When
+                set, the context of each ingested lease is serialized and stored along with its fields.
+            collection_affinity_executor (Optional[CollectionAffinityExecutor]): Runs the writes of a collection
+                on its worker slot. When set, the writes to a collection run one at a time in arrival order.
         """
+        if lease_documents_collection is not None and lease_mongo_lock_manager is None:
+            raise ValueError("A lease Mongo lock manager must be provided with the lease documents collection.")
+
         self._container_client = container_client
         self._mongo_lock_manager = mongo_lock_manager
         self._collection_documents_collection = collection_documents_collection
+        self._lease_documents_collection = lease_documents_collection
+        self._lease_mongo_lock_manager = lease_mongo_lock_manager
+        self._ingested_documents_collection = ingested_documents_collection
+        self._async_container_client_factory = async_container_client_factory
+        self._context_store = context_store
+        self._collection_affinity_executor = collection_affinity_executor
+
+    @property
+    def uses_lease_documents(self) -> bool:
+        """Whether new data is written using the per-lease storage layout."""
+        return self._lease_documents_collection is not None
+
+    @property
+    def context_store(self) -> Optional[CollectionContextStore]:
+        """The store of the LLM context serialized at ingest time, if one is configured."""
+        return self._context_store
 
     def ingest_analyzer_output(
         self,
@@ -73,51 +330,17 @@ class IngestionCollectionDocumentService(object):
             data (dict): The analyzer output data.
             config (FieldDataCollectionConfig): The configuration object containing lease configuration hash.
         """
-        field_list = self._extract_field_list(config)
-        pdf_file_path = build_adls_pdf_file_path(
-            doc_type,
-            collection_id,
-            filename,
-            lease_id
-        )
-        markdown_file_path = build_adls_markdown_file_path(
+        self._ingest_output(
             doc_type,
             collection_id,
+            lease_id,
             filename,
-            lease_id
+            date_of_document,
+            data,
+            config,
+            is_classifier_output=False
         )
 
-        document_id = _build_document_id(collection_id, config.lease_config_hash)
-
-        try:
-            self._mongo_lock_manager.wait(document_id)
-            existing_document = self._get_or_create_document(document_id, collection_id, config)
-            try:
-                lease = self._get_or_create_lease(existing_document, lease_id, pdf_file_path, markdown_file_path)
-            except ValueError as e:
-                logging.warning(f"Lease already exists: {e}")
-                return
-
-            self._update_markdowns_from_analyzer_output(data, markdown_file_path)
-
-            self._update_fields_from_analyzer_output(lease,
-                                                     data,
-                                                     field_list,
-                                                     date_of_document,
-                                                     markdown_file_path,
-                                                     pdf_file_path)
-            self._upsert_document(existing_document)
-
-            logging.info(
-                f"Data ingested from analyzer output successfully for collection_id={collection_id}, lease_id={lease_id}, "
-                f"lease_config_hash={config.lease_config_hash}"
-            )
-        except Exception as e:
-            logging.error(f"Error occurred while ingesting data: {e}")
-            raise
-        finally:
-            self._mongo_lock_manager.release_lock(document_id)
-
     def ingest_classifier_output(
         self,
         doc_type: IngestDocumentType,
@@ -139,51 +362,273 @@ class IngestionCollectionDocumentService(object):
             data (dict): The classifier output data.
             config (FieldDataCollectionConfig): The configuration object containing lease configuration hash.
         """
-        field_list = self._extract_field_list(config)
-        pdf_file_path = build_adls_pdf_file_path(
+        self._ingest_output(
             doc_type,
             collection_id,
+            lease_id,
             filename,
-            lease_id
+            date_of_document,
+            data,
+            config,
+            is_classifier_output=True
         )
-        markdown_file_path = build_adls_markdown_file_path(
-            doc_type,
-            collection_id,
-            filename,
-            lease_id
+
+    def ingest_many(
+        self,
+        outputs: list[ContentUnderstandingIngestOutput],
+        config: FieldDataCollectionConfig
+    ):
+        """Ingests a batch of analyzer and classifier outputs into the database.
+
+        Outputs are grouped by the Mongo document they are stored in, so each document is locked, read and
+        written once per batch, and the markdowns of a document are uploaded as one batch.
+
+        Args:
+            outputs (list[ContentUnderstandingIngestOutput]): The outputs to ingest.
+            config (FieldDataCollectionConfig): The configuration object containing lease configuration hash.
+        """
+        outputs_by_document_id: dict[str, list[ContentUnderstandingIngestOutput]] = {}
+        for output in outputs:
+            outputs_by_document_id.setdefault(self._get_storage_document_id(output, config), []).append(output)
+
+        for document_id, document_outputs in outputs_by_document_id.items():
+            self._ingest_outputs(document_id, document_outputs, config)
+
+    def _ingest_output(
+        self,
+        doc_type: IngestDocumentType,
+        collection_id: str,
+        lease_id: Optional[str],
+        filename: str,
+        date_of_document: date,
+        data: dict,
+        config: FieldDataCollectionConfig,
+        is_classifier_output: bool
+    ):
+        output = ContentUnderstandingIngestOutput(
+            doc_type=doc_type,
+            collection_id=collection_id,
+            lease_id=lease_id,
+            filename=filename,
+            date_of_document=date_of_document,
+            data=data,
+            is_classifier_output=is_classifier_output
         )
+        self._ingest_outputs(self._get_storage_document_id(output, config), [output], config)
 
-        document_id = _build_document_id(collection_id, config.lease_config_hash)
+    def _get_storage_document_id(
+        self,
+        output: ContentUnderstandingIngestOutput,
+        config: FieldDataCollectionConfig
+    ) -> str:
+        if self.uses_lease_documents:
+            return _build_lease_document_id(output.collection_id, config.lease_config_hash, output.lease_id)
+        return _build_document_id(output.collection_id, config.lease_config_hash)
+
+    def _ingest_outputs(
+        self,
+        document_id: str,
+        outputs: list[ContentUnderstandingIngestOutput],
+        config: FieldDataCollectionConfig
+    ):
+        """Ingests outputs stored in the same Mongo document, on the worker slot of their collection if configured.
+
+        Only the Mongo read-modify-write is run on the slot. The Content Understanding calls that produced the
+        outputs, the markdown uploads and the wait for the document lock all run on the calling thread, so a
+        slot is never held up by a slow analysis, upload or contended lock.
+
+        Args:
+            document_id (str): The ID of the Mongo document the outputs are stored in.
+            outputs (list[ContentUnderstandingIngestOutput]): The outputs to ingest.
+            config (FieldDataCollectionConfig): The configuration object containing lease configuration hash.
+        """
+        lock_manager = self._lease_mongo_lock_manager if self.uses_lease_documents else self._mongo_lock_manager
 
         try:
-            self._mongo_lock_manager.wait(document_id)
-            existing_document = self._get_or_create_document(document_id, collection_id, config)
-            try:
-                lease = self._get_or_create_lease(existing_document, lease_id, pdf_file_path, markdown_file_path)
-            except ValueError as e:
-                logging.warning(f"Lease already exists: {e}")
+            # Markdowns are only uploaded where no file exists yet, so they need neither the lock nor the slot
+            self._upload_markdowns(self._get_markdowns_to_upload(outputs))
+
+            if not lock_manager.wait(document_id):
+                raise RuntimeError(f"Timed out waiting for the lock on document {document_id}.")
+
+            if self._collection_affinity_executor is None:
+                written = self._write_outputs(document_id, outputs, config)
+            else:
+                written = self._collection_affinity_executor.submit(
+                    outputs[0].collection_id,
+                    self._write_outputs,
+                    document_id,
+                    outputs,
+                    config
+                ).result()
+
+            if written is None:
                 return
+            existing_document, ingested_outputs = written
+
+            # Stored once the fields are written, so the store never serves values that were not written
+            self._save_lease_contexts(
+                existing_document,
+                {output.lease_id for output, _ in ingested_outputs},
+                config
+            )
+            invalidate(InvalidationSource.COLLECTION_DOCUMENTS, {
+                "_id": document_id,
+                "collection_id": existing_document.collection_id,
+                "lease_config_hash": config.lease_config_hash
+            })
+
+            if self._ingested_documents_collection is not None:
+                self._record_ingested_documents([
+                    _build_ingested_document_key(
+                        output.collection_id,
+                        output.lease_id,
+                        pdf_file_path,
+                        config.lease_config_hash
+                    )
+                    for output, pdf_file_path in ingested_outputs
+                ])
+
+            for output, _ in ingested_outputs:
+                output_type = "classifier" if output.is_classifier_output else "analyzer"
+                logging.info(
+                    f"Data ingested from {output_type} output successfully for collection_id={output.collection_id}, "
+                    f"lease_id={output.lease_id}, lease_config_hash={config.lease_config_hash}"
+                )
+        except Exception as e:
+            logging.error(f"Error occurred while ingesting data: {e}")
+            raise
+        finally:
+            lock_manager.release_lock(document_id)
+
+    def _write_outputs(
+        self,
+        document_id: str,
+        outputs: list[ContentUnderstandingIngestOutput],
+        config: FieldDataCollectionConfig
+    ) -> Optional[tuple[ExtractedCollectionDocuments | ExtractedLeaseDocument, list[tuple]]]:
+        """Writes outputs stored in the same locked Mongo document with a single read-modify-write.
+
+        Args:
+            document_id (str): The ID of the Mongo document the outputs are stored in.
+            outputs (list[ContentUnderstandingIngestOutput]): The outputs to ingest.
+            config (FieldDataCollectionConfig): The configuration object containing lease configuration hash.
+
+        Returns:
+            Optional[tuple[ExtractedCollectionDocuments | ExtractedLeaseDocument, list[tuple]]]: The written
+                document and the written outputs paired with their PDF paths, or None if every output was skipped.
+        """
+        field_list = config.compiled.field_names
+        if self.uses_lease_documents:
+            existing_document = self._get_or_create_lease_document(
+                document_id,
+                outputs[0].collection_id,
+                outputs[0].lease_id,
+                config
+            )
+        else:
+            existing_document = self._get_or_create_document(document_id, outputs[0].collection_id, config)
 
-            self._update_markdowns_from_classifier_output(data, markdown_file_path)
+        ingested_outputs: list[tuple[ContentUnderstandingIngestOutput, str]] = []
+        for output in outputs:
+            pdf_file_path = self._apply_output(existing_document, output, field_list, config)
+            if pdf_file_path is not None:
+                ingested_outputs.append((output, pdf_file_path))
+
+        if not ingested_outputs:
+            return None
+
+        if self.uses_lease_documents:
+            self._upsert_lease_document(existing_document)
+        else:
+            self._upsert_document(existing_document)
+        return existing_document, ingested_outputs
+
+    def _apply_output(
+        self,
+        existing_document: ExtractedCollectionDocuments | ExtractedLeaseDocument,
+        output: ContentUnderstandingIngestOutput,
+        field_list: frozenset[str],
+        config: FieldDataCollectionConfig
+    ) -> Optional[str]:
+        """Applies a single output to a loaded document.
+
+        Args:
+            existing_document (ExtractedCollectionDocuments | ExtractedLeaseDocument): The loaded document.
+            output (ContentUnderstandingIngestOutput): The output to apply.
+            field_list (frozenset[str]): The allowed field names.
+            config (FieldDataCollectionConfig): The configuration object containing lease configuration hash.
+
+        Returns:
+            Optional[str]: The path of the ingested PDF document, or None if the output was skipped.
+        """
+        pdf_file_path = build_adls_pdf_file_path(
+            output.doc_type,
+            output.collection_id,
+            output.filename,
+            output.lease_id
+        )
+        markdown_file_path = build_adls_markdown_file_path(
+            output.doc_type,
+            output.collection_id,
+            output.filename,
+            output.lease_id
+        )
+        if self.uses_lease_documents:
+            lease = existing_document
+        else:
+            lease = self._get_or_create_lease(existing_document, output.lease_id)
+        try:
+            self._register_lease_paths(
+                lease,
+                output.collection_id,
+                config.lease_config_hash,
+                pdf_file_path,
+                markdown_file_path
+            )
+        except ValueError as e:
+            logging.warning(f"Skipping output: {e}")
+            return None
 
+        if output.is_classifier_output:
             self._update_fields_from_classifier_output(lease,
-                                                       data,
+                                                       output.data,
                                                        field_list,
-                                                       date_of_document,
+                                                       output.date_of_document,
                                                        markdown_file_path,
                                                        pdf_file_path)
+        else:
+            self._update_fields_from_analyzer_output(lease,
+                                                     output.data,
+                                                     field_list,
+                                                     output.date_of_document,
+                                                     markdown_file_path,
+                                                     pdf_file_path)
+        return pdf_file_path
 
-            self._upsert_document(existing_document)
+    def _save_lease_contexts(
+        self,
+        existing_document: ExtractedCollectionDocuments | ExtractedLeaseDocument,
+        lease_ids: set[Optional[str]],
+        config: FieldDataCollectionConfig
+    ):
+        """Serializes the LLM context of the updated leases of a document and stores it, if a store is configured.
 
-            logging.info(
-                f"Data ingested from classifier output successfully for collection_id={collection_id}, lease_id={lease_id}, "
-                f"lease_config_hash={config.lease_config_hash}"
-            )
-        except Exception as e:
-            logging.error(f"Error occurred while ingesting data: {e}")
-            raise
-        finally:
-            self._mongo_lock_manager.release_lock(document_id)
+        Args:
+            existing_document (ExtractedCollectionDocuments | ExtractedLeaseDocument): The updated document.
+            lease_ids (set[Optional[str]]): The IDs of the updated leases.
+            config (FieldDataCollectionConfig): The configuration object containing lease configuration hash.
+        """
+        if self._context_store is None:
+            return
+
+        for lease_id in lease_ids:
+            if self.uses_lease_documents:
+                lease = existing_document
+            else:
+                lease = existing_document.get_lease(lease_id)
+
+            _store_lease_context(self._context_store, existing_document.collection_id, config.lease_config_hash, lease)
 
     def clean_empty_document(
             self,
@@ -199,8 +644,9 @@ class IngestionCollectionDocumentService(object):
             return
 
         try:
-            # Check if the document only contains the BaseMongoLockable fields
-            ExtractedCollectionDocuments(**existing_document)
+            # Check if the document only contains the BaseMongoLockable fields. The leases are not needed for
+            # this check, so they are left out of the validation
+            ExtractedCollectionDocuments(**_without_stored_leases(existing_document))
         except Exception:
             logging.info(f"Error parsing document. Deleting empty document with ID {document_id}")
             self._collection_documents_collection.delete_one({"_id": document_id})
@@ -223,42 +669,154 @@ class IngestionCollectionDocumentService(object):
         Returns:
             bool: True if the lease document exists, False otherwise.
         """
+        original_document_path = build_adls_pdf_file_path(
+            doc_type,
+            collection_id,
+            filename,
+            lease_id,
+        )
+
+        if self._ingested_documents_collection is None:
+            return self._is_document_in_stored_leases(collection_id, lease_id, original_document_path, config)
+
+        ingested_document_key = _build_ingested_document_key(
+            collection_id,
+            lease_id,
+            original_document_path,
+            config.lease_config_hash
+        )
+        if self._ingested_documents_collection.find_one(ingested_document_key, {"_id": 1}):
+            return True
+
+        # Documents ingested before the index existed are recorded once per collection
+        backfilled_key = _build_ingested_document_key(
+            collection_id,
+            None,
+            _BACKFILLED_DOCUMENT_PATH,
+            config.lease_config_hash
+        )
+        if not self._ingested_documents_collection.find_one(backfilled_key, {"_id": 1}):
+            return ingested_document_key in self._backfill_ingested_documents(collection_id, config)
+
+        # An ingest that stopped between writing the fields and recording the document left no entry, so a
+        # miss is confirmed against the stored lease and recorded if the document is there
+        if not self._is_document_in_stored_leases(collection_id, lease_id, original_document_path, config):
+            return False
+        self._record_ingested_document(ingested_document_key)
+        return True
+
+    def _backfill_ingested_documents(self, collection_id: str, config: FieldDataCollectionConfig) -> list[dict]:
+        """Records the documents of a collection that were ingested before the ingested documents index existed.
+
+        Args:
+            collection_id (str): The collection ID.
+            config (FieldDataCollectionConfig): The configuration object containing lease configuration hash.
+
+        Returns:
+            list[dict]: The keys of the recorded documents.
+        """
+        stored_paths = set()
+        existing_document = self._collection_documents_collection.find_one(
+            {"_id": _build_document_id(collection_id, config.lease_config_hash)},
+            {"information.leases.lease_id": 1, "information.leases.original_documents": 1}
+        )
+        for lease in ((existing_document or {}).get("information") or {}).get("leases", []):
+            stored_paths.update((lease.get("lease_id"), path) for path in lease.get("original_documents", []))
+
+        if self.uses_lease_documents:
+            for lease_document in self._lease_documents_collection.find(
+                {"collection_id": collection_id, "lease_config_hash": config.lease_config_hash},
+                {"lease_id": 1, "original_documents": 1}
+            ):
+                stored_paths.update(
+                    (lease_document.get("lease_id"), path) for path in lease_document.get("original_documents", [])
+                )
+
+        ingested_document_keys = [
+            _build_ingested_document_key(collection_id, lease_id, path, config.lease_config_hash)
+            for lease_id, path in stored_paths
+        ]
+        if ingested_document_keys:
+            self._record_ingested_documents(ingested_document_keys)
+
+        # Recorded last, so the backfill is run again if it fails before every document is recorded
+        self._record_ingested_document(_build_ingested_document_key(
+            collection_id,
+            None,
+            _BACKFILLED_DOCUMENT_PATH,
+            config.lease_config_hash
+        ))
+        logging.info(
+            f"Recorded {len(ingested_document_keys)} documents ingested before the ingested documents index for "
+            f"collection_id={collection_id}, lease_config_hash={config.lease_config_hash}"
+        )
+        return ingested_document_keys
+
+    def _is_document_in_stored_leases(
+            self,
+            collection_id: str,
+            lease_id: Optional[str],
+            original_document_path: str,
+            config: FieldDataCollectionConfig) -> bool:
+        if self.uses_lease_documents:
+            lease_document = self._lease_documents_collection.find_one(
+                {"_id": _build_lease_document_id(collection_id, config.lease_config_hash, lease_id)},
+                {"original_documents": 1}
+            )
+            if lease_document and original_document_path in lease_document.get("original_documents", []):
+                return True
+
+        # Fall back to the collection-wide document for leases that have not been migrated yet
         document_id = _build_document_id(collection_id, config.lease_config_hash)
         existing_document = self._collection_documents_collection.find_one(
-            {"_id": document_id}
+            {"_id": document_id},
+            {"information.leases.lease_id": 1, "information.leases.original_documents": 1}
         )
 
         if not existing_document:
             return False
 
-        existing_document = ExtractedCollectionDocuments(**existing_document)
-        lease = next((lease for lease in existing_document.information.leases if lease.lease_id == lease_id), None)
+        # Only the paths of the requested lease are needed, so the stored leases are not validated
+        stored_leases = (existing_document.get("information") or {}).get("leases", [])
+        lease = next((lease for lease in stored_leases if lease.get("lease_id") == lease_id), None)
 
         if not lease:
             return False
 
-        original_document_path = build_adls_pdf_file_path(
-            doc_type,
-            collection_id,
-            filename,
-            lease_id,
-        )
-
-        if original_document_path not in lease.original_documents:
+        if original_document_path not in lease.get("original_documents", []):
             return False
 
         return True
 
-    def _extract_field_list(self, config: FieldDataCollectionConfig):
-        field_list = []
-        for collection_row in config.collection_rows:
-            if collection_row.data_type is not DataType.LEASE_AGREEMENT:
-                continue
+    def _record_ingested_documents(self, ingested_document_keys: list[dict]):
+        if len(ingested_document_keys) == 1:
+            self._record_ingested_document(ingested_document_keys[0])
+            return
 
-            for field_schema in collection_row.field_schema:
-                field_list.append(field_schema.name)
+        ingested_unix_timestamp = int(datetime.now().timestamp())
+        try:
+            self._ingested_documents_collection.bulk_write(
+                [
+                    UpdateOne(key, {"$setOnInsert": {"ingested_unix_timestamp": ingested_unix_timestamp}}, upsert=True)
+                    for key in ingested_document_keys
+                ],
+                ordered=False
+            )
+        except errors.BulkWriteError as e:
+            # Entries recorded concurrently fail on the unique index; anything else is a real failure
+            if any(error.get("code") != _DUPLICATE_KEY_ERROR_CODE for error in e.details.get("writeErrors", [])):
+                raise
 
-        return field_list
+    def _record_ingested_document(self, ingested_document_key: dict):
+        try:
+            self._ingested_documents_collection.update_one(
+                ingested_document_key,
+                {"$setOnInsert": {"ingested_unix_timestamp": int(datetime.now().timestamp())}},
+                upsert=True
+            )
+        except errors.DuplicateKeyError:
+            # A concurrent ingest of the same document recorded it first
+            pass
 
     def _get_or_create_document(
         self,
@@ -279,7 +837,7 @@ class IngestionCollectionDocumentService(object):
                 **(existing_document or {})  # Include MongoLock data
             )
         else:
-            document = ExtractedCollectionDocuments(**existing_document)
+            document = ExtractedCollectionDocuments.from_stored(existing_document)
             document.config_id = config.id
 
         document.id = document_id
@@ -289,11 +847,9 @@ class IngestionCollectionDocumentService(object):
     def _get_or_create_lease(
         self,
         existing_document: ExtractedCollectionDocuments,
-        lease_id: str,
-        pdf_path: str,
-        markdown_path: str
-    ):
-        lease = next((lease for lease in existing_document.information.leases if lease.lease_id == lease_id), None)
+        lease_id: str
+    ) -> ExtractedLeaseCollection:
+        lease = existing_document.get_lease(lease_id)
         if lease is None:
             lease = ExtractedLeaseCollection(
                 lease_id=lease_id,
@@ -305,30 +861,99 @@ class IngestionCollectionDocumentService(object):
             )
             existing_document.information.leases.append(lease)
 
-        if pdf_path not in lease.original_documents:
-            lease.original_documents.append(pdf_path)
+        return lease
+
+    def _get_or_create_lease_document(
+        self,
+        lease_document_id: str,
+        collection_id: str,
+        lease_id: Optional[str],
+        config: FieldDataCollectionConfig,
+    ) -> ExtractedLeaseDocument:
+        existing_document = self._lease_documents_collection.find_one(
+            {"_id": lease_document_id}
+        )
+
+        if not existing_document or existing_document.get("collection_id") is None:
+            # A lease document replaces the collection-wide copy of its lease on read, so it starts from that copy
+            stored_lease = self._find_collection_document_lease(collection_id, config.lease_config_hash, lease_id)
+            document = ExtractedLeaseDocument(
+                collection_id=collection_id,
+                config_id=config.id,
+                lease_config_hash=config.lease_config_hash,
+                **{
+                    "lease_id": lease_id,
+                    "original_documents": [],
+                    "markdowns": [],
+                    "fields": {},
+                    **(existing_document or {}),  # Include MongoLock data
+                    **(stored_lease or {}),
+                }
+            )
         else:
-            logging.warning(
-                f"PDF file already ingested for lease_id={lease_id} and collection_id={existing_document.collection_id} "
-                f"with hash={existing_document.lease_config_hash}."
+            document = ExtractedLeaseDocument(**existing_document)
+            document.config_id = config.id
+
+        document.id = lease_document_id
+
+        return document
+
+    def _find_collection_document_lease(
+        self,
+        collection_id: str,
+        config_hash: str,
+        lease_id: Optional[str]
+    ) -> Optional[dict]:
+        """Finds a lease in the collection-wide document, as stored before the per-lease storage layout.
+
+        Args:
+            collection_id (str): The collection ID.
+            config_hash (str): The configuration hash.
+            lease_id (Optional[str]): The lease ID.
+
+        Returns:
+            Optional[dict]: The stored lease, or None if the collection-wide document has no such lease.
+        """
+        existing_document = self._collection_documents_collection.find_one(
+            {"_id": _build_document_id(collection_id, config_hash)},
+            {"collection_id": 1, "information.leases": {"$elemMatch": {"lease_id": lease_id}}}
+        )
+        if not existing_document or existing_document.get("collection_id") is None:
+            return None
+
+        stored_leases = (existing_document.get("information") or {}).get("leases", [])
+        return next((lease for lease in stored_leases if lease.get("lease_id") == lease_id), None)
+
+    def _register_lease_paths(
+        self,
+        lease: ExtractedLeaseCollection,
+        collection_id: str,
+        lease_config_hash: str,
+        pdf_path: str,
+        markdown_path: str
+    ):
+        # The fields of a document already in the lease were stored with it, so they are not added twice
+        if pdf_path in lease.original_documents:
+            raise ValueError(
+                f"PDF file already ingested for lease_id={lease.lease_id} and collection_id={collection_id} "
+                f"with hash={lease_config_hash}."
             )
+        lease.original_documents.append(pdf_path)
 
         if markdown_path not in lease.markdowns:
             lease.markdowns.append(markdown_path)
         else:
             logging.warning(
-                f"Markdown file already ingested for lease_id={lease_id} and collection_id={existing_document.collection_id} "
-                f"with hash={existing_document.lease_config_hash}."
+                f"Markdown file already ingested for lease_id={lease.lease_id} and collection_id={collection_id} "
+                f"with hash={lease_config_hash}."
             )
 
-        return lease
-
     def _process_extracted_field(
         self,
         lease: ExtractedLeaseCollection,
         field_name: str,
         field_value: dict,
-        field_list: list,
+        field_list: frozenset[str],
         date_of_document: date,
         markdown_path: str,
         pdf_path: str,
@@ -342,7 +967,7 @@ class IngestionCollectionDocumentService(object):
             lease (ExtractedLeaseCollection): The lease to add the field to.
             field_name (str): The name of the field.
             field_value (dict): The field value data.
-            field_list (list): List of allowed field names.
+            field_list (frozenset[str]): The allowed field names.
             date_of_document (date): The date of the document.
             markdown_path (str): Path to the markdown file.
             pdf_path (str): Path to the PDF file.
@@ -394,19 +1019,82 @@ class IngestionCollectionDocumentService(object):
 
         return True
 
-    def _update_markdowns_from_analyzer_output(self, data: dict, path: str):
-        if self._container_client.file_exists(path):
-            logging.info(f"Markdown file already exists at {path}.")
-            return
-        for content in data['result']['contents']:
-            markdown = content['markdown']
-            self._container_client.upload_document(markdown, path)
+    def _get_markdowns_to_upload(
+        self,
+        outputs: list[ContentUnderstandingIngestOutput]
+    ) -> dict[str, str | PagedMarkdown]:
+        markdowns: dict[str, str | PagedMarkdown] = {}
+        for output in outputs:
+            markdown_file_path = build_adls_markdown_file_path(
+                output.doc_type,
+                output.collection_id,
+                output.filename,
+                output.lease_id
+            )
+            if markdown_file_path not in markdowns:
+                markdown = self._get_markdown_to_upload(output)
+                if markdown is not None:
+                    markdowns[markdown_file_path] = markdown
+        return markdowns
+
+    def _get_markdown_to_upload(self, output: ContentUnderstandingIngestOutput) -> Optional[str | PagedMarkdown]:
+        contents = [content for content in output.data['result']['contents'] if 'markdown' in content]
+        if not contents:
+            return '' if output.is_classifier_output else None
+
+        if not output.is_classifier_output:
+            contents = contents[-1:]
+            markdown = contents[0]['markdown']
+            separator = ''
+        else:
+            # Get all returned markdown content from the classifier output
+            # We might have multiple returned documents, so iterate over all of them
+            # to retrieve markdowns and concatenate them
+            separator = ' '
+            markdown = ''.join(content['markdown'] + separator for content in contents)
+
+        # Markdowns with page information are stored page by page, so single pages can be read back
+        paged_markdown = encode_paged_markdown(markdown, get_page_offsets(contents, separator))
+        return paged_markdown if paged_markdown is not None else markdown
+
+    def _upload_markdowns(self, markdowns: dict[str, str | PagedMarkdown]):
+        """Uploads the markdowns whose path does not exist yet, along with their page indexes.
+
+        Markdowns already stored are kept as they are, and so are their page indexes.
+        """
+        documents = [
+            (markdown.data, path, None, markdown.index.encoding) if isinstance(markdown, PagedMarkdown)
+            else (markdown, path)
+            for path, markdown in markdowns.items()
+        ]
+        if len(documents) > 1 and self._async_container_client_factory is not None:
+            # Ingestion runs on worker threads without an event loop
+            uploaded = asyncio.run(self._upload_documents_async(documents))
+        elif len(documents) > 1:
+            uploaded = self._container_client.upload_documents(documents, if_absent=True)
+        else:
+            uploaded = [self._container_client.upload_if_absent(*document) for document in documents]
+
+        page_indexes = []
+        for (_, path, *_), was_uploaded in zip(documents, uploaded):
+            if not was_uploaded:
+                logging.info(f"Markdown file already exists at {path}.")
+            elif isinstance(markdowns[path], PagedMarkdown):
+                page_indexes.append((markdowns[path].index.model_dump_json(), build_markdown_page_index_path(path)))
+        if len(page_indexes) > 1:
+            self._container_client.upload_documents(page_indexes)
+        elif page_indexes:
+            self._container_client.upload_document(*page_indexes[0])
+
+    async def _upload_documents_async(self, documents: list[tuple]) -> list[bool]:
+        async with self._async_container_client_factory() as async_container_client:
+            return await async_container_client.upload_documents(documents, if_absent=True)
 
     def _update_fields_from_analyzer_output(
         self,
         lease: ExtractedLeaseCollection,
         data: dict,
-        field_list: list,
+        field_list: frozenset[str],
         date_of_document: date,
         markdown_path: str,
         pdf_path: str
@@ -422,27 +1110,11 @@ class IngestionCollectionDocumentService(object):
                 pdf_path
             )
 
-    def _update_markdowns_from_classifier_output(self, data: dict, path: str):
-        if self._container_client.file_exists(path):
-            logging.info(f"Markdown file already exists at {path}.")
-            return
-
-        # Get all returned markdown content from the classifier output
-        # We might have multiple returned documents, so iterate over all of them
-        # to retrieve markdowns and concatenate them
-        full_markdown_content = ''
-
-        for content in data['result']['contents']:
-            if 'markdown' in content:
-                full_markdown_content += content['markdown'] + ' '
-
-        self._container_client.upload_document(full_markdown_content, path)
-
     def _update_fields_from_classifier_output(
         self,
         lease: ExtractedLeaseCollection,
         data: dict,
-        field_list: list,
+        field_list: frozenset[str],
         date_of_document: date,
         markdown_path: str,
         pdf_path: str
@@ -473,13 +1145,153 @@ class IngestionCollectionDocumentService(object):
         self,
         existing_document: ExtractedCollectionDocuments
     ):
-        self._collection_documents_collection.update_one(
-            {"_id": existing_document.id},
-            {"$set": existing_document.model_dump(by_alias=True, mode='json', exclude_defaults=True)},
-            upsert=True
+        self._write_locked_document(
+            self._collection_documents_collection,
+            self._mongo_lock_manager,
+            existing_document.id,
+            # Cleared on every write, so leases written after a migration are migrated again
+            {**_dump_collection_document(existing_document), _MIGRATED_FLAG: False}
+        )
+
+    def _upsert_lease_document(
+        self,
+        lease_document: ExtractedLeaseDocument
+    ):
+        self._write_locked_document(
+            self._lease_documents_collection,
+            self._lease_mongo_lock_manager,
+            lease_document.id,
+            _dump_lease(lease_document)
+        )
+
+    def _write_locked_document(
+        self,
+        collection: Collection,
+        lock_manager: MongoLockManager,
+        document_id: str,
+        document: dict
+    ):
+        """Writes a document read under its lock, unless the lock was lost since.
+
+        Acquiring the lock creates the document, so the write never has to insert it.
+
+        Args:
+            collection (Collection): The MongoDB collection holding the document.
+            lock_manager (MongoLockManager): The lock manager holding the lock on the document.
+            document_id (str): The ID of the document.
+            document (dict): The serialized document.
+
+        Raises:
+            RuntimeError: If the lock expired or was taken over, in which case nothing is written.
+        """
+        result = collection.update_one(
+            lock_manager.get_lock_filter(document_id),
+            {"$set": {
+                **document,
+                _VERSION_FIELD: datetime.now().timestamp()
+            }}
+        )
+        if result.matched_count == 0:
+            raise RuntimeError(f"The lock on document {document_id} was lost before the document was written.")
+
+    def _get_all_leases(
+        self,
+        collection_id: str,
+        config: FieldDataCollectionConfig
+    ) -> list[dict]:
+        """Gets the raw leases of a collection from both storage layouts.
+
+        Only the lease ID and the parts of each field needed by the LLM context are fetched. Leases stored in
+        the per-lease layout take precedence over their copy in the collection-wide document, which is only
+        read as a fallback for leases that have not been migrated yet.
+
+        Args:
+            collection_id (str): The ID of the collection being queried.
+            config (FieldDataCollectionConfig): The configuration object containing lease configuration hash.
+
+        Returns:
+            list[dict]: The projected leases of the collection, as stored in the database.
+        """
+        lease_documents = []
+        if self.uses_lease_documents:
+            lease_documents = self._lease_documents_collection.find(
+                {"collection_id": collection_id, "lease_config_hash": config.lease_config_hash},
+                _build_lease_context_projection(config)
+            )
+
+        existing_document = self._collection_documents_collection.find_one(
+            {"_id": _build_document_id(collection_id, config.lease_config_hash)},
+            _build_lease_context_projection(config, _COLLECTION_DOCUMENT_LEASES_PATH)
+        )
+        return _merge_stored_leases(lease_documents, existing_document)
+
+    async def _get_all_leases_async(
+        self,
+        collection_id: str,
+        config: FieldDataCollectionConfig
+    ) -> list[dict]:
+        """Gets the raw leases of a collection from both storage layouts without blocking the event loop.
+
+        Both layouts are read concurrently. See ``_get_all_leases``.
+
+        Args:
+            collection_id (str): The ID of the collection being queried.
+            config (FieldDataCollectionConfig): The configuration object containing lease configuration hash.
+
+        Returns:
+            list[dict]: The projected leases of the collection, as stored in the database.
+        """
+        existing_document_read = AsyncCollection(self._collection_documents_collection).find_one(
+            {"_id": _build_document_id(collection_id, config.lease_config_hash)},
+            _build_lease_context_projection(config, _COLLECTION_DOCUMENT_LEASES_PATH)
         )
+        if not self.uses_lease_documents:
+            return _merge_stored_leases([], await existing_document_read)
+
+        lease_documents, existing_document = await asyncio.gather(
+            AsyncCollection(self._lease_documents_collection).find(
+                {"collection_id": collection_id, "lease_config_hash": config.lease_config_hash},
+                _build_lease_context_projection(config)
+            ),
+            existing_document_read
+        )
+        return _merge_stored_leases(lease_documents, existing_document)
+
+    async def get_collection_version_async(self, collection_id: str, config: FieldDataCollectionConfig) -> str:
+        """Gets a version of the stored data of a collection, which changes whenever the data is written.
 
-    def _get_all_extracted_fields_from_collection_doc(self, collection_id: str, config: FieldDataCollectionConfig) -> dict:
+        The version is built from the ``updated_unix_timestamp`` that every write stamps and the number of
+        stored documents, so data derived from a collection can be cached under it. Only those fields are read.
+
+        Args:
+            collection_id (str): The ID of the collection.
+            config (FieldDataCollectionConfig): The configuration object containing lease configuration hash.
+
+        Returns:
+            str: The version of the collection's data.
+        """
+        projection = {"_id": 0, _VERSION_FIELD: 1}
+        reads = [
+            AsyncCollection(self._collection_documents_collection).find(
+                {"_id": _build_document_id(collection_id, config.lease_config_hash)},
+                projection
+            )
+        ]
+        if self.uses_lease_documents:
+            reads.append(AsyncCollection(self._lease_documents_collection).find(
+                {"collection_id": collection_id, "lease_config_hash": config.lease_config_hash},
+                projection
+            ))
+
+        documents = [document for documents in await asyncio.gather(*reads) for document in documents]
+        latest = max((document.get(_VERSION_FIELD, 0) for document in documents), default=0)
+        return f"{latest}-{len(documents)}"
+
+    def _get_all_extracted_fields_from_collection_doc(
+        self,
+        collection_id: str,
+        config: FieldDataCollectionConfig
+    ) -> dict:
         """Gets all extracted fields from an existing collection document.
 
         Args:
@@ -490,42 +1302,57 @@ class IngestionCollectionDocumentService(object):
             dict: A dictionary keyed by lease ID. Each entry in the top-level dictionary is another
                   dictionary of the extracted key-value pairs from each lease document, keyed by field name.
         """
+        # Query Cosmos for collection document
+        logging.info(
+            f"Querying CosmosDB for collection ID {collection_id} and Lease Config Hash {config.lease_config_hash}"
+        )
+        return self._build_extracted_fields(collection_id, config, self._get_all_leases(collection_id, config))
+
+    async def _get_all_extracted_fields_from_collection_doc_async(
+        self,
+        collection_id: str,
+        config: FieldDataCollectionConfig
+    ) -> dict:
+        """Gets all extracted fields from an existing collection document without blocking the event loop.
+
+        Args:
+            collection_id (str): The ID of the collection being queried.
+            config (FieldDataCollectionConfig): The configuration object containing lease configuration hash.
+
+        Returns:
+            dict: The extracted fields keyed by lease ID, as returned by
+                ``_get_all_extracted_fields_from_collection_doc``.
+        """
+        logging.info(
+            f"Querying CosmosDB for collection ID {collection_id} and Lease Config Hash {config.lease_config_hash}"
+        )
+        leases = await self._get_all_leases_async(collection_id, config)
+        return self._build_extracted_fields(collection_id, config, leases)
+
+    def _build_extracted_fields(
+        self,
+        collection_id: str,
+        config: FieldDataCollectionConfig,
+        leases: list[dict]
+    ) -> dict:
         # Dict to store all fields from leases in this collection
         all_lease_fields_dict = {}
 
-        # Query Cosmos for collection document
-        logging.info(f"Querying CosmosDB for collection ID {collection_id} and Lease Config Hash {config.lease_config_hash}")
-        existing_document = self._collection_documents_collection.find_one(
-            {"_id": _build_document_id(collection_id, config.lease_config_hash)}
-        )
-        if not existing_document or existing_document.get("collection_id") is None:
+        if not leases:
             logging.warning(
                 f"data for collection {collection_id} and lease config hash {config.lease_config_hash} does not exist."
             )
             return all_lease_fields_dict
-        existing_document = ExtractedCollectionDocuments(**existing_document)
 
-        # Iterate over all leases in the collection document
-        for lease in existing_document.information.leases:
-            lease_key = lease.lease_id
+        # Iterate over all leases in the collection
+        for lease in leases:
+            lease_key = lease.get("lease_id")
             if lease_key in all_lease_fields_dict:
                 logging.error(f"A lease with ID {lease_key} has already been processed - skipping...")
                 continue
 
-            lease_field_dict = {}
-            # Get stringified values of each element
-
-            for field_name, field_values in lease.fields.items():
-                lease_agreement_data: list[dict] = []
-                for field_value in field_values:
-                    lease_agreement_data.append(
-                        LeaseAgreementDocumentData(**field_value.model_dump())
-                    )
-
-                lease_field_dict[field_name] = lease_agreement_data
-
-            # Update the top-level dictionary with the lease fields
-            all_lease_fields_dict[lease_key] = lease_field_dict
+            # Build the LLM-facing models straight from the stored fields in a single pass
+            all_lease_fields_dict[lease_key] = _LEASE_FIELDS_ADAPTER.validate_python(lease.get("fields", {}))
 
         return all_lease_fields_dict
 
@@ -541,6 +1368,7 @@ class IngestionCollectionDocumentService(object):
         """
         cosmos_client = CosmosClient(environment_config.cosmosdb.endpoint.value)
         container_client = get_container_client(environment_config)
+        start_cache_invalidation_watcher(environment_config)
         collection_documents_collection = cosmos_client.get_collection(
             environment_config.cosmosdb.db_name.value,
             environment_config.cosmosdb.document_collection_name.value
@@ -548,8 +1376,49 @@ class IngestionCollectionDocumentService(object):
         mongo_lock_manager = MongoLockManager(
             collection_documents_collection,
         )
+
+        lease_documents_collection = None
+        lease_mongo_lock_manager = None
+        if lease_document_collection_name := environment_config.cosmosdb.lease_document_collection_name:
+            lease_documents_collection = cosmos_client.get_collection(
+                environment_config.cosmosdb.db_name.value,
+                lease_document_collection_name.value
+            )
+            ensure_indexes(lease_documents_collection, MongoCollection.LEASE_DOCUMENTS)
+            lease_mongo_lock_manager = MongoLockManager(
+                lease_documents_collection,
+            )
+
+        ingested_documents_collection = None
+        if ingested_documents_collection_name := environment_config.cosmosdb.ingested_documents_collection_name:
+            ingested_documents_collection = cosmos_client.get_collection(
+                environment_config.cosmosdb.db_name.value,
+                ingested_documents_collection_name.value
+            )
+            ensure_indexes(ingested_documents_collection, MongoCollection.INGESTED_DOCUMENTS)
+
+        context_store = None
+        if context_collection_name := environment_config.cosmosdb.context_collection_name:
+            context_collection = cosmos_client.get_collection(
+                environment_config.cosmosdb.db_name.value,
+                context_collection_name.value
+            )
+            ensure_indexes(context_collection, MongoCollection.COLLECTION_CONTEXTS)
+            context_store = CollectionContextStore(context_collection)
+
+        # The local backend writes at disk speed, so it has no async client
+        async_container_client_factory = None
+        if not environment_config.blob_storage.uses_local_backend:
+            async_container_client_factory = partial(get_async_container_client, environment_config)
+
         return cls(
             collection_documents_collection=collection_documents_collection,
             container_client=container_client,
-            mongo_lock_manager=mongo_lock_manager
+            mongo_lock_manager=mongo_lock_manager,
+            lease_documents_collection=lease_documents_collection,
+            lease_mongo_lock_manager=lease_mongo_lock_manager,
+            ingested_documents_collection=ingested_documents_collection,
+            async_container_client_factory=async_container_client_factory,
+            context_store=context_store,
+            collection_affinity_executor=get_collection_affinity_executor()
         )
@@ -0,0 +1,247 @@
+import logging
+from datetime import datetime
+from typing import Optional
+from pymongo.collection import Collection
+
+from .mongo_lock_manager import MongoLockManager
+from .ingest_lease_documents_service import _MIGRATED_FLAG, _build_lease_document_id, _dump_lease, \
+    _store_lease_context
+from .mongo_index_manager import MongoCollection, ensure_indexes
+from .collection_context_store import CollectionContextStore
+from ._cosmos_client import CosmosClient
+from models.extracted_collection_documents import ExtractedCollectionDocuments, \
+    ExtractedLeaseCollection, \
+    ExtractedLeaseDocument
+from models.environment_config import EnvironmentConfig
+from utils.cache_invalidation import InvalidationSource, invalidate
+
+
+class LeaseDocumentMigrator(object):
+    """Copies leases from collection-wide documents into the per-lease storage layout.
+
+    Migration is idempotent: leases that already exist in the per-lease layout are merged by original
+    document path, so a migration can be re-run or interrupted at any point. The collection-wide documents
+    are left in place and flagged, so readers can keep falling back to them during the dual-read period.
+    """
+    _collection_documents_collection: Collection
+    _lease_documents_collection: Collection
+    _mongo_lock_manager: MongoLockManager
+    _lease_mongo_lock_manager: MongoLockManager
+    _context_store: Optional[CollectionContextStore]
+
+    def __init__(
+        self,
+        collection_documents_collection: Collection,
+        lease_documents_collection: Collection,
+        mongo_lock_manager: MongoLockManager,
+        lease_mongo_lock_manager: MongoLockManager,
+        context_store: Optional[CollectionContextStore] = None,
+    ):
+        """Initializes the LeaseDocumentMigrator.
+
+        Args:
+            collection_documents_collection (Collection): The MongoDB collection holding collection-wide documents.
+            lease_documents_collection (Collection): The MongoDB collection holding the per-lease documents.
+            mongo_lock_manager (MongoLockManager): The lock manager for the collection-wide documents.
+            lease_mongo_lock_manager (MongoLockManager): The lock manager for the per-lease documents.
+            context_store (Optional[CollectionContextStore]): The store of the LLM context of every lease. When
+                set, the context of each migrated lease is stored again, since queries read it instead of the lease.
+        """
+        self._collection_documents_collection = collection_documents_collection
+        self._lease_documents_collection = lease_documents_collection
+        self._mongo_lock_manager = mongo_lock_manager
+        self._lease_mongo_lock_manager = lease_mongo_lock_manager
+        self._context_store = context_store
+
+    def migrate_all(self, limit: Optional[int] = None, include_migrated: bool = False) -> int:
+        """Migrates collection-wide documents into the per-lease storage layout.
+
+        Args:
+            limit (Optional[int]): Maximum number of collection documents to migrate in this run.
+            include_migrated (bool): Whether to re-run the migration for documents already flagged as migrated.
+
+        Returns:
+            int: The number of collection documents migrated.
+        """
+        query = {"information": {"$exists": True}}
+        if not include_migrated:
+            query[_MIGRATED_FLAG] = {"$ne": True}
+
+        cursor = self._collection_documents_collection.find(query, {"_id": 1})
+        if limit:
+            cursor = cursor.limit(limit)
+
+        migrated_count = 0
+        for document in cursor:
+            try:
+                self.migrate_document(document["_id"])
+                migrated_count += 1
+            except Exception as e:
+                logging.error(f"Failed to migrate collection document {document['_id']}: {e}")
+
+        logging.info(f"Migrated {migrated_count} collection documents to the per-lease storage layout.")
+        return migrated_count
+
+    def migrate_document(self, document_id: str) -> int:
+        """Migrates the leases of a single collection-wide document.
+
+        Args:
+            document_id (str): The ID of the collection-wide document.
+
+        Returns:
+            int: The number of lease documents created or updated.
+        """
+        try:
+            if not self._mongo_lock_manager.wait(document_id):
+                raise RuntimeError(f"Timed out waiting for the lock on document {document_id}.")
+            existing_document = self._collection_documents_collection.find_one({"_id": document_id})
+            if not existing_document or existing_document.get("collection_id") is None:
+                return 0
+
+            collection_document = ExtractedCollectionDocuments(**existing_document)
+            updated_leases = 0
+            for lease in collection_document.information.leases:
+                if self._migrate_lease(collection_document, lease):
+                    updated_leases += 1
+
+            result = self._collection_documents_collection.update_one(
+                self._mongo_lock_manager.get_lock_filter(document_id),
+                {"$set": {_MIGRATED_FLAG: True}}
+            )
+            if result.matched_count == 0:
+                raise RuntimeError(f"The lock on document {document_id} was lost before the document was written.")
+            logging.info(f"Migrated collection document {document_id}: {updated_leases} lease documents updated.")
+            return updated_leases
+        finally:
+            self._mongo_lock_manager.release_lock(document_id)
+
+    def _migrate_lease(
+        self,
+        collection_document: ExtractedCollectionDocuments,
+        lease: ExtractedLeaseCollection
+    ) -> bool:
+        lease_document_id = _build_lease_document_id(
+            collection_document.collection_id,
+            collection_document.lease_config_hash,
+            lease.lease_id
+        )
+        try:
+            if not self._lease_mongo_lock_manager.wait(lease_document_id):
+                raise RuntimeError(f"Timed out waiting for the lock on document {lease_document_id}.")
+            existing_lease_document = self._lease_documents_collection.find_one({"_id": lease_document_id})
+
+            if not existing_lease_document or existing_lease_document.get("collection_id") is None:
+                lease_document = ExtractedLeaseDocument(
+                    collection_id=collection_document.collection_id,
+                    config_id=collection_document.config_id,
+                    lease_config_hash=collection_document.lease_config_hash,
+                    **{**(existing_lease_document or {}), **lease.model_dump()}
+                )
+            else:
+                lease_document = ExtractedLeaseDocument(**existing_lease_document)
+                if not self._merge_lease(lease_document, lease):
+                    return False
+
+            lease_document.id = lease_document_id
+
+            result = self._lease_documents_collection.update_one(
+                self._lease_mongo_lock_manager.get_lock_filter(lease_document_id),
+                {"$set": {
+                    **_dump_lease(lease_document),
+                    "updated_unix_timestamp": datetime.now().timestamp()
+                }}
+            )
+            if result.matched_count == 0:
+                raise RuntimeError(
+                    f"The lock on document {lease_document_id} was lost before the document was written."
+                )
+
+            # Stored once the lease is written, like ingestion does, so the store never serves unwritten values
+            if self._context_store is not None:
+                _store_lease_context(
+                    self._context_store,
+                    lease_document.collection_id,
+                    lease_document.lease_config_hash,
+                    lease_document
+                )
+            invalidate(InvalidationSource.COLLECTION_DOCUMENTS, {
+                "_id": lease_document_id,
+                "collection_id": lease_document.collection_id,
+                "lease_config_hash": lease_document.lease_config_hash
+            })
+            return True
+        finally:
+            self._lease_mongo_lock_manager.release_lock(lease_document_id)
+
+    def _merge_lease(self, lease_document: ExtractedLeaseDocument, lease: ExtractedLeaseCollection) -> bool:
+        """Merges the documents of a collection-wide lease that are missing from its lease document.
+
+        Values from the collection-wide lease were ingested before the lease document existed, so they are
+        placed ahead of the values already stored in the lease document.
+
+        Args:
+            lease_document (ExtractedLeaseDocument): The lease document to merge into.
+            lease (ExtractedLeaseCollection): The lease from the collection-wide document.
+
+        Returns:
+            bool: True if the lease document was changed, False otherwise.
+        """
+        missing_documents = [
+            document for document in lease.original_documents if document not in lease_document.original_documents
+        ]
+        missing_markdowns = [
+            markdown for markdown in lease.markdowns if markdown not in lease_document.markdowns
+        ]
+        if not missing_documents and not missing_markdowns:
+            return False
+
+        for field_name, field_values in lease.fields.items():
+            missing_values = [value for value in field_values if value.document in missing_documents]
+            if missing_values:
+                lease_document.fields[field_name] = missing_values + lease_document.fields.get(field_name, [])
+
+        lease_document.original_documents = missing_documents + lease_document.original_documents
+        lease_document.markdowns = missing_markdowns + lease_document.markdowns
+        return True
+
+    @classmethod
+    def from_environment_config(cls, environment_config: EnvironmentConfig):
+        """Creates a LeaseDocumentMigrator instance from the environment configuration.
+
+        Args:
+            environment_config (EnvironmentConfig): The environment configuration.
+
+        Returns:
+            LeaseDocumentMigrator: The LeaseDocumentMigrator instance.
+        """
+        lease_document_collection_name = environment_config.cosmosdb.lease_document_collection_name
+        if not lease_document_collection_name:
+            raise ValueError("The lease document collection name is not configured.")
+
+        cosmos_client = CosmosClient(environment_config.cosmosdb.endpoint.value)
+        collection_documents_collection = cosmos_client.get_collection(
+            environment_config.cosmosdb.db_name.value,
+            environment_config.cosmosdb.document_collection_name.value
+        )
+        lease_documents_collection = cosmos_client.get_collection(
+            environment_config.cosmosdb.db_name.value,
+            lease_document_collection_name.value
+        )
+        ensure_indexes(lease_documents_collection, MongoCollection.LEASE_DOCUMENTS)
+
+        context_store = None
+        if context_collection_name := environment_config.cosmosdb.context_collection_name:
+            context_collection = cosmos_client.get_collection(
+                environment_config.cosmosdb.db_name.value,
+                context_collection_name.value
+            )
+            ensure_indexes(context_collection, MongoCollection.COLLECTION_CONTEXTS)
+            context_store = CollectionContextStore(context_collection)
+
+        return cls(
+            collection_documents_collection=collection_documents_collection,
+            lease_documents_collection=lease_documents_collection,
+            mongo_lock_manager=MongoLockManager(collection_documents_collection),
+            lease_mongo_lock_manager=MongoLockManager(lease_documents_collection),
+            context_store=context_store,
+        )
@@ -6,6 +6,7 @@ import os
 import time
 from openai import AsyncAzureOpenAI
 from semantic_kernel import Kernel
+from semantic_kernel.connectors.ai.function_calling_utils import kernel_function_metadata_to_function_call_format
 from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoiceBehavior
 from semantic_kernel.connectors.ai.open_ai.services.azure_chat_completion import AzureChatCompletion
 from semantic_kernel.connectors.ai.open_ai.services.open_ai_chat_completion import OpenAIChatCompletion
@@ -13,6 +14,7 @@ from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.azure_chat_
     AzureChatPromptExecutionSettings,
 )
 from semantic_kernel.contents import ChatHistory
+from semantic_kernel.functions import KernelFunctionFromMethod
 from services.collection_kernel_plugin import CollectionPlugin
 from configs.llm_config import LlmConfig, get_llm_config
 from models.api.v1 import QueryResponse, GeneratedResponse, QueryMetrics
@@ -21,6 +23,8 @@ import json
 from services.citation_mapper import CitationMapper
 from utils.health_check_cache import service_status
 
+_COLLECTION_PLUGIN_NAME = "Collection"
+
 
 class LlmRequestManager:
     _chat_completions: AzureChatCompletion | OpenAIChatCompletion
@@ -83,6 +87,21 @@ class LlmRequestManager:
         )
         return query_response
 
+    def get_collection_question_definitions(self) -> list[dict]:
+        """Gets the tool definitions and response format sent with every collection question.
+
+        Returns:
+            list[dict]: The definition of the collection data function and the schema of the response.
+        """
+        collection_function = KernelFunctionFromMethod(
+            CollectionPlugin.get_collection_data,
+            plugin_name=_COLLECTION_PLUGIN_NAME
+        )
+        return [
+            kernel_function_metadata_to_function_call_format(collection_function.metadata),
+            GeneratedResponse.model_json_schema()
+        ]
+
     async def answer_collection_question(
         self,
         system_message: str,
@@ -92,17 +111,16 @@ class LlmRequestManager:
     ) -> str:
         kernel = Kernel()
 
-        collection_plugin_name = "Collection"
         kernel.add_service(self._chat_completions)
         kernel.add_plugin(
             collection_plugin,
-            plugin_name=collection_plugin_name,
+            plugin_name=_COLLECTION_PLUGIN_NAME,
         )
 
         execution_settings = AzureChatPromptExecutionSettings()
         execution_settings.function_choice_behavior = FunctionChoiceBehavior.Required(
             included_functions=[
-                f"{collection_plugin_name}-{CollectionPlugin.get_collection_data.__kernel_function_name__}"
+                f"{_COLLECTION_PLUGIN_NAME}-{CollectionPlugin.get_collection_data.__kernel_function_name__}"
             ]
         )
         execution_settings.response_format = GeneratedResponse
@@ -0,0 +1,246 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from typing import Iterator, Union
+from azure.core.exceptions import ResourceNotFoundError
+
+from .container_client import BaseContainerClient, _GZIP_ENCODING, _get_output_paths, _save_metadata
+from models.environment_config import EnvironmentConfig
+from utils.download_manifest import DownloadManifest
+
+
+# Metadata sidecars are kept in a hidden tree mirroring the blobs, so listings never see them
+_METADATA_DIR = ".metadata"
+_TEMP_PREFIX = ".upload-"
+
+
+class LocalFileSystemContainerClient(BaseContainerClient):
+    """Blob storage backed by a local directory, for local development and load tests without network.
+
+    Blobs are stored at their path under the root directory and their metadata and content encoding in JSON
+    sidecars. Writes go to a temporary file that is moved into place, so readers never see a partially
+    written blob.
+    """
+    _root_dir: str
+
+    def __init__(self, root_dir: str):
+        """Initialize the LocalFileSystemContainerClient.
+
+        Args:
+            root_dir (str): The directory holding the blobs.
+        """
+        self._root_dir = os.path.abspath(root_dir)
+
+    def _get_file_path(self, path: str, base_dir: str = "") -> str:
+        storage_dir = os.path.join(self._root_dir, base_dir) if base_dir else self._root_dir
+        file_path = os.path.normpath(os.path.join(storage_dir, *path.split("/")))
+        if file_path != storage_dir and not file_path.startswith(storage_dir + os.sep):
+            raise ValueError(f"Blob path {path} is outside of the storage directory.")
+        if not base_dir and path.split("/", 1)[0] == _METADATA_DIR:
+            raise ValueError(f"Blob path {path} is reserved for metadata.")
+        return file_path
+
+    def _get_metadata_path(self, path: str) -> str:
+        return self._get_file_path(path, _METADATA_DIR) + ".json"
+
+    def _write_temp_file(self, file_path: str, content: Union[bytes, str]) -> str:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        data = content.encode("utf-8") if isinstance(content, str) else content
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), prefix=_TEMP_PREFIX)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return temp_path
+
+    def _write_properties(self, path: str, metadata: dict = None, content_encoding: str = None):
+        properties_path = self._get_metadata_path(path)
+        properties = {"metadata": metadata or {}, "content_encoding": content_encoding}
+        temp_path = self._write_temp_file(properties_path, json.dumps(properties))
+        os.replace(temp_path, properties_path)
+
+    def _read_properties(self, path: str) -> dict:
+        try:
+            with open(self._get_metadata_path(path)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"metadata": {}, "content_encoding": None}
+
+    def _iter_documents(self, base_path: str, extension: str = None) -> Iterator[str]:
+        # Blob paths are prefixes rather than directories, so walk from the deepest directory of the prefix
+        walk_root = self._get_file_path(base_path.rsplit("/", 1)[0] if "/" in base_path else "")
+        for dir_path, dir_names, file_names in os.walk(walk_root):
+            dir_names[:] = sorted(name for name in dir_names if name != _METADATA_DIR)
+            for file_name in sorted(file_names):
+                if file_name.startswith(_TEMP_PREFIX):
+                    continue
+                name = os.path.relpath(os.path.join(dir_path, file_name), self._root_dir).replace(os.sep, "/")
+                if name.startswith(base_path) and os.path.splitext(name)[1] \
+                        and (not extension or name.endswith(extension)):
+                    yield name
+
+    def file_exists(self, file_path: str) -> bool:
+        """Check if a file exists in the storage directory.
+
+        Args:
+            file_path (str): The path of the file to check.
+
+        Returns:
+            bool: True if the file exists, False otherwise.
+        """
+        return os.path.isfile(self._get_file_path(file_path))
+
+    def upload_document(
+        self,
+        bytes: Union[bytes, str],
+        path: str,
+        metadata: dict = None,
+        content_encoding: str = None
+    ):
+        """Write a document to the storage directory, replacing any existing file.
+
+        Args:
+            bytes (Union[bytes, str]): The content of the document to write.
+            path (str): The path to write the document to.
+            metadata (dict, optional): Metadata to associate with the file. Defaults to None.
+            content_encoding (str, optional): The encoding of content that is already encoded. Defaults to None.
+        """
+        file_path = self._get_file_path(path)
+        temp_path = self._write_temp_file(file_path, bytes)
+        self._write_properties(path, metadata, content_encoding)
+        os.replace(temp_path, file_path)
+
+    def upload_if_absent(
+        self,
+        bytes: Union[bytes, str],
+        path: str,
+        metadata: dict = None,
+        content_encoding: str = None
+    ) -> bool:
+        """Write a document to the storage directory unless a file already exists at the path.
+
+        The file is linked into place, which fails atomically if the path exists, so concurrent writers of
+        the same path write it once.
+
+        Args:
+            bytes (Union[bytes, str]): The content of the document to write.
+            path (str): The path to write the document to.
+            metadata (dict, optional): Metadata to associate with the file. Defaults to None.
+            content_encoding (str, optional): The encoding of content that is already encoded. Defaults to None.
+
+        Returns:
+            bool: True if the document was written, False if a file already existed at the path.
+        """
+        file_path = self._get_file_path(path)
+        if os.path.exists(file_path):
+            return False
+
+        temp_path = self._write_temp_file(file_path, bytes)
+        try:
+            os.link(temp_path, file_path)
+        except FileExistsError:
+            return False
+        finally:
+            os.remove(temp_path)
+
+        # The properties are written after the link so a losing writer cannot replace the winner's. Without them
+        # the file would be read back unencoded, so it is removed again if they cannot be written.
+        try:
+            self._write_properties(path, metadata, content_encoding)
+        except BaseException:
+            os.remove(file_path)
+            raise
+        return True
+
+    def download_file(self, path: str) -> tuple[bytes, dict]:
+        """Read a file from the storage directory.
+
+        Args:
+            path (str): The path of the file to read.
+
+        Returns:
+            tuple[bytes, dict]: The content and metadata of the file.
+        """
+        try:
+            with open(self._get_file_path(path), "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            raise ResourceNotFoundError(f"The file {path} does not exist.")
+
+        properties = self._read_properties(path)
+        if properties["content_encoding"] == _GZIP_ENCODING:
+            content = gzip.decompress(content)
+        return content, properties["metadata"]
+
+    def download_range(self, path: str, offset: int, length: int) -> bytes:
+        """Read a byte range of a file from the storage directory, as stored.
+
+        Args:
+            path (str): The path of the file to read.
+            offset (int): The offset of the first byte to read.
+            length (int): The number of bytes to read.
+
+        Returns:
+            bytes: The stored bytes of the range, which are not decompressed.
+        """
+        try:
+            with open(self._get_file_path(path), "rb") as f:
+                f.seek(offset)
+                return f.read(length)
+        except FileNotFoundError:
+            raise ResourceNotFoundError(f"The file {path} does not exist.")
+
+    def iter_download_files(self, base_path: str, output_dir: str, extension: str = None) -> Iterator[str]:
+        """Copy files from the storage directory, yielding each saved file as its copy completes.
+
+        Files whose modification time and size are unchanged since the last copy to the output directory
+        are skipped, as recorded in its download manifest.
+
+        Args:
+            base_path (str): The base path of the files to copy.
+            output_dir (str): The directory to save the copied files.
+            extension (str, optional): The file extension to filter the files. Defaults to None.
+
+        Yields:
+            str: The path of each saved file.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        with DownloadManifest(output_dir) as manifest:
+            for name in self._iter_documents(base_path, extension):
+                source_path = self._get_file_path(name)
+                stat = os.stat(source_path)
+                version = f"{stat.st_mtime_ns}-{stat.st_size}"
+                output_file, metadata_output_file = _get_output_paths(name, output_dir)
+                if not manifest.is_complete(name, version, stat.st_size, output_file):
+                    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+                    properties = self._read_properties(name)
+                    if properties["content_encoding"] == _GZIP_ENCODING:
+                        with gzip.open(source_path, "rb") as source, open(output_file + ".part", "wb") as target:
+                            shutil.copyfileobj(source, target)
+                    else:
+                        shutil.copyfile(source_path, output_file + ".part")
+                    os.replace(output_file + ".part", output_file)
+                    _save_metadata(metadata_output_file, properties["metadata"])
+                    manifest.record(
+                        name,
+                        version,
+                        stat.st_size,
+                        complete=True,
+                        file_size=os.path.getsize(output_file)
+                    )
+                yield output_file
+
+    @classmethod
+    def from_environment_config(cls, environment_config: EnvironmentConfig):
+        """Creates a LocalFileSystemContainerClient storing the configured container under the local root path.
+
+        Args:
+            environment_config (EnvironmentConfig): The environment configuration.
+
+        Returns:
+            LocalFileSystemContainerClient: The LocalFileSystemContainerClient instance.
+        """
+        blob_storage = environment_config.blob_storage
+        if not blob_storage.local_root_path:
+            raise ValueError("A local root path must be configured for the local blob storage backend.")
+        return cls(os.path.join(blob_storage.local_root_path.value, blob_storage.container_name.value))
@@ -0,0 +1,96 @@
+from threading import Lock
+from typing import Optional
+from azure.core.exceptions import ResourceNotFoundError
+from cachetools import LRUCache
+
+from .container_client import BaseContainerClient, get_container_client
+from models.environment_config import EnvironmentConfig
+from models.ingestion_models import IngestDocumentType
+from utils.markdown_pages import MarkdownPageIndex
+from utils.path_utils import build_adls_markdown_file_path, build_markdown_page_index_path
+
+
+# Markdowns are written once, so their page indexes do not change and can be kept until evicted
+page_index_cache = LRUCache(maxsize=1000)
+_page_index_cache_lock = Lock()
+
+
+class MarkdownPageService(object):
+    """Reads single pages of stored markdowns with ranged reads, using the page index written at ingestion."""
+    _container_client: BaseContainerClient
+
+    def __init__(self, container_client: BaseContainerClient):
+        """Initializes the MarkdownPageService.
+
+        Args:
+            container_client (BaseContainerClient): The container client of the blob storage backend.
+        """
+        self._container_client = container_client
+
+    def get_pages(
+        self,
+        collection_id: str,
+        lease_id: str,
+        document_name: str,
+        page_numbers: list[int]
+    ) -> Optional[dict[int, str]]:
+        """Gets the markdown of some pages of an ingested document.
+
+        Only the bytes of the requested pages are downloaded, with one ranged read per run of consecutive
+        pages.
+
+        Args:
+            collection_id (str): The collection ID.
+            lease_id (str): The lease ID.
+            document_name (str): The file name of the ingested document.
+            page_numbers (list[int]): The requested page numbers.
+
+        Returns:
+            Optional[dict[int, str]]: The markdown of each requested page found in the document, by page number,
+                or None if the document has no page index.
+        """
+        markdown_path = build_adls_markdown_file_path(
+            IngestDocumentType.COLLECTION,
+            collection_id,
+            document_name,
+            lease_id
+        )
+        index = self._get_page_index(markdown_path)
+        if index is None:
+            return None
+
+        pages = {}
+        for run in index.get_ranges(page_numbers):
+            start = run[0][1]
+            data = self._container_client.download_range(markdown_path, start, run[-1][1] + run[-1][2] - start)
+            for page_number, offset, length in run:
+                pages[page_number] = index.decode_segment(data[offset - start:offset - start + length])
+        return pages
+
+    def _get_page_index(self, markdown_path: str) -> Optional[MarkdownPageIndex]:
+        with _page_index_cache_lock:
+            index = page_index_cache.get(markdown_path)
+        if index is not None:
+            return index
+
+        try:
+            content, _ = self._container_client.download_file(build_markdown_page_index_path(markdown_path))
+        except ResourceNotFoundError:
+            return None
+
+        index = MarkdownPageIndex.model_validate_json(content)
+        with _page_index_cache_lock:
+            page_index_cache[markdown_path] = index
+        return index
+
+    @classmethod
+    def from_environment_config(cls, environment_config: EnvironmentConfig):
+        """Creates a MarkdownPageService from the environment configuration.
+
+        Args:
+            environment_config (EnvironmentConfig): The environment configuration.
+
+        Returns:
+            MarkdownPageService: The MarkdownPageService instance.
+        """
+        return cls(get_container_client(environment_config))
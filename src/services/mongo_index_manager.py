@@ -0,0 +1,295 @@
+import argparse
+import logging
+import sys
+from enum import Enum
+from typing import Any, Optional
+from pydantic import BaseModel, ConfigDict
+from pymongo import ASCENDING, errors
+from pymongo.collection import Collection
+
+from ._cosmos_client import CosmosClient
+from models.environment_config import EnvironmentConfig
+
+
+class MongoCollection(str, Enum):
+    """The Mongo collections used by the application."""
+    DOCUMENTS = "documents"
+    LEASE_DOCUMENTS = "lease_documents"
+    INGESTED_DOCUMENTS = "ingested_documents"
+    COLLECTION_CONTEXTS = "collection_contexts"
+    CONFIGURATIONS = "configurations"
+
+
+class IndexDefinition(BaseModel):
+    """An ascending index required by the queries on a collection."""
+    model_config = ConfigDict(frozen=True)
+
+    keys: tuple[str, ...]
+    unique: bool = False
+
+    @property
+    def name(self) -> str:
+        """The index name, following the Mongo default naming so existing indexes are matched."""
+        return "_".join(f"{key}_{ASCENDING}" for key in self.keys)
+
+
+class HotQuery(BaseModel):
+    """A query run on every ingest or chat request, checked for collection scans.
+
+    Only the shape of the filter matters for the query plan, so the values are placeholders.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    name: str
+    filter: dict[str, Any]
+
+
+class QueryPlanResult(BaseModel):
+    """The outcome of checking the query plan of a hot query."""
+    collection: MongoCollection
+    query: str
+    stages: list[str] = []
+    error: Optional[str] = None
+
+    @property
+    def is_collection_scan(self) -> bool:
+        """Whether the query plan scans the whole collection."""
+        return "COLLSCAN" in self.stages
+
+
+_PLACEHOLDER = "__query_plan_check__"
+
+# Every write stamps updated_unix_timestamp, which the cache invalidation watcher polls when change streams
+# are not available
+_UPDATED_TIMESTAMP_INDEX = IndexDefinition(keys=("updated_unix_timestamp",))
+
+REQUIRED_INDEXES: dict[MongoCollection, tuple[IndexDefinition, ...]] = {
+    MongoCollection.DOCUMENTS: (
+        _UPDATED_TIMESTAMP_INDEX,
+    ),
+    MongoCollection.LEASE_DOCUMENTS: (
+        IndexDefinition(keys=("collection_id", "lease_config_hash")),
+        _UPDATED_TIMESTAMP_INDEX,
+    ),
+    MongoCollection.INGESTED_DOCUMENTS: (
+        IndexDefinition(keys=("collection_id", "lease_id", "document_path", "lease_config_hash"), unique=True),
+    ),
+    MongoCollection.COLLECTION_CONTEXTS: (
+        IndexDefinition(keys=("collection_id", "lease_config_hash")),
+    ),
+    MongoCollection.CONFIGURATIONS: (
+        _UPDATED_TIMESTAMP_INDEX,
+    ),
+}
+
+# Mirrors the filter built by MongoLockManager.acquire_lock
+_LOCK_QUERY = HotQuery(
+    name="acquire_lock",
+    filter={
+        "_id": _PLACEHOLDER,
+        "$or": [
+            {"is_locked": {"$exists": False}},
+            {"is_locked": False},
+            {"unlock_unix_timestamp": {"$lte": 0}}
+        ]
+    }
+)
+
+HOT_QUERIES: dict[MongoCollection, tuple[HotQuery, ...]] = {
+    MongoCollection.DOCUMENTS: (
+        HotQuery(name="find_by_id", filter={"_id": _PLACEHOLDER}),
+        _LOCK_QUERY,
+        HotQuery(name="find_updated_since", filter={"updated_unix_timestamp": {"$gt": 0}}),
+    ),
+    MongoCollection.LEASE_DOCUMENTS: (
+        HotQuery(name="find_by_id", filter={"_id": _PLACEHOLDER}),
+        _LOCK_QUERY,
+        HotQuery(
+            name="find_collection_leases",
+            filter={"collection_id": _PLACEHOLDER, "lease_config_hash": _PLACEHOLDER}
+        ),
+        HotQuery(name="find_updated_since", filter={"updated_unix_timestamp": {"$gt": 0}}),
+    ),
+    MongoCollection.INGESTED_DOCUMENTS: (
+        HotQuery(
+            name="find_ingested_document",
+            filter={
+                "collection_id": _PLACEHOLDER,
+                "lease_id": _PLACEHOLDER,
+                "document_path": _PLACEHOLDER,
+                "lease_config_hash": _PLACEHOLDER
+            }
+        ),
+    ),
+    MongoCollection.COLLECTION_CONTEXTS: (
+        HotQuery(
+            name="find_collection_context",
+            filter={"collection_id": _PLACEHOLDER, "lease_config_hash": _PLACEHOLDER}
+        ),
+    ),
+    MongoCollection.CONFIGURATIONS: (
+        HotQuery(name="find_by_id", filter={"_id": _PLACEHOLDER}),
+        HotQuery(name="find_updated_since", filter={"updated_unix_timestamp": {"$gt": 0}}),
+    ),
+}
+
+_ensured_indexes: set[tuple] = set()
+
+
+def ensure_indexes(collection: Collection, collection_type: MongoCollection) -> list[str]:
+    """Creates the indexes declared for a collection, once per process.
+
+    Index creation is idempotent on the server, so this is safe to run from every instance.
+
+    Args:
+        collection (Collection): The MongoDB collection to index.
+        collection_type (MongoCollection): Which of the application's collections it is.
+
+    Returns:
+        list[str]: The names of the indexes created or confirmed by this call.
+    """
+    index_names = []
+    for index in REQUIRED_INDEXES[collection_type]:
+        index_key = (collection.full_name, index)
+        if index_key in _ensured_indexes:
+            continue
+        collection.create_index([(key, ASCENDING) for key in index.keys], unique=index.unique, name=index.name)
+        _ensured_indexes.add(index_key)
+        index_names.append(index.name)
+    return index_names
+
+
+def _find_plan_stages(explain_output: Any) -> list[str]:
+    """Collects every stage name of an explain output, whatever the server's plan layout."""
+    stages = []
+    if isinstance(explain_output, dict):
+        if isinstance(explain_output.get("stage"), str):
+            stages.append(explain_output["stage"])
+        for value in explain_output.values():
+            stages.extend(_find_plan_stages(value))
+    elif isinstance(explain_output, list):
+        for value in explain_output:
+            stages.extend(_find_plan_stages(value))
+    return stages
+
+
+class MongoIndexManager(object):
+    """Declares the indexes each Mongo collection needs and checks that the hot queries use them."""
+    _collections: dict[MongoCollection, Collection]
+
+    def __init__(self, collections: dict[MongoCollection, Collection]):
+        """Initializes the MongoIndexManager.
+
+        Args:
+            collections (dict[MongoCollection, Collection]): The configured collections, by collection type.
+        """
+        self._collections = collections
+
+    def ensure_indexes(self) -> dict[MongoCollection, list[str]]:
+        """Creates the declared indexes on every configured collection.
+
+        Returns:
+            dict[MongoCollection, list[str]]: The names of the indexes created or confirmed, by collection type.
+        """
+        created_indexes = {}
+        for collection_type, collection in self._collections.items():
+            created_indexes[collection_type] = ensure_indexes(collection, collection_type)
+            logging.info(f"Indexes ensured on {collection.name}: {created_indexes[collection_type]}")
+        return created_indexes
+
+    def validate_query_plans(self) -> list[QueryPlanResult]:
+        """Explains the hot queries of every configured collection and reports their plan stages.
+
+        Queries planned as collection scans are logged as errors. Explain is not supported by every
+        Mongo API version, so failures to explain are reported on the result rather than raised.
+
+        Returns:
+            list[QueryPlanResult]: The result of each hot query.
+        """
+        results = []
+        for collection_type, collection in self._collections.items():
+            for query in HOT_QUERIES[collection_type]:
+                result = self._validate_query_plan(collection_type, collection, query)
+                if result.is_collection_scan:
+                    logging.error(
+                        f"Query {query.name} on {collection.name} scans the whole collection. "
+                        f"Check that the indexes declared for {collection_type.value} exist."
+                    )
+                elif result.error:
+                    logging.warning(f"Could not check the query plan of {query.name} on {collection.name}: "
+                                    f"{result.error}")
+                results.append(result)
+        return results
+
+    def _validate_query_plan(
+        self,
+        collection_type: MongoCollection,
+        collection: Collection,
+        query: HotQuery
+    ) -> QueryPlanResult:
+        try:
+            explain_output = collection.find(query.filter).limit(1).explain()
+        except errors.PyMongoError as e:
+            return QueryPlanResult(collection=collection_type, query=query.name, error=str(e))
+        return QueryPlanResult(
+            collection=collection_type,
+            query=query.name,
+            stages=_find_plan_stages(explain_output)
+        )
+
+    @classmethod
+    def from_environment_config(cls, environment_config: EnvironmentConfig):
+        """Creates a MongoIndexManager for the collections configured in the environment.
+
+        Args:
+            environment_config (EnvironmentConfig): The environment configuration.
+
+        Returns:
+            MongoIndexManager: The MongoIndexManager instance.
+        """
+        cosmos_client = CosmosClient(environment_config.cosmosdb.endpoint.value)
+        cosmosdb = environment_config.cosmosdb
+        collection_names = {
+            MongoCollection.DOCUMENTS: cosmosdb.document_collection_name,
+            MongoCollection.LEASE_DOCUMENTS: cosmosdb.lease_document_collection_name,
+            MongoCollection.INGESTED_DOCUMENTS: cosmosdb.ingested_documents_collection_name,
+            MongoCollection.COLLECTION_CONTEXTS: cosmosdb.context_collection_name,
+            MongoCollection.CONFIGURATIONS: cosmosdb.configuration_collection_name,
+        }
+        return cls({
+            collection_type: cosmos_client.get_collection(cosmosdb.db_name.value, collection_name.value)
+            for collection_type, collection_name in collection_names.items()
+            if collection_name
+        })
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Creates the declared indexes and checks the hot query plans of the configured environment.
+
+    Run from the ``src`` directory with ``python -m services.mongo_index_manager``.
+
+    Args:
+        argv (Optional[list[str]]): The command line arguments.
+
+    Returns:
+        int: The exit code, non-zero when a hot query scans a whole collection.
+    """
+    from configs.app_config_manager import get_app_config_manager
+
+    parser = argparse.ArgumentParser(description=main.__doc__.splitlines()[0])
+    parser.add_argument("--check-only", action="store_true", help="Only check query plans, do not create indexes.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    index_manager = MongoIndexManager.from_environment_config(get_app_config_manager().hydrate_config())
+    if not args.check_only:
+        index_manager.ensure_indexes()
+
+    results = index_manager.validate_query_plans()
+    for result in results:
+        print(f"{result.collection.value}.{result.query}: {', '.join(result.stages) or result.error}")
+    return 1 if any(result.is_collection_scan for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,37 +1,140 @@
-from datetime import datetime
+import logging
+import os
+import random
+import socket
 import time
+from datetime import datetime
+from threading import Lock, Thread
+from typing import Optional
+from uuid import uuid4
+from opentelemetry import metrics
 from pymongo import errors
 from pymongo.collection import Collection
-from typing import Optional
 from constants import MongoLockContants
 
 
+# Fields of a stored document that belong to its lock. Only the lock manager writes them
+LOCK_FIELDS = ("is_locked", "unlock_unix_timestamp", "lock_owner")
+
+_meter = metrics.get_meter(__name__)
+_acquire_attempts_counter = _meter.create_counter(
+    "mongo_lock.acquire_attempts",
+    description="Lock acquisition attempts, by outcome."
+)
+_wait_duration_histogram = _meter.create_histogram(
+    "mongo_lock.wait_duration",
+    unit="s",
+    description="Time spent waiting for a lock, by outcome."
+)
+_lost_locks_counter = _meter.create_counter(
+    "mongo_lock.lost",
+    description="Locks that expired or were taken over while held."
+)
+
+
+class _HeldLock(object):
+    owner: str
+
+    def __init__(self, owner: str):
+        self.owner = owner
+
+
+class _KeyedLocks(object):
+    """In-process locks keyed by document, created on first use and dropped once no thread needs them.
+
+    Exact keys rather than a fixed set of stripes keep unrelated documents from sharing a lock, which could
+    deadlock holders of two locks at once such as the lease document migration.
+    """
+    _guard: Lock
+    _locks: dict[tuple, list]
+
+    def __init__(self):
+        self._guard = Lock()
+        self._locks = {}  # key -> [lock, number of threads holding or waiting for it]
+
+    def acquire(self, key: tuple, timeout: Optional[float]) -> bool:
+        with self._guard:
+            entry = self._locks.setdefault(key, [Lock(), 0])
+            entry[1] += 1
+
+        if entry[0].acquire(timeout=-1 if timeout is None else max(timeout, 0)):
+            return True
+
+        self._drop_user(key, entry)
+        return False
+
+    def release(self, key: tuple):
+        with self._guard:
+            entry = self._locks[key]
+            entry[0].release()
+        self._drop_user(key, entry)
+
+    def _drop_user(self, key: tuple, entry: list):
+        with self._guard:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
+
+
+_local_locks = _KeyedLocks()
+
+
 class MongoLockManager:
+    """Document locks stored on the locked documents themselves.
+
+    Each acquisition is identified by an owner token, so only the holder can renew or release its lock, and
+    writes conditioned on the owner with ``get_lock_filter`` are not applied once the lock is lost. Held
+    locks are renewed by a heartbeat so long ingests keep their lock, while the locks of crashed holders
+    still expire.
+
+    Contenders in the same process queue on an in-process lock per document, and the one competing for the
+    stored lock retries with exponential backoff and full jitter, so lock traffic does not grow with the
+    number of waiters.
+    """
     _collection: Collection
     _lock_duration: int
+    _renew_interval: float
+    _owner_id: str
+    _held_locks: dict[str, _HeldLock]
+    _local_lock_holds: set[str]
+    _state_lock: Lock
+    _heartbeat: Optional[Thread]
 
-    def __init__(self, collection: Collection, lock_duration: int = MongoLockContants.LOCK_DURATION_IN_SECONDS):
+    def __init__(
+        self,
+        collection: Collection,
+        lock_duration: int = MongoLockContants.LOCK_DURATION_IN_SECONDS,
+        renew_interval: Optional[float] = None
+    ):
         """Initialize the MongoLockManager.
 
         Args:
             collection (Collection): The MongoDB collection to use for locking.
-            lock_duration (int): Duration of the lock in seconds.
+            lock_duration (int): Duration of the lock in seconds. Held locks are renewed before they expire.
+            renew_interval (Optional[float]): Seconds between renewals of held locks. Defaults to a third of
+                the lock duration.
         """
         self._collection = collection
         self._lock_duration = lock_duration
+        self._renew_interval = renew_interval or lock_duration / 3
+        self._owner_id = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self._held_locks = {}
+        self._local_lock_holds = set()
+        self._state_lock = Lock()
+        self._heartbeat = None
 
     def acquire_lock(self, document_id: str) -> bool:
         """Attempt to acquire a lock on a document.
 
         Args:
             document_id (str): The ID of the document to lock.
-            lock_duration (int): Duration of the lock in seconds (default: 300 seconds).
 
         Returns:
             bool: True if the lock was acquired, False otherwise.
         """
         current_time = int(datetime.now().timestamp())
         unlock_time = current_time + self._lock_duration
+        owner = f"{self._owner_id}:{uuid4().hex}"
 
         try:
             result = self._collection.update_one(
@@ -46,7 +149,8 @@ class MongoLockManager:
                 {
                     "$set": {
                         "is_locked": True,
-                        "unlock_unix_timestamp": unlock_time
+                        "unlock_unix_timestamp": unlock_time,
+                        "lock_owner": owner
                     },
                     "$setOnInsert": {
                         "_id": document_id,
@@ -54,32 +158,51 @@ class MongoLockManager:
                 },
                 upsert=True
             )
-            if result.modified_count > 0 or result.upserted_id is not None:
-                return True
+        except errors.DuplicateKeyError:
+            # The document exists and is locked, so the upsert tried to insert it again
+            _acquire_attempts_counter.add(1, {"result": "contended"})
             return False
         except errors.PyMongoError as e:
             raise RuntimeError(f"Failed to acquire lock for document {document_id}: {e}")
 
+        if result.modified_count > 0 or result.upserted_id is not None:
+            _acquire_attempts_counter.add(1, {"result": "acquired"})
+            self._track_lock(document_id, owner)
+            return True
+        _acquire_attempts_counter.add(1, {"result": "contended"})
+        return False
+
     def wait(self, document_id: str, timeout: Optional[int] = MongoLockContants.MAX_WAIT_TIMEOUT_IN_SECONDS) -> bool:
-        """Wait for a lock to be released on a document.
+        """Wait for a lock to be released on a document, then acquire it.
+
+        Contenders in the same process queue on an in-process lock first, so only one of them at a time
+        competes for the lock in the database.
 
         Args:
             document_id (str): The ID of the document to wait for.
             timeout (int, optional): Maximum time to wait in seconds. If None, wait indefinitely.
 
         Returns:
-            bool: True if the lock was released, False if timed out.
+            bool: True if the lock was acquired, False if timed out.
         """
-        start_time = datetime.now()
-        while True:
-            if self.acquire_lock(document_id):
-                return True
-            if timeout and (datetime.now() - start_time).total_seconds() > timeout:
-                return False
-            time.sleep(MongoLockContants.WAIT_SLEEP_DURATION)
+        start_time = time.monotonic()
+        local_key = self._get_local_key(document_id)
+        if not _local_locks.acquire(local_key, timeout):
+            return self._time_out_wait(document_id, start_time)
+
+        acquired = False
+        try:
+            acquired = self._wait_for_stored_lock(document_id, start_time, timeout)
+        finally:
+            if acquired:
+                with self._state_lock:
+                    self._local_lock_holds.add(document_id)
+            else:
+                _local_locks.release(local_key)
+        return acquired
 
     def release_lock(self, document_id: str) -> bool:
-        """Release the lock on a document.
+        """Release the lock on a document, if it is still held by this manager.
 
         Args:
             document_id (str): The ID of the document to unlock.
@@ -87,16 +210,135 @@ class MongoLockManager:
         Returns:
             bool: True if the lock was released, False otherwise.
         """
+        with self._state_lock:
+            held_lock = self._held_locks.pop(document_id, None)
+            holds_local_lock = document_id in self._local_lock_holds
+            self._local_lock_holds.discard(document_id)
+
+        try:
+            return self._release_stored_lock(document_id, held_lock)
+        finally:
+            if holds_local_lock:
+                _local_locks.release(self._get_local_key(document_id))
+
+    def get_lock_filter(self, document_id: str) -> dict:
+        """Gets a filter that only matches a document while this manager holds its lock.
+
+        The owner is unique to each acquisition, so a write made with the filter by a holder whose lock
+        expired or was taken over matches nothing instead of overwriting the writes of the new holder.
+
+        Args:
+            document_id (str): The ID of the locked document.
+
+        Returns:
+            dict: The filter.
+
+        Raises:
+            RuntimeError: If the lock is not held by this manager.
+        """
+        with self._state_lock:
+            held_lock = self._held_locks.get(document_id)
+        if held_lock is None:
+            raise RuntimeError(f"The lock on document {document_id} is not held.")
+        return {"_id": document_id, "lock_owner": held_lock.owner}
+
+    def _wait_for_stored_lock(self, document_id: str, start_time: float, timeout: Optional[int]) -> bool:
+        attempt = 0
+        while True:
+            if self.acquire_lock(document_id):
+                _wait_duration_histogram.record(time.monotonic() - start_time, {"acquired": True})
+                return True
+
+            elapsed = time.monotonic() - start_time
+            if timeout and elapsed > timeout:
+                return self._time_out_wait(document_id, start_time)
+
+            delay = self._get_backoff_delay(attempt)
+            if timeout:
+                delay = min(delay, max(timeout - elapsed, 0) + MongoLockContants.BACKOFF_BASE_DELAY_IN_SECONDS)
+            time.sleep(delay)
+            attempt += 1
+
+    def _time_out_wait(self, document_id: str, start_time: float) -> bool:
+        elapsed = time.monotonic() - start_time
+        _wait_duration_histogram.record(elapsed, {"acquired": False})
+        logging.warning(f"Timed out after {elapsed:.1f}s waiting for the lock on document {document_id}")
+        return False
+
+    def _release_stored_lock(self, document_id: str, held_lock: Optional[_HeldLock]) -> bool:
+        if held_lock is None:
+            return False
+
         try:
             result = self._collection.update_one(
-                {"_id": document_id, "is_locked": True},
+                {"_id": document_id, "is_locked": True, "lock_owner": held_lock.owner},
                 {
                     "$set": {
                         "is_locked": False,
                         "unlock_unix_timestamp": 0
+                    },
+                    "$unset": {
+                        "lock_owner": ""
                     }
                 }
             )
-            return result.modified_count > 0
         except errors.PyMongoError as e:
             raise RuntimeError(f"Failed to release lock for document {document_id}: {e}")
+
+        if result.modified_count == 0:
+            _lost_locks_counter.add(1)
+            logging.warning(f"The lock on document {document_id} was lost before it was released.")
+            return False
+        return True
+
+    def _get_backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        max_delay = min(
+            MongoLockContants.BACKOFF_MAX_DELAY_IN_SECONDS,
+            MongoLockContants.BACKOFF_BASE_DELAY_IN_SECONDS * 2 ** attempt
+        )
+        return random.uniform(0, max_delay)
+
+    def _get_local_key(self, document_id: str) -> tuple:
+        # Managers are created per request, so the in-process locks are shared by collection and document
+        return (self._collection.full_name, document_id)
+
+    def _track_lock(self, document_id: str, owner: str):
+        with self._state_lock:
+            self._held_locks[document_id] = _HeldLock(owner)
+            if self._heartbeat is None or not self._heartbeat.is_alive():
+                self._heartbeat = Thread(target=self._renew_held_locks, name="mongo-lock-heartbeat", daemon=True)
+                self._heartbeat.start()
+
+    def _renew_held_locks(self):
+        """Renews every held lock until none are left."""
+        while True:
+            time.sleep(self._renew_interval)
+            with self._state_lock:
+                held_locks = dict(self._held_locks)
+                if not held_locks:
+                    self._heartbeat = None
+                    return
+
+            unlock_time = int(datetime.now().timestamp()) + self._lock_duration
+            for document_id, held_lock in held_locks.items():
+                try:
+                    result = self._collection.update_one(
+                        {"_id": document_id, "lock_owner": held_lock.owner},
+                        {"$set": {"unlock_unix_timestamp": unlock_time}}
+                    )
+                except errors.PyMongoError as e:
+                    logging.warning(f"Failed to renew the lock on document {document_id}: {e}")
+                    continue
+
+                if result.matched_count == 0:
+                    self._forget_lost_lock(document_id, held_lock)
+
+    def _forget_lost_lock(self, document_id: str, held_lock: _HeldLock):
+        with self._state_lock:
+            # The lock may have been released while it was being renewed
+            if self._held_locks.get(document_id) is not held_lock:
+                return
+            del self._held_locks[document_id]
+        _lost_locks_counter.add(1)
+        logging.warning(f"The lock on document {document_id} expired or was taken over while held.")
@@ -0,0 +1,167 @@
+from abc import ABC, abstractmethod
+from threading import Lock
+from typing import Any, Optional
+from cachetools import TLRUCache
+
+from constants import SharedCacheConstants
+from models.environment_config import EnvironmentConfig, SharedCacheBackend
+
+
+class SharedCache(ABC):
+    """A cache of serialized values shared by every instance of the function app."""
+    ttl_in_seconds: int
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Get a value from the cache.
+
+        Args:
+            key (str): The key of the value.
+
+        Returns:
+            Optional[str]: The value, or None if the key is not cached.
+        """
+
+    @abstractmethod
+    def set(self, key: str, value: str):
+        """Store a value in the cache for the cache's TTL.
+
+        Args:
+            key (str): The key of the value.
+            value (str): The value.
+        """
+
+
+class InMemorySharedCache(SharedCache):
+    """An in-process stand-in for the shared cache, for tests and local development.
+
+    Entries are only shared by the callers within the process.
+    """
+    _entries: TLRUCache
+    _lock: Lock
+
+    def __init__(
+        self,
+        ttl_in_seconds: int = SharedCacheConstants.DEFAULT_TTL_IN_SECONDS,
+        maxsize: int = SharedCacheConstants.IN_MEMORY_MAX_ENTRIES
+    ):
+        """Initialize the InMemorySharedCache.
+
+        Args:
+            ttl_in_seconds (int): How long entries are kept.
+            maxsize (int): The maximum number of entries.
+        """
+        self.ttl_in_seconds = ttl_in_seconds
+        self._entries = TLRUCache(maxsize=maxsize, ttu=lambda key, value, now: now + ttl_in_seconds)
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a value from the cache.
+
+        Args:
+            key (str): The key of the value.
+
+        Returns:
+            Optional[str]: The value, or None if the key is not cached.
+        """
+        with self._lock:
+            return self._entries.get(key)
+
+    def set(self, key: str, value: str):
+        """Store a value in the cache for the cache's TTL.
+
+        Args:
+            key (str): The key of the value.
+            value (str): The value.
+        """
+        with self._lock:
+            self._entries[key] = value
+
+
+class RedisSharedCache(SharedCache):
+    """A shared cache stored in Redis, or any server speaking the Redis protocol such as Azure Cache for Redis."""
+    _client: Any
+
+    def __init__(self, client: Any, ttl_in_seconds: int = SharedCacheConstants.DEFAULT_TTL_IN_SECONDS):
+        """Initialize the RedisSharedCache.
+
+        Args:
+            client (redis.Redis): The Redis client, returning decoded strings.
+            ttl_in_seconds (int): How long entries are kept.
+        """
+        self._client = client
+        self.ttl_in_seconds = ttl_in_seconds
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a value from the cache.
+
+        Args:
+            key (str): The key of the value.
+
+        Returns:
+            Optional[str]: The value, or None if the key is not cached.
+        """
+        return self._client.get(key)
+
+    def set(self, key: str, value: str):
+        """Store a value in the cache for the cache's TTL.
+
+        Args:
+            key (str): The key of the value.
+            value (str): The value.
+        """
+        self._client.set(key, value, ex=self.ttl_in_seconds)
+
+    @classmethod
+    def from_url(cls, url: str, ttl_in_seconds: int = SharedCacheConstants.DEFAULT_TTL_IN_SECONDS):
+        """Creates a RedisSharedCache from a Redis URL, such as ``rediss://:<key>@<host>:6380/0``.
+
+        Args:
+            url (str): The Redis URL.
+            ttl_in_seconds (int): How long entries are kept.
+
+        Returns:
+            RedisSharedCache: The RedisSharedCache instance.
+        """
+        import redis
+
+        client = redis.Redis.from_url(
+            url,
+            decode_responses=True,
+            socket_timeout=SharedCacheConstants.SOCKET_TIMEOUT_IN_SECONDS,
+            socket_connect_timeout=SharedCacheConstants.SOCKET_TIMEOUT_IN_SECONDS
+        )
+        return cls(client, ttl_in_seconds)
+
+
+_shared_cache: SharedCache | None = None
+_shared_cache_lock = Lock()
+
+
+def get_shared_cache(environment_config: EnvironmentConfig) -> Optional[SharedCache]:
+    """Get the process-wide shared cache, if one is configured.
+
+    Args:
+        environment_config (EnvironmentConfig): The environment configuration.
+
+    Returns:
+        Optional[SharedCache]: The shared cache, or None if no shared cache is configured.
+    """
+    global _shared_cache
+    config = environment_config.shared_cache
+    if config is None:
+        return None
+
+    with _shared_cache_lock:
+        if _shared_cache is not None:
+            return _shared_cache
+
+        ttl_in_seconds = config.ttl_in_seconds.value if config.ttl_in_seconds \
+            else SharedCacheConstants.DEFAULT_TTL_IN_SECONDS
+        if config.backend.value == SharedCacheBackend.MEMORY:
+            _shared_cache = InMemorySharedCache(ttl_in_seconds)
+        elif config.url:
+            _shared_cache = RedisSharedCache.from_url(config.url.value, ttl_in_seconds)
+        else:
+            raise ValueError("A URL must be configured for the Redis shared cache.")
+        return _shared_cache
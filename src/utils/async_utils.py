@@ -0,0 +1,85 @@
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from threading import Lock
+from typing import Any, Awaitable, Callable, Hashable
+
+from constants import AsyncIoConstants
+
+
+# Shared across event loops: each HTTP request runs on its own loop, and the blocking drivers keep their
+# connection pools per process rather than per loop
+_executor = ThreadPoolExecutor(max_workers=AsyncIoConstants.MAX_BLOCKING_IO_THREADS, thread_name_prefix="blocking-io")
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Runs a blocking I/O call on the shared thread pool without blocking the event loop.
+
+    Args:
+        func (Callable[..., Any]): The blocking function.
+        *args: Positional arguments for the function.
+        **kwargs: Keyword arguments for the function.
+
+    Returns:
+        Any: The return value of the function.
+    """
+    return await asyncio.get_running_loop().run_in_executor(_executor, partial(func, *args, **kwargs))
+
+
+class SingleFlight(object):
+    """Coalesces concurrent calls for the same key, so one call runs and every caller shares its result.
+
+    Callers may run on different event loops and threads, as concurrent HTTP requests do, so calls in flight
+    are tracked with thread-safe futures. A call that fails raises its error to every caller waiting for it.
+    """
+    _guard: Lock
+    _calls: dict[Hashable, Future]
+
+    def __init__(self):
+        """Initializes the SingleFlight."""
+        self._guard = Lock()
+        self._calls = {}
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Runs a call unless one is already in flight for the key, and returns the result of the call.
+
+        Args:
+            key (Hashable): The key of the call.
+            func (Callable[[], Awaitable[Any]]): Makes the call. Only called when no call is in flight.
+
+        Returns:
+            Any: The result of the call, made by this caller or by the one that started it.
+        """
+        while True:
+            with self._guard:
+                call = self._calls.get(key)
+                is_leader = call is None
+                if is_leader:
+                    call = self._calls[key] = Future()
+
+            if is_leader:
+                return await self._lead(key, call, func)
+
+            try:
+                # Shielded so that a waiter giving up does not cancel the call for the other waiters
+                return await asyncio.shield(asyncio.wrap_future(call))
+            except asyncio.CancelledError:
+                if not call.cancelled():
+                    raise
+                # The caller that started the call was cancelled, so start it again
+
+    async def _lead(self, key: Hashable, call: Future, func: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            result = await func()
+        except Exception as e:
+            call.set_exception(e)
+            raise
+        except BaseException:
+            call.cancel()
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._guard:
+                del self._calls[key]
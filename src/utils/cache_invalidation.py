@@ -0,0 +1,46 @@
+import logging
+from enum import Enum
+from threading import Lock
+from typing import Callable
+
+
+class InvalidationSource(str, Enum):
+    """The stored data an in-process cache is derived from."""
+    COLLECTION_DOCUMENTS = "collection_documents"
+    CONFIGURATIONS = "configurations"
+
+
+InvalidationHandler = Callable[[dict], None]
+
+_handlers: dict[InvalidationSource, list[InvalidationHandler]] = {source: [] for source in InvalidationSource}
+_handlers_lock = Lock()
+
+
+def register_invalidation_handler(source: InvalidationSource, handler: InvalidationHandler):
+    """Registers a handler that drops cached entries derived from a changed document.
+
+    Args:
+        source (InvalidationSource): The stored data the cache is derived from.
+        handler (InvalidationHandler): Called with the changed document's ``_id``, ``collection_id`` and
+            ``lease_config_hash`` (when the document has them).
+    """
+    with _handlers_lock:
+        if handler not in _handlers[source]:
+            _handlers[source].append(handler)
+
+
+def invalidate(source: InvalidationSource, document: dict):
+    """Notifies every cache registered for a source that a document changed.
+
+    Args:
+        source (InvalidationSource): The stored data that changed.
+        document (dict): The identifying fields of the changed document.
+    """
+    with _handlers_lock:
+        handlers = list(_handlers[source])
+
+    for handler in handlers:
+        try:
+            handler(document)
+        except Exception as e:
+            logging.error(f"Cache invalidation handler failed for {source.value} document {document.get('_id')}: {e}")
@@ -0,0 +1,46 @@
+import bisect
+import hashlib
+from typing import Iterable
+
+
+def _hash(value: str) -> int:
+    # Python's built-in hash is salted per process, so a stable digest is used instead
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class ConsistentHashRing(object):
+    """Maps keys to nodes so that adding or removing a node only moves the keys of that node.
+
+    Each node is placed on the ring at several points (virtual nodes) to spread keys evenly.
+    """
+    _points: list[int]
+    _nodes: list[str]
+
+    def __init__(self, nodes: Iterable[str], virtual_nodes: int = 100):
+        """Initializes the ConsistentHashRing.
+
+        Args:
+            nodes (Iterable[str]): The nodes to distribute keys over.
+            virtual_nodes (int): The number of points each node takes on the ring.
+        """
+        ring = sorted(
+            (_hash(f"{node}#{index}"), node)
+            for node in nodes
+            for index in range(virtual_nodes)
+        )
+        if not ring:
+            raise ValueError("A consistent hash ring needs at least one node.")
+        self._points = [point for point, _ in ring]
+        self._nodes = [node for _, node in ring]
+
+    def get_node(self, key: str) -> str:
+        """Gets the node a key belongs to.
+
+        Args:
+            key (str): The key.
+
+        Returns:
+            str: The node owning the first ring point at or after the hash of the key.
+        """
+        index = bisect.bisect_left(self._points, _hash(key)) % len(self._points)
+        return self._nodes[index]
@@ -0,0 +1,114 @@
+import json
+import os
+from threading import Lock
+from typing import IO, Optional
+
+
+class DownloadManifest(object):
+    """Append-only record of the blobs downloaded to a directory.
+
+    Each line records a blob's ETag and size once its download starts and again once it completes, so a
+    later run can skip unchanged blobs and resume partial downloads. The last record of a blob wins, and a
+    line cut short by an interruption is ignored.
+    """
+    FILE_NAME = ".download_manifest.jsonl"
+
+    _path: str
+    _entries: dict[str, dict]
+    _file: Optional[IO[str]]
+    _ends_with_partial_line: bool
+    _lock: Lock
+
+    def __init__(self, output_dir: str):
+        """Initializes the DownloadManifest, loading the records of previous runs.
+
+        Args:
+            output_dir (str): The directory the blobs are downloaded to, which holds the manifest.
+        """
+        self._path = os.path.join(output_dir, self.FILE_NAME)
+        self._entries = {}
+        self._file = None
+        self._lock = Lock()
+        self._ends_with_partial_line = False
+
+        if os.path.exists(self._path):
+            with open(self._path) as f:
+                line = ""
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self._entries[entry["name"]] = entry
+                self._ends_with_partial_line = bool(line) and not line.endswith("\n")
+
+    def __enter__(self):
+        """Use the manifest until the block exits."""
+        return self
+
+    def __exit__(self, *args):
+        """Close the manifest."""
+        self.close()
+
+    def get(self, name: str) -> Optional[dict]:
+        """Gets the last record of a blob.
+
+        Args:
+            name (str): The blob name.
+
+        Returns:
+            Optional[dict]: The record, with the ``etag``, ``size`` and ``complete`` keys, or None.
+        """
+        with self._lock:
+            return self._entries.get(name)
+
+    def is_complete(self, name: str, etag: str, size: int, output_file: str) -> bool:
+        """Checks whether a blob was fully downloaded and saved, and has not changed since.
+
+        Args:
+            name (str): The blob name.
+            etag (str): The current ETag of the blob.
+            size (int): The current size of the blob.
+            output_file (str): The file the blob is downloaded to.
+
+        Returns:
+            bool: True if the downloaded file is up to date.
+        """
+        entry = self.get(name)
+        return (
+            entry is not None
+            and entry["complete"]
+            and entry["etag"] == etag
+            and entry["size"] == size
+            and os.path.isfile(output_file)
+            and os.path.getsize(output_file) == entry.get("file_size", size)
+        )
+
+    def record(self, name: str, etag: str, size: int, complete: bool, file_size: Optional[int] = None):
+        """Records the state of a blob's download.
+
+        Args:
+            name (str): The blob name.
+            etag (str): The ETag of the downloaded blob.
+            size (int): The size of the downloaded blob.
+            complete (bool): Whether the download has completed.
+            file_size (Optional[int]): The size of the saved file, when it differs from the blob's size.
+        """
+        entry = {"name": name, "etag": etag, "size": size, "complete": complete}
+        if file_size is not None and file_size != size:
+            entry["file_size"] = file_size
+        with self._lock:
+            if self._file is None:
+                self._file = open(self._path, "a")
+                if self._ends_with_partial_line:
+                    self._file.write("\n")
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+            self._entries[name] = entry
+
+    def close(self):
+        """Closes the manifest file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
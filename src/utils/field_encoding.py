@@ -0,0 +1,153 @@
+import re
+import struct
+from typing import Any, Optional
+
+from bson import Binary
+
+
+_SOURCE_REGION_PATTERN = re.compile(r"^D\((\d+),([^()]*)\)$")
+_SOURCE_REGION_SEPARATOR = ";"
+
+# Content Understanding reports coordinates with at most 4 decimals, stored as scaled integers
+_COORDINATE_SCALE = 10_000
+
+# How coordinates were formatted in the original string, so decoding reproduces it exactly
+_FORMAT_TRIMMED = 0  # "7.501", "1"
+_FORMAT_FIXED = 1  # "7.5010", "1.0000"
+
+_REGION_HEADER = struct.Struct("<HH")  # page, number of coordinates
+_SPAN_KEYS = frozenset({"offset", "length"})
+_MAX_UINT32 = 2 ** 32 - 1
+
+
+def _format_coordinate(value: int, coordinate_format: int) -> str:
+    formatted = f"{value / _COORDINATE_SCALE:.4f}"
+    if coordinate_format == _FORMAT_TRIMMED:
+        formatted = formatted.rstrip("0").rstrip(".")
+    return formatted
+
+
+def _pack_source(source: str, coordinate_format: int) -> Optional[bytes]:
+    packed = bytearray([coordinate_format])
+    for region in source.split(_SOURCE_REGION_SEPARATOR):
+        match = _SOURCE_REGION_PATTERN.match(region)
+        if not match:
+            return None
+        try:
+            page = int(match.group(1))
+            coordinates = [round(float(value) * _COORDINATE_SCALE) for value in match.group(2).split(",")]
+            packed += _REGION_HEADER.pack(page, len(coordinates))
+            packed += struct.pack(f"<{len(coordinates)}i", *coordinates)
+        except (ValueError, struct.error):
+            return None
+    return bytes(packed)
+
+
+def encode_source(source: str) -> Optional[bytes]:
+    """Packs a CU source polygon string such as ``D(1,0.5,1.25,...)`` into binary form.
+
+    Each region is stored as its page number and coordinates scaled to 32-bit integers. The string is only
+    encoded if it decodes back to exactly the same string.
+
+    Args:
+        source (str): The source polygon string.
+
+    Returns:
+        Optional[bytes]: The packed source, or None if the string cannot be encoded losslessly.
+    """
+    for coordinate_format in (_FORMAT_TRIMMED, _FORMAT_FIXED):
+        packed = _pack_source(source, coordinate_format)
+        if packed is not None and decode_source(packed) == source:
+            return packed
+    return None
+
+
+def decode_source(packed: bytes) -> str:
+    """Unpacks a source polygon string packed by ``encode_source``.
+
+    Args:
+        packed (bytes): The packed source.
+
+    Returns:
+        str: The source polygon string.
+    """
+    coordinate_format = packed[0]
+    regions = []
+    offset = 1
+    while offset < len(packed):
+        page, coordinate_count = _REGION_HEADER.unpack_from(packed, offset)
+        offset += _REGION_HEADER.size
+        coordinates = struct.unpack_from(f"<{coordinate_count}i", packed, offset)
+        offset += 4 * coordinate_count
+        formatted = ",".join(_format_coordinate(value, coordinate_format) for value in coordinates)
+        regions.append(f"D({page},{formatted})")
+    return _SOURCE_REGION_SEPARATOR.join(regions)
+
+
+def encode_spans(spans: list[dict]) -> Optional[bytes]:
+    """Packs a list of ``{"offset", "length"}`` spans into pairs of unsigned 32-bit integers.
+
+    Args:
+        spans (list[dict]): The spans.
+
+    Returns:
+        Optional[bytes]: The packed spans, or None if a span has other keys or out of range values.
+    """
+    values = []
+    for span in spans:
+        if not isinstance(span, dict) or span.keys() != _SPAN_KEYS:
+            return None
+        for value in (span["offset"], span["length"]):
+            if type(value) is not int or not 0 <= value <= _MAX_UINT32:
+                return None
+            values.append(value)
+    return struct.pack(f"<{len(values)}I", *values)
+
+
+def decode_spans(packed: bytes) -> list[dict]:
+    """Unpacks spans packed by ``encode_spans``.
+
+    Args:
+        packed (bytes): The packed spans.
+
+    Returns:
+        list[dict]: The spans.
+    """
+    values = struct.unpack(f"<{len(packed) // 4}I", packed)
+    return [{"offset": offset, "length": length} for offset, length in zip(values[::2], values[1::2])]
+
+
+def encode_stored_fields(fields: dict[str, list[dict]]) -> dict[str, list[dict]]:
+    """Replaces the sources and spans of serialized lease fields with their packed binary form, in place.
+
+    Values that cannot be packed losslessly are kept as they are. Nested array items and object properties
+    are encoded as well.
+
+    Args:
+        fields (dict[str, list[dict]]): The serialized fields of a lease, keyed by field name.
+
+    Returns:
+        dict[str, list[dict]]: The same fields.
+    """
+    for field_values in fields.values():
+        for field_value in field_values:
+            _encode_stored_field(field_value)
+    return fields
+
+
+def _encode_stored_field(field_value: Any):
+    if not isinstance(field_value, dict):
+        return
+
+    source = field_value.get("source")
+    if isinstance(source, str) and (packed_source := encode_source(source)) is not None:
+        field_value["source"] = Binary(packed_source)
+
+    spans = field_value.get("spans")
+    if isinstance(spans, list) and spans and (packed_spans := encode_spans(spans)) is not None:
+        field_value["spans"] = Binary(packed_spans)
+
+    for item in field_value.get("valueArray") or []:
+        _encode_stored_field(item)
+    for item in (field_value.get("valueObject") or {}).values():
+        _encode_stored_field(item)
@@ -0,0 +1,185 @@
+import heapq
+import itertools
+import time
+from collections.abc import MutableMapping
+from threading import RLock
+from typing import Any, Callable, Hashable, Iterator, Optional
+
+
+class _Entry(object):
+    __slots__ = ("value", "size", "cost", "expires_at", "sequence")
+
+    def __init__(self, value: Any, size: int, cost: float, expires_at: Optional[float]):
+        self.value = value
+        self.size = size
+        self.cost = cost
+        self.expires_at = expires_at
+        self.sequence = 0
+
+
+class GreedyDualSizeCache(MutableMapping):
+    """A cache bounded by the total size of its values rather than by their number.
+
+    Entries are evicted by GreedyDual-Size: each entry has a priority of ``L + cost / size``, set when it is
+    stored and again on every hit, where ``L`` is the priority of the last evicted entry. The entry with the
+    lowest priority is evicted first, so large entries that are cheap to rebuild go before small or expensive
+    ones, and entries that are no longer read fall behind as ``L`` rises.
+
+    Values larger than the whole budget are not cached. The cache is thread safe.
+    """
+    _maxsize: int
+    _getsizeof: Callable[[Any], int]
+    _ttl: Optional[float]
+    _timer: Callable[[], float]
+    _entries: dict[Hashable, _Entry]
+    _heap: list[tuple[float, int, Hashable]]
+    _sequence: Iterator[int]
+    _inflation: float
+    _currsize: int
+    _evictions: int
+
+    def __init__(
+        self,
+        maxsize: int,
+        getsizeof: Callable[[Any], int],
+        ttl: Optional[float] = None,
+        timer: Callable[[], float] = time.monotonic
+    ):
+        """Initializes the GreedyDualSizeCache.
+
+        Args:
+            maxsize (int): The maximum total size of the cached values.
+            getsizeof (Callable[[Any], int]): Returns the size of a value, such as its serialized size in bytes.
+            ttl (Optional[float]): How long entries are kept, in seconds. Entries do not expire when None.
+            timer (Callable[[], float]): The clock used for expiry.
+        """
+        self._maxsize = maxsize
+        self._getsizeof = getsizeof
+        self._ttl = ttl
+        self._timer = timer
+        self._entries = {}
+        self._heap = []
+        self._sequence = itertools.count(1)
+        self._inflation = 0.0
+        self._currsize = 0
+        self._evictions = 0
+        self._lock = RLock()
+
+    @property
+    def maxsize(self) -> int:
+        """The maximum total size of the cached values."""
+        return self._maxsize
+
+    @property
+    def currsize(self) -> int:
+        """The total size of the cached values."""
+        return self._currsize
+
+    @property
+    def evictions(self) -> int:
+        """The number of entries evicted to make room for others since the cache was created."""
+        return self._evictions
+
+    def set(self, key: Hashable, value: Any, cost: Optional[float] = None):
+        """Stores a value along with the cost of producing it again.
+
+        Args:
+            key (Hashable): The key of the value.
+            value (Any): The value.
+            cost (Optional[float]): The cost of producing the value, such as the time it took. Replacing a value
+                keeps the cost of the previous one when None, otherwise the cost defaults to 1.
+        """
+        size = max(self._getsizeof(value), 1)
+        with self._lock:
+            previous = self._entries.get(key)
+            if cost is None:
+                cost = previous.cost if previous is not None else 1.0
+            if previous is not None:
+                self._remove(key)
+            if size > self._maxsize:
+                return
+
+            if self._currsize + size > self._maxsize:
+                self._expire()
+            while self._currsize + size > self._maxsize:
+                self._evict()
+
+            expires_at = self._timer() + self._ttl if self._ttl is not None else None
+            entry = _Entry(value, size, cost, expires_at)
+            self._entries[key] = entry
+            self._currsize += size
+            self._prioritize(key, entry)
+
+    def __setitem__(self, key: Hashable, value: Any):
+        """Stores a value, keeping the cost of the value it replaces."""
+        self.set(key, value)
+
+    def __getitem__(self, key: Hashable) -> Any:
+        """Gets a value and raises its priority."""
+        with self._lock:
+            entry = self._entries[key]
+            if self._is_expired(entry):
+                self._remove(key)
+                raise KeyError(key)
+            self._prioritize(key, entry)
+            return entry.value
+
+    def __contains__(self, key: object) -> bool:
+        """Checks whether a value is cached, without raising its priority."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not self._is_expired(entry)
+
+    def __delitem__(self, key: Hashable):
+        """Removes a value. Removed values are not counted as evictions."""
+        with self._lock:
+            self._remove(key)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        """Iterates over a snapshot of the keys."""
+        with self._lock:
+            return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        """Gets the number of entries, including expired entries that have not been dropped yet."""
+        return len(self._entries)
+
+    def clear(self):
+        """Removes every entry. Removed entries are not counted as evictions."""
+        with self._lock:
+            self._entries.clear()
+            self._heap.clear()
+            self._inflation = 0.0
+            self._currsize = 0
+
+    def _is_expired(self, entry: _Entry) -> bool:
+        return entry.expires_at is not None and entry.expires_at <= self._timer()
+
+    def _prioritize(self, key: Hashable, entry: _Entry):
+        entry.sequence = next(self._sequence)
+        heapq.heappush(self._heap, (self._inflation + entry.cost / entry.size, entry.sequence, key))
+        # Every hit pushes a new priority, so drop the outdated ones once they outnumber the entries
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [item for item in self._heap if self._is_current(item)]
+            heapq.heapify(self._heap)
+
+    def _is_current(self, item: tuple[float, int, Hashable]) -> bool:
+        entry = self._entries.get(item[2])
+        return entry is not None and entry.sequence == item[1]
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self._currsize -= entry.size
+
+    def _expire(self):
+        for key in [key for key, entry in self._entries.items() if self._is_expired(entry)]:
+            self._remove(key)
+
+    def _evict(self):
+        while True:
+            item = heapq.heappop(self._heap)
+            if self._is_current(item):
+                break
+        self._inflation = item[0]
+        self._remove(item[2])
+        self._evictions += 1
@@ -0,0 +1,114 @@
+import gzip
+from typing import Optional
+from pydantic import BaseModel
+
+from constants import BlobStorageConstants
+
+
+GZIP_ENCODING = "gzip"
+IDENTITY_ENCODING = "identity"
+
+
+class MarkdownPageIndex(BaseModel):
+    """Where each page of a stored markdown starts in the blob, so single pages can be read with a ranged read.
+
+    The markdown is stored as one segment per page, each compressed on its own when the blob is compressed,
+    so any run of consecutive pages can be read and decoded without the rest of the blob.
+    """
+    encoding: str = IDENTITY_ENCODING
+    # (page number, byte offset, byte length) of each page segment, in blob order
+    pages: list[tuple[int, int, int]] = []
+
+    def get_ranges(self, page_numbers: list[int]) -> list[list[tuple[int, int, int]]]:
+        """Groups the segments of the requested pages into runs of adjacent segments.
+
+        Args:
+            page_numbers (list[int]): The requested page numbers.
+
+        Returns:
+            list[list[tuple[int, int, int]]]: The segments of each run, each run readable with one ranged read.
+        """
+        requested = set(page_numbers)
+        runs: list[list[tuple[int, int, int]]] = []
+        for segment in self.pages:
+            if segment[0] not in requested:
+                continue
+            if runs and runs[-1][-1][1] + runs[-1][-1][2] == segment[1]:
+                runs[-1].append(segment)
+            else:
+                runs.append([segment])
+        return runs
+
+    def decode_segment(self, data: bytes) -> str:
+        """Decodes the stored bytes of a page segment.
+
+        Args:
+            data (bytes): The bytes of the segment.
+
+        Returns:
+            str: The markdown of the page.
+        """
+        if self.encoding == GZIP_ENCODING:
+            data = gzip.decompress(data)
+        return data.decode("utf-8")
+
+
+class PagedMarkdown(BaseModel):
+    """A markdown encoded as page segments, ready to be stored along with its page index."""
+    data: bytes
+    index: MarkdownPageIndex
+
+
+def get_page_offsets(contents: list[dict], separator: str = "") -> dict[int, int]:
+    """Gets the offset in the joined markdown of the contents at which each page starts.
+
+    Content Understanding reports the spans of each page as offsets in the markdown of its content.
+
+    Args:
+        contents (list[dict]): The contents whose markdowns are joined, in order.
+        separator (str): The separator appended after the markdown of each content.
+
+    Returns:
+        dict[int, int]: The offset of the first span of each page, by page number.
+    """
+    page_offsets: dict[int, int] = {}
+    content_offset = 0
+    for content in contents:
+        for page in content.get("pages") or []:
+            offsets = [span["offset"] for span in page.get("spans") or [] if "offset" in span]
+            if "pageNumber" in page and offsets:
+                offset = content_offset + min(offsets)
+                page_offsets[page["pageNumber"]] = min(offset, page_offsets.get(page["pageNumber"], offset))
+        content_offset += len(content.get("markdown", "")) + len(separator)
+    return page_offsets
+
+
+def encode_paged_markdown(markdown: str, page_offsets: dict[int, int]) -> Optional[PagedMarkdown]:
+    """Splits a markdown into one segment per page and encodes the segments back to back.
+
+    Each page runs from its first span to the start of the next page, and text before the first page is kept
+    with it, so the segments together hold the whole markdown. Markdowns larger than the compression minimum
+    are compressed one segment at a time, which a gzip reader decodes as one stream.
+
+    Args:
+        markdown (str): The markdown.
+        page_offsets (dict[int, int]): The offset at which each page starts, by page number.
+
+    Returns:
+        Optional[PagedMarkdown]: The encoded markdown and its index, or None if no page is known.
+    """
+    starts = sorted((offset, page) for page, offset in page_offsets.items() if 0 <= offset <= len(markdown))
+    if not starts:
+        return None
+
+    compress = len(markdown.encode("utf-8")) >= BlobStorageConstants.COMPRESSION_MIN_SIZE_IN_BYTES
+    index = MarkdownPageIndex(encoding=GZIP_ENCODING if compress else IDENTITY_ENCODING)
+    data = bytearray()
+    for position, (start, page) in enumerate(starts):
+        end = starts[position + 1][0] if position + 1 < len(starts) else len(markdown)
+        segment = markdown[0 if position == 0 else start:end].encode("utf-8")
+        if compress:
+            segment = gzip.compress(segment, mtime=0)
+        index.pages.append((page, len(data), len(segment)))
+        data += segment
+    return PagedMarkdown(data=bytes(data), index=index)
@@ -1,3 +1,4 @@
+import os
 from typing import Optional
 from models.ingestion_models import IngestDocumentType
 from constants import PathConstants
@@ -53,3 +54,15 @@ def build_adls_pdf_file_path(
         raise ValueError("Lease ID must be provided for COLLECTION document type.")
 
     return f"{PathConstants.COLLECTION_PREFIX}/{id}/{lease_id}/{file_name}"
+
+
+def build_markdown_page_index_path(markdown_file_path: str) -> str:
+    """Build the path of the page index stored next to a markdown file.
+
+    Args:
+        markdown_file_path (str): The markdown file path.
+
+    Returns:
+        str: The page index file path.
+    """
+    return os.path.splitext(markdown_file_path)[0] + ".pages.json"
@@ -0,0 +1,90 @@
+import logging
+import math
+from threading import Lock
+from typing import Any, Optional
+
+from constants import ContextBudgetConstants
+
+
+class TokenCounter(object):
+    """Counts the tokens of a text with the tokenizer of a model, without calling the model.
+
+    tiktoken is used when it is installed and its encoding can be loaded, which may need network access the
+    first time. Otherwise, tokens are approximated from the number of characters.
+    """
+    _model_name: Optional[str]
+    _encoding: Any
+    _encoding_loaded: bool
+
+    def __init__(self, model_name: Optional[str] = None):
+        """Initializes the TokenCounter.
+
+        Args:
+            model_name (Optional[str]): The name of the model, such as ``gpt-4o``. The default encoding is used
+                for unknown models.
+        """
+        self._model_name = model_name
+        self._encoding = None
+        self._encoding_loaded = False
+        self._lock = Lock()
+
+    @property
+    def is_exact(self) -> bool:
+        """Whether tokens are counted with the tokenizer rather than approximated."""
+        return self._get_encoding() is not None
+
+    def count(self, text: str) -> int:
+        """Counts the tokens of a text.
+
+        Args:
+            text (str): The text.
+
+        Returns:
+            int: The number of tokens.
+        """
+        encoding = self._get_encoding()
+        if encoding is None:
+            return math.ceil(len(text) / ContextBudgetConstants.APPROXIMATE_CHARACTERS_PER_TOKEN)
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def _get_encoding(self) -> Any:
+        with self._lock:
+            if not self._encoding_loaded:
+                self._encoding = self._load_encoding()
+                self._encoding_loaded = True
+            return self._encoding
+
+    def _load_encoding(self) -> Any:
+        try:
+            import tiktoken
+        except ImportError:
+            logging.info("tiktoken is not installed, token counts are approximated")
+            return None
+
+        try:
+            try:
+                return tiktoken.encoding_for_model(self._model_name or "")
+            except KeyError:
+                return tiktoken.get_encoding(ContextBudgetConstants.DEFAULT_ENCODING)
+        except Exception as e:
+            logging.warning(f"Failed to load the tokenizer, token counts are approximated: {e}")
+            return None
+
+
+_token_counters: dict[Optional[str], TokenCounter] = {}
+_token_counters_lock = Lock()
+
+
+def get_token_counter(model_name: Optional[str] = None) -> TokenCounter:
+    """Gets the process-wide token counter of a model, so its tokenizer is only loaded once.
+
+    Args:
+        model_name (Optional[str]): The name of the model.
+
+    Returns:
+        TokenCounter: The token counter.
+    """
+    with _token_counters_lock:
+        if model_name not in _token_counters:
+            _token_counters[model_name] = TokenCounter(model_name)
+        return _token_counters[model_name]
@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 from controllers.inference_controller import InferenceController
 from services.ingest_config_management_service import IngestConfigManagementService
 from services.ingest_lease_documents_service import IngestionCollectionDocumentService
@@ -32,7 +32,7 @@ class TestInferenceController(unittest.TestCase):
         config_version = "1.0"
         user_id = "user123"
 
-        self.config_management_service.load_config.return_value = None
+        self.config_management_service.load_config_async.return_value = None
 
         with self.assertRaises(HTTPError) as context:
             asyncio.run(self.controller.query(request, config_name, config_version, user_id))
@@ -47,7 +47,7 @@ class TestInferenceController(unittest.TestCase):
         user_id = "user123"
         config = MagicMock()
         config.prompt = "test prompt"
-        self.config_management_service.load_config.return_value = config
+        self.config_management_service.load_config_async.return_value = config
         self.chat_history.user_message_limit_exceeded = True
 
         with self.assertRaises(HTTPError) as context:
@@ -63,7 +63,7 @@ class TestInferenceController(unittest.TestCase):
         user_id = "user123"
         config = MagicMock()
         config.prompt = "test prompt"
-        self.config_management_service.load_config.return_value = config
+        self.config_management_service.load_config_async.return_value = config
         test_response = "test response"
         test_citations = [["test_doc", "test_bounding_boxes"]]
         test_metrics = QueryMetrics(prompt_tokens=100,
@@ -82,7 +82,9 @@ class TestInferenceController(unittest.TestCase):
 
         response = asyncio.run(self.controller.query(request, config_name, config_version, user_id))
 
-        self.config_management_service.load_config.assert_called_once_with(f"{config_name}-{config_version}")
+        self.config_management_service.load_config_async.assert_awaited_once_with(f"{config_name}-{config_version}")
+        self.chat_history.read_messages_async.assert_awaited_once_with(request.sid, user_id)
+        self.chat_history.store_messages_async.assert_awaited_once_with(request.sid, user_id)
         self.llm_request_manager.answer_collection_question.assert_called_once_with(
             config.prompt,
             request.query,
@@ -93,3 +95,41 @@ class TestInferenceController(unittest.TestCase):
         self.assertEqual(response.__class__.__name__, "QueryResponse")
         self.assertEqual(response.response, test_response)
         self.assertEqual(response.citations, test_citations)
+
+    def test_query_reports_context_budget_metrics(self):
+        """Test that the prompt tokens are counted before the question, and the packing is reported."""
+        request = QueryRequest(query="test query", sid="1234", cid="test-correlation-id")
+        config = MagicMock()
+        config.prompt = "test prompt"
+        self.config_management_service.load_config_async.return_value = config
+        self.llm_request_manager.answer_collection_question.return_value = QueryResponse(
+            response="test response",
+            citations=[],
+            metrics=QueryMetrics(prompt_tokens=100, completion_tokens=10, total_tokens=110, total_latency_sec=20.0)
+        ).model_dump_json()
+        self.chat_history.user_message_limit_exceeded = False
+        self.chat_history.messages = []
+        context_packer = MagicMock()
+        context_packer.count_prompt_tokens.return_value = 42
+        controller = InferenceController(
+            self.llm_request_manager,
+            self.config_management_service,
+            self.chat_history,
+            self.lease_docs_service,
+            context_packer=context_packer
+        )
+
+        with patch("controllers.inference_controller.CollectionPlugin") as mock_plugin_class:
+            mock_plugin_class.return_value.context_tokens = 300
+            mock_plugin_class.return_value.truncated_context_values = 2
+            response = asyncio.run(controller.query(request, "test_config", "1.0", "user123"))
+
+        context_packer.count_prompt_tokens.assert_called_once_with(
+            "test prompt",
+            "test query",
+            [],
+            self.llm_request_manager.get_collection_question_definitions.return_value
+        )
+        self.assertEqual(mock_plugin_class.call_args.args[-2:], (context_packer, 42))
+        self.assertEqual(response.metrics.context_tokens, 300)
+        self.assertEqual(response.metrics.truncated_context_values, 2)
@@ -5,7 +5,11 @@ from services.azure_content_understanding_client import AzureContentUnderstandin
 from services.ingest_lease_documents_service import IngestionCollectionDocumentService
 from controllers.ingest_lease_documents_controller import IngestLeaseDocumentsController
 from models.data_collection_config import FieldDataCollectionConfig
-from models.ingestion_models import IngestCollectionDocumentRequest, IngestDocumentType
+from models.ingestion_models import (
+    ContentUnderstandingIngestOutput,
+    IngestCollectionDocumentRequest,
+    IngestDocumentType
+)
 from models.http_error import HTTPError
 from datetime import date
 
@@ -88,21 +92,27 @@ class TestIngestDocuments(TestIngestLeaseDocumentsControllerBase):
         )
         self.assertEqual(self.mock_content_understanding_client.begin_analyze_data.call_count, len(documents))
         self.assertEqual(self.mock_content_understanding_client.poll_result.call_count, len(documents))
-        self.assertEqual(self.mock_ingestion_collection_document_service.ingest_analyzer_output.call_count, len(documents))
+        self.mock_ingestion_collection_document_service.ingest_analyzer_output.assert_not_called()
+        self.mock_ingestion_collection_document_service.ingest_many.assert_called_once_with(
+            [
+                ContentUnderstandingIngestOutput(
+                    doc_type=IngestDocumentType.COLLECTION,
+                    collection_id=document.id,
+                    lease_id=document.lease_id,
+                    filename=document.filename,
+                    date_of_document=document.date_of_document,
+                    data=mock_analyzer_output,
+                    is_classifier_output=False
+                )
+                for document in documents
+            ],
+            mock_config
+        )
 
         for document in documents:
             self.mock_content_understanding_client.begin_analyze_data.assert_any_call(
                 "test-analyzer", document.file_bytes
             )
-            self.mock_ingestion_collection_document_service.ingest_analyzer_output.assert_any_call(
-                IngestDocumentType.COLLECTION,
-                document.id,
-                document.lease_id,
-                document.filename,
-                document.date_of_document,
-                mock_analyzer_output,
-                mock_config
-            )
 
     def test_when_already_ingested_returns_correct_response_analyzer_only(self):
         """Test the ingest_documents method.
@@ -265,8 +275,21 @@ class TestIngestDocuments(TestIngestLeaseDocumentsControllerBase):
         )
         self.assertEqual(self.mock_content_understanding_client.begin_classify_data.call_count, len(documents))
         self.assertEqual(self.mock_content_understanding_client.poll_result.call_count, len(documents))
-        classifier_output_call_count = self.mock_ingestion_collection_document_service.ingest_classifier_output.call_count
-        self.assertEqual(classifier_output_call_count, len(documents))
+        self.mock_ingestion_collection_document_service.ingest_many.assert_called_once_with(
+            [
+                ContentUnderstandingIngestOutput(
+                    doc_type=IngestDocumentType.COLLECTION,
+                    collection_id=document.id,
+                    lease_id=document.lease_id,
+                    filename=document.filename,
+                    date_of_document=document.date_of_document,
+                    data=mock_classifier_output,
+                    is_classifier_output=True
+                )
+                for document in documents
+            ],
+            mock_config
+        )
 
         # Verify analyzer methods are not called when classifier is enabled
         self.mock_content_understanding_client.begin_analyze_data.assert_not_called()
@@ -276,15 +299,6 @@ class TestIngestDocuments(TestIngestLeaseDocumentsControllerBase):
             self.mock_content_understanding_client.begin_classify_data.assert_any_call(
                 "test-classifier", document.file_bytes
             )
-            self.mock_ingestion_collection_document_service.ingest_classifier_output.assert_any_call(
-                IngestDocumentType.COLLECTION,
-                document.id,
-                document.lease_id,
-                document.filename,
-                document.date_of_document,
-                mock_classifier_output,
-                mock_config
-            )
 
     def test_when_already_ingested_returns_correct_response_classifier_enabled(self):
         """Test the ingest_documents method when documents are already ingested with classifier enabled.
@@ -435,3 +449,48 @@ class TestIngestDocuments(TestIngestLeaseDocumentsControllerBase):
         # Verify classifier methods are not called when classifier is disabled
         self.mock_content_understanding_client.begin_classify_data.assert_not_called()
         self.mock_ingestion_collection_document_service.ingest_classifier_output.assert_not_called()
+
+    def test_batch_skips_duplicate_documents(self):
+        """Test that a document repeated within a batch is only analyzed and ingested once."""
+        # Arrange
+        document = IngestCollectionDocumentRequest(
+            id="collection_id_1",
+            lease_id="lease_id_1",
+            filename="filename_1",
+            file_bytes=b"file_bytes_1",
+            date_of_document=date(2023, 10, 1),
+        )
+        mock_config = FieldDataCollectionConfig(**{
+            "_id": "test_config-1.0",
+            "name": "test_config",
+            "version": "1.0",
+            "prompt": "Test prompt.",
+            "lease_config_hash": "test_hash",
+            "collection_rows": [
+                {
+                    "data_type": "LeaseAgreement",
+                    "container_name": "lesa",
+                    "folder_name": "lease-agreements",
+                    "field_schema": [
+                        {
+                            "name": "earliest_termination_dates",
+                            "type": "date",
+                            "description": "Earliest termination dates"
+                        }
+                    ],
+                    "analyzer_id": "test-analyzer"
+                }
+            ]
+        })
+
+        self.mock_ingestion_collection_document_service.is_document_ingested.return_value = False
+        self.mock_ingestion_configuration_management_service.load_config.return_value = mock_config
+        self.mock_content_understanding_client.poll_result.return_value = {"analyzer": "output"}
+
+        # Act
+        self.controller.ingest_documents("test_config", "1.0", [document, document])
+
+        # Assert
+        self.mock_content_understanding_client.begin_analyze_data.assert_called_once()
+        outputs = self.mock_ingestion_collection_document_service.ingest_many.call_args[0][0]
+        self.assertEqual(len(outputs), 1)
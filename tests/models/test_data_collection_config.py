@@ -0,0 +1,61 @@
+from unittest import TestCase
+
+from models.data_collection_config import (
+    ArrayFieldSchema,
+    ClassifierConfig,
+    FieldDataCollectionConfig,
+    FieldMappingType,
+    FieldSchema,
+    LeaseAgreementCollectionRow
+)
+
+
+class TestCompiledIngestConfig(TestCase):
+    def setUp(self):
+        self.config = FieldDataCollectionConfig(
+            _id="test_config-1.0",
+            name="test_config",
+            version="1.0",
+            prompt="Test prompt",
+            lease_config_hash="hash",
+            collection_rows=[
+                LeaseAgreementCollectionRow(
+                    analyzer_id="analyzer",
+                    field_schema=[
+                        FieldSchema(name="field1", type=FieldMappingType.STRING, description="Field 1"),
+                        ArrayFieldSchema(
+                            name="field2",
+                            description="Field 2",
+                            items=[FieldSchema(name="item", type=FieldMappingType.STRING, description="Item")]
+                        )
+                    ]
+                ),
+                LeaseAgreementCollectionRow(
+                    analyzer_id="analyzer",
+                    field_schema=[
+                        FieldSchema(name="field3", type=FieldMappingType.DATE, description="Field 3")
+                    ],
+                    classifier=ClassifierConfig(enabled=True, classifier_id="classifier")
+                )
+            ]
+        )
+
+    def test_compiled_config(self):
+        compiled = self.config.compiled
+
+        self.assertEqual(compiled.field_names, frozenset({"field1", "field2", "field3"}))
+        self.assertEqual(compiled.prompt, "Test prompt")
+        self.assertEqual(len(compiled.lease_rows), 2)
+        self.assertFalse(compiled.lease_rows[0].is_classifier_enabled)
+        self.assertEqual(compiled.lease_rows[0].content_understanding_id, "analyzer")
+        self.assertEqual(compiled.lease_rows[0].field_names, frozenset({"field1", "field2"}))
+        self.assertTrue(compiled.lease_rows[1].is_classifier_enabled)
+        self.assertEqual(compiled.lease_rows[1].content_understanding_id, "classifier")
+
+    def test_compiled_config_is_computed_once(self):
+        self.assertIs(self.config.compiled, self.config.compiled)
+
+    def test_compiled_config_is_not_serialized(self):
+        self.config.compiled
+
+        self.assertNotIn("compiled", self.config.model_dump())
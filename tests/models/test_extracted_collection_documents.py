@@ -84,3 +84,37 @@ class TestExtractedCollectionDocuments(TestCase):
             self.assertEqual(model_obj_val.spans, obj_val["spans"])
         if "source" in obj_val:
             self.assertEqual(model_obj_val.source, obj_val["source"])
+
+    def test_from_stored_hydrates_leases_on_access(self):
+        json_path = Path(__file__).parent / "lease_documents/sample-1.json"
+        with open(json_path, encoding="utf-8") as f:
+            data = json.load(f)
+        lease_id = data["information"]["leases"][0]["lease_id"]
+
+        collection_documents = ExtractedCollectionDocuments.from_stored(data)
+
+        self._validate_top_level_fields(collection_documents, data)
+        self.assertTrue(all(isinstance(lease, dict) for lease in collection_documents.information.leases))
+
+        model_lease = collection_documents.get_lease(lease_id)
+
+        self._validate_lease(model_lease, data["information"]["leases"][0])
+        self.assertIs(collection_documents.information.leases[0], model_lease)
+        self.assertIs(collection_documents.get_lease(lease_id), model_lease)
+        self.assertIsNone(collection_documents.get_lease("missing-lease"))
+
+    def test_from_stored_dumps_like_validated_document(self):
+        json_path = Path(__file__).parent / "lease_documents/sample-1.json"
+        with open(json_path, encoding="utf-8") as f:
+            data = json.load(f)
+        stored = ExtractedCollectionDocuments.model_validate(data).model_dump(
+            by_alias=True, mode="json", exclude_defaults=True
+        )
+
+        collection_documents = ExtractedCollectionDocuments.from_stored(stored)
+        collection_documents.get_lease(stored["information"]["leases"][0]["lease_id"])
+
+        self.assertEqual(
+            collection_documents.model_dump(by_alias=True, mode="json", exclude_defaults=True, warnings=False),
+            stored
+        )
@@ -0,0 +1,26 @@
+import unittest
+from unittest.mock import patch, Mock
+from routes.api.v1.index_management_routes import ensure_mongo_indexes
+
+
+class TestIndexManagementRoutes(unittest.TestCase):
+    """Unit tests for the index management timer."""
+
+    @patch("routes.api.v1.index_management_routes.logging")
+    @patch("routes.api.v1.index_management_routes.MongoIndexManager")
+    @patch("routes.api.v1.index_management_routes.get_app_config_manager")
+    def test_ensure_mongo_indexes(self, mock_app_config_manager, mock_index_manager, mock_logging):
+        """Test that the timer creates the indexes and logs hot queries that scan a collection."""
+        environment_config = Mock()
+        mock_app_config_manager.return_value.hydrate_config.return_value = environment_config
+        index_manager = mock_index_manager.from_environment_config.return_value
+        index_manager.validate_query_plans.return_value = [
+            Mock(is_collection_scan=False),
+            Mock(is_collection_scan=True),
+        ]
+
+        ensure_mongo_indexes(Mock())
+
+        mock_index_manager.from_environment_config.assert_called_once_with(environment_config)
+        index_manager.ensure_indexes.assert_called_once()
+        mock_logging.error.assert_called_once()
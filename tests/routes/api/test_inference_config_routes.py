@@ -16,8 +16,14 @@ class TestInferenceConfigRoutes(unittest.IsolatedAsyncioTestCase):
     @patch('routes.api.v1.inference_config_routes.get_llm_request_manager')
     @patch('routes.api.v1.inference_config_routes.InferenceController')
     @patch('routes.api.v1.inference_config_routes.get_cosmos_chat_history')
+    @patch('routes.api.v1.inference_config_routes.get_shared_cache')
+    @patch('routes.api.v1.inference_config_routes.get_context_pruner')
+    @patch('routes.api.v1.inference_config_routes.get_context_packer')
     async def test_query_success(
         self,
+        mock_get_context_packer,
+        mock_get_context_pruner,
+        mock_get_shared_cache,
         mock_get_cosmos_chat_history,
         mock_inference_controller,
         mock_get_llm_request_manager,
@@ -77,8 +83,15 @@ class TestInferenceConfigRoutes(unittest.IsolatedAsyncioTestCase):
             mock_get_llm_request_manager.return_value,
             mock_ingest_config_management_service.from_environment_config.return_value,
             mock_get_cosmos_chat_history.return_value,
-            mock_lease_docs_service.from_environment_config.return_value
+            mock_lease_docs_service.from_environment_config.return_value,
+            mock_get_shared_cache.return_value,
+            mock_lease_docs_service.from_environment_config.return_value.context_store,
+            mock_get_context_pruner.return_value,
+            mock_get_context_packer.return_value
         )
+        mock_get_shared_cache.assert_called_once_with(mock_environment_config)
+        mock_get_context_pruner.assert_called_once_with(mock_environment_config)
+        mock_get_context_packer.assert_called_once_with(mock_environment_config)
         mock_controller_instance.query.assert_called_once_with(
             query_request,
             "default_config_name",
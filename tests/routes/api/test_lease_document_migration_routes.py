@@ -0,0 +1,31 @@
+import unittest
+from unittest.mock import patch, Mock
+from routes.api.v1.lease_document_migration_routes import migrate_lease_documents
+
+
+class TestLeaseDocumentMigrationRoutes(unittest.TestCase):
+    """Unit tests for the lease document migration timer."""
+
+    @patch("routes.api.v1.lease_document_migration_routes.LeaseDocumentMigrator")
+    @patch("routes.api.v1.lease_document_migration_routes.get_app_config_manager")
+    def test_migrate_lease_documents(self, mock_app_config_manager, mock_migrator):
+        """Test that the timer runs a bounded migration when the layout is configured."""
+        environment_config = Mock()
+        mock_app_config_manager.return_value.hydrate_config.return_value = environment_config
+
+        migrate_lease_documents(Mock())
+
+        mock_migrator.from_environment_config.assert_called_once_with(environment_config)
+        mock_migrator.from_environment_config.return_value.migrate_all.assert_called_once_with(limit=50)
+
+    @patch("routes.api.v1.lease_document_migration_routes.LeaseDocumentMigrator")
+    @patch("routes.api.v1.lease_document_migration_routes.get_app_config_manager")
+    def test_migrate_lease_documents_not_configured(self, mock_app_config_manager, mock_migrator):
+        """Test that the timer is a no-op without a lease document collection."""
+        environment_config = Mock()
+        environment_config.cosmosdb.lease_document_collection_name = None
+        mock_app_config_manager.return_value.hydrate_config.return_value = environment_config
+
+        migrate_lease_documents(Mock())
+
+        mock_migrator.from_environment_config.assert_not_called()
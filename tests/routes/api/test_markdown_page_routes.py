@@ -0,0 +1,61 @@
+import json
+import unittest
+from unittest.mock import patch
+from azure.functions import HttpRequest
+from routes.api.v1.markdown_page_routes import get_markdown_pages
+
+ROUTE_PARAMS = {"collection_id": "c1", "lease_id": "l1", "document_name": "lease.pdf"}
+
+
+class TestGetMarkdownPages(unittest.TestCase):
+    """Test the get_markdown_pages route."""
+
+    def _request(self, params: dict) -> HttpRequest:
+        return HttpRequest(
+            method="GET",
+            url="/documents/c1/l1/lease.pdf/pages",
+            route_params=ROUTE_PARAMS,
+            params=params,
+            body=b""
+        )
+
+    @patch("routes.api.v1.markdown_page_routes.MarkdownPageService")
+    @patch("routes.api.v1.markdown_page_routes.get_app_config_manager")
+    def test_get_markdown_pages(self, mock_app_config_manager, mock_service):
+        """Test that the selected pages are returned in page order."""
+        mock_service.from_environment_config.return_value.get_pages.return_value = {3: "three", 1: "one"}
+
+        response = get_markdown_pages(self._request({"pages": "1, 3-4"}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.get_body()), {
+            "pages": [{"page_number": 1, "markdown": "one"}, {"page_number": 3, "markdown": "three"}]
+        })
+        mock_service.from_environment_config.return_value.get_pages.assert_called_once_with(
+            "c1", "l1", "lease.pdf", [1, 3, 4]
+        )
+
+    @patch("routes.api.v1.markdown_page_routes.MarkdownPageService")
+    @patch("routes.api.v1.markdown_page_routes.get_app_config_manager")
+    def test_document_without_page_index(self, mock_app_config_manager, mock_service):
+        """Test that documents without a page index are reported as not found."""
+        mock_service.from_environment_config.return_value.get_pages.return_value = None
+
+        response = get_markdown_pages(self._request({"pages": "1"}))
+
+        self.assertEqual(response.status_code, 404)
+
+    @patch("routes.api.v1.markdown_page_routes.MarkdownPageService")
+    @patch("routes.api.v1.markdown_page_routes.get_app_config_manager")
+    def test_invalid_page_selection(self, mock_app_config_manager, mock_service):
+        """Test that missing, malformed and oversized page selections are rejected."""
+        for params in [{}, {"pages": "one"}, {"pages": "0"}, {"pages": "5-2"}, {"pages": "1-100"}]:
+            with self.subTest(params=params):
+                response = get_markdown_pages(self._request(params))
+
+                self.assertEqual(response.status_code, 400)
+        mock_service.from_environment_config.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
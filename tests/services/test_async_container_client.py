@@ -0,0 +1,186 @@
+import asyncio
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+from azure.core.exceptions import ResourceExistsError
+from azure.storage.blob import ContentSettings
+from src.services.async_container_client import AsyncContainerClient, _SharedAsyncCredential, \
+    get_async_container_client
+
+
+class _AsyncBlobList(object):
+    def __init__(self, names: list[str]):
+        blobs = [MagicMock() for _ in names]
+        for blob, name in zip(blobs, names):
+            blob.name = name
+        self._blobs = iter(blobs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._blobs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class TestAsyncContainerClient(unittest.TestCase):
+    def setUp(self):
+        """Set up the test case with a mock async container client."""
+        self.mock_container_client = MagicMock()
+        self.mock_container_client.upload_blob = AsyncMock()
+        self.mock_container_client.close = AsyncMock()
+        self.container_client = AsyncContainerClient(self.mock_container_client, max_concurrency=3)
+
+    def _mock_download(self, content: bytes, metadata: dict) -> MagicMock:
+        mock_blob = MagicMock()
+        mock_blob.readall = AsyncMock(return_value=content)
+        mock_blob.properties.metadata = metadata
+        self.mock_container_client.download_blob = AsyncMock(return_value=mock_blob)
+        return mock_blob
+
+    def test_upload_document_uses_max_concurrency(self):
+        asyncio.run(self.container_client.upload_document(b"file content", "path/to/file.txt"))
+
+        self.mock_container_client.upload_blob.assert_awaited_once_with(
+            "path/to/file.txt", b"file content", overwrite=True, metadata=None, max_concurrency=3
+        )
+
+    def test_upload_documents_uploads_each_document(self):
+        asyncio.run(self.container_client.upload_documents([("a", "a.md"), ("b", "b.md")]))
+
+        self.assertEqual(self.mock_container_client.upload_blob.await_count, 2)
+        uploaded_paths = {call.args[0] for call in self.mock_container_client.upload_blob.await_args_list}
+        self.assertEqual(uploaded_paths, {"a.md", "b.md"})
+
+    def test_upload_documents_if_absent(self):
+        self.mock_container_client.upload_blob.side_effect = [None, ResourceExistsError("The blob already exists.")]
+
+        with patch("src.services.async_container_client.BlobStorageConstants.CONCURRENT_TRANSFERS", 1):
+            result = asyncio.run(
+                self.container_client.upload_documents([("a", "a.md"), ("b", "b.md")], if_absent=True)
+            )
+
+        self.assertEqual(result, [True, False])
+        self.mock_container_client.upload_blob.assert_any_await(
+            "a.md", "a", overwrite=False, metadata=None, max_concurrency=3
+        )
+
+    def test_upload_documents_bounds_concurrent_transfers(self):
+        in_flight = 0
+        max_in_flight = 0
+
+        async def upload_blob(*args, **kwargs):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0)
+            in_flight -= 1
+
+        self.mock_container_client.upload_blob = AsyncMock(side_effect=upload_blob)
+
+        with patch("src.services.async_container_client.BlobStorageConstants.CONCURRENT_TRANSFERS", 2):
+            asyncio.run(self.container_client.upload_documents([(str(i), f"{i}.md") for i in range(5)]))
+
+        self.assertEqual(self.mock_container_client.upload_blob.await_count, 5)
+        self.assertEqual(max_in_flight, 2)
+
+    def test_download_file_uses_max_concurrency(self):
+        self._mock_download(b"file content", {"key": "value"})
+
+        content, metadata = asyncio.run(self.container_client.download_file("path/to/file.txt"))
+
+        self.mock_container_client.download_blob.assert_awaited_once_with(
+            "path/to/file.txt", max_concurrency=3, decompress=False
+        )
+        self.assertEqual(content, b"file content")
+        self.assertEqual(metadata, {"key": "value"})
+
+    def test_download_file_decompresses_gzip_encoded_blob(self):
+        mock_blob = self._mock_download(gzip.compress(b"file content"), {})
+        mock_blob.properties.content_settings = ContentSettings(content_encoding="gzip")
+
+        content, _ = asyncio.run(self.container_client.download_file("path/to/file.md"))
+
+        self.assertEqual(content, b"file content")
+
+    def test_download_files_saves_matching_files(self):
+        self.mock_container_client.list_blobs.return_value = _AsyncBlobList(
+            ["base/a.pdf", "base/b.md", "base/folder"]
+        )
+        self._mock_download(b"file content", {"key": "value"})
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            results = asyncio.run(self.container_client.download_files("base", output_dir, extension=".pdf"))
+
+            self.assertEqual(results, [os.path.join(output_dir, "base", "a.pdf")])
+            with open(results[0], "rb") as f:
+                self.assertEqual(f.read(), b"file content")
+            with open(os.path.join(output_dir, "base", "a.json")) as f:
+                self.assertEqual(json.load(f), {"key": "value"})
+        self.mock_container_client.list_blobs.assert_called_once_with("base")
+
+    def test_context_manager_closes_client(self):
+        async def use_client():
+            async with self.container_client:
+                pass
+
+        asyncio.run(use_client())
+
+        self.mock_container_client.close.assert_awaited_once()
+
+
+class TestSharedAsyncCredential(unittest.TestCase):
+    def test_get_token_uses_shared_credential(self):
+        mock_credential = MagicMock()
+        mock_credential.get_token.return_value = "token"
+        credential = _SharedAsyncCredential(mock_credential)
+
+        token = asyncio.run(credential.get_token("scope", tenant_id="tenant"))
+
+        self.assertEqual(token, "token")
+        mock_credential.get_token.assert_called_once_with("scope", tenant_id="tenant")
+
+    def test_close_keeps_shared_credential_open(self):
+        mock_credential = MagicMock()
+        credential = _SharedAsyncCredential(mock_credential)
+
+        asyncio.run(credential.close())
+
+        mock_credential.close.assert_not_called()
+
+
+class TestGetAsyncContainerClient(unittest.TestCase):
+    @patch("src.services.async_container_client.get_storage_credential")
+    @patch("src.services.async_container_client.AsyncAzureContainerClient")
+    def test_clients_share_credential(self, mock_azure_client, mock_get_storage_credential):
+        environment_config = MagicMock()
+        environment_config.blob_storage.max_concurrency.value = 8
+
+        first = get_async_container_client(environment_config)
+        second = get_async_container_client(environment_config)
+
+        self.assertIsNot(first, second)
+        self.assertEqual(first._max_concurrency, 8)
+        credentials = [call.kwargs["credential"] for call in mock_azure_client.call_args_list]
+        self.assertEqual(len(credentials), 2)
+        for credential in credentials:
+            self.assertIs(credential._credential, mock_get_storage_credential.return_value)
+
+    @patch("src.services.async_container_client.get_storage_credential")
+    @patch("src.services.async_container_client.AsyncAzureContainerClient")
+    def test_defaults_max_concurrency(self, mock_azure_client, mock_get_storage_credential):
+        environment_config = MagicMock()
+        environment_config.blob_storage.max_concurrency = None
+
+        client = get_async_container_client(environment_config)
+
+        self.assertEqual(client._max_concurrency, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from pymongo import errors
+
+from services.cache_invalidation_watcher import CacheInvalidationWatcher
+from utils.cache_invalidation import InvalidationSource
+
+
+class TestCacheInvalidationWatcher(unittest.TestCase):
+    def setUp(self):
+        self.mock_collection = MagicMock()
+        self.watcher = CacheInvalidationWatcher([(InvalidationSource.COLLECTION_DOCUMENTS, self.mock_collection)])
+
+    @patch("services.cache_invalidation_watcher.invalidate")
+    def test_change_stream_invalidates_changed_documents(self, mock_invalidate):
+        """Test that change stream events are pushed with the identifying fields of the document."""
+        stream = self.mock_collection.watch.return_value.__enter__.return_value
+
+        def next_change():
+            if stream.try_next.call_count == 2:
+                self.watcher.stop()
+                return None
+            return {"fullDocument": {
+                "_id": "collection-hash",
+                "collection_id": "collection",
+                "lease_config_hash": "hash",
+                "information": {"leases": []}
+            }}
+        stream.try_next.side_effect = next_change
+
+        self.watcher._watch(InvalidationSource.COLLECTION_DOCUMENTS, self.mock_collection)
+
+        mock_invalidate.assert_called_once_with(
+            InvalidationSource.COLLECTION_DOCUMENTS,
+            {"_id": "collection-hash", "collection_id": "collection", "lease_config_hash": "hash"}
+        )
+
+    def test_change_stream_only_sends_the_identity_of_data_writes(self):
+        """Test that lock-only updates are filtered out, and that whole documents are not sent."""
+        self.watcher.stop()
+        stream = self.mock_collection.watch.return_value.__enter__.return_value
+        stream.try_next.return_value = None
+
+        self.watcher._watch_change_stream(InvalidationSource.COLLECTION_DOCUMENTS, self.mock_collection)
+
+        (pipeline,), kwargs = self.mock_collection.watch.call_args
+        match, project = pipeline[0]["$match"], pipeline[1]["$project"]
+        self.assertIn(
+            {"operationType": "update", "updateDescription.updatedFields.updated_unix_timestamp": {"$exists": True}},
+            match["$or"]
+        )
+        self.assertNotIn("fullDocument", project)
+        self.assertEqual(
+            sorted(key for key in project if key.startswith("fullDocument.")),
+            [
+                "fullDocument._id",
+                "fullDocument.collection_id",
+                "fullDocument.lease_config_hash",
+                "fullDocument.updated_unix_timestamp"
+            ]
+        )
+        self.assertEqual(kwargs, {"full_document": "updateLookup"})
+
+    @patch("services.cache_invalidation_watcher.invalidate")
+    @patch("services.cache_invalidation_watcher.time")
+    def test_falls_back_to_polling(self, mock_time, mock_invalidate):
+        """Test that the version field is polled when change streams are not supported."""
+        mock_time.time.return_value = 1000.0
+        self.mock_collection.watch.side_effect = errors.OperationFailure("change streams not supported")
+        changed_document = {
+            "_id": "collection-hash",
+            "collection_id": "collection",
+            "lease_config_hash": "hash",
+            "updated_unix_timestamp": 1001.0
+        }
+        self.mock_collection.find.side_effect = [[changed_document], [changed_document]]
+        wait_results = iter([False, False, True])
+        self.watcher._stop_event = MagicMock()
+        self.watcher._stop_event.is_set.side_effect = lambda: self.mock_collection.find.call_count >= 2
+        self.watcher._stop_event.wait.side_effect = lambda timeout: next(wait_results)
+
+        self.watcher._watch(InvalidationSource.COLLECTION_DOCUMENTS, self.mock_collection)
+
+        self.mock_collection.find.assert_called_with(
+            {"updated_unix_timestamp": {"$gt": 941.0}},
+            {"_id": 1, "collection_id": 1, "lease_config_hash": 1, "updated_unix_timestamp": 1}
+        )
+        # The second poll returns the same version again, which is not reported twice
+        mock_invalidate.assert_called_once_with(InvalidationSource.COLLECTION_DOCUMENTS, changed_document)
+        self.mock_collection.create_index.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import threading
+import unittest
+from services.collection_affinity_executor import CollectionAffinityExecutor
+
+
+class TestCollectionAffinityExecutor(unittest.TestCase):
+    """Unit tests for the CollectionAffinityExecutor."""
+
+    def setUp(self):
+        self.executor = CollectionAffinityExecutor(worker_count=4)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_collection_work_runs_in_order_on_one_slot(self):
+        """Test that the work of a collection runs one item at a time, in submission order, on one thread."""
+        processed = []
+        threads = set()
+        running = threading.Semaphore(1)
+
+        def work(index):
+            self.assertTrue(running.acquire(blocking=False))
+            processed.append(index)
+            threads.add(threading.current_thread().name)
+            running.release()
+
+        futures = [self.executor.submit("collection1", work, index) for index in range(50)]
+        for future in futures:
+            future.result(timeout=5)
+
+        self.assertEqual(processed, list(range(50)))
+        self.assertEqual(len(threads), 1)
+
+    def test_collections_on_other_slots_run_in_parallel(self):
+        """Test that a busy collection does not hold up collections on other slots."""
+        collection_ids = [f"collection{index}" for index in range(100)]
+        blocked_collection = collection_ids[0]
+        other_collection = next(
+            collection_id for collection_id in collection_ids
+            if self.executor.get_worker_slot(collection_id) != self.executor.get_worker_slot(blocked_collection)
+        )
+        release = threading.Event()
+
+        blocked = self.executor.submit(blocked_collection, release.wait, 5)
+        other = self.executor.submit(other_collection, lambda: "done")
+
+        self.assertEqual(other.result(timeout=5), "done")
+        self.assertFalse(blocked.done())
+        release.set()
+        self.assertTrue(blocked.result(timeout=5))
+
+    def test_exceptions_are_returned_to_the_caller(self):
+        """Test that errors raised by the work are raised from its future."""
+        def fail():
+            raise ValueError("ingest failed")
+
+        with self.assertRaises(ValueError):
+            self.executor.submit("collection1", fail).result(timeout=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,198 @@
+import asyncio
+import json
+import unittest
+from datetime import date
+from unittest.mock import MagicMock
+from pymongo import errors
+
+from models.document_data_models import DocumentData, LeaseAgreement, LeaseAgreementDocumentData
+from services.citation_mapper import CitationMapper
+from services.collection_context_store import CollectionContextStore, build_lease_context, convert_datetime, \
+    join_lease_contexts
+
+
+def _build_fields(value: str, document: str) -> dict:
+    return {
+        "Name": [LeaseAgreementDocumentData(
+            valueString=value,
+            source_document=document,
+            source_bounding_boxes="D(1,1,1,1,1,1,1,1)",
+            date_of_document=date(2023, 10, 1)
+        )],
+        "Lease": [LeaseAgreementDocumentData(valueInteger=1, source_document=document)]
+    }
+
+
+class TestCollectionContext(unittest.TestCase):
+    def test_single_lease_is_serialized_like_the_collection(self):
+        """Test that a collection of one lease is serialized as the whole collection data used to be."""
+        fields = _build_fields("Rooftop", "/path/to/document.pdf")
+        document_data = DocumentData(
+            _id="collection",
+            lease_config_hash="hash",
+            unstructured_data=[LeaseAgreement(lease_id="lease1", fields=fields)]
+        ).model_dump(by_alias=True, exclude_none=True, exclude_defaults=True, exclude_unset=True)
+        document_data, citation_mappings = CitationMapper().process_json(document_data)
+
+        result = join_lease_contexts(
+            "collection",
+            "hash",
+            [build_lease_context("collection", "lease1", fields)]
+        )
+
+        self.assertEqual(result, (json.dumps(document_data, default=convert_datetime), citation_mappings))
+
+    def test_aliases_of_later_leases_are_suffixed(self):
+        """Test that every lease numbers its aliases from A, and later leases are suffixed with their position."""
+        lease_contexts = [
+            build_lease_context("collection", "lease1", _build_fields("Rooftop", "/a.pdf")),
+            build_lease_context("collection", "lease2", _build_fields("Tower", "/b.pdf")),
+        ]
+
+        document_data_str, citation_mappings = join_lease_contexts("collection", "hash", lease_contexts)
+
+        document_data = json.loads(document_data_str)
+        self.assertEqual(document_data["_id"], "collection")
+        self.assertEqual(document_data["lease_config_hash"], "hash")
+        self.assertEqual(
+            [lease["fields"]["Name"][0]["document"] for lease in document_data["unstructured_data"]],
+            ["CITEcollection-A", "CITEcollection-A2"]
+        )
+        self.assertEqual(sorted(citation_mappings), [
+            "CITEcollection-A", "CITEcollection-A2", "CITEcollection-B", "CITEcollection-B2"
+        ])
+        self.assertEqual(citation_mappings["CITEcollection-B2"]["source_document"], "/b.pdf")
+
+    def test_values_that_look_like_aliases_are_kept(self):
+        """Test that only aliases are suffixed, not values quoting them."""
+        fields = {"Name": [LeaseAgreementDocumentData(
+            valueString='"document": "CITEcollection-A"',
+            source_document="/b.pdf"
+        )]}
+        lease_contexts = [
+            build_lease_context("collection", "lease1", _build_fields("Rooftop", "/a.pdf")),
+            build_lease_context("collection", "lease2", fields),
+        ]
+
+        document_data = json.loads(join_lease_contexts("collection", "hash", lease_contexts)[0])
+
+        self.assertEqual(document_data["unstructured_data"][1]["fields"]["Name"][0], {
+            "valueString": '"document": "CITEcollection-A"',
+            "document": "CITEcollection-A2"
+        })
+
+    def test_empty_collection(self):
+        """Test that a collection without leases has empty unstructured data."""
+        document_data_str, citation_mappings = join_lease_contexts("collection", "hash", [])
+
+        self.assertEqual(json.loads(document_data_str), {
+            "_id": "collection",
+            "lease_config_hash": "hash",
+            "unstructured_data": []
+        })
+        self.assertEqual(citation_mappings, {})
+
+
+class TestCollectionContextStore(unittest.TestCase):
+    def setUp(self):
+        self.mock_collection = MagicMock()
+        self.store = CollectionContextStore(self.mock_collection)
+        self.lease_context = ('{"lease_id": "lease1"}', {"CITEcollection-A": {"source_document": "/a.pdf"}})
+
+    def test_save_lease_context(self):
+        """Test that the context of a lease replaces the stored one."""
+        self.store.save_lease_context("collection", "hash", "lease1", self.lease_context)
+
+        self.mock_collection.update_one.assert_called_once_with(
+            {"_id": "collection-hash-lease1"},
+            {"$set": {
+                "collection_id": "collection",
+                "lease_config_hash": "hash",
+                "lease_id": "lease1",
+                "context": '{"lease_id": "lease1"}',
+                "citation_mappings": {"CITEcollection-A": {"source_document": "/a.pdf"}}
+            }},
+            upsert=True
+        )
+
+    def test_discard_lease_context(self):
+        """Test that a discarded lease is removed along with the marker of its collection."""
+        self.store.discard_lease_context("collection", "hash", "lease1")
+
+        self.mock_collection.delete_many.assert_called_once_with(
+            {"_id": {"$in": ["collection-hash", "collection-hash-lease1"]}}
+        )
+
+    def test_save_collection_context_keeps_stored_leases(self):
+        """Test that built leases are only inserted, and the collection is marked complete last."""
+        self.store.save_collection_context("collection", "hash", {"lease1": self.lease_context})
+
+        requests = self.mock_collection.bulk_write.call_args.args[0]
+        self.assertEqual(len(requests), 2)
+        self.assertEqual(requests[0]._filter, {"_id": "collection-hash-lease1"})
+        self.assertIn("$setOnInsert", requests[0]._doc)
+        self.assertEqual(requests[1]._filter, {"_id": "collection-hash"})
+        self.assertTrue(requests[1]._doc["$set"]["complete"])
+        self.assertTrue(self.mock_collection.bulk_write.call_args.kwargs["ordered"])
+
+    def test_save_collection_context_ignores_concurrent_saves(self):
+        """Test that leases inserted concurrently by another instance are not an error."""
+        self.mock_collection.bulk_write.side_effect = errors.BulkWriteError(
+            {"writeErrors": [{"code": 11000, "errmsg": "duplicate key"}]}
+        )
+
+        self.store.save_collection_context("collection", "hash", {"lease1": self.lease_context})
+
+    def test_save_collection_context_raises_other_errors(self):
+        """Test that other write errors are raised."""
+        self.mock_collection.bulk_write.side_effect = errors.BulkWriteError(
+            {"writeErrors": [{"code": 2, "errmsg": "bad value"}]}
+        )
+
+        with self.assertRaises(errors.BulkWriteError):
+            self.store.save_collection_context("collection", "hash", {"lease1": self.lease_context})
+
+    def test_get_collection_context_requires_complete_collection(self):
+        """Test that collections whose leases were not all stored are not served from the store."""
+        self.mock_collection.find.return_value = [
+            {"_id": "collection-hash-lease1", "context": '{"lease_id": "lease1"}', "citation_mappings": {}}
+        ]
+
+        self.assertIsNone(asyncio.run(self.store.get_collection_context_async("collection", "hash")))
+
+    def test_get_collection_context_joins_stored_leases(self):
+        """Test that the stored leases of a complete collection are joined in a stable order with one query."""
+        self.mock_collection.find.return_value = [
+            {
+                "_id": "collection-hash-lease2",
+                "context": '{"lease_id": "lease2", "fields": {"Name": [{"document": "CITEcollection-A"}]}}',
+                "citation_mappings": {"CITEcollection-A": {"source_document": "/b.pdf"}}
+            },
+            {"_id": "collection-hash", "complete": True},
+            {
+                "_id": "collection-hash-lease1",
+                "context": '{"lease_id": "lease1", "fields": {"Name": [{"document": "CITEcollection-A"}]}}',
+                "citation_mappings": {"CITEcollection-A": {"source_document": "/a.pdf"}}
+            },
+        ]
+
+        document_data_str, citation_mappings = asyncio.run(
+            self.store.get_collection_context_async("collection", "hash")
+        )
+
+        self.mock_collection.find.assert_called_once_with(
+            {"collection_id": "collection", "lease_config_hash": "hash"},
+            None
+        )
+        self.assertEqual(
+            [lease["lease_id"] for lease in json.loads(document_data_str)["unstructured_data"]],
+            ["lease1", "lease2"]
+        )
+        self.assertEqual(citation_mappings, {
+            "CITEcollection-A": {"source_document": "/a.pdf"},
+            "CITEcollection-A2": {"source_document": "/b.pdf"}
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
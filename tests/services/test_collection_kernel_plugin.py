@@ -1,14 +1,21 @@
 from datetime import date
+import asyncio
 import json
+import threading
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 from models.data_collection_config import LeaseAgreementCollectionRow
 from models.document_data_models import FieldMappingType, \
     LeaseAgreementDocumentData, \
     _LeaseAgreementDocumentData
 from models.data_collection_config import FieldDataCollectionConfig, DataType
 from services.collection_kernel_plugin import CollectionPlugin, document_data_cache
+from services.context_packer import ContextPacker
+from services.context_pruner import CollectionContextPruner
+from services.shared_cache import InMemorySharedCache
 from models.document_data_models import DocumentData
+from utils.cache_invalidation import InvalidationSource, invalidate
+from cachetools.keys import hashkey
 
 
 class TestCollectionPlugin(unittest.TestCase):
@@ -132,10 +139,12 @@ class TestCollectionPlugin(unittest.TestCase):
             }
         }
 
-        mock_lease_docs_service._get_all_extracted_fields_from_collection_doc.return_value = mock_extracted_fields_cosmos_only
+        mock_lease_docs_service._get_all_extracted_fields_from_collection_doc_async = AsyncMock(
+            return_value=mock_extracted_fields_cosmos_only
+        )
 
         # Execute the method
-        response = plugin_cosmos_only.get_collection_data(collection_id)
+        response = asyncio.run(plugin_cosmos_only.get_collection_data(collection_id))
 
         expected_response = {
             "_id": "3OAS074ACOS",
@@ -216,10 +225,12 @@ class TestCollectionPlugin(unittest.TestCase):
             }
         }
 
-        mock_lease_docs_service._get_all_extracted_fields_from_collection_doc.return_value = mock_extracted_fields_array
+        mock_lease_docs_service._get_all_extracted_fields_from_collection_doc_async = AsyncMock(
+            return_value=mock_extracted_fields_array
+        )
 
         # Execute the method
-        response = plugin_cosmos_array.get_collection_data(collection_id)
+        response = asyncio.run(plugin_cosmos_array.get_collection_data(collection_id))
 
         expected_response = {
             "_id": "3OAS074AARR",
@@ -317,10 +328,12 @@ class TestCollectionPlugin(unittest.TestCase):
             }
         }
 
-        mock_lease_docs_service._get_all_extracted_fields_from_collection_doc.return_value = mock_extracted_fields_array
+        mock_lease_docs_service._get_all_extracted_fields_from_collection_doc_async = AsyncMock(
+            return_value=mock_extracted_fields_array
+        )
 
         # Execute the method
-        response = plugin_cosmos_array.get_collection_data(collection_id)
+        response = asyncio.run(plugin_cosmos_array.get_collection_data(collection_id))
 
         expected_response = {
             "_id": "4OAS074AARR",
@@ -404,10 +417,12 @@ class TestCollectionPlugin(unittest.TestCase):
             }
         }
 
-        mock_lease_docs_service._get_all_extracted_fields_from_collection_doc.return_value = mock_extracted_fields
+        mock_lease_docs_service._get_all_extracted_fields_from_collection_doc_async = AsyncMock(
+            return_value=mock_extracted_fields
+        )
 
         # Execute the method
-        response = plugin_cosmos_only.get_collection_data(collection_id)
+        response = asyncio.run(plugin_cosmos_only.get_collection_data(collection_id))
 
         # Verify the results
         expected_response = {
@@ -445,10 +460,12 @@ class TestCollectionPlugin(unittest.TestCase):
 
         mock_extracted_fields = {}
 
-        mock_lease_docs_service._get_all_extracted_fields_from_collection_doc.return_value = mock_extracted_fields
+        mock_lease_docs_service._get_all_extracted_fields_from_collection_doc_async = AsyncMock(
+            return_value=mock_extracted_fields
+        )
 
         # Execute the method
-        response = plugin_cosmos_only.get_collection_data(collection_id)
+        response = asyncio.run(plugin_cosmos_only.get_collection_data(collection_id))
 
         # Verify the results
         expected_document_data = DocumentData(_id=collection_id,
@@ -469,11 +486,389 @@ class TestCollectionPlugin(unittest.TestCase):
             document_service=mock_lease_docs_service)
         collection_id = "3OAS074AEXC"
 
-        mock_lease_docs_service._get_all_extracted_fields_from_collection_doc.side_effect = \
-            Exception("Lease docs service error")
+        mock_lease_docs_service._get_all_extracted_fields_from_collection_doc_async = AsyncMock(
+            side_effect=Exception("Lease docs service error")
+        )
 
         # Verify that an exception is raised
         with self.assertRaises(Exception) as context:
-            plugin_cosmos_only.get_collection_data(collection_id)
+            asyncio.run(plugin_cosmos_only.get_collection_data(collection_id))
 
         self.assertTrue("Lease docs service error" in str(context.exception))
+
+
+class TestDocumentDataCacheInvalidation(unittest.TestCase):
+    def tearDown(self):
+        document_data_cache.clear()
+
+    def test_changed_collection_document_is_evicted(self):
+        """Test that a change to a stored collection document evicts its cached data."""
+        document_data_cache[hashkey("collection", "hash")] = {"document_data_str": "", "citation_mappings": {}}
+        document_data_cache[hashkey("other", "hash")] = {"document_data_str": "", "citation_mappings": {}}
+
+        invalidate(
+            InvalidationSource.COLLECTION_DOCUMENTS,
+            {"_id": "collection-hash", "collection_id": "collection", "lease_config_hash": "hash"}
+        )
+
+        self.assertNotIn(hashkey("collection", "hash"), document_data_cache)
+        self.assertIn(hashkey("other", "hash"), document_data_cache)
+
+
+class TestCollectionPluginSharedCache(unittest.TestCase):
+    def setUp(self):
+        document_data_cache.clear()
+        self.config = FieldDataCollectionConfig(
+            id="test_id",
+            name="test_name",
+            version="1.0",
+            lease_config_hash="fake_hash",
+            prompt="test_prompt",
+            collection_rows=[
+                LeaseAgreementCollectionRow(
+                    data_type="LeaseAgreement",
+                    analyzer_id="analyzer",
+                    field_schema=[{"name": "Name", "type": "string", "description": "Name"}]
+                )
+            ]
+        )
+        self.document_service = MagicMock()
+        self.document_service.get_collection_version_async = AsyncMock(return_value="1700000000.0-1")
+        self.document_service._get_all_extracted_fields_from_collection_doc_async = AsyncMock(return_value={
+            "lease1": {
+                "Name": [LeaseAgreementDocumentData(
+                    valueString="Rooftop",
+                    source_document="/path/to/document.pdf",
+                    source_bounding_boxes="D(1,1,1,1,1,1,1,1)")]
+            }
+        })
+        self.shared_cache = InMemorySharedCache()
+
+    def tearDown(self):
+        document_data_cache.clear()
+
+    def _get_collection_data(self) -> str:
+        plugin = CollectionPlugin(self.config, self.document_service, self.shared_cache)
+        return asyncio.run(plugin.get_collection_data("collection"))
+
+    def test_built_data_is_shared_under_its_version(self):
+        """Test that data built on a miss is stored in the shared cache, keyed by the version of the stored data."""
+        document_data_str = self._get_collection_data()
+
+        shared_entry = json.loads(self.shared_cache.get("collection-data:collection:fake_hash:1700000000.0-1"))
+        self.assertEqual(shared_entry["document_data_str"], document_data_str)
+        self.assertIn("CITEcollection-A", shared_entry["citation_mappings"])
+
+    def test_other_instances_read_shared_data(self):
+        """Test that an instance with a cold in-process cache reads the data from the shared cache."""
+        document_data_str = self._get_collection_data()
+        document_data_cache.clear()
+        self.document_service._get_all_extracted_fields_from_collection_doc_async.reset_mock()
+
+        self.assertEqual(self._get_collection_data(), document_data_str)
+        self.document_service._get_all_extracted_fields_from_collection_doc_async.assert_not_called()
+        self.assertIn(hashkey("collection", "fake_hash"), document_data_cache)
+
+    def test_changed_data_is_rebuilt(self):
+        """Test that shared data built before the collection changed is not read."""
+        self._get_collection_data()
+        document_data_cache.clear()
+        self.document_service.get_collection_version_async.return_value = "1700000001.0-1"
+
+        self._get_collection_data()
+
+        self.assertEqual(self.document_service._get_all_extracted_fields_from_collection_doc_async.await_count, 2)
+
+    def test_cached_data_is_weighted_by_serialized_size(self):
+        """Test that the in-process cache accounts for the serialized size of the data it holds."""
+        document_data_str = self._get_collection_data()
+
+        citation_mappings = document_data_cache[hashkey("collection", "fake_hash")]["citation_mappings"]
+        self.assertEqual(document_data_cache.currsize, len(document_data_str) + len(json.dumps(citation_mappings)))
+
+    def test_concurrent_queries_share_one_build(self):
+        """Test that concurrent queries of a collection that is not cached build its data once."""
+        async def get_extracted_fields(collection_id, config):
+            await asyncio.sleep(0.01)
+            return {}
+        self.document_service._get_all_extracted_fields_from_collection_doc_async = AsyncMock(
+            side_effect=get_extracted_fields
+        )
+
+        async def run():
+            plugins = [CollectionPlugin(self.config, self.document_service) for _ in range(5)]
+            return await asyncio.gather(*[plugin.get_collection_data("collection") for plugin in plugins])
+
+        results = asyncio.run(run())
+
+        self.assertEqual(len(set(results)), 1)
+        self.document_service._get_all_extracted_fields_from_collection_doc_async.assert_awaited_once()
+
+    def test_cache_hits_are_not_written_back(self):
+        """Test that reading cached data leaves the cached entry as it is."""
+        self._get_collection_data()
+
+        with patch.object(document_data_cache, "set") as mock_set:
+            self._get_collection_data()
+
+        mock_set.assert_not_called()
+
+    def test_unavailable_shared_cache_falls_back_to_building(self):
+        """Test that queries are answered when the shared cache cannot be reached."""
+        self.shared_cache = MagicMock()
+        self.shared_cache.get.side_effect = ConnectionError("unreachable")
+        self.shared_cache.set.side_effect = ConnectionError("unreachable")
+
+        document_data_str = self._get_collection_data()
+
+        self.assertEqual(json.loads(document_data_str)["_id"], "collection")
+
+
+class TestCollectionPluginContextStore(unittest.TestCase):
+    def setUp(self):
+        document_data_cache.clear()
+        self.config = FieldDataCollectionConfig(
+            id="test_id",
+            name="test_name",
+            version="1.0",
+            lease_config_hash="fake_hash",
+            prompt="test_prompt",
+            collection_rows=[
+                LeaseAgreementCollectionRow(
+                    data_type="LeaseAgreement",
+                    analyzer_id="analyzer",
+                    field_schema=[{"name": "Name", "type": "string", "description": "Name"}]
+                )
+            ]
+        )
+        self.document_service = MagicMock()
+        self.document_service._get_all_extracted_fields_from_collection_doc_async = AsyncMock(return_value={
+            lease_id: {
+                "Name": [LeaseAgreementDocumentData(
+                    valueString="Rooftop",
+                    source_document=f"/path/to/{lease_id}.pdf",
+                    source_bounding_boxes="D(1,1,1,1,1,1,1,1)")]
+            }
+            for lease_id in ("lease1", "lease2")
+        })
+        self.context_store = MagicMock()
+        self.context_store.get_collection_context_async = AsyncMock(return_value=None)
+
+    def tearDown(self):
+        document_data_cache.clear()
+
+    def _get_collection_data(self) -> str:
+        plugin = CollectionPlugin(self.config, self.document_service, context_store=self.context_store)
+        return asyncio.run(plugin.get_collection_data("collection"))
+
+    def test_stored_context_is_served_without_building(self):
+        """Test that the context stored at ingest time is served as it is."""
+        self.context_store.get_collection_context_async.return_value = (
+            '{"_id": "collection"}',
+            {"CITEcollection-A": {"source_document": "/a.pdf", "source_bounding_boxes": None}}
+        )
+
+        plugin = CollectionPlugin(self.config, self.document_service, context_store=self.context_store)
+
+        self.assertEqual(asyncio.run(plugin.get_collection_data("collection")), '{"_id": "collection"}')
+        self.context_store.get_collection_context_async.assert_awaited_once_with("collection", "fake_hash")
+        self.document_service._get_all_extracted_fields_from_collection_doc_async.assert_not_called()
+        self.assertEqual(plugin.restore_citations(["CITEcollection-A"]), [["/a.pdf", None]])
+
+    def test_citations_are_restored_once_the_cached_data_is_dropped(self):
+        """Test that citations are restored from the data returned to the model, whatever the cache holds."""
+        self.context_store.get_collection_context_async.return_value = (
+            '{"_id": "collection"}',
+            {"CITEcollection-A": {"source_document": "/a.pdf", "source_bounding_boxes": None}}
+        )
+        plugin = CollectionPlugin(self.config, self.document_service, context_store=self.context_store)
+
+        with patch.object(document_data_cache, "_maxsize", 1):
+            asyncio.run(plugin.get_collection_data("collection"))
+        self.assertNotIn(hashkey("collection", "fake_hash"), document_data_cache)
+        self.assertEqual(plugin.restore_citations(["CITEcollection-A"]), [["/a.pdf", None]])
+
+        asyncio.run(plugin.get_collection_data("collection"))
+        invalidate(
+            InvalidationSource.COLLECTION_DOCUMENTS,
+            {"_id": "collection-fake_hash", "collection_id": "collection", "lease_config_hash": "fake_hash"}
+        )
+        self.assertEqual(plugin.restore_citations(["CITEcollection-A", "CITEcollection-Z"]), [["/a.pdf", None]])
+
+    def test_missing_context_is_built_and_saved(self):
+        """Test that a collection not yet in the store is built, and every lease is saved to the store."""
+        document_data_str = self._get_collection_data()
+
+        saved_lease_contexts = self.context_store.save_collection_context.call_args.args[2]
+        self.assertEqual(list(saved_lease_contexts), ["lease1", "lease2"])
+        self.assertEqual(
+            [lease["fields"]["Name"][0]["document"] for lease in json.loads(document_data_str)["unstructured_data"]],
+            ["CITEcollection-A", "CITEcollection-A2"]
+        )
+
+    def test_failed_save_still_answers(self):
+        """Test that queries are answered when the built context cannot be saved."""
+        self.context_store.save_collection_context.side_effect = ConnectionError("unreachable")
+
+        document_data_str = self._get_collection_data()
+
+        self.assertEqual(len(json.loads(document_data_str)["unstructured_data"]), 2)
+
+
+class TestCollectionPluginContextPruning(unittest.TestCase):
+    def setUp(self):
+        document_data_cache.clear()
+        self.config = FieldDataCollectionConfig(
+            id="test_id",
+            name="test_name",
+            version="1.0",
+            lease_config_hash="fake_hash",
+            prompt="test_prompt",
+            collection_rows=[
+                LeaseAgreementCollectionRow(
+                    data_type="LeaseAgreement",
+                    analyzer_id="analyzer",
+                    field_schema=[
+                        {"name": "Name", "type": "string", "description": "Name of the site"},
+                        {"name": "Rent", "type": "float", "description": "Monthly rent"}
+                    ]
+                )
+            ]
+        )
+        self.document_service = MagicMock()
+        self.document_service._get_all_extracted_fields_from_collection_doc_async = AsyncMock(return_value={
+            "lease1": {
+                "Name": [LeaseAgreementDocumentData(valueString="Rooftop", source_document="/a.pdf")],
+                "Rent": [LeaseAgreementDocumentData(valueNumber=1200.0, source_document="/a.pdf")]
+            }
+        })
+
+    def tearDown(self):
+        document_data_cache.clear()
+
+    def test_collection_data_is_pruned_to_the_question(self):
+        """Test that only the fields relevant to the question are returned, and every citation is restorable."""
+        plugin = CollectionPlugin(
+            self.config,
+            self.document_service,
+            context_pruner=CollectionContextPruner(),
+            question="What is the monthly rent?"
+        )
+
+        document_data = json.loads(asyncio.run(plugin.get_collection_data("collection")))
+
+        self.assertEqual(list(document_data["unstructured_data"][0]["fields"]), ["Rent"])
+        self.assertEqual(document_data["omitted_fields"], ["Name"])
+        self.assertEqual(plugin.restore_citations(["CITEcollection-A"]), [["/a.pdf", None]])
+
+    def test_collection_data_is_not_pruned_without_a_question(self):
+        """Test that the whole collection data is returned when the question is not known."""
+        plugin = CollectionPlugin(self.config, self.document_service, context_pruner=CollectionContextPruner())
+
+        document_data = json.loads(asyncio.run(plugin.get_collection_data("collection")))
+
+        self.assertEqual(list(document_data["unstructured_data"][0]["fields"]), ["Name", "Rent"])
+
+    def test_collection_data_is_indexed_once_per_load(self):
+        """Test that cached collection data is parsed and tokenized once, whatever the number of questions."""
+        pruner = CollectionContextPruner()
+        questions = ["What is the monthly rent?", "What is the name of the site?"]
+
+        with patch.object(pruner, "index", wraps=pruner.index) as mock_index:
+            results = [
+                json.loads(asyncio.run(CollectionPlugin(
+                    self.config,
+                    self.document_service,
+                    context_pruner=pruner,
+                    question=question
+                ).get_collection_data("collection")))
+                for question in questions
+            ]
+
+        mock_index.assert_called_once()
+        self.assertEqual([list(result["unstructured_data"][0]["fields"]) for result in results], [["Rent"], ["Name"]])
+
+
+class TestCollectionPluginContextPacking(unittest.TestCase):
+    def setUp(self):
+        document_data_cache.clear()
+        self.config = FieldDataCollectionConfig(
+            id="test_id",
+            name="test_name",
+            version="1.0",
+            lease_config_hash="fake_hash",
+            prompt="test_prompt",
+            collection_rows=[
+                LeaseAgreementCollectionRow(
+                    data_type="LeaseAgreement",
+                    analyzer_id="analyzer",
+                    field_schema=[{"name": "Rent", "type": "float", "description": "Monthly rent"}]
+                )
+            ]
+        )
+        self.document_service = MagicMock()
+        self.document_service._get_all_extracted_fields_from_collection_doc_async = AsyncMock(return_value={
+            "lease1": {
+                "Rent": [
+                    LeaseAgreementDocumentData(valueNumber=1000.0, source_document="/a.pdf"),
+                    LeaseAgreementDocumentData(valueNumber=1200.0, source_document="/b.pdf")
+                ]
+            }
+        })
+        self.token_counter = MagicMock()
+        self.token_counter.count.side_effect = len
+
+    def tearDown(self):
+        document_data_cache.clear()
+
+    def test_collection_data_within_budget_is_counted(self):
+        """Test that the tokens of every returned collection data are added up."""
+        plugin = CollectionPlugin(
+            self.config,
+            self.document_service,
+            context_packer=ContextPacker(100000, self.token_counter),
+            prompt_tokens=100
+        )
+
+        document_data_str = asyncio.run(plugin.get_collection_data("collection"))
+        asyncio.run(plugin.get_collection_data("collection"))
+
+        self.assertEqual(plugin.context_tokens, 2 * len(document_data_str))
+        self.assertEqual(plugin.truncated_context_values, 0)
+
+    def test_collection_data_is_packed_into_the_tokens_left(self):
+        """Test that values are left out when the prompt leaves too few tokens for the collection data."""
+        plugin = CollectionPlugin(self.config, self.document_service)
+        full_size = len(asyncio.run(plugin.get_collection_data("collection")))
+        plugin = CollectionPlugin(
+            self.config,
+            self.document_service,
+            context_packer=ContextPacker(1000, self.token_counter),
+            prompt_tokens=1000 - full_size + 1
+        )
+
+        document_data = json.loads(asyncio.run(plugin.get_collection_data("collection")))
+
+        self.assertEqual(len(document_data["unstructured_data"][0]["fields"]["Rent"]), 1)
+        self.assertEqual(document_data["truncated_values"], 1)
+        self.assertEqual(plugin.truncated_context_values, 1)
+        self.assertLessEqual(plugin.context_tokens, full_size - 1)
+
+    def test_collection_data_is_packed_off_the_event_loop(self):
+        """Test that the collection data is tokenized outside of the thread running the event loop."""
+        counting_threads = []
+
+        def count(text):
+            counting_threads.append(threading.current_thread())
+            return len(text)
+        self.token_counter.count.side_effect = count
+        plugin = CollectionPlugin(
+            self.config,
+            self.document_service,
+            context_packer=ContextPacker(100000, self.token_counter)
+        )
+
+        asyncio.run(plugin.get_collection_data("collection"))
+
+        self.assertTrue(counting_threads)
+        self.assertNotIn(threading.current_thread(), counting_threads)
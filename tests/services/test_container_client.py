@@ -1,6 +1,14 @@
+import gzip
+import json
+import os
+import tempfile
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceExistsError, ResourceModifiedError
+from azure.storage.blob import ContentSettings
 from src.services.container_client import ContainerClient
+from src.utils.download_manifest import DownloadManifest
 
 
 class TestFileExists(unittest.TestCase):
@@ -36,6 +44,61 @@ class TestUploadDocument(unittest.TestCase):
             "path/to/file.txt", b"file content", overwrite=True, metadata=None
         )
 
+    def test_upload_document_compresses_markdown(self):
+        """Test that large markdown is stored gzip-compressed with its content encoding."""
+        markdown = "# Lease\n" + "The tenant shall pay the rent. " * 100
+
+        self.container_client.upload_document(markdown, "path/to/file.md")
+
+        args, kwargs = self.mock_container_client.upload_blob.call_args
+        self.assertEqual(args[0], "path/to/file.md")
+        self.assertEqual(gzip.decompress(args[1]).decode("utf-8"), markdown)
+        self.assertLess(len(args[1]), len(markdown))
+        self.assertEqual(kwargs["content_settings"].content_encoding, "gzip")
+        self.assertEqual(kwargs["content_settings"].content_type, "text/markdown; charset=utf-8")
+
+    def test_upload_document_keeps_small_markdown_uncompressed(self):
+        """Test that markdown below the minimum size is stored as it is."""
+        self.container_client.upload_document("# Lease", "path/to/file.md")
+
+        self.mock_container_client.upload_blob.assert_called_once_with(
+            "path/to/file.md", "# Lease", overwrite=True, metadata=None
+        )
+
+
+class TestUploadIfAbsent(unittest.TestCase):
+    def setUp(self):
+        """Set up the test case with a mock container client."""
+        self.mock_container_client = MagicMock()
+        self.container_client = ContainerClient(self.mock_container_client)
+
+    def test_upload_if_absent_uploads_conditionally(self):
+        """Test that the upload is a single request conditioned on the blob not existing."""
+        result = self.container_client.upload_if_absent(b"file content", "path/to/file.txt")
+
+        self.assertTrue(result)
+        self.mock_container_client.upload_blob.assert_called_once_with(
+            "path/to/file.txt", b"file content", overwrite=False, metadata=None
+        )
+        self.mock_container_client.get_blob_client.assert_not_called()
+
+    def test_upload_if_absent_existing_blob(self):
+        """Test that an existing blob is reported rather than raised."""
+        self.mock_container_client.upload_blob.side_effect = ResourceExistsError("The blob already exists.")
+
+        result = self.container_client.upload_if_absent(b"file content", "path/to/file.txt")
+
+        self.assertFalse(result)
+
+    def test_upload_documents_if_absent(self):
+        """Test that batched uploads report which documents were uploaded."""
+        self.mock_container_client.upload_blob.side_effect = [None, ResourceExistsError("The blob already exists.")]
+
+        with patch("src.services.container_client._CONCURRENT_THREADS", 1):
+            result = self.container_client.upload_documents([(b"a", "a.md"), (b"b", "b.md")], if_absent=True)
+
+        self.assertEqual(result, [True, False])
+
 
 class TestDownloadFile(unittest.TestCase):
     def setUp(self):
@@ -52,7 +115,137 @@ class TestDownloadFile(unittest.TestCase):
 
         b, metadata = self.container_client.download_file("path/to/file.txt")
 
-        self.mock_container_client.download_blob.assert_called_once_with("path/to/file.txt")
+        self.mock_container_client.download_blob.assert_called_once_with("path/to/file.txt", decompress=False)
         mock_blob.readall.assert_called_once()
         self.assertEqual(b, b"file content")
         self.assertEqual(metadata, {"key": "value"})
+
+    def test_download_file_decompresses_gzip_encoded_blob(self):
+        """Test that compressed blobs are returned decompressed."""
+        mock_blob = MagicMock()
+        self.mock_container_client.download_blob.return_value = mock_blob
+        mock_blob.readall.return_value = gzip.compress(b"file content")
+        mock_blob.properties.content_settings = ContentSettings(content_encoding="gzip")
+
+        b, _ = self.container_client.download_file("path/to/file.md")
+
+        self.assertEqual(b, b"file content")
+
+
+class TestDownloadFiles(unittest.TestCase):
+    def setUp(self):
+        """Set up the test case with a mock container client and blob contents."""
+        self.mock_container_client = MagicMock()
+        self.container_client = ContainerClient(self.mock_container_client)
+        self.contents = {"base/a.pdf": b"content of a", "base/b.pdf": b"content of b"}
+        self.etags = {"base/a.pdf": "etag-a", "base/b.pdf": "etag-b"}
+        self.mock_container_client.list_blobs.side_effect = lambda *args, **kwargs: iter(
+            [self._blob(name) for name in [*self.contents, "base/c.md", "base/folder"]]
+        )
+        self.mock_container_client.download_blob.side_effect = self._download_blob
+        self.output_dir = tempfile.mkdtemp()
+
+    def _blob(self, name: str) -> MagicMock:
+        blob = MagicMock()
+        blob.name = name
+        blob.etag = self.etags.get(name, "etag")
+        blob.size = len(self.contents.get(name, b""))
+        blob.metadata = {"key": name}
+        return blob
+
+    def _download_blob(self, name: str, offset: int = 0, **kwargs) -> MagicMock:
+        downloader = MagicMock()
+        downloader.readinto.side_effect = lambda stream: stream.write(self.contents[name][offset:])
+        downloader.properties.etag = self.etags[name]
+        return downloader
+
+    def _read(self, name: str) -> bytes:
+        with open(os.path.join(self.output_dir, name), "rb") as f:
+            return f.read()
+
+    def test_download_files_streams_matching_files(self):
+        """Test that matching blobs are streamed to disk along with their metadata."""
+        results = self.container_client.download_files("base", self.output_dir, extension=".pdf")
+
+        self.assertEqual(sorted(results), [os.path.join(self.output_dir, "base", name) for name in ("a.pdf", "b.pdf")])
+        self.assertEqual(self._read("base/a.pdf"), b"content of a")
+        self.assertEqual(self._read("base/b.pdf"), b"content of b")
+        with open(os.path.join(self.output_dir, "base", "a.json")) as f:
+            self.assertEqual(json.load(f), {"key": "base/a.pdf"})
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "base", "a.pdf.part")))
+        self.mock_container_client.list_blobs.assert_called_once_with("base", include=["metadata"])
+
+    def test_download_files_is_a_lazy_generator(self):
+        """Test that nothing is listed until the downloads are consumed."""
+        downloads = self.container_client.iter_download_files("base", self.output_dir, extension=".pdf")
+
+        self.mock_container_client.list_blobs.assert_not_called()
+        self.assertEqual(len(list(downloads)), 2)
+
+    def test_download_files_skips_unchanged_files(self):
+        """Test that a second run only downloads the blobs that changed."""
+        self.container_client.download_files("base", self.output_dir, extension=".pdf")
+        self.mock_container_client.download_blob.reset_mock()
+        self.contents["base/b.pdf"] = b"new content of b"
+        self.etags["base/b.pdf"] = "etag-b2"
+
+        self.container_client.download_files("base", self.output_dir, extension=".pdf")
+
+        self.mock_container_client.download_blob.assert_called_once_with("base/b.pdf", decompress=False)
+        self.assertEqual(self._read("base/b.pdf"), b"new content of b")
+
+    def test_download_files_resumes_partial_download(self):
+        """Test that an interrupted download continues from the bytes already written."""
+        os.makedirs(os.path.join(self.output_dir, "base"))
+        with open(os.path.join(self.output_dir, "base", "a.pdf.part"), "wb") as f:
+            f.write(b"content")
+        with DownloadManifest(self.output_dir) as manifest:
+            manifest.record("base/a.pdf", "etag-a", 12, complete=False)
+
+        self.container_client.download_files("base", self.output_dir, extension="a.pdf")
+
+        self.mock_container_client.download_blob.assert_called_once_with(
+            "base/a.pdf", offset=7, etag="etag-a", match_condition=MatchConditions.IfNotModified, decompress=False
+        )
+        self.assertEqual(self._read("base/a.pdf"), b"content of a")
+        self.assertTrue(DownloadManifest(self.output_dir).get("base/a.pdf")["complete"])
+
+    def test_download_files_restarts_modified_partial_download(self):
+        """Test that a partial download is restarted when the blob changed in between."""
+        os.makedirs(os.path.join(self.output_dir, "base"))
+        with open(os.path.join(self.output_dir, "base", "a.pdf.part"), "wb") as f:
+            f.write(b"stale")
+        with DownloadManifest(self.output_dir) as manifest:
+            manifest.record("base/a.pdf", "etag-a", 12, complete=False)
+        download_blob = self._download_blob
+
+        def fail_resumed_download(name, offset=0, **kwargs):
+            if offset:
+                raise ResourceModifiedError("The condition specified was not met.")
+            return download_blob(name)
+
+        self.mock_container_client.download_blob.side_effect = fail_resumed_download
+
+        self.container_client.download_files("base", self.output_dir, extension="a.pdf")
+
+        self.assertEqual(self._read("base/a.pdf"), b"content of a")
+
+    def test_download_files_decompresses_gzip_encoded_blobs(self):
+        """Test that compressed blobs are saved decompressed and skipped once saved."""
+        self.contents["base/a.pdf"] = gzip.compress(b"decompressed content of a")
+        list_blobs = self.mock_container_client.list_blobs.side_effect
+
+        def list_compressed_blobs(*args, **kwargs):
+            for blob in list_blobs(*args, **kwargs):
+                if blob.name == "base/a.pdf":
+                    blob.content_settings = ContentSettings(content_encoding="gzip")
+                yield blob
+
+        self.mock_container_client.list_blobs.side_effect = list_compressed_blobs
+
+        self.container_client.download_files("base", self.output_dir, extension="a.pdf")
+        self.container_client.download_files("base", self.output_dir, extension="a.pdf")
+
+        self.assertEqual(self._read("base/a.pdf"), b"decompressed content of a")
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "base", "a.pdf.part")))
+        self.mock_container_client.download_blob.assert_called_once()
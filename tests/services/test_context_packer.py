@@ -0,0 +1,138 @@
+import json
+import unittest
+from unittest.mock import MagicMock
+from semantic_kernel.contents import ChatMessageContent, FunctionResultContent
+
+from models.environment_config import ConfigurationValue, ContextBudgetConfig
+from services.context_packer import ContextPacker, get_context_packer
+
+
+class _CharacterCounter(object):
+    """Counts one token per character, so budgets are easy to reason about."""
+    def count(self, text: str) -> int:
+        return len(text)
+
+
+class TestContextPacker(unittest.TestCase):
+    def setUp(self):
+        self.document_data = {
+            "_id": "collection",
+            "lease_config_hash": "hash",
+            "unstructured_data": [
+                {"lease_id": "lease1", "fields": {
+                    "Rent": [
+                        {"valueNumber": 1000, "document": "CITEcollection-A", "date_of_document": "2020-01-01"},
+                        {"valueNumber": 1200, "document": "CITEcollection-B", "date_of_document": "2024-01-01"}
+                    ],
+                    "Name": [{"valueString": "Rooftop", "document": "CITEcollection-C"}]
+                }},
+                {"lease_id": "lease2", "fields": {
+                    "Rent": [
+                        {"valueNumber": 900, "document": "CITEcollection-A2", "date_of_document": "2022-06-30"}
+                    ]
+                }}
+            ]
+        }
+        self.document_data_str = json.dumps(self.document_data)
+        self.packer = ContextPacker(max_prompt_tokens=1000, token_counter=_CharacterCounter())
+
+    def test_collection_data_within_budget_is_unchanged(self):
+        """Test that collection data that fits is returned as it is."""
+        packed_context = self.packer.pack(self.document_data_str, reserved_tokens=0)
+
+        self.assertEqual(packed_context.document_data_str, self.document_data_str)
+        self.assertEqual(packed_context.tokens, len(self.document_data_str))
+        self.assertEqual(packed_context.truncated_values, 0)
+
+    def test_most_recent_values_are_kept_first(self):
+        """Test that values are kept from the most recent document, and the others are reported as truncated."""
+        packed_context = self.packer.pack(self.document_data_str, reserved_tokens=1000 - 380)
+
+        document_data = json.loads(packed_context.document_data_str)
+        self.assertLessEqual(packed_context.tokens, 380)
+        self.assertEqual(packed_context.tokens, len(packed_context.document_data_str))
+        self.assertEqual(document_data["unstructured_data"][0]["fields"], {
+            "Rent": [{"valueNumber": 1200, "document": "CITEcollection-B", "date_of_document": "2024-01-01"}]
+        })
+        self.assertEqual(document_data["unstructured_data"][1]["fields"]["Rent"][0]["valueNumber"], 900)
+        self.assertEqual(packed_context.truncated_values, 2)
+        self.assertEqual(document_data["truncated_values"], 2)
+
+    def test_kept_values_keep_their_stored_order(self):
+        """Test that the values of a field stay in their stored order once packed."""
+        packed_context = self.packer.pack(self.document_data_str, reserved_tokens=1000 - 480)
+
+        rent = json.loads(packed_context.document_data_str)["unstructured_data"][0]["fields"]["Rent"]
+        self.assertEqual([value["valueNumber"] for value in rent], [1000, 1200])
+
+    def test_nothing_is_kept_without_budget(self):
+        """Test that every value is truncated when the prompt uses the whole budget."""
+        packed_context = self.packer.pack(self.document_data_str, reserved_tokens=2000)
+
+        document_data = json.loads(packed_context.document_data_str)
+        self.assertEqual([lease["fields"] for lease in document_data["unstructured_data"]], [{}, {}])
+        self.assertEqual(packed_context.truncated_values, 4)
+
+    def test_count_prompt_tokens_of_a_new_chat(self):
+        """Test that the system message is counted when the chat history is empty."""
+        self.assertEqual(self.packer.count_prompt_tokens("system", "question", [], []), 6 + 8 + 2 * 4)
+
+    def test_count_prompt_tokens_of_an_ongoing_chat(self):
+        """Test that the chat history is counted instead of the system message, including tool results."""
+        history_messages = [
+            ChatMessageContent(role="system", content="system"),
+            ChatMessageContent(role="tool", items=[
+                FunctionResultContent(id="1", function_name="get_collection_data", result='{"_id": "c"}')
+            ])
+        ]
+
+        self.assertEqual(
+            self.packer.count_prompt_tokens("ignored", "question", history_messages, []),
+            6 + len('{"_id": "c"}') + 8 + 3 * 4
+        )
+
+    def test_count_prompt_tokens_includes_request_definitions(self):
+        """Test that the tool definitions and response format sent with the messages are counted."""
+        request_definitions = [{"type": "function"}, {"type": "object"}]
+
+        self.assertEqual(
+            self.packer.count_prompt_tokens("system", "question", [], request_definitions),
+            6 + 8 + 2 * 4 + 2 * len('{"type": "function"}') - 2
+        )
+
+    def test_smaller_values_are_kept_after_one_that_does_not_fit(self):
+        """Test that a value that does not fit is skipped, and values of lower priority that fit are kept."""
+        packed_context = self.packer.pack(self.document_data_str, reserved_tokens=1000 - 340)
+
+        document_data = json.loads(packed_context.document_data_str)
+        self.assertLessEqual(packed_context.tokens, 340)
+        self.assertEqual(document_data["unstructured_data"][0]["fields"], {
+            "Rent": [{"valueNumber": 1200, "document": "CITEcollection-B", "date_of_document": "2024-01-01"}],
+            "Name": [{"valueString": "Rooftop", "document": "CITEcollection-C"}]
+        })
+        self.assertEqual(document_data["unstructured_data"][1]["fields"], {})
+        self.assertEqual(packed_context.truncated_values, 2)
+
+
+class TestGetContextPacker(unittest.TestCase):
+    def test_budget_is_disabled_by_default(self):
+        """Test that no packer is created unless a budget is configured."""
+        environment_config = MagicMock()
+        environment_config.context_budget = None
+
+        self.assertIsNone(get_context_packer(environment_config))
+
+    def test_configured_budget(self):
+        """Test that the packer uses the configured budget and the tokenizer of the configured model."""
+        environment_config = MagicMock()
+        environment_config.context_budget = ContextBudgetConfig(max_prompt_tokens=ConfigurationValue[int](value=500))
+        environment_config.llm.model_name.value = "gpt-4o"
+
+        packer = get_context_packer(environment_config)
+
+        self.assertEqual(packer._max_prompt_tokens, 500)
+        self.assertEqual(packer._token_counter._model_name, "gpt-4o")
+
+
+if __name__ == '__main__':
+    unittest.main()
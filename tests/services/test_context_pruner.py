@@ -0,0 +1,143 @@
+import json
+import unittest
+from unittest.mock import MagicMock
+
+from models.data_collection_config import FieldDataCollectionConfig, LeaseAgreementCollectionRow
+from models.environment_config import ConfigurationValue, ContextPruningConfig
+from services.context_pruner import CollectionContextPruner, get_context_pruner
+
+
+def _field(value, document: str = "CITEcollection-A") -> list[dict]:
+    key = "valueInteger" if isinstance(value, int) else "valueString"
+    return [{key: value, "document": document}]
+
+
+class TestCollectionContextPruner(unittest.TestCase):
+    def setUp(self):
+        self.config = FieldDataCollectionConfig(
+            name="test_name",
+            version="1.0",
+            prompt="test_prompt",
+            collection_rows=[
+                LeaseAgreementCollectionRow(
+                    analyzer_id="analyzer",
+                    field_schema=[
+                        {"name": "Site_Name", "type": "string", "description": "Name of the site"},
+                        {"name": "Current_Rent_Amount", "type": "float", "description": "Monthly rent paid"},
+                        {"name": "Expiration_Date", "type": "date", "description": "When the lease ends"},
+                        {
+                            "name": "equipment",
+                            "type": "array",
+                            "description": "Equipment on the site",
+                            "items": [
+                                {"name": "make", "type": "string", "description": "Manufacturer"}
+                            ]
+                        }
+                    ]
+                )
+            ]
+        )
+        self.document_data = {
+            "_id": "collection",
+            "lease_config_hash": "hash",
+            "unstructured_data": [
+                {"lease_id": "lease1", "fields": {
+                    "Site_Name": _field("Rooftop"),
+                    "Current_Rent_Amount": _field(1200),
+                    "Expiration_Date": _field("2030-01-01"),
+                    "equipment": [{"valueArray": [{"valueObject": {"make": _field("Ericsson")[0]}}]}]
+                }},
+                {"lease_id": "lease2", "fields": {
+                    "Site_Name": _field("Water Tower"),
+                    "Current_Rent_Amount": _field(900),
+                    "Expiration_Date": _field("2028-06-30")
+                }},
+            ]
+        }
+
+    def _prune(self, question: str, pruner: CollectionContextPruner = None) -> dict:
+        pruner = pruner or CollectionContextPruner()
+        return json.loads(pruner.prune(json.dumps(self.document_data), question, self.config))
+
+    def test_fields_matching_the_question_are_kept(self):
+        """Test that fields are matched by name and description, and the others are reported as omitted."""
+        result = self._prune("What is the monthly rent?")
+
+        self.assertEqual(
+            [list(lease["fields"]) for lease in result["unstructured_data"]],
+            [["Current_Rent_Amount"], ["Current_Rent_Amount"]]
+        )
+        self.assertEqual(result["omitted_fields"], ["Site_Name", "Expiration_Date", "equipment"])
+        self.assertNotIn("omitted_leases", result)
+
+    def test_fields_are_matched_by_value(self):
+        """Test that values, including array item properties, are matched."""
+        result = self._prune("Which sites have Ericsson gear?")
+
+        self.assertIn("equipment", result["unstructured_data"][0]["fields"])
+
+    def test_all_fields_are_kept_when_none_matches(self):
+        """Test that fields are left as they are when nothing tells which ones matter."""
+        result = self._prune("Summarize everything")
+
+        self.assertEqual(result, self.document_data)
+
+    def test_best_fields_are_kept_within_the_limit(self):
+        """Test that only the best scoring fields are kept, favoring the terms fewer fields share."""
+        result = self._prune("monthly rent of the site", CollectionContextPruner(max_fields=1))
+
+        self.assertEqual(list(result["unstructured_data"][0]["fields"]), ["Current_Rent_Amount"])
+
+    def test_best_leases_are_kept_within_the_limit(self):
+        """Test that the leases matching the question are kept first."""
+        result = self._prune("rent of the water tower", CollectionContextPruner(max_leases=1))
+
+        self.assertEqual([lease["lease_id"] for lease in result["unstructured_data"]], ["lease2"])
+        self.assertEqual(result["omitted_leases"], 1)
+
+    def test_leases_are_kept_within_the_size_budget(self):
+        """Test that leases are added until the size budget is reached, keeping at least the best one."""
+        result = self._prune("rent of lease2", CollectionContextPruner(max_size_in_bytes=1))
+
+        self.assertEqual([lease["lease_id"] for lease in result["unstructured_data"]], ["lease2"])
+
+    def test_kept_leases_stay_in_their_stored_order(self):
+        """Test that pruning keeps the order of the leases it does not leave out."""
+        result = self._prune("rent of the water tower")
+
+        self.assertEqual([lease["lease_id"] for lease in result["unstructured_data"]], ["lease1", "lease2"])
+
+    def test_index_is_reused_across_questions(self):
+        """Test that pruning indexed data leaves the index as it was, so it serves every question."""
+        pruner = CollectionContextPruner(max_leases=1)
+        index = pruner.index(json.dumps(self.document_data), self.config)
+
+        first = json.loads(pruner.prune_indexed(index, "rent of the water tower"))
+        second = json.loads(pruner.prune_indexed(index, "monthly rent of the rooftop"))
+
+        self.assertEqual([lease["lease_id"] for lease in first["unstructured_data"]], ["lease2"])
+        self.assertEqual([lease["lease_id"] for lease in second["unstructured_data"]], ["lease1"])
+        self.assertEqual(index.document_data, self.document_data)
+
+
+class TestGetContextPruner(unittest.TestCase):
+    def test_pruning_is_disabled_by_default(self):
+        """Test that no pruner is created unless pruning is configured."""
+        environment_config = MagicMock()
+        environment_config.context_pruning = None
+
+        self.assertIsNone(get_context_pruner(environment_config))
+
+    def test_configured_limits(self):
+        """Test that the configured limits are used, with defaults for the others."""
+        environment_config = MagicMock()
+        environment_config.context_pruning = ContextPruningConfig(max_fields=ConfigurationValue[int](value=5))
+
+        pruner = get_context_pruner(environment_config)
+
+        self.assertEqual(pruner._max_fields, 5)
+        self.assertEqual(pruner._max_leases, 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
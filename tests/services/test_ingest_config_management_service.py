@@ -1,6 +1,7 @@
+import asyncio
 import unittest
-from unittest.mock import MagicMock
-from services.ingest_config_management_service import IngestConfigManagementService
+from unittest.mock import MagicMock, patch
+from services.ingest_config_management_service import IngestConfigManagementService, config_cache
 from models import FieldDataCollectionConfig
 
 
@@ -79,13 +80,100 @@ class TestUpsertConfig(unittest.TestCase):
         )
 
         # act
-        self.service.upsert_config(config)
+        with patch("services.ingest_config_management_service.datetime") as mock_datetime:
+            mock_datetime.now.return_value.timestamp.return_value = 1700000000.5
+            self.service.upsert_config(config)
 
         # assert
         self.mock_db \
             .get_collection.return_value \
             .update_one.assert_called_once_with(
                 {"_id": "test_config-1.0"},
-                {"$set": config.model_dump(by_alias=True)},
+                {"$set": {**config.model_dump(by_alias=True), "updated_unix_timestamp": 1700000000.5}},
                 upsert=True
             )
+
+
+class TestConfigCache(unittest.TestCase):
+    """Test the in-process configuration cache of IngestConfigManagementService."""
+
+    def setUp(self):
+        config_cache.clear()
+        self.mock_db = MagicMock()
+        self.mock_collection = self.mock_db.get_collection.return_value
+        self.service = IngestConfigManagementService(self.mock_db, MagicMock())
+        self.config_data = {
+            "_id": "test_config-1.0",
+            "name": "test_config",
+            "version": "1.0",
+            "prompt": "Test prompt",
+            "lease_config_hash": "hash",
+            "updated_unix_timestamp": 1.0,
+            "collection_rows": []
+        }
+        self.mock_collection.find_one.return_value = self.config_data
+
+    def tearDown(self):
+        config_cache.clear()
+
+    def test_cached_config_is_served_without_database_reads(self):
+        """Test that a recently loaded configuration is returned from the cache."""
+        first = self.service.load_config("test_config-1.0")
+        second = self.service.load_config("test_config-1.0")
+
+        self.assertIs(first, second)
+        self.mock_collection.find_one.assert_called_once_with({"_id": "test_config-1.0"})
+
+    @patch("services.ingest_config_management_service.time")
+    def test_stale_config_version_is_checked(self, mock_time):
+        """Test that only the version is read once the check interval has passed."""
+        mock_time.monotonic.return_value = 0
+        first = self.service.load_config("test_config-1.0")
+
+        mock_time.monotonic.return_value = 60
+        second = self.service.load_config("test_config-1.0")
+
+        self.assertIs(first, second)
+        self.assertEqual(self.mock_collection.find_one.call_count, 2)
+        self.mock_collection.find_one.assert_called_with(
+            {"_id": "test_config-1.0"},
+            {"lease_config_hash": 1, "updated_unix_timestamp": 1}
+        )
+
+    @patch("services.ingest_config_management_service.time")
+    def test_changed_config_is_reloaded(self, mock_time):
+        """Test that a configuration updated in the database is reloaded."""
+        mock_time.monotonic.return_value = 0
+        self.service.load_config("test_config-1.0")
+
+        mock_time.monotonic.return_value = 60
+        self.mock_collection.find_one.return_value = {**self.config_data, "prompt": "New prompt",
+                                                      "updated_unix_timestamp": 2.0}
+        config = self.service.load_config("test_config-1.0")
+
+        self.assertEqual(config.prompt, "New prompt")
+        self.assertEqual(self.mock_collection.find_one.call_count, 3)
+
+    @patch("services.ingest_config_management_service.time")
+    def test_load_config_async_shares_cache(self, mock_time):
+        """Test that the async variant reads the configuration and shares the cache with load_config."""
+        mock_time.monotonic.return_value = 0
+        first = asyncio.run(self.service.load_config_async("test_config-1.0"))
+        second = self.service.load_config("test_config-1.0")
+
+        mock_time.monotonic.return_value = 60
+        third = asyncio.run(self.service.load_config_async("test_config-1.0"))
+
+        self.assertEqual(first.prompt, "Test prompt")
+        self.assertIs(first, second)
+        self.assertIs(first, third)
+        self.assertEqual(self.mock_collection.find_one.call_count, 2)
+
+    def test_upsert_invalidates_cached_config(self):
+        """Test that upserting a configuration drops its cached copy."""
+        config = self.service.load_config("test_config-1.0")
+
+        self.service.upsert_config(config)
+        self.service.load_config("test_config-1.0")
+
+        self.assertEqual(self.mock_collection.find_one.call_count, 2)
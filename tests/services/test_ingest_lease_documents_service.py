@@ -1,12 +1,19 @@
+import asyncio
+import threading
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import ANY, DEFAULT, AsyncMock, patch, MagicMock
 from datetime import date
+from bson import Binary
+from pymongo import errors
 
+from services.collection_affinity_executor import CollectionAffinityExecutor
+from services.collection_context_store import build_lease_context
 from services.ingest_lease_documents_service import IngestionCollectionDocumentService
 from models.data_collection_config import (
     FieldDataCollectionConfig,
     LeaseAgreementCollectionRow,
     FieldSchema,
+    ArrayFieldSchema,
     FieldMappingType,
     ClassifierConfig
 )
@@ -15,10 +22,15 @@ from models.extracted_collection_documents import (
     ExtractedCollectionInformationCollection,
     ExtractedLeaseCollection,
     ExtractedLeaseField,
-    ExtractedLeaseFieldType
+    ExtractedLeaseFieldType,
+    ExtractedLeaseDocument
 )
 from models.document_data_models import LeaseAgreementDocumentData
-from models.ingestion_models import IngestDocumentType
+from models.ingestion_models import ContentUnderstandingIngestOutput, IngestDocumentType
+
+
+def _lock_filter(document_id: str) -> dict:
+    return {"_id": document_id, "lock_owner": "owner"}
 
 
 class TestIngestionCollectionDocumentServiceIngestAnalyzerOutput(unittest.TestCase):
@@ -27,6 +39,7 @@ class TestIngestionCollectionDocumentServiceIngestAnalyzerOutput(unittest.TestCa
         self.mock_container_client = MagicMock()
         self.mock_collection_documents_collection = MagicMock()
         self.mock_mongo_lock_manager = MagicMock()
+        self.mock_mongo_lock_manager.get_lock_filter.side_effect = _lock_filter
 
         self.service = IngestionCollectionDocumentService(
             collection_documents_collection=self.mock_collection_documents_collection,
@@ -83,7 +96,6 @@ class TestIngestionCollectionDocumentServiceIngestAnalyzerOutput(unittest.TestCa
             }
         }
         self.mock_collection_documents_collection.find_one.return_value = None
-        self.mock_container_client.file_exists.return_value = False
 
         self.service.ingest_analyzer_output(
             doc_type=IngestDocumentType.COLLECTION,
@@ -104,7 +116,7 @@ class TestIngestionCollectionDocumentServiceIngestAnalyzerOutput(unittest.TestCa
         self.mock_mongo_lock_manager.release_lock.assert_called_once_with(
             "test_collection-fake_hash"
         )
-        self.mock_container_client.upload_document.assert_called_once_with(
+        self.mock_container_client.upload_if_absent.assert_called_once_with(
             "some_markdown",
             "Collections/test_collection/test_lease/test_file.md"
         )
@@ -113,7 +125,7 @@ class TestIngestionCollectionDocumentServiceIngestAnalyzerOutput(unittest.TestCa
             "lease_id=test_lease, lease_config_hash=fake_hash"
         )
         self.mock_collection_documents_collection.update_one.assert_called_once_with(
-            {"_id": "test_collection-fake_hash"},
+            {"_id": "test_collection-fake_hash", "lock_owner": "owner"},
             {
                 "$set":
                 {
@@ -155,10 +167,11 @@ class TestIngestionCollectionDocumentServiceIngestAnalyzerOutput(unittest.TestCa
                                 }
                             }
                         ]
-                    }
+                    },
+                    "lease_documents_migrated": False,
+                    "updated_unix_timestamp": ANY
                 }
-            },
-            upsert=True
+            }
         )
 
     @patch("services.ingest_lease_documents_service.logging")
@@ -181,6 +194,47 @@ class TestIngestionCollectionDocumentServiceIngestAnalyzerOutput(unittest.TestCa
             mock_logging.error.assert_called_with("Error occurred while ingesting data: DB error")
             self.assertEqual(str(ex.exception), "DB error")
 
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_ingest_analyzer_output_lock_timeout(self, mock_logging):
+        """Test that a document whose lock could not be acquired is neither read nor written."""
+        self.mock_mongo_lock_manager.wait.return_value = False
+
+        with self.assertRaises(RuntimeError):
+            self.service.ingest_analyzer_output(
+                doc_type=IngestDocumentType.COLLECTION,
+                collection_id="test_collection",
+                lease_id="test_lease",
+                filename="test_file.pdf",
+                date_of_document=date(2023, 1, 1),
+                data={"result": {"contents": [{"fields": {}, "markdown": "markdown"}]}},
+                config=self.config
+            )
+
+        self.mock_collection_documents_collection.find_one.assert_not_called()
+        self.mock_collection_documents_collection.update_one.assert_not_called()
+        self.mock_mongo_lock_manager.release_lock.assert_called_once_with("test_collection-fake_hash")
+
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_ingest_analyzer_output_lost_lock(self, mock_logging):
+        """Test that a write whose lock expired or was taken over matches nothing and fails the ingest."""
+        self.mock_collection_documents_collection.find_one.return_value = None
+        self.mock_collection_documents_collection.update_one.return_value.matched_count = 0
+
+        with self.assertRaises(RuntimeError):
+            self.service.ingest_analyzer_output(
+                doc_type=IngestDocumentType.COLLECTION,
+                collection_id="test_collection",
+                lease_id="test_lease",
+                filename="test_file.pdf",
+                date_of_document=date(2023, 1, 1),
+                data={"result": {"contents": [{"fields": {}, "markdown": "markdown"}]}},
+                config=self.config
+            )
+
+        filter = self.mock_collection_documents_collection.update_one.call_args[0][0]
+        self.assertEqual(filter, {"_id": "test_collection-fake_hash", "lock_owner": "owner"})
+        self.assertNotIn("upsert", self.mock_collection_documents_collection.update_one.call_args[1])
+
     @patch("services.ingest_lease_documents_service.logging")
     def test_ingest_analyzer_output_with_existing_document(self, mock_logging):
         data = {
@@ -218,6 +272,194 @@ class TestIngestionCollectionDocumentServiceIngestAnalyzerOutput(unittest.TestCa
             "lease_id=abc_lease, lease_config_hash=fake_hash"
         )
 
+    def _ingest_paged_markdown(self):
+        data = {
+            "result": {
+                "contents": [
+                    {
+                        "fields": {"field1": {"valueString": "test_value", "type": "string"}},
+                        "markdown": "page one\npage two",
+                        "pages": [
+                            {"pageNumber": 1, "spans": [{"offset": 0, "length": 8}]},
+                            {"pageNumber": 2, "spans": [{"offset": 9, "length": 8}]}
+                        ]
+                    }
+                ]
+            }
+        }
+        self.mock_collection_documents_collection.find_one.return_value = None
+
+        self.service.ingest_analyzer_output(
+            doc_type=IngestDocumentType.COLLECTION,
+            collection_id="test_collection",
+            lease_id="test_lease",
+            filename="test_file.pdf",
+            date_of_document=date(2023, 1, 1),
+            data=data,
+            config=self.config
+        )
+
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_ingest_analyzer_output_uploads_page_index(self, mock_logging):
+        self.mock_container_client.upload_if_absent.return_value = True
+
+        self._ingest_paged_markdown()
+
+        self.mock_container_client.upload_if_absent.assert_called_once_with(
+            b"page one\npage two",
+            "Collections/test_collection/test_lease/test_file.md",
+            None,
+            "identity"
+        )
+        self.mock_container_client.upload_document.assert_called_once_with(
+            '{"encoding":"identity","pages":[[1,0,9],[2,9,8]]}',
+            "Collections/test_collection/test_lease/test_file.pages.json"
+        )
+
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_ingest_analyzer_output_keeps_existing_page_index(self, mock_logging):
+        self.mock_container_client.upload_if_absent.return_value = False
+
+        self._ingest_paged_markdown()
+
+        self.mock_container_client.upload_document.assert_not_called()
+
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_ingest_analyzer_output_saves_lease_context(self, mock_logging):
+        """Test that the context of an ingested lease is stored after its fields, as queries would build it."""
+        mock_context_store = MagicMock()
+        writes = MagicMock()
+        writes.attach_mock(mock_context_store.save_lease_context, "save_lease_context")
+        writes.attach_mock(self.mock_collection_documents_collection.update_one, "update_one")
+        self.mock_collection_documents_collection.update_one.return_value.matched_count = 1
+        self.service = IngestionCollectionDocumentService(
+            collection_documents_collection=self.mock_collection_documents_collection,
+            container_client=self.mock_container_client,
+            mongo_lock_manager=self.mock_mongo_lock_manager,
+            context_store=mock_context_store
+        )
+        data = {
+            "result": {
+                "contents": [
+                    {
+                        "fields": {
+                            "field1": {
+                                "valueString": "test_value",
+                                "confidence": 0.95,
+                                "type": "string",
+                                "source": "D(1,0.5,0.5,1,0.5,1,1,0.5,1)",
+                                "spans": [{"offset": 0, "length": 10}]
+                            }
+                        },
+                        "markdown": "some_markdown"
+                    }
+                ]
+            }
+        }
+        self.mock_collection_documents_collection.find_one.return_value = None
+
+        self.service.ingest_analyzer_output(
+            doc_type=IngestDocumentType.COLLECTION,
+            collection_id="test_collection",
+            lease_id="test_lease",
+            filename="test_file.pdf",
+            date_of_document=date(2023, 1, 1),
+            data=data,
+            config=self.config
+        )
+
+        self.assertEqual([call[0] for call in writes.mock_calls], ["update_one", "save_lease_context"])
+        stored_lease = self.mock_collection_documents_collection.update_one.call_args.args[1]["$set"][
+            "information"]["leases"][0]
+        read_fields = self.service._build_extracted_fields("test_collection", self.config, [stored_lease])
+        mock_context_store.save_lease_context.assert_called_once_with(
+            "test_collection",
+            "fake_hash",
+            "test_lease",
+            build_lease_context("test_collection", "test_lease", read_fields["test_lease"])
+        )
+
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_ingest_analyzer_output_lost_lock_keeps_stored_context(self, mock_logging):
+        """Test that the context of a lease whose write matched nothing is not stored."""
+        mock_context_store = MagicMock()
+        self.service = IngestionCollectionDocumentService(
+            collection_documents_collection=self.mock_collection_documents_collection,
+            container_client=self.mock_container_client,
+            mongo_lock_manager=self.mock_mongo_lock_manager,
+            context_store=mock_context_store
+        )
+        self.mock_collection_documents_collection.find_one.return_value = None
+        self.mock_collection_documents_collection.update_one.return_value.matched_count = 0
+
+        with self.assertRaises(RuntimeError):
+            self.service.ingest_analyzer_output(
+                doc_type=IngestDocumentType.COLLECTION,
+                collection_id="test_collection",
+                lease_id="test_lease",
+                filename="test_file.pdf",
+                date_of_document=date(2023, 1, 1),
+                data={"result": {"contents": [{"fields": {}, "markdown": "markdown"}]}},
+                config=self.config
+            )
+
+        mock_context_store.save_lease_context.assert_not_called()
+
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_ingest_analyzer_output_discards_context_that_cannot_be_stored(self, mock_logging):
+        """Test that a lease whose context cannot be stored after its fields were written is discarded."""
+        mock_context_store = MagicMock()
+        mock_context_store.save_lease_context.side_effect = Exception("DB error")
+        self.service = IngestionCollectionDocumentService(
+            collection_documents_collection=self.mock_collection_documents_collection,
+            container_client=self.mock_container_client,
+            mongo_lock_manager=self.mock_mongo_lock_manager,
+            context_store=mock_context_store
+        )
+        self.mock_collection_documents_collection.find_one.return_value = None
+
+        self.service.ingest_analyzer_output(
+            doc_type=IngestDocumentType.COLLECTION,
+            collection_id="test_collection",
+            lease_id="test_lease",
+            filename="test_file.pdf",
+            date_of_document=date(2023, 1, 1),
+            data={"result": {"contents": [{"fields": {}, "markdown": "markdown"}]}},
+            config=self.config
+        )
+
+        self.mock_collection_documents_collection.update_one.assert_called_once()
+        mock_context_store.discard_lease_context.assert_called_once_with("test_collection", "fake_hash", "test_lease")
+
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_ingest_analyzer_output_skips_document_already_in_lease(self, mock_logging):
+        """Test that a retried ingest of a document whose fields were stored does not add them twice."""
+        self.mock_collection_documents_collection.find_one.return_value = {
+            "_id": "test_collection-fake_hash",
+            "collection_id": "test_collection",
+            "config_id": "config-id",
+            "lease_config_hash": "fake_hash",
+            "information": {"leases": [{
+                "lease_id": "test_lease",
+                "original_documents": ["Collections/test_collection/test_lease/test_file.pdf"],
+                "markdowns": ["Collections/test_collection/test_lease/test_file.md"],
+                "fields": {}
+            }]}
+        }
+
+        self.service.ingest_analyzer_output(
+            doc_type=IngestDocumentType.COLLECTION,
+            collection_id="test_collection",
+            lease_id="test_lease",
+            filename="test_file.pdf",
+            date_of_document=date(2023, 1, 1),
+            data={"result": {"contents": [{"fields": {}, "markdown": "markdown"}]}},
+            config=self.config
+        )
+
+        self.mock_collection_documents_collection.update_one.assert_not_called()
+        self.mock_mongo_lock_manager.release_lock.assert_called_once_with("test_collection-fake_hash")
+
     @patch("services.ingest_lease_documents_service.logging")
     def test_ingest_analyzer_output_field_not_in_config(self, mock_logging):
         # FieldDataCollectionConfig has empty collection_rows, so no fields are valid
@@ -353,7 +595,10 @@ class TestIngestionCollectionDocumentServiceIsLeaseDocumentIngested(unittest.Tes
         )
 
         self.assertTrue(result)
-        self.mock_collection_documents_collection.find_one.assert_called_once_with({"_id": document_id})
+        self.mock_collection_documents_collection.find_one.assert_called_once_with(
+            {"_id": document_id},
+            {"information.leases.lease_id": 1, "information.leases.original_documents": 1}
+        )
 
     def test_is_document_ingested_returns_false_for_missing_site_document(self):
         self.mock_collection_documents_collection.find_one.return_value = None
@@ -367,7 +612,10 @@ class TestIngestionCollectionDocumentServiceIsLeaseDocumentIngested(unittest.Tes
         )
 
         self.assertFalse(result)
-        self.mock_collection_documents_collection.find_one.assert_called_once_with({"_id": "test_collection-fake_hash"})
+        self.mock_collection_documents_collection.find_one.assert_called_once_with(
+            {"_id": "test_collection-fake_hash"},
+            {"information.leases.lease_id": 1, "information.leases.original_documents": 1}
+        )
 
     def test_is_document_ingested_returns_false_for_missing_lease(self):
         existing_document = ExtractedCollectionDocuments(
@@ -434,6 +682,7 @@ class TestIngestionCollectionDocumentServiceIngestClassifierOutput(unittest.Test
         self.mock_container_client = MagicMock()
         self.mock_collection_documents_collection = MagicMock()
         self.mock_mongo_lock_manager = MagicMock()
+        self.mock_mongo_lock_manager.get_lock_filter.side_effect = _lock_filter
 
         self.service = IngestionCollectionDocumentService(
             collection_documents_collection=self.mock_collection_documents_collection,
@@ -510,7 +759,6 @@ class TestIngestionCollectionDocumentServiceIngestClassifierOutput(unittest.Test
             }
         }
         self.mock_collection_documents_collection.find_one.return_value = None
-        self.mock_container_client.file_exists.return_value = False
 
         self.service.ingest_classifier_output(
             doc_type=IngestDocumentType.COLLECTION,
@@ -531,7 +779,7 @@ class TestIngestionCollectionDocumentServiceIngestClassifierOutput(unittest.Test
         self.mock_mongo_lock_manager.release_lock.assert_called_once_with(
             "test_collection-fake_hash"
         )
-        self.mock_container_client.upload_document.assert_called_once_with(
+        self.mock_container_client.upload_if_absent.assert_called_once_with(
             "some_markdown_content more_markdown_content ",
             "Collections/test_collection/test_lease/test_file.md"
         )
@@ -540,7 +788,7 @@ class TestIngestionCollectionDocumentServiceIngestClassifierOutput(unittest.Test
             "lease_id=test_lease, lease_config_hash=fake_hash"
         )
         self.mock_collection_documents_collection.update_one.assert_called_once_with(
-            {"_id": "test_collection-fake_hash"},
+            {"_id": "test_collection-fake_hash", "lock_owner": "owner"},
             {
                 "$set":
                 {
@@ -599,10 +847,11 @@ class TestIngestionCollectionDocumentServiceIngestClassifierOutput(unittest.Test
                                 }
                             }
                         ]
-                    }
+                    },
+                    "lease_documents_migrated": False,
+                    "updated_unix_timestamp": ANY
                 }
-            },
-            upsert=True
+            }
         )
 
     @patch("services.ingest_lease_documents_service.logging")
@@ -684,7 +933,6 @@ class TestIngestionCollectionDocumentServiceIngestClassifierOutput(unittest.Test
             }
         }
         self.mock_collection_documents_collection.find_one.return_value = None
-        self.mock_container_client.file_exists.return_value = False
 
         self.service.ingest_classifier_output(
             doc_type=IngestDocumentType.COLLECTION,
@@ -1087,5 +1335,942 @@ class TestIngestionCollectionDocumentServiceGetAllExtractedFields(unittest.TestC
         )
 
 
+class TestIngestionCollectionDocumentServiceLeaseDocuments(unittest.TestCase):
+    """Tests for the per-lease storage layout."""
+
+    def setUp(self):
+        self.mock_container_client = MagicMock()
+        self.mock_collection_documents_collection = MagicMock()
+        self.mock_collection_documents_collection.find_one.return_value = None
+        self.mock_lease_documents_collection = MagicMock()
+        self.mock_mongo_lock_manager = MagicMock()
+        self.mock_mongo_lock_manager.get_lock_filter.side_effect = _lock_filter
+        self.mock_lease_mongo_lock_manager = MagicMock()
+        self.mock_lease_mongo_lock_manager.get_lock_filter.side_effect = _lock_filter
+
+        self.service = IngestionCollectionDocumentService(
+            collection_documents_collection=self.mock_collection_documents_collection,
+            container_client=self.mock_container_client,
+            mongo_lock_manager=self.mock_mongo_lock_manager,
+            lease_documents_collection=self.mock_lease_documents_collection,
+            lease_mongo_lock_manager=self.mock_lease_mongo_lock_manager,
+        )
+
+        self.config = FieldDataCollectionConfig(
+            name="test-config",
+            version="1.0",
+            lease_config_hash="fake_hash",
+            prompt="Test prompt",
+            collection_rows=[
+                LeaseAgreementCollectionRow(
+                    analyzer_id="analyzer_id",
+                    field_schema=[
+                        FieldSchema(
+                            name="field1",
+                            type=FieldMappingType.STRING,
+                            description="Field 1 description",
+                        ),
+                    ]
+                )
+            ]
+        )
+        self.config.id = "config-id"
+
+    def _lease_field(self, value: str, document: str) -> ExtractedLeaseField:
+        return ExtractedLeaseField(
+            type=ExtractedLeaseFieldType.STRING,
+            valueString=value,
+            date_of_document=date(2023, 1, 1),
+            document=document
+        )
+
+    def test_requires_lease_lock_manager(self):
+        with self.assertRaises(ValueError):
+            IngestionCollectionDocumentService(
+                collection_documents_collection=self.mock_collection_documents_collection,
+                container_client=self.mock_container_client,
+                mongo_lock_manager=self.mock_mongo_lock_manager,
+                lease_documents_collection=self.mock_lease_documents_collection,
+            )
+
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_ingest_analyzer_output_writes_lease_document(self, mock_logging):
+        data = {
+            "result": {
+                "contents": [
+                    {
+                        "fields": {"field1": {"valueString": "test_value", "type": "string"}},
+                        "markdown": "some_markdown"
+                    }
+                ]
+            }
+        }
+        self.mock_lease_documents_collection.find_one.return_value = None
+
+        self.service.ingest_analyzer_output(
+            doc_type=IngestDocumentType.COLLECTION,
+            collection_id="test_collection",
+            lease_id="test_lease",
+            filename="test_file.pdf",
+            date_of_document=date(2023, 1, 1),
+            data=data,
+            config=self.config
+        )
+
+        lease_document_id = "test_collection-fake_hash-test_lease"
+        self.mock_lease_mongo_lock_manager.wait.assert_called_once_with(lease_document_id)
+        self.mock_lease_mongo_lock_manager.release_lock.assert_called_once_with(lease_document_id)
+        self.mock_mongo_lock_manager.wait.assert_not_called()
+        self.mock_collection_documents_collection.update_one.assert_not_called()
+        self.mock_lease_documents_collection.update_one.assert_called_once_with(
+            {"_id": lease_document_id, "lock_owner": "owner"},
+            {
+                "$set": {
+                    "_id": lease_document_id,
+                    "collection_id": "test_collection",
+                    "config_id": "config-id",
+                    "lease_config_hash": "fake_hash",
+                    "lease_id": "test_lease",
+                    "original_documents": ["Collections/test_collection/test_lease/test_file.pdf"],
+                    "markdowns": ["Collections/test_collection/test_lease/test_file.md"],
+                    "fields": {
+                        "field1": [
+                            {
+                                "type": "string",
+                                "valueString": "test_value",
+                                "date_of_document": "2023-01-01",
+                                "markdown": "Collections/test_collection/test_lease/test_file.md",
+                                "document": "Collections/test_collection/test_lease/test_file.pdf"
+                            }
+                        ]
+                    },
+                    "updated_unix_timestamp": ANY
+                }
+            }
+        )
+
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_new_lease_document_starts_from_collection_document_lease(self, mock_logging):
+        data = {
+            "result": {
+                "contents": [{"fields": {"field1": {"valueString": "new", "type": "string"}}, "markdown": "markdown"}]
+            }
+        }
+        self.mock_lease_documents_collection.find_one.return_value = None
+        self.mock_collection_documents_collection.find_one.return_value = {
+            "_id": "test_collection-fake_hash",
+            "collection_id": "test_collection",
+            "information": {"leases": [{
+                "lease_id": "test_lease",
+                "original_documents": ["Collections/test_collection/test_lease/old.pdf"],
+                "markdowns": ["Collections/test_collection/test_lease/old.md"],
+                "fields": {
+                    "field1": [self._lease_field("old", "Collections/test_collection/test_lease/old.pdf").model_dump()],
+                    "field2": [self._lease_field("kept", "Collections/test_collection/test_lease/old.pdf").model_dump()]
+                }
+            }]}
+        }
+
+        self.service.ingest_analyzer_output(
+            doc_type=IngestDocumentType.COLLECTION,
+            collection_id="test_collection",
+            lease_id="test_lease",
+            filename="test_file.pdf",
+            date_of_document=date(2023, 1, 1),
+            data=data,
+            config=self.config
+        )
+
+        self.mock_collection_documents_collection.find_one.assert_called_once_with(
+            {"_id": "test_collection-fake_hash"},
+            {"collection_id": 1, "information.leases": {"$elemMatch": {"lease_id": "test_lease"}}}
+        )
+        stored = self.mock_lease_documents_collection.update_one.call_args[0][1]["$set"]
+        self.assertEqual(stored["original_documents"], [
+            "Collections/test_collection/test_lease/old.pdf",
+            "Collections/test_collection/test_lease/test_file.pdf"
+        ])
+        self.assertEqual([value["valueString"] for value in stored["fields"]["field1"]], ["old", "new"])
+        self.assertEqual([value["valueString"] for value in stored["fields"]["field2"]], ["kept"])
+
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_lease_document_write_leaves_lock_fields(self, mock_logging):
+        data = {
+            "result": {
+                "contents": [{"fields": {"field1": {"valueString": "test", "type": "string"}}, "markdown": "markdown"}]
+            }
+        }
+        self.mock_lease_documents_collection.find_one.return_value = {
+            "_id": "test_collection-fake_hash-test_lease",
+            "is_locked": True,
+            "unlock_unix_timestamp": 123,
+            "lock_owner": "owner"
+        }
+
+        self.service.ingest_analyzer_output(
+            doc_type=IngestDocumentType.COLLECTION,
+            collection_id="test_collection",
+            lease_id="test_lease",
+            filename="test_file.pdf",
+            date_of_document=date(2023, 1, 1),
+            data=data,
+            config=self.config
+        )
+
+        stored = self.mock_lease_documents_collection.update_one.call_args[0][1]["$set"]
+        self.assertEqual(stored["collection_id"], "test_collection")
+        for lock_field in ("is_locked", "unlock_unix_timestamp", "lock_owner"):
+            self.assertNotIn(lock_field, stored)
+
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_lease_document_packs_sources_and_spans(self, mock_logging):
+        source = "D(1,1.0000,2.0000,3.0000,2.0000,3.0000,4.0000,1.0000,4.0000)"
+        spans = [{"offset": 10, "length": 4}]
+        data = {
+            "result": {
+                "contents": [
+                    {
+                        "fields": {
+                            "field1": {"valueString": "test", "type": "string", "source": source, "spans": spans}
+                        },
+                        "markdown": "some_markdown"
+                    }
+                ]
+            }
+        }
+        self.mock_lease_documents_collection.find_one.return_value = None
+
+        self.service.ingest_analyzer_output(
+            doc_type=IngestDocumentType.COLLECTION,
+            collection_id="test_collection",
+            lease_id="test_lease",
+            filename="test_file.pdf",
+            date_of_document=date(2023, 1, 1),
+            data=data,
+            config=self.config
+        )
+
+        stored = self.mock_lease_documents_collection.update_one.call_args[0][1]["$set"]
+        stored_field = stored["fields"]["field1"][0]
+        self.assertIsInstance(stored_field["source"], Binary)
+        self.assertIsInstance(stored_field["spans"], Binary)
+
+        # Stored documents read back with the original values
+        lease_document = ExtractedLeaseDocument(**stored)
+        self.assertEqual(lease_document.fields["field1"][0].source, source)
+        self.assertEqual(lease_document.fields["field1"][0].spans, spans)
+        self.assertEqual(LeaseAgreementDocumentData(**stored_field).source_bounding_boxes, source)
+
+    def test_is_document_ingested_reads_lease_document(self):
+        self.mock_lease_documents_collection.find_one.return_value = {
+            "original_documents": ["Collections/test_collection/test_lease/test_file.pdf"]
+        }
+
+        result = self.service.is_document_ingested(
+            doc_type=IngestDocumentType.COLLECTION,
+            collection_id="test_collection",
+            filename="test_file.pdf",
+            config=self.config,
+            lease_id="test_lease"
+        )
+
+        self.assertTrue(result)
+        self.mock_collection_documents_collection.find_one.assert_not_called()
+
+    def test_is_document_ingested_falls_back_to_collection_document(self):
+        self.mock_lease_documents_collection.find_one.return_value = None
+        self.mock_collection_documents_collection.find_one.return_value = ExtractedCollectionDocuments(
+            collection_id="test_collection",
+            config_id="config-id",
+            lease_config_hash="fake_hash",
+            information=ExtractedCollectionInformationCollection(
+                leases=[
+                    ExtractedLeaseCollection(
+                        lease_id="test_lease",
+                        original_documents=["Collections/test_collection/test_lease/test_file.pdf"],
+                        markdowns=[],
+                        fields={}
+                    )
+                ]
+            )
+        ).model_dump()
+
+        result = self.service.is_document_ingested(
+            doc_type=IngestDocumentType.COLLECTION,
+            collection_id="test_collection",
+            filename="test_file.pdf",
+            config=self.config,
+            lease_id="test_lease"
+        )
+
+        self.assertTrue(result)
+
+    def _mock_both_layouts(self):
+        lease_document = ExtractedLeaseDocument(
+            _id="test_collection-fake_hash-lease1",
+            collection_id="test_collection",
+            config_id="config-id",
+            lease_config_hash="fake_hash",
+            lease_id="lease1",
+            original_documents=["new.pdf"],
+            markdowns=["new.md"],
+            fields={"field1": [self._lease_field("migrated", "new.pdf")]}
+        )
+        self.mock_lease_documents_collection.find.return_value = [lease_document.model_dump(by_alias=True)]
+        self.mock_collection_documents_collection.find_one.return_value = ExtractedCollectionDocuments(
+            collection_id="test_collection",
+            config_id="config-id",
+            lease_config_hash="fake_hash",
+            information=ExtractedCollectionInformationCollection(
+                leases=[
+                    ExtractedLeaseCollection(
+                        lease_id="lease1",
+                        original_documents=["old.pdf"],
+                        markdowns=["old.md"],
+                        fields={"field1": [self._lease_field("stale", "old.pdf")]}
+                    ),
+                    ExtractedLeaseCollection(
+                        lease_id="lease2",
+                        original_documents=["other.pdf"],
+                        markdowns=["other.md"],
+                        fields={"field1": [self._lease_field("legacy", "other.pdf")]}
+                    )
+                ]
+            )
+        ).model_dump()
+
+    def _assert_both_layouts_merged(self, result: dict, mock_logging):
+        self.assertEqual(
+            self.mock_lease_documents_collection.find.call_args[0][0],
+            {"collection_id": "test_collection", "lease_config_hash": "fake_hash"}
+        )
+        self.assertEqual(list(result.keys()), ["lease1", "lease2"])
+        self.assertEqual(result["lease1"]["field1"][0].valueString, "migrated")
+        self.assertEqual(result["lease2"]["field1"][0].valueString, "legacy")
+        mock_logging.error.assert_not_called()
+
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_get_all_extracted_fields_merges_both_layouts(self, mock_logging):
+        self._mock_both_layouts()
+
+        result = self.service._get_all_extracted_fields_from_collection_doc("test_collection", self.config)
+
+        self._assert_both_layouts_merged(result, mock_logging)
+
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_get_all_extracted_fields_async_merges_both_layouts(self, mock_logging):
+        self._mock_both_layouts()
+
+        result = asyncio.run(
+            self.service._get_all_extracted_fields_from_collection_doc_async("test_collection", self.config)
+        )
+
+        self._assert_both_layouts_merged(result, mock_logging)
+
+    def test_get_collection_version_reads_both_layouts(self):
+        self.mock_collection_documents_collection.find.return_value = [{"updated_unix_timestamp": 100.0}]
+        self.mock_lease_documents_collection.find.return_value = [
+            {"updated_unix_timestamp": 300.0},
+            {"updated_unix_timestamp": 200.0}
+        ]
+
+        version = asyncio.run(self.service.get_collection_version_async("test_collection", self.config))
+
+        self.assertEqual(version, "300.0-3")
+        self.mock_collection_documents_collection.find.assert_called_once_with(
+            {"_id": "test_collection-fake_hash"},
+            {"_id": 0, "updated_unix_timestamp": 1}
+        )
+        self.mock_lease_documents_collection.find.assert_called_once_with(
+            {"collection_id": "test_collection", "lease_config_hash": "fake_hash"},
+            {"_id": 0, "updated_unix_timestamp": 1}
+        )
+
+    def test_get_collection_version_without_stored_documents(self):
+        self.mock_collection_documents_collection.find.return_value = []
+        self.mock_lease_documents_collection.find.return_value = []
+
+        version = asyncio.run(self.service.get_collection_version_async("test_collection", self.config))
+
+        self.assertEqual(version, "0-0")
+
+
+class TestIngestionCollectionDocumentServiceProjectedReads(unittest.TestCase):
+    """Tests for the projected read path used to build the LLM context."""
+
+    def setUp(self):
+        self.mock_collection_documents_collection = MagicMock()
+
+        self.service = IngestionCollectionDocumentService(
+            collection_documents_collection=self.mock_collection_documents_collection,
+            container_client=MagicMock(),
+            mongo_lock_manager=MagicMock(),
+        )
+
+        self.config = FieldDataCollectionConfig(
+            name="test-config",
+            version="1.0",
+            lease_config_hash="test_hash",
+            prompt="Test prompt",
+            collection_rows=[
+                LeaseAgreementCollectionRow(
+                    analyzer_id="analyzer_id",
+                    field_schema=[
+                        FieldSchema(name="field1", type=FieldMappingType.STRING, description="Field 1"),
+                        ArrayFieldSchema(
+                            name="equipment",
+                            description="Equipment",
+                            items=[FieldSchema(name="make", type=FieldMappingType.STRING, description="Make")]
+                        ),
+                    ]
+                )
+            ]
+        )
+
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_projection_excludes_fields_not_in_context(self, mock_logging):
+        self.mock_collection_documents_collection.find_one.return_value = None
+
+        self.service._get_all_extracted_fields_from_collection_doc("test_collection", self.config)
+
+        query, projection = self.mock_collection_documents_collection.find_one.call_args[0]
+        self.assertEqual(query, {"_id": "test_collection-test_hash"})
+        self.assertEqual(projection["is_locked"], 0)
+        self.assertEqual(projection["information.leases.markdowns"], 0)
+        self.assertEqual(projection["information.leases.original_documents"], 0)
+        self.assertEqual(projection["information.leases.fields.field1.spans"], 0)
+        self.assertEqual(projection["information.leases.fields.equipment.valueArray.spans"], 0)
+        self.assertEqual(projection["information.leases.fields.equipment.valueArray.valueObject.make.spans"], 0)
+        self.assertTrue(all(value == 0 for value in projection.values()))
+        self.assertNotIn("information.leases.fields.field1.source", projection)
+        self.assertNotIn("information.leases.fields.field1.document", projection)
+
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_builds_context_models_from_stored_fields(self, mock_logging):
+        self.mock_collection_documents_collection.find_one.return_value = {
+            "_id": "test_collection-test_hash",
+            "collection_id": "test_collection",
+            "information": {
+                "leases": [
+                    {
+                        "lease_id": "lease1",
+                        "fields": {
+                            "field1": [
+                                {
+                                    "valueString": "value",
+                                    "source": "D(1,1,1,1,1,1,1,1)",
+                                    "document": "doc.pdf",
+                                    "date_of_document": "2023-01-01"
+                                }
+                            ],
+                            "equipment": [
+                                {
+                                    "valueArray": [
+                                        {
+                                            "valueObject": {
+                                                "make": {"valueString": "Make1", "source": "D(1,2,2,2,2,2,2,2)"}
+                                            }
+                                        }
+                                    ],
+                                    "document": "doc.pdf"
+                                }
+                            ]
+                        }
+                    }
+                ]
+            }
+        }
+
+        result = self.service._get_all_extracted_fields_from_collection_doc("test_collection", self.config)
+
+        field1 = result["lease1"]["field1"][0]
+        self.assertIsInstance(field1, LeaseAgreementDocumentData)
+        self.assertEqual(field1.valueString, "value")
+        self.assertEqual(field1.source_document, "doc.pdf")
+        self.assertEqual(field1.source_bounding_boxes, "D(1,1,1,1,1,1,1,1)")
+        self.assertEqual(field1.date_of_document, date(2023, 1, 1))
+        make = result["lease1"]["equipment"][0].valueArray[0].valueObject["make"]
+        self.assertEqual(make.valueString, "Make1")
+        self.assertEqual(make.source_bounding_boxes, "D(1,2,2,2,2,2,2,2)")
+
+
+class TestIngestionCollectionDocumentServiceIngestedDocuments(unittest.TestCase):
+    """Tests for the ingested documents index collection."""
+
+    def setUp(self):
+        self.mock_container_client = MagicMock()
+        self.mock_collection_documents_collection = MagicMock()
+        self.mock_ingested_documents_collection = MagicMock()
+        self.mock_mongo_lock_manager = MagicMock()
+
+        self.service = IngestionCollectionDocumentService(
+            collection_documents_collection=self.mock_collection_documents_collection,
+            container_client=self.mock_container_client,
+            mongo_lock_manager=self.mock_mongo_lock_manager,
+            ingested_documents_collection=self.mock_ingested_documents_collection,
+        )
+
+        self.config = FieldDataCollectionConfig(
+            name="test-config",
+            version="1.0",
+            lease_config_hash="fake_hash",
+            prompt="Test prompt",
+            collection_rows=[
+                LeaseAgreementCollectionRow(
+                    analyzer_id="analyzer_id",
+                    field_schema=[
+                        FieldSchema(
+                            name="field1",
+                            type=FieldMappingType.STRING,
+                            description="Field 1 description",
+                        ),
+                    ]
+                )
+            ]
+        )
+        self.config.id = "config-id"
+        self.ingested_document_key = {
+            "collection_id": "test_collection",
+            "lease_id": "test_lease",
+            "document_path": "Collections/test_collection/test_lease/test_file.pdf",
+            "lease_config_hash": "fake_hash",
+        }
+
+    def _is_document_ingested(self) -> bool:
+        return self.service.is_document_ingested(
+            doc_type=IngestDocumentType.COLLECTION,
+            collection_id="test_collection",
+            filename="test_file.pdf",
+            config=self.config,
+            lease_id="test_lease"
+        )
+
+    def test_is_document_ingested_point_lookup(self):
+        self.mock_ingested_documents_collection.find_one.return_value = {"_id": "entry"}
+
+        self.assertTrue(self._is_document_ingested())
+
+        self.mock_ingested_documents_collection.find_one.assert_called_once_with(
+            self.ingested_document_key, {"_id": 1}
+        )
+        self.mock_collection_documents_collection.find_one.assert_not_called()
+
+    def test_is_document_ingested_backfills_entry(self):
+        self.mock_ingested_documents_collection.find_one.return_value = None
+        self.mock_collection_documents_collection.find_one.return_value = ExtractedCollectionDocuments(
+            collection_id="test_collection",
+            config_id="config-id",
+            lease_config_hash="fake_hash",
+            information=ExtractedCollectionInformationCollection(
+                leases=[
+                    ExtractedLeaseCollection(
+                        lease_id="test_lease",
+                        original_documents=["Collections/test_collection/test_lease/test_file.pdf"],
+                        markdowns=[],
+                        fields={}
+                    )
+                ]
+            )
+        ).model_dump()
+
+        self.assertTrue(self._is_document_ingested())
+
+        self.mock_collection_documents_collection.find_one.assert_called_once_with(
+            {"_id": "test_collection-fake_hash"},
+            {"information.leases.lease_id": 1, "information.leases.original_documents": 1}
+        )
+        (filter, update), _ = self.mock_ingested_documents_collection.update_one.call_args_list[0]
+        self.assertEqual(filter, self.ingested_document_key)
+        self.assertIn("ingested_unix_timestamp", update["$setOnInsert"])
+        # The backfill of the collection is recorded last
+        self.assertEqual(
+            self.mock_ingested_documents_collection.update_one.call_args_list[1][0][0],
+            {**self.ingested_document_key, "lease_id": None, "document_path": ""}
+        )
+
+    def test_is_document_ingested_returns_false(self):
+        self.mock_ingested_documents_collection.find_one.return_value = None
+        self.mock_collection_documents_collection.find_one.return_value = None
+
+        self.assertFalse(self._is_document_ingested())
+        self.mock_ingested_documents_collection.update_one.assert_called_once()
+        self.assertEqual(
+            self.mock_ingested_documents_collection.update_one.call_args[0][0],
+            {**self.ingested_document_key, "lease_id": None, "document_path": ""}
+        )
+
+    def test_is_document_ingested_confirms_misses_once_backfilled(self):
+        self.mock_ingested_documents_collection.find_one.side_effect = lambda key, projection: (
+            {"_id": "backfilled"} if key["document_path"] == "" else None
+        )
+        self.mock_collection_documents_collection.find_one.return_value = None
+
+        self.assertFalse(self._is_document_ingested())
+
+        self.assertEqual(self.mock_ingested_documents_collection.find_one.call_count, 2)
+        self.mock_collection_documents_collection.find_one.assert_called_once_with(
+            {"_id": "test_collection-fake_hash"},
+            {"information.leases.lease_id": 1, "information.leases.original_documents": 1}
+        )
+        self.mock_ingested_documents_collection.update_one.assert_not_called()
+
+    def test_is_document_ingested_records_stored_document_missing_from_index(self):
+        """Test that a document whose ingest stopped before it was recorded is found in its lease and recorded."""
+        self.mock_ingested_documents_collection.find_one.side_effect = lambda key, projection: (
+            {"_id": "backfilled"} if key["document_path"] == "" else None
+        )
+        self.mock_collection_documents_collection.find_one.return_value = {"information": {"leases": [
+            {"lease_id": "test_lease", "original_documents": ["Collections/test_collection/test_lease/test_file.pdf"]}
+        ]}}
+
+        self.assertTrue(self._is_document_ingested())
+
+        self.mock_ingested_documents_collection.update_one.assert_called_once_with(
+            self.ingested_document_key,
+            {"$setOnInsert": {"ingested_unix_timestamp": ANY}},
+            upsert=True
+        )
+
+    def test_is_document_ingested_backfills_lease_documents(self):
+        service = IngestionCollectionDocumentService(
+            collection_documents_collection=self.mock_collection_documents_collection,
+            container_client=self.mock_container_client,
+            mongo_lock_manager=self.mock_mongo_lock_manager,
+            lease_documents_collection=MagicMock(),
+            lease_mongo_lock_manager=MagicMock(),
+            ingested_documents_collection=self.mock_ingested_documents_collection,
+        )
+        service._lease_documents_collection.find.return_value = [
+            {"lease_id": "test_lease", "original_documents": ["Collections/test_collection/test_lease/test_file.pdf"]},
+            {"lease_id": "other_lease", "original_documents": ["Collections/test_collection/other_lease/other.pdf"]},
+        ]
+        self.mock_ingested_documents_collection.find_one.return_value = None
+        self.mock_collection_documents_collection.find_one.return_value = None
+
+        self.assertTrue(service.is_document_ingested(
+            doc_type=IngestDocumentType.COLLECTION,
+            collection_id="test_collection",
+            filename="test_file.pdf",
+            config=self.config,
+            lease_id="test_lease"
+        ))
+
+        service._lease_documents_collection.find.assert_called_once_with(
+            {"collection_id": "test_collection", "lease_config_hash": "fake_hash"},
+            {"lease_id": 1, "original_documents": 1}
+        )
+        operations = self.mock_ingested_documents_collection.bulk_write.call_args[0][0]
+        self.assertEqual(len(operations), 2)
+
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_ingest_analyzer_output_records_entry(self, mock_logging):
+        data = {
+            "result": {
+                "contents": [
+                    {
+                        "fields": {"field1": {"valueString": "test_value", "type": "string"}},
+                        "markdown": "some_markdown"
+                    }
+                ]
+            }
+        }
+        self.mock_collection_documents_collection.find_one.return_value = None
+
+        self.service.ingest_analyzer_output(
+            doc_type=IngestDocumentType.COLLECTION,
+            collection_id="test_collection",
+            lease_id="test_lease",
+            filename="test_file.pdf",
+            date_of_document=date(2023, 1, 1),
+            data=data,
+            config=self.config
+        )
+
+        filter, update = self.mock_ingested_documents_collection.update_one.call_args[0]
+        self.assertEqual(filter, self.ingested_document_key)
+        self.assertEqual(self.mock_ingested_documents_collection.update_one.call_args[1], {"upsert": True})
+
+    def test_record_ingested_document_ignores_duplicate_key(self):
+        self.mock_ingested_documents_collection.find_one.return_value = None
+        self.mock_ingested_documents_collection.update_one.side_effect = errors.DuplicateKeyError("duplicate")
+        self.mock_collection_documents_collection.find_one.return_value = ExtractedCollectionDocuments(
+            collection_id="test_collection",
+            config_id="config-id",
+            lease_config_hash="fake_hash",
+            information=ExtractedCollectionInformationCollection(
+                leases=[
+                    ExtractedLeaseCollection(
+                        lease_id="test_lease",
+                        original_documents=["Collections/test_collection/test_lease/test_file.pdf"],
+                        markdowns=[],
+                        fields={}
+                    )
+                ]
+            )
+        ).model_dump()
+
+        self.assertTrue(self._is_document_ingested())
+
+
+class TestIngestionCollectionDocumentServiceIngestMany(unittest.TestCase):
+    """Tests for batched ingestion."""
+
+    def setUp(self):
+        self.mock_container_client = MagicMock()
+        self.mock_collection_documents_collection = MagicMock()
+        self.mock_ingested_documents_collection = MagicMock()
+        self.mock_mongo_lock_manager = MagicMock()
+        self.mock_mongo_lock_manager.get_lock_filter.side_effect = _lock_filter
+
+        self.service = IngestionCollectionDocumentService(
+            collection_documents_collection=self.mock_collection_documents_collection,
+            container_client=self.mock_container_client,
+            mongo_lock_manager=self.mock_mongo_lock_manager,
+            ingested_documents_collection=self.mock_ingested_documents_collection,
+        )
+
+        self.config = FieldDataCollectionConfig(
+            name="test-config",
+            version="1.0",
+            lease_config_hash="fake_hash",
+            prompt="Test prompt",
+            collection_rows=[
+                LeaseAgreementCollectionRow(
+                    analyzer_id="analyzer_id",
+                    field_schema=[
+                        FieldSchema(
+                            name="field1",
+                            type=FieldMappingType.STRING,
+                            description="Field 1 description",
+                        ),
+                    ]
+                )
+            ]
+        )
+        self.config.id = "config-id"
+        self.mock_collection_documents_collection.find_one.return_value = None
+
+    def _output(self, collection_id: str, lease_id: str, filename: str) -> ContentUnderstandingIngestOutput:
+        return ContentUnderstandingIngestOutput(
+            doc_type=IngestDocumentType.COLLECTION,
+            collection_id=collection_id,
+            lease_id=lease_id,
+            filename=filename,
+            date_of_document=date(2023, 1, 1),
+            data={
+                "result": {
+                    "contents": [
+                        {
+                            "fields": {"field1": {"valueString": filename, "type": "string"}},
+                            "markdown": f"markdown of {filename}"
+                        }
+                    ]
+                }
+            }
+        )
+
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_ingest_many_writes_each_collection_once(self, mock_logging):
+        self.service.ingest_many(
+            [
+                self._output("collection1", "lease1", "a.pdf"),
+                self._output("collection1", "lease2", "b.pdf"),
+                self._output("collection1", "lease1", "c.pdf"),
+                self._output("collection2", "lease1", "d.pdf"),
+            ],
+            self.config
+        )
+
+        self.assertEqual(self.mock_mongo_lock_manager.wait.call_count, 2)
+        self.mock_mongo_lock_manager.wait.assert_any_call("collection1-fake_hash")
+        self.mock_mongo_lock_manager.wait.assert_any_call("collection2-fake_hash")
+        self.assertEqual(self.mock_mongo_lock_manager.release_lock.call_count, 2)
+        self.assertEqual(self.mock_collection_documents_collection.find_one.call_count, 2)
+        self.assertEqual(self.mock_collection_documents_collection.update_one.call_count, 2)
+
+        filter, update = self.mock_collection_documents_collection.update_one.call_args_list[0][0]
+        self.assertEqual(filter, {"_id": "collection1-fake_hash", "lock_owner": "owner"})
+        leases = {lease["lease_id"]: lease for lease in update["$set"]["information"]["leases"]}
+        self.assertEqual(
+            leases["lease1"]["original_documents"],
+            ["Collections/collection1/lease1/a.pdf", "Collections/collection1/lease1/c.pdf"]
+        )
+        self.assertEqual(
+            [value["valueString"] for value in leases["lease1"]["fields"]["field1"]],
+            ["a.pdf", "c.pdf"]
+        )
+        self.assertEqual(leases["lease2"]["original_documents"], ["Collections/collection1/lease2/b.pdf"])
+
+        self.mock_container_client.upload_documents.assert_called_once_with([
+            ("markdown of a.pdf", "Collections/collection1/lease1/a.md"),
+            ("markdown of b.pdf", "Collections/collection1/lease2/b.md"),
+            ("markdown of c.pdf", "Collections/collection1/lease1/c.md"),
+        ], if_absent=True)
+        self.mock_container_client.upload_if_absent.assert_called_once_with(
+            "markdown of d.pdf", "Collections/collection2/lease1/d.md"
+        )
+        operations = self.mock_ingested_documents_collection.bulk_write.call_args[0][0]
+        self.assertEqual(len(operations), 3)
+        self.mock_ingested_documents_collection.update_one.assert_called_once()
+
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_ingest_many_writes_on_the_collection_worker_slot(self, mock_logging):
+        executor = CollectionAffinityExecutor(2)
+        self.addCleanup(executor.shutdown)
+        service = IngestionCollectionDocumentService(
+            collection_documents_collection=self.mock_collection_documents_collection,
+            container_client=self.mock_container_client,
+            mongo_lock_manager=self.mock_mongo_lock_manager,
+            ingested_documents_collection=self.mock_ingested_documents_collection,
+            collection_affinity_executor=executor,
+        )
+        write_threads = []
+        self.mock_collection_documents_collection.update_one.side_effect = \
+            lambda *args, **kwargs: write_threads.append(threading.current_thread().name) or DEFAULT
+
+        service.ingest_many(
+            [self._output("collection1", "lease1", "a.pdf"), self._output("collection2", "lease1", "b.pdf")],
+            self.config
+        )
+
+        self.assertEqual(write_threads, [
+            f"ingest-worker-{executor.get_worker_slot('collection1')}_0",
+            f"ingest-worker-{executor.get_worker_slot('collection2')}_0",
+        ])
+
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_ingest_many_uploads_and_waits_for_locks_off_the_worker_slot(self, mock_logging):
+        """Test that only the read-modify-write holds a worker slot, not uploads or lock waits."""
+        executor = CollectionAffinityExecutor(1)
+        self.addCleanup(executor.shutdown)
+        service = IngestionCollectionDocumentService(
+            collection_documents_collection=self.mock_collection_documents_collection,
+            container_client=self.mock_container_client,
+            mongo_lock_manager=self.mock_mongo_lock_manager,
+            collection_affinity_executor=executor,
+        )
+        threads = {}
+
+        def record_thread(name):
+            def side_effect(*args, **kwargs):
+                threads[name] = threading.current_thread().name
+                return DEFAULT
+            return side_effect
+        self.mock_container_client.upload_if_absent.side_effect = record_thread("upload")
+        self.mock_mongo_lock_manager.wait.side_effect = record_thread("wait")
+        self.mock_collection_documents_collection.find_one.side_effect = record_thread("read")
+
+        service.ingest_many([self._output("collection1", "lease1", "a.pdf")], self.config)
+
+        calling_thread = threading.current_thread().name
+        self.assertEqual(threads["upload"], calling_thread)
+        self.assertEqual(threads["wait"], calling_thread)
+        self.assertEqual(threads["read"], f"ingest-worker-{executor.get_worker_slot('collection1')}_0")
+
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_ingest_many_raises_errors_of_the_worker_slot(self, mock_logging):
+        executor = CollectionAffinityExecutor(1)
+        self.addCleanup(executor.shutdown)
+        service = IngestionCollectionDocumentService(
+            collection_documents_collection=self.mock_collection_documents_collection,
+            container_client=self.mock_container_client,
+            mongo_lock_manager=self.mock_mongo_lock_manager,
+            collection_affinity_executor=executor,
+        )
+        self.mock_collection_documents_collection.update_one.side_effect = Exception("DB error")
+
+        with self.assertRaises(Exception):
+            service.ingest_many([self._output("collection1", "lease1", "a.pdf")], self.config)
+
+        self.mock_mongo_lock_manager.release_lock.assert_called_once_with("collection1-fake_hash")
+
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_ingest_many_keeps_untouched_leases_as_stored(self, mock_logging):
+        stored_lease = {"lease_id": "other_lease", "original_documents": ["other.pdf"], "markdowns": [], "fields": {
+            "field1": [{"type": "string", "valueString": "stored", "date_of_document": "2022-01-01"}]
+        }}
+        self.mock_collection_documents_collection.find_one.return_value = {
+            "_id": "collection1-fake_hash",
+            "collection_id": "collection1",
+            "config_id": "config-id",
+            "lease_config_hash": "fake_hash",
+            "information": {"leases": [stored_lease]}
+        }
+
+        with patch(
+            "models.extracted_collection_documents.ExtractedLeaseCollection.model_validate",
+            side_effect=AssertionError("untouched lease validated")
+        ):
+            self.service.ingest_many(
+                [self._output("collection1", "lease1", "a.pdf"), self._output("collection1", "lease1", "b.pdf")],
+                self.config
+            )
+
+        update = self.mock_collection_documents_collection.update_one.call_args[0][1]
+        leases = update["$set"]["information"]["leases"]
+        self.assertEqual(leases[0], stored_lease)
+        self.assertEqual(leases[1]["lease_id"], "lease1")
+
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_ingest_many_releases_lock_on_error(self, mock_logging):
+        self.mock_collection_documents_collection.update_one.side_effect = Exception("DB error")
+
+        with self.assertRaises(Exception):
+            self.service.ingest_many(
+                [self._output("collection1", "lease1", "a.pdf"), self._output("collection1", "lease2", "b.pdf")],
+                self.config
+            )
+
+        self.mock_mongo_lock_manager.release_lock.assert_called_once_with("collection1-fake_hash")
+        self.mock_ingested_documents_collection.bulk_write.assert_not_called()
+
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_ingest_many_ignores_duplicate_ingested_entries(self, mock_logging):
+        self.mock_ingested_documents_collection.bulk_write.side_effect = errors.BulkWriteError(
+            {"writeErrors": [{"code": 11000}]}
+        )
+
+        self.service.ingest_many(
+            [self._output("collection1", "lease1", "a.pdf"), self._output("collection1", "lease2", "b.pdf")],
+            self.config
+        )
+
+        self.mock_collection_documents_collection.update_one.assert_called_once()
+
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_ingest_many_keeps_existing_markdowns(self, mock_logging):
+        self.mock_container_client.upload_documents.return_value = [True, False]
+
+        self.service.ingest_many(
+            [self._output("collection1", "lease1", "a.pdf"), self._output("collection1", "lease2", "b.pdf")],
+            self.config
+        )
+
+        self.mock_container_client.file_exists.assert_not_called()
+        mock_logging.info.assert_any_call("Markdown file already exists at Collections/collection1/lease2/b.md.")
+        self.mock_collection_documents_collection.update_one.assert_called_once()
+
+    @patch("services.ingest_lease_documents_service.logging")
+    def test_ingest_many_uploads_markdowns_with_async_client(self, mock_logging):
+        mock_async_container_client = MagicMock()
+        mock_async_container_client.__aenter__ = AsyncMock(return_value=mock_async_container_client)
+        mock_async_container_client.__aexit__ = AsyncMock(return_value=None)
+        mock_async_container_client.upload_documents = AsyncMock()
+        self.service._async_container_client_factory = MagicMock(return_value=mock_async_container_client)
+
+        self.service.ingest_many(
+            [self._output("collection1", "lease1", "a.pdf"), self._output("collection1", "lease2", "b.pdf")],
+            self.config
+        )
+
+        mock_async_container_client.upload_documents.assert_awaited_once_with([
+            ("markdown of a.pdf", "Collections/collection1/lease1/a.md"),
+            ("markdown of b.pdf", "Collections/collection1/lease2/b.md"),
+        ], if_absent=True)
+        mock_async_container_client.__aexit__.assert_awaited_once()
+        self.mock_container_client.upload_documents.assert_not_called()
+        self.mock_collection_documents_collection.update_one.assert_called_once()
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,233 @@
+import unittest
+from unittest.mock import MagicMock
+from datetime import date
+
+from services.lease_document_migrator import LeaseDocumentMigrator
+from models.extracted_collection_documents import (
+    ExtractedCollectionDocuments,
+    ExtractedCollectionInformationCollection,
+    ExtractedLeaseCollection,
+    ExtractedLeaseDocument,
+    ExtractedLeaseField,
+    ExtractedLeaseFieldType
+)
+
+
+def _lease_field(value: str, document: str) -> ExtractedLeaseField:
+    return ExtractedLeaseField(
+        type=ExtractedLeaseFieldType.STRING,
+        valueString=value,
+        date_of_document=date(2023, 1, 1),
+        document=document
+    )
+
+
+class TestLeaseDocumentMigrator(unittest.TestCase):
+    def setUp(self):
+        self.mock_collection_documents_collection = MagicMock()
+        self.mock_lease_documents_collection = MagicMock()
+        self.mock_mongo_lock_manager = MagicMock()
+        self.mock_lease_mongo_lock_manager = MagicMock()
+        for lock_manager in (self.mock_mongo_lock_manager, self.mock_lease_mongo_lock_manager):
+            lock_manager.get_lock_filter.side_effect = lambda document_id: {"_id": document_id, "lock_owner": "owner"}
+
+        self.migrator = LeaseDocumentMigrator(
+            collection_documents_collection=self.mock_collection_documents_collection,
+            lease_documents_collection=self.mock_lease_documents_collection,
+            mongo_lock_manager=self.mock_mongo_lock_manager,
+            lease_mongo_lock_manager=self.mock_lease_mongo_lock_manager,
+        )
+
+        self.collection_document = ExtractedCollectionDocuments(
+            _id="collection-hash",
+            collection_id="collection",
+            config_id="config-id",
+            lease_config_hash="hash",
+            information=ExtractedCollectionInformationCollection(
+                leases=[
+                    ExtractedLeaseCollection(
+                        lease_id="lease1",
+                        original_documents=["old.pdf"],
+                        markdowns=["old.md"],
+                        fields={"field1": [_lease_field("old_value", "old.pdf")]}
+                    )
+                ]
+            )
+        )
+        self.mock_collection_documents_collection.find_one.return_value = \
+            self.collection_document.model_dump(by_alias=True)
+
+    def test_migrate_document_creates_lease_document(self):
+        """Test that a lease without a lease document is copied as-is."""
+        self.mock_lease_documents_collection.find_one.return_value = None
+
+        updated = self.migrator.migrate_document("collection-hash")
+
+        self.assertEqual(updated, 1)
+        self.mock_mongo_lock_manager.wait.assert_called_once_with("collection-hash")
+        self.mock_mongo_lock_manager.release_lock.assert_called_once_with("collection-hash")
+        self.mock_lease_mongo_lock_manager.wait.assert_called_once_with("collection-hash-lease1")
+        self.mock_lease_mongo_lock_manager.release_lock.assert_called_once_with("collection-hash-lease1")
+
+        filter, update = self.mock_lease_documents_collection.update_one.call_args[0]
+        self.assertEqual(filter, {"_id": "collection-hash-lease1", "lock_owner": "owner"})
+        self.assertEqual(update["$set"]["collection_id"], "collection")
+        self.assertEqual(update["$set"]["lease_id"], "lease1")
+        self.assertEqual(update["$set"]["original_documents"], ["old.pdf"])
+        self.assertEqual(update["$set"]["fields"]["field1"][0]["valueString"], "old_value")
+        self.mock_collection_documents_collection.update_one.assert_called_once_with(
+            {"_id": "collection-hash", "lock_owner": "owner"},
+            {"$set": {"lease_documents_migrated": True}}
+        )
+
+    def test_migrate_document_merges_into_existing_lease_document(self):
+        """Test that older values are placed ahead of values already in the lease document."""
+        self.mock_lease_documents_collection.find_one.return_value = ExtractedLeaseDocument(
+            _id="collection-hash-lease1",
+            collection_id="collection",
+            config_id="config-id",
+            lease_config_hash="hash",
+            lease_id="lease1",
+            original_documents=["new.pdf"],
+            markdowns=["new.md"],
+            fields={"field1": [_lease_field("new_value", "new.pdf")]}
+        ).model_dump(by_alias=True)
+
+        self.migrator.migrate_document("collection-hash")
+
+        update = self.mock_lease_documents_collection.update_one.call_args[0][1]
+        self.assertEqual(update["$set"]["original_documents"], ["old.pdf", "new.pdf"])
+        self.assertEqual(update["$set"]["markdowns"], ["old.md", "new.md"])
+        self.assertEqual(
+            [value["valueString"] for value in update["$set"]["fields"]["field1"]],
+            ["old_value", "new_value"]
+        )
+
+    def test_migrate_document_stores_merged_lease_context(self):
+        """Test that the context of a migrated lease is stored from the merged lease document."""
+        context_store = MagicMock()
+        self.migrator = LeaseDocumentMigrator(
+            collection_documents_collection=self.mock_collection_documents_collection,
+            lease_documents_collection=self.mock_lease_documents_collection,
+            mongo_lock_manager=self.mock_mongo_lock_manager,
+            lease_mongo_lock_manager=self.mock_lease_mongo_lock_manager,
+            context_store=context_store,
+        )
+        self.mock_lease_documents_collection.find_one.return_value = ExtractedLeaseDocument(
+            _id="collection-hash-lease1",
+            collection_id="collection",
+            config_id="config-id",
+            lease_config_hash="hash",
+            lease_id="lease1",
+            original_documents=["new.pdf"],
+            markdowns=["new.md"],
+            fields={"field1": [_lease_field("new_value", "new.pdf")]}
+        ).model_dump(by_alias=True)
+
+        self.migrator.migrate_document("collection-hash")
+
+        context_store.save_lease_context.assert_called_once()
+        collection_id, lease_config_hash, lease_id, (context, _) = context_store.save_lease_context.call_args[0]
+        self.assertEqual((collection_id, lease_config_hash, lease_id), ("collection", "hash", "lease1"))
+        self.assertIn("old_value", context)
+        self.assertIn("new_value", context)
+
+    def test_migrate_document_lost_lease_lock_keeps_stored_context(self):
+        """Test that the context of a lease whose write matched nothing is not stored."""
+        context_store = MagicMock()
+        self.migrator = LeaseDocumentMigrator(
+            collection_documents_collection=self.mock_collection_documents_collection,
+            lease_documents_collection=self.mock_lease_documents_collection,
+            mongo_lock_manager=self.mock_mongo_lock_manager,
+            lease_mongo_lock_manager=self.mock_lease_mongo_lock_manager,
+            context_store=context_store,
+        )
+        self.mock_lease_documents_collection.find_one.return_value = None
+        self.mock_lease_documents_collection.update_one.return_value.matched_count = 0
+
+        with self.assertRaises(RuntimeError):
+            self.migrator.migrate_document("collection-hash")
+
+        context_store.save_lease_context.assert_not_called()
+
+    def test_migrate_document_is_idempotent(self):
+        """Test that an already migrated lease is not written again."""
+        self.mock_lease_documents_collection.find_one.return_value = ExtractedLeaseDocument(
+            _id="collection-hash-lease1",
+            collection_id="collection",
+            config_id="config-id",
+            lease_config_hash="hash",
+            lease_id="lease1",
+            original_documents=["old.pdf"],
+            markdowns=["old.md"],
+            fields={"field1": [_lease_field("old_value", "old.pdf")]}
+        ).model_dump(by_alias=True)
+
+        updated = self.migrator.migrate_document("collection-hash")
+
+        self.assertEqual(updated, 0)
+        self.mock_lease_documents_collection.update_one.assert_not_called()
+        self.mock_lease_mongo_lock_manager.release_lock.assert_called_once_with("collection-hash-lease1")
+
+    def test_migrate_document_lost_lease_lock(self):
+        """Test that a lease document whose lock was lost is not written and the document stays unmigrated."""
+        self.mock_lease_documents_collection.find_one.return_value = None
+        self.mock_lease_documents_collection.update_one.return_value.matched_count = 0
+
+        with self.assertRaises(RuntimeError):
+            self.migrator.migrate_document("collection-hash")
+
+        self.mock_collection_documents_collection.update_one.assert_not_called()
+        self.mock_lease_mongo_lock_manager.release_lock.assert_called_once_with("collection-hash-lease1")
+        self.mock_mongo_lock_manager.release_lock.assert_called_once_with("collection-hash")
+
+    def test_migrate_document_lock_timeout(self):
+        """Test that a document whose lock could not be acquired is not read."""
+        self.mock_mongo_lock_manager.wait.return_value = False
+
+        with self.assertRaises(RuntimeError):
+            self.migrator.migrate_document("collection-hash")
+
+        self.mock_collection_documents_collection.find_one.assert_not_called()
+        self.mock_lease_documents_collection.update_one.assert_not_called()
+
+    def test_migrate_document_missing_document(self):
+        """Test that a lock-only document is skipped."""
+        self.mock_collection_documents_collection.find_one.return_value = {"_id": "collection-hash"}
+
+        updated = self.migrator.migrate_document("collection-hash")
+
+        self.assertEqual(updated, 0)
+        self.mock_collection_documents_collection.update_one.assert_not_called()
+        self.mock_mongo_lock_manager.release_lock.assert_called_once_with("collection-hash")
+
+    def test_migrate_all_skips_migrated_documents(self):
+        """Test that migrate_all only picks up documents that have not been migrated."""
+        self.mock_collection_documents_collection.find.return_value.limit.return_value = [{"_id": "collection-hash"}]
+        self.mock_lease_documents_collection.find_one.return_value = None
+
+        migrated = self.migrator.migrate_all(limit=10)
+
+        self.assertEqual(migrated, 1)
+        self.mock_collection_documents_collection.find.assert_called_once_with(
+            {"information": {"$exists": True}, "lease_documents_migrated": {"$ne": True}},
+            {"_id": 1}
+        )
+        self.mock_collection_documents_collection.find.return_value.limit.assert_called_once_with(10)
+
+    def test_migrate_all_continues_after_failure(self):
+        """Test that a failing document does not stop the migration run."""
+        self.mock_collection_documents_collection.find.return_value = [{"_id": "bad"}, {"_id": "collection-hash"}]
+        self.mock_lease_documents_collection.find_one.return_value = None
+        self.mock_collection_documents_collection.find_one.side_effect = [
+            Exception("DB error"),
+            self.collection_document.model_dump(by_alias=True)
+        ]
+
+        migrated = self.migrator.migrate_all()
+
+        self.assertEqual(migrated, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,7 @@
 import unittest
 from unittest.mock import patch
 from src.services.llm_request_manager import LlmRequestManager
-from src.models.api.v1 import QueryResponse
+from src.models.api.v1 import GeneratedResponse, QueryResponse
 from src.services.collection_kernel_plugin import CollectionPlugin
 from src.models.data_collection_config import FieldDataCollectionConfig
 
@@ -24,8 +24,6 @@ class TestParseResponseContent(unittest.TestCase):
             lease_config_hash="hash",
             collection_rows=[])
 
-        from src.services.collection_kernel_plugin import document_data_cache
-        self.document_data_cache = document_data_cache
         self.collection_plugin = CollectionPlugin(config=config, document_service=None)
         self.collection_plugin._collection_id = "1"  # Set a mock collection ID for testing
 
@@ -34,8 +32,7 @@ class TestParseResponseContent(unittest.TestCase):
 
     def test_single_json_object(self):
         raw_content = '{"response": "Test response", "citations": ["CITE1-1"]}'
-        key = self.collection_plugin.composite_key("1", "hash")
-        self.document_data_cache[key] = {
+        self.collection_plugin._loaded_document_data["1"] = {
             "citation_mappings" : {
                 "CITE1-1" : {
                     "source_document": "source_document1",
@@ -60,8 +57,7 @@ class TestParseResponseContent(unittest.TestCase):
             '{"response": "Test response 1", "citations": ["CITE1-1"]}\n'
             '{"response": "Test response 2", "citations": ["CITE1-1"]}'
         )
-        key = self.collection_plugin.composite_key("1", "hash")
-        self.document_data_cache[key] = {
+        self.collection_plugin._loaded_document_data["1"] = {
             "citation_mappings" : {
                 "CITE1-1" : {
                     "source_document": "source_document1",
@@ -85,8 +81,7 @@ class TestParseResponseContent(unittest.TestCase):
     def test_pure_string_content(self):
         raw_content = "This is a pure string with no JSON object."
 
-        key = self.collection_plugin.composite_key("1", "hash")
-        self.document_data_cache[key] = {
+        self.collection_plugin._loaded_document_data["1"] = {
             "citation_mappings" : {
                 "CITE1-1" : {
                     "source_document": "source_document1",
@@ -109,8 +104,7 @@ class TestParseResponseContent(unittest.TestCase):
     def test_invalid_json(self):
         raw_content = '{"response": "Test response", "citations": ["doc1", "box1"]'  # Missing closing brace
 
-        key = self.collection_plugin.composite_key("1", "hash")
-        self.document_data_cache[key] = {
+        self.collection_plugin._loaded_document_data["1"] = {
             "citation_mappings" : {
                 "CITE1-1" : {
                     "source_document": "source_document1",
@@ -129,3 +123,11 @@ class TestParseResponseContent(unittest.TestCase):
             citations=[]
         )
         self.assertEqual(result.model_dump_json(), expected.model_dump_json())
+
+    def test_collection_question_definitions(self):
+        """Test that the definitions include the collection data function and the response schema."""
+        tool_definition, response_schema = self.llm_request_manager.get_collection_question_definitions()
+
+        self.assertEqual(tool_definition["function"]["name"], "Collection-get_collection_data")
+        self.assertEqual(tool_definition["function"]["parameters"]["required"], ["collection_id"])
+        self.assertEqual(response_schema, GeneratedResponse.model_json_schema())
@@ -0,0 +1,157 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from azure.core.exceptions import ResourceNotFoundError
+
+from src.models.environment_config import BlobStorageBackend, BlobStorageConfig, ConfigurationValue
+from src.services import container_client
+from src.services.local_container_client import LocalFileSystemContainerClient
+
+
+class TestLocalFileSystemContainerClient(unittest.TestCase):
+    def setUp(self):
+        """Set up the test case with an empty storage directory."""
+        self.root_dir = tempfile.mkdtemp()
+        self.container_client = LocalFileSystemContainerClient(self.root_dir)
+
+    def test_upload_and_download_document(self):
+        """Test that documents are stored at their path with their metadata."""
+        self.container_client.upload_document("# Lease", "Collections/c1/l1/a.md", metadata={"key": "value"})
+
+        with open(os.path.join(self.root_dir, "Collections", "c1", "l1", "a.md")) as f:
+            self.assertEqual(f.read(), "# Lease")
+        self.assertTrue(self.container_client.file_exists("Collections/c1/l1/a.md"))
+        self.assertEqual(
+            self.container_client.download_file("Collections/c1/l1/a.md"),
+            (b"# Lease", {"key": "value"})
+        )
+
+    def test_upload_document_replaces_existing_document(self):
+        """Test that uploads replace the content and leave no temporary files behind."""
+        self.container_client.upload_document(b"old", "a.md")
+        self.container_client.upload_document(b"new", "a.md")
+
+        self.assertEqual(self.container_client.download_file("a.md"), (b"new", {}))
+        self.assertEqual(sorted(os.listdir(self.root_dir)), [".metadata", "a.md"])
+
+    def test_upload_if_absent(self):
+        """Test that an existing document is kept as it is."""
+        self.assertTrue(self.container_client.upload_if_absent(b"first", "a.md"))
+        self.assertFalse(self.container_client.upload_if_absent(b"second", "a.md"))
+
+        self.assertEqual(self.container_client.download_file("a.md"), (b"first", {}))
+
+    def test_upload_if_absent_removes_document_without_properties(self):
+        """Test that a document whose properties could not be written is removed, so a retry writes it."""
+        compressed = gzip.compress(b"# Lease")
+        with patch.object(self.container_client, "_write_properties", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                self.container_client.upload_if_absent(compressed, "a.md", content_encoding="gzip")
+
+        self.assertFalse(self.container_client.file_exists("a.md"))
+        self.assertTrue(self.container_client.upload_if_absent(compressed, "a.md", content_encoding="gzip"))
+        self.assertEqual(self.container_client.download_file("a.md"), (b"# Lease", {}))
+
+    def test_upload_documents_if_absent(self):
+        """Test that batched uploads report which documents were written."""
+        self.container_client.upload_document(b"existing", "b.md")
+
+        result = self.container_client.upload_documents([(b"a", "a.md"), (b"b", "b.md")], if_absent=True)
+
+        self.assertEqual(result, [True, False])
+        self.assertEqual(self.container_client.download_file("b.md")[0], b"existing")
+
+    def test_encoded_documents(self):
+        """Test that encoded documents are decoded on download, and ranges are read as stored."""
+        self.container_client.upload_document(gzip.compress(b"# Lease"), "a.md", content_encoding="gzip")
+
+        self.assertEqual(self.container_client.download_file("a.md"), (b"# Lease", {}))
+        self.assertEqual(self.container_client.download_range("a.md", 0, 2), b"\x1f\x8b")
+
+    def test_download_missing_file(self):
+        """Test that downloads of missing files raise the same error as Azure Blob Storage."""
+        with self.assertRaises(ResourceNotFoundError):
+            self.container_client.download_file("missing.md")
+
+    def test_file_exists_missing_file(self):
+        """Test that missing files are reported as such."""
+        self.assertFalse(self.container_client.file_exists("missing.md"))
+
+    def test_rejects_paths_outside_of_storage_directory(self):
+        """Test that paths cannot escape the storage directory or overwrite metadata."""
+        with self.assertRaises(ValueError):
+            self.container_client.upload_document(b"content", "../outside.md")
+        with self.assertRaises(ValueError):
+            self.container_client.upload_document(b"content", ".metadata/a.md.json")
+
+    def test_download_files_copies_matching_files(self):
+        """Test that files under a prefix are copied with their metadata, and skipped once unchanged."""
+        self.container_client.upload_document(b"a", "Collections/c1/a.pdf", metadata={"key": "a"})
+        self.container_client.upload_document(b"b", "Collections/c1/b.md")
+        self.container_client.upload_document(b"c", "Collections/c2/c.pdf")
+        output_dir = tempfile.mkdtemp()
+
+        results = self.container_client.download_files("Collections/c1", output_dir, extension=".pdf")
+
+        self.assertEqual(results, [os.path.join(output_dir, "Collections", "c1", "a.pdf")])
+        with open(results[0], "rb") as f:
+            self.assertEqual(f.read(), b"a")
+        with open(os.path.join(output_dir, "Collections", "c1", "a.json")) as f:
+            self.assertEqual(json.load(f), {"key": "a"})
+
+        with patch("src.services.local_container_client.shutil.copyfile") as mock_copyfile:
+            self.container_client.download_files("Collections/c1", output_dir, extension=".pdf")
+        mock_copyfile.assert_not_called()
+
+
+class TestGetContainerClient(unittest.TestCase):
+    def setUp(self):
+        container_client._container_client = None
+
+    def tearDown(self):
+        container_client._container_client = None
+
+    def test_local_backend(self):
+        """Test that the local backend stores the container under the local root path."""
+        root_dir = tempfile.mkdtemp()
+        environment_config = MagicMock()
+        environment_config.blob_storage = BlobStorageConfig(
+            account_url=ConfigurationValue(value="https://account.blob.core.windows.net/"),
+            container_name=ConfigurationValue(value="processed"),
+            backend=ConfigurationValue(value=BlobStorageBackend.LOCAL),
+            local_root_path=ConfigurationValue(value=root_dir)
+        )
+
+        client = container_client.get_container_client(environment_config)
+
+        self.assertIsInstance(client, LocalFileSystemContainerClient)
+        client.upload_document(b"content", "a.md")
+        self.assertTrue(os.path.isfile(os.path.join(root_dir, "processed", "a.md")))
+
+    def test_local_backend_requires_root_path(self):
+        """Test that the local backend cannot be used without a root path."""
+        environment_config = MagicMock()
+        environment_config.blob_storage = BlobStorageConfig(
+            account_url=ConfigurationValue(value="https://account.blob.core.windows.net/"),
+            container_name=ConfigurationValue(value="processed"),
+            backend=ConfigurationValue(value="local")
+        )
+
+        with self.assertRaises(ValueError):
+            container_client.get_container_client(environment_config)
+
+    def test_azure_backend_is_the_default(self):
+        """Test that Azure Blob Storage is used unless configured otherwise."""
+        blob_storage = BlobStorageConfig(
+            account_url=ConfigurationValue(value="https://account.blob.core.windows.net/"),
+            container_name=ConfigurationValue(value="processed")
+        )
+
+        self.assertFalse(blob_storage.uses_local_backend)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.services import markdown_page_service
+from src.services.local_container_client import LocalFileSystemContainerClient
+from src.services.markdown_page_service import MarkdownPageService
+from src.utils.markdown_pages import encode_paged_markdown
+
+
+class TestMarkdownPageService(unittest.TestCase):
+    def setUp(self):
+        """Set up the test case with a paged markdown stored on the local backend."""
+        markdown_page_service.page_index_cache.clear()
+        self.container_client = LocalFileSystemContainerClient(tempfile.mkdtemp())
+        self.service = MarkdownPageService(self.container_client)
+
+        self.pages = [f"## Page {page}\n" + f"Clause {page} of the lease. " * 50 for page in range(1, 6)]
+        offsets = {page: sum(len(text) for text in self.pages[:page - 1]) for page in range(1, 6)}
+        paged_markdown = encode_paged_markdown("".join(self.pages), offsets)
+        self.container_client.upload_document(
+            paged_markdown.data,
+            "Collections/c1/l1/lease.md",
+            content_encoding=paged_markdown.index.encoding
+        )
+        self.container_client.upload_document(
+            paged_markdown.index.model_dump_json(),
+            "Collections/c1/l1/lease.pages.json"
+        )
+
+    def test_get_pages_reads_requested_pages(self):
+        with patch.object(self.container_client, "download_range", wraps=self.container_client.download_range) \
+                as mock_download_range:
+            pages = self.service.get_pages("c1", "l1", "lease.pdf", [2, 3, 5, 9])
+
+        self.assertEqual(pages, {2: self.pages[1], 3: self.pages[2], 5: self.pages[4]})
+        # Pages 2 and 3 are adjacent, so they are read together
+        self.assertEqual(mock_download_range.call_count, 2)
+
+    def test_whole_markdown_still_downloads(self):
+        content, _ = self.container_client.download_file("Collections/c1/l1/lease.md")
+
+        self.assertEqual(content.decode("utf-8"), "".join(self.pages))
+
+    def test_page_index_is_cached(self):
+        self.service.get_pages("c1", "l1", "lease.pdf", [1])
+
+        with patch.object(self.container_client, "download_file") as mock_download_file:
+            self.service.get_pages("c1", "l1", "lease.pdf", [1])
+
+        mock_download_file.assert_not_called()
+
+    def test_document_without_page_index(self):
+        self.assertIsNone(self.service.get_pages("c1", "l1", "other.pdf", [1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
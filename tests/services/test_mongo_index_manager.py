@@ -0,0 +1,114 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from pymongo import errors
+
+from services import mongo_index_manager
+from services.mongo_index_manager import MongoCollection, MongoIndexManager, ensure_indexes, _find_plan_stages
+
+
+class TestMongoIndexManager(unittest.TestCase):
+    """Unit tests for the MongoIndexManager."""
+
+    def setUp(self):
+        mongo_index_manager._ensured_indexes.clear()
+        self.mock_collection = MagicMock()
+        self.mock_collection.full_name = "db.LeaseDocuments"
+        self.mock_collection.name = "LeaseDocuments"
+        self.index_manager = MongoIndexManager({MongoCollection.LEASE_DOCUMENTS: self.mock_collection})
+
+    def tearDown(self):
+        mongo_index_manager._ensured_indexes.clear()
+
+    def test_ensure_indexes_creates_declared_indexes_once(self):
+        """Test that the declared indexes are created, and only once per process."""
+        self.index_manager.ensure_indexes()
+        self.index_manager.ensure_indexes()
+
+        self.mock_collection.create_index.assert_any_call(
+            [("collection_id", 1), ("lease_config_hash", 1)],
+            unique=False,
+            name="collection_id_1_lease_config_hash_1"
+        )
+        self.mock_collection.create_index.assert_any_call(
+            [("updated_unix_timestamp", 1)],
+            unique=False,
+            name="updated_unix_timestamp_1"
+        )
+        self.assertEqual(self.mock_collection.create_index.call_count, 2)
+
+    def test_ensure_indexes_unique(self):
+        """Test that the ingested documents index enforces uniqueness."""
+        ensure_indexes(self.mock_collection, MongoCollection.INGESTED_DOCUMENTS)
+
+        self.mock_collection.create_index.assert_called_once_with(
+            [("collection_id", 1), ("lease_id", 1), ("document_path", 1), ("lease_config_hash", 1)],
+            unique=True,
+            name="collection_id_1_lease_id_1_document_path_1_lease_config_hash_1"
+        )
+
+    @patch("services.mongo_index_manager.logging")
+    def test_validate_query_plans_reports_collection_scans(self, mock_logging):
+        """Test that a hot query planned as a collection scan is reported and logged."""
+        index_scan = {"queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}}
+        collection_scan = {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}
+
+        def explain_for(query_filter):
+            cursor = MagicMock()
+            is_collection_query = "collection_id" in query_filter
+            cursor.limit.return_value.explain.return_value = collection_scan if is_collection_query else index_scan
+            return cursor
+        self.mock_collection.find.side_effect = explain_for
+
+        results = self.index_manager.validate_query_plans()
+
+        scans = [result.query for result in results if result.is_collection_scan]
+        self.assertEqual(scans, ["find_collection_leases"])
+        self.assertEqual(
+            next(result for result in results if result.query == "find_by_id").stages,
+            ["FETCH", "IXSCAN"]
+        )
+        mock_logging.error.assert_called_once()
+
+    @patch("services.mongo_index_manager.logging")
+    def test_validate_query_plans_explain_not_supported(self, mock_logging):
+        """Test that a failure to explain is reported on the result instead of raised."""
+        self.mock_collection.find.return_value.limit.return_value.explain.side_effect = \
+            errors.OperationFailure("explain is not supported")
+
+        results = self.index_manager.validate_query_plans()
+
+        self.assertTrue(all(result.error for result in results))
+        self.assertFalse(any(result.is_collection_scan for result in results))
+        mock_logging.error.assert_not_called()
+
+    def test_find_plan_stages_nested(self):
+        """Test that stages are found in nested and sharded explain layouts."""
+        explain_output = {
+            "queryPlanner": {
+                "winningPlan": {
+                    "stage": "SHARD_MERGE",
+                    "shards": [{"winningPlan": {"stage": "COLLSCAN"}}]
+                }
+            }
+        }
+
+        self.assertEqual(_find_plan_stages(explain_output), ["SHARD_MERGE", "COLLSCAN"])
+
+    @patch("services.mongo_index_manager.CosmosClient")
+    def test_from_environment_config_skips_unconfigured_collections(self, mock_cosmos_client):
+        """Test that only the configured collections are managed."""
+        environment_config = MagicMock()
+        environment_config.cosmosdb.lease_document_collection_name = None
+        environment_config.cosmosdb.ingested_documents_collection_name = None
+        environment_config.cosmosdb.context_collection_name = None
+
+        index_manager = MongoIndexManager.from_environment_config(environment_config)
+
+        self.assertEqual(
+            set(index_manager._collections),
+            {MongoCollection.DOCUMENTS, MongoCollection.CONFIGURATIONS}
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,10 @@
+import threading
+import time
 import unittest
 from unittest.mock import MagicMock
-from pymongo.errors import PyMongoError
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from constants import MongoLockContants
+from src.services import mongo_lock_manager
 from src.services.mongo_lock_manager import MongoLockManager
 
 
@@ -84,9 +88,13 @@ class TestWait(unittest.TestCase):
 
 class TestReleaseLock(unittest.TestCase):
     def setUp(self):
-        """Set up the test case with a mock collection."""
+        """Set up the test case with a mock collection and a held lock."""
         self.mock_collection = MagicMock()
         self.lock_manager = MongoLockManager(self.mock_collection, lock_duration=300)
+        self.mock_collection.update_one.return_value.modified_count = 1
+        self.lock_manager.acquire_lock("doc1")
+        self.owner = self.mock_collection.update_one.call_args[0][1]["$set"]["lock_owner"]
+        self.mock_collection.update_one.reset_mock()
 
     def test_release_lock_success(self):
         """Test releasing a lock successfully."""
@@ -95,13 +103,13 @@ class TestReleaseLock(unittest.TestCase):
         result = self.lock_manager.release_lock("doc1")
 
         self.mock_collection.update_one.assert_called_once_with(
-            {"_id": "doc1", "is_locked": True},
-            {"$set": {"is_locked": False, "unlock_unix_timestamp": 0}}
+            {"_id": "doc1", "is_locked": True, "lock_owner": self.owner},
+            {"$set": {"is_locked": False, "unlock_unix_timestamp": 0}, "$unset": {"lock_owner": ""}}
         )
         self.assertTrue(result)
 
     def test_release_lock_failure(self):
-        """Test releasing a lock when no document is found."""
+        """Test releasing a lock that was taken over by another owner."""
         self.mock_collection.update_one.return_value.modified_count = 0
 
         result = self.lock_manager.release_lock("doc1")
@@ -109,8 +117,133 @@ class TestReleaseLock(unittest.TestCase):
         self.mock_collection.update_one.assert_called_once()
         self.assertFalse(result)
 
+    def test_release_lock_not_held(self):
+        """Test that a lock that is not held by this manager is not released."""
+        result = self.lock_manager.release_lock("doc2")
+
+        self.mock_collection.update_one.assert_not_called()
+        self.assertFalse(result)
+
     def test_release_lock_exception(self):
         self.mock_collection.update_one.side_effect = PyMongoError("Mocked error")
 
         with self.assertRaises(RuntimeError):
             self.lock_manager.release_lock("doc1")
+
+
+class TestOwnership(unittest.TestCase):
+    def setUp(self):
+        self.mock_collection = MagicMock()
+        self.lock_manager = MongoLockManager(self.mock_collection, lock_duration=300, renew_interval=0.01)
+
+    def test_acquire_lock_contended_duplicate_key(self):
+        """Test that the duplicate key error of a contended upsert means the lock is held elsewhere."""
+        self.mock_collection.update_one.side_effect = DuplicateKeyError("E11000")
+
+        self.assertFalse(self.lock_manager.acquire_lock("doc1"))
+
+    def test_acquire_lock_sets_new_owner(self):
+        """Test that every acquisition sets a new owner."""
+        self.mock_collection.update_one.return_value.modified_count = 1
+
+        self.lock_manager.acquire_lock("doc1")
+        self.lock_manager.release_lock("doc1")
+        self.lock_manager.acquire_lock("doc1")
+
+        acquisitions = [call for call in self.mock_collection.update_one.call_args_list if "$setOnInsert" in call[0][1]]
+        owners = [call[0][1]["$set"]["lock_owner"] for call in acquisitions]
+        self.assertEqual(len(set(owners)), 2)
+
+    def test_get_lock_filter(self):
+        """Test that the lock filter of a held lock matches its owner."""
+        self.mock_collection.update_one.return_value.modified_count = 1
+        self.lock_manager.acquire_lock("doc1")
+        owner = self.mock_collection.update_one.call_args[0][1]["$set"]["lock_owner"]
+
+        self.assertEqual(self.lock_manager.get_lock_filter("doc1"), {"_id": "doc1", "lock_owner": owner})
+        with self.assertRaises(RuntimeError):
+            self.lock_manager.get_lock_filter("doc2")
+
+    def test_heartbeat_renews_held_locks(self):
+        """Test that held locks are renewed for their owner until they are lost."""
+        renewed = threading.Event()
+
+        def update_one(query, update, **kwargs):
+            result = MagicMock(modified_count=1, matched_count=1)
+            if "$setOnInsert" not in update:
+                # Report the lock as lost on its first renewal, which stops the heartbeat
+                result.matched_count = 0
+                renewed.set()
+            return result
+        self.mock_collection.update_one.side_effect = update_one
+
+        self.lock_manager.acquire_lock("doc1")
+
+        self.assertTrue(renewed.wait(5))
+        self.lock_manager._heartbeat.join(5)
+        acquisition, renewal = [call[0] for call in self.mock_collection.update_one.call_args_list[:2]]
+        self.assertEqual(renewal[0]["lock_owner"], acquisition[1]["$set"]["lock_owner"])
+        self.assertIn("unlock_unix_timestamp", renewal[1]["$set"])
+        self.assertFalse(self.lock_manager.release_lock("doc1"))
+
+
+class TestBackoff(unittest.TestCase):
+    def setUp(self):
+        self.lock_manager = MongoLockManager(MagicMock(), lock_duration=300)
+
+    def test_backoff_is_bounded_and_grows(self):
+        """Test that the jittered backoff delay is capped and its bound doubles with each attempt."""
+        for attempt in range(20):
+            delay = self.lock_manager._get_backoff_delay(attempt)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(MongoLockContants.BACKOFF_MAX_DELAY_IN_SECONDS,
+                                            MongoLockContants.BACKOFF_BASE_DELAY_IN_SECONDS * 2 ** attempt))
+
+
+class TestLocalLocks(unittest.TestCase):
+    def test_local_contenders_queue_in_process(self):
+        """Test that only one local contender at a time competes for the stored lock."""
+        lock_manager = MongoLockManager(MagicMock(), lock_duration=300)
+        lock_manager.acquire_lock = MagicMock(return_value=True)
+        lock_manager._release_stored_lock = MagicMock(return_value=True)
+        self.assertTrue(lock_manager.wait("doc1"))
+
+        waiter = threading.Thread(target=lock_manager.wait, args=("doc1",), kwargs={"timeout": 5})
+        waiter.start()
+        time.sleep(0.1)
+
+        # The second contender has not polled the database while the first one holds the lock
+        self.assertEqual(lock_manager.acquire_lock.call_count, 1)
+        lock_manager.release_lock("doc1")
+        waiter.join(5)
+
+        self.assertFalse(waiter.is_alive())
+        self.assertEqual(lock_manager.acquire_lock.call_count, 2)
+        lock_manager.release_lock("doc1")
+        self.assertNotIn(lock_manager._get_local_key("doc1"), mongo_lock_manager._local_locks._locks)
+
+    def test_local_wait_timeout(self):
+        """Test that a local contender gives up once the timeout passes."""
+        lock_manager = MongoLockManager(MagicMock(), lock_duration=300)
+        lock_manager.acquire_lock = MagicMock(return_value=True)
+        lock_manager.wait("doc1")
+
+        result = []
+        waiter = threading.Thread(target=lambda: result.append(lock_manager.wait("doc1", timeout=0.1)))
+        waiter.start()
+        waiter.join(5)
+
+        self.assertEqual(result, [False])
+        self.assertEqual(lock_manager.acquire_lock.call_count, 1)
+        lock_manager.release_lock("doc1")
+        self.assertNotIn(lock_manager._get_local_key("doc1"), mongo_lock_manager._local_locks._locks)
+
+    def test_different_documents_do_not_block(self):
+        """Test that locks on different documents are independent in-process."""
+        lock_manager = MongoLockManager(MagicMock(), lock_duration=300)
+        lock_manager.acquire_lock = MagicMock(return_value=True)
+
+        self.assertTrue(lock_manager.wait("doc1", timeout=1))
+        self.assertTrue(lock_manager.wait("doc2", timeout=1))
+        lock_manager.release_lock("doc1")
+        lock_manager.release_lock("doc2")
@@ -0,0 +1,85 @@
+import unittest
+from unittest.mock import MagicMock
+
+from src.models.environment_config import ConfigurationValue, SharedCacheBackend, SharedCacheConfig
+from src.services import shared_cache
+from src.services.shared_cache import InMemorySharedCache, RedisSharedCache
+
+
+class TestInMemorySharedCache(unittest.TestCase):
+    def test_get_and_set(self):
+        """Test that stored values are returned, and missing keys are reported as None."""
+        cache = InMemorySharedCache()
+
+        cache.set("key", "value")
+
+        self.assertEqual(cache.get("key"), "value")
+        self.assertIsNone(cache.get("missing"))
+
+    def test_expired_values_are_dropped(self):
+        """Test that values are only kept for the TTL."""
+        cache = InMemorySharedCache(ttl_in_seconds=0)
+
+        cache.set("key", "value")
+
+        self.assertIsNone(cache.get("key"))
+
+
+class TestRedisSharedCache(unittest.TestCase):
+    def test_set_expires_values(self):
+        """Test that values are stored with the TTL of the cache."""
+        client = MagicMock()
+        cache = RedisSharedCache(client, ttl_in_seconds=60)
+
+        cache.set("key", "value")
+
+        client.set.assert_called_once_with("key", "value", ex=60)
+
+    def test_get(self):
+        """Test that values are read from Redis."""
+        client = MagicMock()
+        client.get.return_value = "value"
+
+        self.assertEqual(RedisSharedCache(client).get("key"), "value")
+        client.get.assert_called_once_with("key")
+
+
+class TestGetSharedCache(unittest.TestCase):
+    def setUp(self):
+        shared_cache._shared_cache = None
+
+    def tearDown(self):
+        shared_cache._shared_cache = None
+
+    def test_not_configured(self):
+        """Test that no shared cache is used unless configured."""
+        environment_config = MagicMock()
+        environment_config.shared_cache = None
+
+        self.assertIsNone(shared_cache.get_shared_cache(environment_config))
+
+    def test_memory_backend(self):
+        """Test that the in-memory backend is created once per process, with the configured TTL."""
+        environment_config = MagicMock()
+        environment_config.shared_cache = SharedCacheConfig(
+            backend=ConfigurationValue(value=SharedCacheBackend.MEMORY),
+            ttl_in_seconds=ConfigurationValue[int](value=60)
+        )
+
+        cache = shared_cache.get_shared_cache(environment_config)
+
+        self.assertIsInstance(cache, InMemorySharedCache)
+        self.assertEqual(cache.ttl_in_seconds, 60)
+        self.assertIs(shared_cache.get_shared_cache(environment_config), cache)
+
+    def test_redis_backend_requires_url(self):
+        """Test that the Redis backend cannot be used without a URL."""
+        environment_config = MagicMock()
+        environment_config.shared_cache = SharedCacheConfig()
+
+        with self.assertRaises(ValueError):
+            shared_cache.get_shared_cache(environment_config)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch
+from utils.async_utils import SingleFlight, run_blocking
+
+
+class TestRunBlocking(unittest.TestCase):
+    """Unit tests for running blocking I/O from async code."""
+
+    def test_runs_off_the_event_loop_thread(self):
+        """Test that the call runs on another thread and its arguments and result are passed through."""
+        def blocking_call(value, suffix=""):
+            return value + suffix, threading.get_ident()
+
+        async def run():
+            return await run_blocking(blocking_call, "value", suffix="-done"), threading.get_ident()
+
+        (result, call_thread), loop_thread = asyncio.run(run())
+
+        self.assertEqual(result, "value-done")
+        self.assertNotEqual(call_thread, loop_thread)
+
+    def test_runs_concurrently(self):
+        """Test that concurrent calls do not wait for each other."""
+        barrier = threading.Barrier(2, timeout=5)
+
+        async def run():
+            return await asyncio.gather(run_blocking(barrier.wait), run_blocking(barrier.wait))
+
+        self.assertEqual(sorted(asyncio.run(run())), [0, 1])
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Unit tests for coalescing concurrent calls."""
+
+    def test_concurrent_calls_share_one_call(self):
+        """Test that callers of the same key wait for a single call and share its result."""
+        single_flight = SingleFlight()
+        calls = []
+
+        async def load(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return f"{key}-result"
+
+        async def run():
+            return await asyncio.gather(*[
+                single_flight.run(key, lambda key=key: load(key)) for key in ["a", "a", "a", "b"]
+            ])
+
+        self.assertEqual(asyncio.run(run()), ["a-result", "a-result", "a-result", "b-result"])
+        self.assertEqual(sorted(calls), ["a", "b"])
+
+    def test_calls_are_shared_across_event_loops(self):
+        """Test that callers on other threads, each running its own event loop, share the call."""
+        single_flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        async def load():
+            calls.append(threading.get_ident())
+            started.set()
+            await run_blocking(release.wait, 5)
+            return "result"
+
+        following = threading.Event()
+        wrap_future = asyncio.wrap_future
+
+        def follow(call, **kwargs):
+            following.set()
+            return wrap_future(call, **kwargs)
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(asyncio.run(single_flight.run("key", load))))
+        leader.start()
+        started.wait(5)
+        with patch("utils.async_utils.asyncio.wrap_future", side_effect=follow):
+            follower = threading.Thread(target=lambda: results.append(asyncio.run(single_flight.run("key", load))))
+            follower.start()
+            # Released only once the follower waits for the call, or it would start a call of its own
+            following.wait(5)
+            release.set()
+            leader.join(5)
+            follower.join(5)
+
+        self.assertEqual(results, ["result", "result"])
+        self.assertEqual(len(calls), 1)
+
+    def test_errors_are_raised_to_every_caller(self):
+        """Test that a failed call fails its waiters, and the next call runs again."""
+        single_flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("failed")
+
+        async def run():
+            return await asyncio.gather(
+                single_flight.run("key", fail),
+                single_flight.run("key", fail),
+                return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual(asyncio.run(single_flight.run("key", lambda: asyncio.sleep(0, "retried"))), "retried")
+
+    def test_waiters_start_again_when_the_caller_is_cancelled(self):
+        """Test that cancelling the caller that started a call does not cancel the callers waiting for it."""
+        single_flight = SingleFlight()
+        calls = []
+
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        async def run():
+            leader = asyncio.ensure_future(single_flight.run("key", load))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(single_flight.run("key", load))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower
+
+        self.assertEqual(asyncio.run(run()), "result")
+        self.assertEqual(len(calls), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
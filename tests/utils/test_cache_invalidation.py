@@ -0,0 +1,44 @@
+import unittest
+from unittest.mock import MagicMock
+from utils.cache_invalidation import InvalidationSource, invalidate, register_invalidation_handler, _handlers
+
+
+class TestCacheInvalidation(unittest.TestCase):
+    """Unit tests for the cache invalidation registry."""
+
+    def setUp(self):
+        self.handler = MagicMock()
+        register_invalidation_handler(InvalidationSource.COLLECTION_DOCUMENTS, self.handler)
+
+    def tearDown(self):
+        _handlers[InvalidationSource.COLLECTION_DOCUMENTS].remove(self.handler)
+
+    def test_invalidate_calls_handlers_of_source(self):
+        """Test that only the handlers registered for the changed source are called."""
+        invalidate(InvalidationSource.COLLECTION_DOCUMENTS, {"_id": "doc"})
+        invalidate(InvalidationSource.CONFIGURATIONS, {"_id": "config"})
+
+        self.handler.assert_called_once_with({"_id": "doc"})
+
+    def test_register_handler_once(self):
+        """Test that registering the same handler twice does not call it twice."""
+        register_invalidation_handler(InvalidationSource.COLLECTION_DOCUMENTS, self.handler)
+
+        invalidate(InvalidationSource.COLLECTION_DOCUMENTS, {"_id": "doc"})
+
+        self.handler.assert_called_once()
+
+    def test_failing_handler_does_not_stop_others(self):
+        """Test that an exception in one handler is logged and the next handler still runs."""
+        failing_handler = MagicMock(side_effect=Exception("boom"))
+        _handlers[InvalidationSource.COLLECTION_DOCUMENTS].insert(0, failing_handler)
+        try:
+            invalidate(InvalidationSource.COLLECTION_DOCUMENTS, {"_id": "doc"})
+        finally:
+            _handlers[InvalidationSource.COLLECTION_DOCUMENTS].remove(failing_handler)
+
+        self.handler.assert_called_once_with({"_id": "doc"})
+
+
+if __name__ == '__main__':
+    unittest.main()
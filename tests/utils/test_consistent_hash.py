@@ -0,0 +1,45 @@
+import unittest
+from collections import Counter
+from utils.consistent_hash import ConsistentHashRing
+
+
+class TestConsistentHashRing(unittest.TestCase):
+    """Unit tests for the consistent hash ring."""
+
+    def setUp(self):
+        self.keys = [f"collection-{index}" for index in range(2000)]
+
+    def test_get_node_is_stable(self):
+        """Test that a key always maps to the same node, including across ring instances."""
+        ring = ConsistentHashRing(["0", "1", "2"])
+        other_ring = ConsistentHashRing(["2", "0", "1"])
+
+        for key in self.keys[:100]:
+            self.assertEqual(ring.get_node(key), other_ring.get_node(key))
+
+    def test_keys_are_spread_over_nodes(self):
+        """Test that every node receives a fair share of the keys."""
+        ring = ConsistentHashRing([str(node) for node in range(8)])
+
+        counts = Counter(ring.get_node(key) for key in self.keys)
+
+        self.assertEqual(len(counts), 8)
+        self.assertGreater(min(counts.values()), len(self.keys) / 8 / 2)
+
+    def test_adding_a_node_only_moves_its_keys(self):
+        """Test that keys only move to the added node."""
+        ring = ConsistentHashRing([str(node) for node in range(4)])
+        grown_ring = ConsistentHashRing([str(node) for node in range(5)])
+
+        moved = [key for key in self.keys if ring.get_node(key) != grown_ring.get_node(key)]
+
+        self.assertTrue(all(grown_ring.get_node(key) == "4" for key in moved))
+        self.assertLess(len(moved), len(self.keys) / 2)
+
+    def test_requires_nodes(self):
+        with self.assertRaises(ValueError):
+            ConsistentHashRing([])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+
+from src.utils.download_manifest import DownloadManifest
+
+
+class TestDownloadManifest(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.output_file = os.path.join(self.output_dir, "a.pdf")
+        with open(self.output_file, "wb") as f:
+            f.write(b"12345")
+
+    def test_records_persist_across_instances(self):
+        with DownloadManifest(self.output_dir) as manifest:
+            manifest.record("a.pdf", "etag", 5, complete=False)
+            manifest.record("a.pdf", "etag", 5, complete=True)
+
+        manifest = DownloadManifest(self.output_dir)
+
+        self.assertEqual(manifest.get("a.pdf"), {"name": "a.pdf", "etag": "etag", "size": 5, "complete": True})
+        self.assertTrue(manifest.is_complete("a.pdf", "etag", 5, self.output_file))
+
+    def test_is_complete_requires_matching_blob_and_file(self):
+        with DownloadManifest(self.output_dir) as manifest:
+            manifest.record("a.pdf", "etag", 5, complete=True)
+
+            self.assertFalse(manifest.is_complete("a.pdf", "other-etag", 5, self.output_file))
+            self.assertFalse(manifest.is_complete("a.pdf", "etag", 6, self.output_file))
+            self.assertFalse(manifest.is_complete("a.pdf", "etag", 5, self.output_file + ".missing"))
+            self.assertFalse(manifest.is_complete("b.pdf", "etag", 5, self.output_file))
+
+    def test_ignores_line_cut_short_by_interruption(self):
+        with open(os.path.join(self.output_dir, DownloadManifest.FILE_NAME), "w") as f:
+            f.write('{"name": "a.pdf", "etag": "etag", "size": 5, "complete": true}\n{"name": "b.p')
+
+        with DownloadManifest(self.output_dir) as manifest:
+            self.assertIsNone(manifest.get("b.pdf"))
+            manifest.record("b.pdf", "etag", 5, complete=True)
+
+        manifest = DownloadManifest(self.output_dir)
+        self.assertTrue(manifest.get("a.pdf")["complete"])
+        self.assertTrue(manifest.get("b.pdf")["complete"])
+
+
+if __name__ == '__main__':
+    unittest.main()
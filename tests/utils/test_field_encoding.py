@@ -0,0 +1,85 @@
+import unittest
+from bson import Binary
+from utils.field_encoding import decode_source, decode_spans, encode_source, encode_spans, encode_stored_fields
+
+
+class TestFieldEncoding(unittest.TestCase):
+    """Unit tests for the compact encoding of field sources and spans."""
+
+    def test_source_round_trip(self):
+        """Test that sources in the formats reported by Content Understanding decode to the same string."""
+        sources = [
+            "D(1,1.0000,2.5000,3.0000,2.5000,3.0000,4.0000,1.0000,4.0000)",
+            "D(1,0.5,1.25,7.501,1.25,7.501,2,0.5,2)",
+            "D(2,1,2,3,4,5,6,7,8);D(3,0.1234,0.5,0.75,0.5,0.75,0.9,0.1234,0.9)",
+        ]
+        for source in sources:
+            with self.subTest(source=source):
+                packed = encode_source(source)
+                self.assertIsNotNone(packed)
+                self.assertEqual(decode_source(packed), source)
+
+    def test_source_is_smaller_than_string(self):
+        """Test that a packed polygon takes less space than its string."""
+        source = "D(1,1.0123,2.5456,3.0789,2.5456,3.0789,4.0123,1.0123,4.0123)"
+
+        self.assertLess(len(encode_source(source)), len(source))
+
+    def test_source_not_encoded_when_lossy(self):
+        """Test that sources which would not decode to the same string are left unencoded."""
+        sources = [
+            "D(1,0.123456,1,2,1,2,2,0.123456,2)",
+            "D(1,1.5,2.50,3,4)",
+            "not a source",
+            "D(1,)",
+            "D(70000,1,2,3,4)",
+        ]
+        for source in sources:
+            with self.subTest(source=source):
+                self.assertIsNone(encode_source(source))
+
+    def test_spans_round_trip(self):
+        """Test that spans decode to the same offsets and lengths."""
+        spans = [{"offset": 0, "length": 12}, {"offset": 1024, "length": 3}]
+
+        self.assertEqual(decode_spans(encode_spans(spans)), spans)
+
+    def test_spans_not_encoded_with_other_keys(self):
+        """Test that spans with other keys or values are left unencoded."""
+        self.assertIsNone(encode_spans([{"offset": 0, "length": 1, "page": 2}]))
+        self.assertIsNone(encode_spans([{"offset": -1, "length": 1}]))
+        self.assertIsNone(encode_spans([{"offset": 1.5, "length": 1}]))
+
+    def test_encode_stored_fields_nested(self):
+        """Test that sources and spans of array items and object properties are packed as well."""
+        source = "D(1,1,2,3,4,5,6,7,8)"
+        fields = {
+            "field1": [
+                {
+                    "valueString": "value",
+                    "source": source,
+                    "spans": [{"offset": 0, "length": 5}],
+                },
+                {
+                    "valueArray": [
+                        {
+                            "valueObject": {
+                                "name": {"valueString": "name", "source": source, "spans": []}
+                            }
+                        }
+                    ]
+                }
+            ]
+        }
+
+        encode_stored_fields(fields)
+
+        self.assertIsInstance(fields["field1"][0]["source"], Binary)
+        self.assertIsInstance(fields["field1"][0]["spans"], Binary)
+        nested = fields["field1"][1]["valueArray"][0]["valueObject"]["name"]
+        self.assertEqual(decode_source(nested["source"]), source)
+        self.assertEqual(nested["spans"], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
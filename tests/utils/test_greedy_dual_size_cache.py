@@ -0,0 +1,106 @@
+import unittest
+
+from src.utils.greedy_dual_size_cache import GreedyDualSizeCache
+
+
+class TestGreedyDualSizeCache(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.cache = GreedyDualSizeCache(maxsize=10, getsizeof=len, ttl=60, timer=lambda: self.now)
+
+    def test_size_budget(self):
+        """Test that the cache holds values up to their total size, whatever their number."""
+        self.cache["a"] = "xxx"
+        self.cache["b"] = "xxxx"
+
+        self.assertEqual(self.cache.currsize, 7)
+        self.assertEqual(len(self.cache), 2)
+
+        self.cache["b"] = "xx"
+
+        self.assertEqual(self.cache.currsize, 5)
+        self.assertEqual(self.cache.evictions, 0)
+
+    def test_large_cheap_values_are_evicted_first(self):
+        """Test that the entry with the lowest cost per size is evicted to make room."""
+        self.cache.set("large", "xxxxxx", cost=1)
+        self.cache.set("small", "xx", cost=1)
+
+        self.cache.set("new", "xxx", cost=1)
+
+        self.assertNotIn("large", self.cache)
+        self.assertIn("small", self.cache)
+        self.assertEqual(self.cache.currsize, 5)
+        self.assertEqual(self.cache.evictions, 1)
+
+    def test_expensive_values_are_kept(self):
+        """Test that a large value that is expensive to produce outlives cheaper ones."""
+        self.cache.set("large", "xxxxxx", cost=100)
+        self.cache.set("small", "xx", cost=1)
+
+        self.cache.set("new", "xxx", cost=1)
+
+        self.assertIn("large", self.cache)
+        self.assertNotIn("small", self.cache)
+
+    def test_entries_that_are_not_read_age(self):
+        """Test that evictions raise the priority of later entries, so unread entries are evicted in turn."""
+        self.cache.set("old", "xxxx", cost=4)
+        self.cache.set("a", "xxxx", cost=1)
+        self.cache.set("b", "xxxx", cost=1)
+        self.cache.set("c", "xxxx", cost=1)
+        self.assertIn("old", self.cache)
+
+        self.cache.set("d", "xxxx", cost=1)
+        self.cache.set("e", "xxxx", cost=1)
+
+        self.assertNotIn("old", self.cache)
+
+    def test_hits_refresh_priority(self):
+        """Test that reading an entry protects it from being evicted before unread ones."""
+        self.cache.set("a", "xxxx", cost=1)
+        self.cache.set("b", "xxxx", cost=1)
+        self.cache.set("c", "xx", cost=0.1)
+        self.cache.set("d", "xx", cost=0.1)
+
+        self.assertEqual(self.cache["a"], "xxxx")
+        self.cache.set("e", "xxxx", cost=1)
+
+        self.assertIn("a", self.cache)
+        self.assertNotIn("c", self.cache)
+
+    def test_values_larger_than_budget_are_not_cached(self):
+        """Test that a value larger than the whole budget does not evict everything else."""
+        self.cache["a"] = "xxx"
+
+        self.cache["huge"] = "x" * 11
+
+        self.assertNotIn("huge", self.cache)
+        self.assertIn("a", self.cache)
+
+    def test_entries_expire(self):
+        """Test that entries are dropped after the TTL."""
+        self.cache["a"] = "xxx"
+
+        self.now = 60
+
+        self.assertNotIn("a", self.cache)
+        with self.assertRaises(KeyError):
+            self.cache["a"]
+        self.assertEqual(self.cache.currsize, 0)
+
+    def test_clear_and_pop(self):
+        """Test that removed entries free their size without counting as evictions."""
+        self.cache["a"] = "xxx"
+        self.cache["b"] = "xxx"
+
+        self.assertEqual(self.cache.pop("a"), "xxx")
+        self.assertIsNone(self.cache.pop("a", None))
+        self.cache.clear()
+
+        self.assertEqual(self.cache.currsize, 0)
+        self.assertEqual(self.cache.evictions, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
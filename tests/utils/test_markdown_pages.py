@@ -0,0 +1,70 @@
+import gzip
+import unittest
+
+from src.utils.markdown_pages import MarkdownPageIndex, encode_paged_markdown, get_page_offsets
+
+
+def _content(markdown: str, pages: list[tuple[int, int]]) -> dict:
+    return {
+        "markdown": markdown,
+        "pages": [{"pageNumber": page, "spans": [{"offset": offset, "length": 1}]} for page, offset in pages]
+    }
+
+
+class TestGetPageOffsets(unittest.TestCase):
+    def test_single_content(self):
+        contents = [_content("page one\npage two", [(1, 0), (2, 9)])]
+
+        self.assertEqual(get_page_offsets(contents), {1: 0, 2: 9})
+
+    def test_joined_contents_are_offset(self):
+        contents = [_content("first", [(1, 0)]), _content("second", [(2, 0), (3, 3)])]
+
+        self.assertEqual(get_page_offsets(contents, " "), {1: 0, 2: 6, 3: 9})
+
+    def test_pages_without_spans_are_skipped(self):
+        contents = [{"markdown": "text", "pages": [{"pageNumber": 1, "spans": []}, {"pageNumber": 2}]}]
+
+        self.assertEqual(get_page_offsets(contents), {})
+
+
+class TestEncodePagedMarkdown(unittest.TestCase):
+    def test_small_markdown_is_stored_as_plain_segments(self):
+        markdown = "cover\npage one\npage two"
+
+        paged_markdown = encode_paged_markdown(markdown, {1: 6, 2: 15})
+
+        self.assertEqual(paged_markdown.index.encoding, "identity")
+        self.assertEqual(paged_markdown.data.decode("utf-8"), markdown)
+        self.assertEqual(paged_markdown.index.pages, [(1, 0, 15), (2, 15, 8)])
+
+    def test_large_markdown_is_compressed_per_page(self):
+        pages = [f"## Page {page}\n" + "The tenant shall pay the rent. " * 50 for page in range(1, 4)]
+        markdown = "".join(pages)
+        offsets = {page: sum(len(text) for text in pages[:page - 1]) for page in range(1, 4)}
+
+        paged_markdown = encode_paged_markdown(markdown, offsets)
+
+        index = paged_markdown.index
+        self.assertEqual(index.encoding, "gzip")
+        self.assertLess(len(paged_markdown.data), len(markdown))
+        # The page segments decode on their own, and together as a single gzip stream
+        self.assertEqual(gzip.decompress(paged_markdown.data).decode("utf-8"), markdown)
+        for page, offset, length in index.pages:
+            self.assertEqual(index.decode_segment(paged_markdown.data[offset:offset + length]), pages[page - 1])
+
+    def test_no_pages(self):
+        self.assertIsNone(encode_paged_markdown("markdown", {}))
+
+
+class TestMarkdownPageIndex(unittest.TestCase):
+    def test_get_ranges_merges_adjacent_pages(self):
+        index = MarkdownPageIndex(pages=[(1, 0, 10), (2, 10, 5), (3, 15, 5), (4, 20, 5)])
+
+        runs = index.get_ranges([4, 1, 2, 7])
+
+        self.assertEqual(runs, [[(1, 0, 10), (2, 10, 5)], [(4, 20, 5)]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+from utils import token_counter
+from utils.token_counter import TokenCounter, get_token_counter
+
+
+class TestTokenCounter(unittest.TestCase):
+    def test_tokens_are_approximated_without_tiktoken(self):
+        """Test that tokens are approximated from the number of characters when tiktoken is not installed."""
+        with patch.dict(sys.modules, {"tiktoken": None}):
+            counter = TokenCounter("gpt-4o")
+
+            self.assertEqual(counter.count("a" * 10), 4)
+            self.assertFalse(counter.is_exact)
+
+    def test_tokens_are_counted_with_the_model_encoding(self):
+        """Test that the encoding of the model is used, and loaded once."""
+        mock_tiktoken = MagicMock()
+        mock_tiktoken.encoding_for_model.return_value.encode.return_value = [1, 2, 3]
+
+        with patch.dict(sys.modules, {"tiktoken": mock_tiktoken}):
+            counter = TokenCounter("gpt-4o")
+
+            self.assertEqual(counter.count("some text"), 3)
+            self.assertEqual(counter.count("more text"), 3)
+            self.assertTrue(counter.is_exact)
+
+        mock_tiktoken.encoding_for_model.assert_called_once_with("gpt-4o")
+        mock_tiktoken.encoding_for_model.return_value.encode.assert_called_with("more text", disallowed_special=())
+
+    def test_unknown_models_use_the_default_encoding(self):
+        """Test that models tiktoken does not know use the default encoding."""
+        mock_tiktoken = MagicMock()
+        mock_tiktoken.encoding_for_model.side_effect = KeyError("unknown-model")
+        mock_tiktoken.get_encoding.return_value.encode.return_value = [1]
+
+        with patch.dict(sys.modules, {"tiktoken": mock_tiktoken}):
+            self.assertEqual(TokenCounter("unknown-model").count("text"), 1)
+
+        mock_tiktoken.get_encoding.assert_called_once_with("o200k_base")
+
+    def test_tokens_are_approximated_when_the_encoding_cannot_be_loaded(self):
+        """Test that a failure to download the encoding falls back to the approximation."""
+        mock_tiktoken = MagicMock()
+        mock_tiktoken.encoding_for_model.side_effect = ConnectionError("offline")
+
+        with patch.dict(sys.modules, {"tiktoken": mock_tiktoken}):
+            self.assertEqual(TokenCounter("gpt-4o").count("abcdef"), 2)
+
+
+class TestGetTokenCounter(unittest.TestCase):
+    def tearDown(self):
+        token_counter._token_counters.clear()
+
+    def test_token_counters_are_shared_by_model(self):
+        """Test that a single token counter is created per model."""
+        self.assertIs(get_token_counter("gpt-4o"), get_token_counter("gpt-4o"))
+        self.assertIsNot(get_token_counter("gpt-4o"), get_token_counter("gpt-4.1"))
+
+
+if __name__ == '__main__':
+    unittest.main()